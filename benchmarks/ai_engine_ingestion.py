@@ -0,0 +1,159 @@
+"""
+AI Engine Ingestion Benchmark - Events per Second
+Compares the old LPOP-per-event loop of AIEngineServer with batched
+XREADGROUP consumption, concurrent scoring and per-batch pipelined writes,
+against an in-process Redis stand-in (fakeredis)
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import fakeredis
+
+from src.ai.ai_engine_server import AIEngineServer
+from src.pipeline.message_queue import MessageQueueManager, StreamName
+
+logging.getLogger('src.ai.ai_engine_server').setLevel(logging.ERROR)
+logging.getLogger('src.pipeline.message_queue').setLevel(logging.ERROR)
+
+
+class CountingRedis(fakeredis.aioredis.FakeRedis):
+    """Async fake client counting commands sent (a pipeline counts once)"""
+    round_trips = 0
+
+    async def execute_command(self, *args, **options):
+        CountingRedis.round_trips += 1
+        return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        CountingRedis.round_trips += 1
+        return fakeredis.aioredis.FakeRedis.pipeline(self, transaction, shard_hint)
+
+
+class AIEngineIngestionBenchmark:
+    """Measure attack event ingestion throughput of AIEngineServer"""
+
+    def __init__(self, events=5000, model_latency=0.002):
+        self.events = events
+        self.model_latency = model_latency
+        self.payloads = [
+            {
+                'event_type': 'attack',
+                'attacker_ip': f"185.220.{i % 256}.{(i * 7) % 254 + 1}",
+                'service': 'SSH',
+                'action': 'brute_force',
+                'details': {'username': 'root', 'attempt': i},
+            }
+            for i in range(events)
+        ]
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'events': events,
+            'model_latency_ms': model_latency * 1000,
+            'tests': []
+        }
+
+    async def _score(self, event):
+        # Stand-in for model inference awaiting an executor or a model server
+        await asyncio.sleep(self.model_latency)
+        return 0.5
+
+    def _engine(self, server):
+        engine = AIEngineServer(consumer_name='benchmark', batch_size=100, block_ms=10)
+        engine.redis_client = CountingRedis(server=server, decode_responses=True)
+        engine.stream_client = CountingRedis(server=server)
+        engine.score_attack_event = self._score
+        return engine
+
+    def _record(self, name, elapsed):
+        rate = self.events / elapsed if elapsed > 0 else 0.0
+        self.results['tests'].append({
+            'name': name,
+            'seconds': round(elapsed, 3),
+            'events_per_sec': round(rate, 1),
+            'round_trips': CountingRedis.round_trips,
+        })
+        print(f"  ✅ {name}: {self.events} events in {elapsed:.2f}s ({CountingRedis.round_trips} round-trips)")
+        print(f"  🚀 Throughput: {rate:,.0f} events/sec")
+        return rate
+
+    def benchmark_lpop(self):
+        """Previous path: LPOP one event, score it, three writes, repeat"""
+        print("\nTest 1: LPOP per event (before)")
+        server = fakeredis.FakeServer()
+        producer = fakeredis.FakeRedis(server=server)
+        producer.rpush('attack_queue', *[json.dumps(p) for p in self.payloads])
+        engine = self._engine(server)
+        client = engine.redis_client
+
+        async def drain():
+            while True:
+                data = await client.lpop('attack_queue')
+                if not data:
+                    return
+                event = json.loads(data)
+                await self._score(event)
+                key = f"threat:{event['attacker_ip']}"
+                await client.hincrby(key, 'count', 1)
+                await client.hset(key, 'last_seen', datetime.utcnow().isoformat())
+                await client.expire(key, 86400)
+
+        CountingRedis.round_trips = 0
+        start = time.perf_counter()
+        asyncio.run(drain())
+        return self._record('lpop', time.perf_counter() - start)
+
+    def benchmark_streams(self):
+        """Batched XREADGROUP, concurrent scoring, pipelined writes and acks"""
+        print("\nTest 2: XREADGROUP batches of 100 (after)")
+        server = fakeredis.FakeServer()
+        queue = MessageQueueManager(producer_id='benchmark')
+        queue._redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+        queue.publish_many(StreamName.ATTACK_EVENTS, self.payloads)
+        engine = self._engine(server)
+
+        async def drain():
+            await engine.ensure_groups()
+            while True:
+                messages = await engine.read_batch()
+                if not messages:
+                    return
+                await engine.process_batch(messages)
+
+        CountingRedis.round_trips = 0
+        start = time.perf_counter()
+        asyncio.run(drain())
+        elapsed = time.perf_counter() - start
+        assert engine.attack_count == self.events
+        return self._record('xreadgroup', elapsed)
+
+    def run(self):
+        print("=" * 70)
+        print("🧠 AI ENGINE INGESTION BENCHMARK")
+        print("=" * 70)
+        before = self.benchmark_lpop()
+        after = self.benchmark_streams()
+
+        speedup = after / before if before else 0.0
+        self.results['speedup'] = round(speedup, 1)
+        print(f"\n📈 Ingestion speedup: {speedup:.1f}x")
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"ai_engine_ingestion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    AIEngineIngestionBenchmark(events).run()
@@ -0,0 +1,117 @@
+"""
+Case Export Benchmark - Streaming Tar with Parallel Compression
+Compares the old single-threaded tarfile 'w:gz' export with
+EvidenceCollector.stream_case on block-parallel gzip and multithreaded zstd
+"""
+
+import json
+import logging
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.forensics.archive_writer import ZSTD_AVAILABLE
+from src.forensics.evidence_collector import EvidenceCollector
+
+logging.getLogger('src.forensics.evidence_collector').setLevel(logging.WARNING)
+
+
+class CaseExportBenchmark:
+    """Measure export throughput per compressor and thread count"""
+
+    def __init__(self, total_mb=256, files=8):
+        self.total_mb = total_mb
+        self.files = files
+        self.workdir = Path(tempfile.mkdtemp(prefix='export_bench_'))
+        self.collector = EvidenceCollector(evidence_base_path=str(self.workdir / 'evidence'))
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'cpu_count': os.cpu_count(),
+            'total_mb': total_mb,
+            'tests': []
+        }
+
+    def _build_case(self):
+        case = self.collector.create_case("Benchmark", "bench", "export", "intrusion_attempt")
+        case_dir = self.collector.evidence_path / case.case_id
+        case_dir.mkdir(parents=True, exist_ok=True)
+        # سجلات honeypot: نص قابل للضغط مع أجزاء عشوائية، بدورة 16MB تتجاوز نافذة zstd
+        chunk = bytearray()
+        for i in range(200000):
+            chunk += (f"2026-10-16T12:{i % 60:02d}:00 sshd[{i}]: Failed password for root from "
+                      f"45.155.{i % 256}.{(i * 7) % 256} port {40000 + i}\n").encode()
+            if i % 64 == 0:
+                chunk += os.urandom(256).hex().encode() + b"\n"
+        per_file = self.total_mb * 1024 * 1024 // self.files
+        for n in range(self.files):
+            with open(case_dir / f"container_logs_{n}.log", 'wb') as f:
+                written = 0
+                while written < per_file:
+                    f.write(chunk)
+                    written += len(chunk)
+        return case.case_id
+
+    def _record(self, label, elapsed, size):
+        row = {'label': label, 'seconds': round(elapsed, 2),
+               'mb_per_sec': round(self.total_mb / elapsed, 1),
+               'archive_mb': round(size / 1024 / 1024, 1)}
+        self.results['tests'].append(row)
+        print(f"  {label:28s} {row['mb_per_sec']:8.1f} MB/s   archive {row['archive_mb']:7.1f} MB")
+        return row
+
+    def benchmark_legacy(self, case_id):
+        path = self.workdir / 'legacy.tar.gz'
+        start = time.perf_counter()
+        with tarfile.open(path, 'w:gz') as tar:
+            for file_path in (self.collector.evidence_path / case_id).glob('*'):
+                tar.add(file_path, arcname=f"{case_id}/{file_path.name}")
+        return self._record('tarfile w:gz (before)', time.perf_counter() - start, path.stat().st_size)
+
+    def benchmark_stream(self, case_id, compression, workers):
+        path = self.workdir / f"stream.{compression}"
+        start = time.perf_counter()
+        with open(path, 'wb') as sink:
+            self.collector.stream_case(case_id, sink, compression=compression, workers=workers)
+        return self._record(f"stream_case {compression} x{workers}", time.perf_counter() - start,
+                            path.stat().st_size)
+
+    def run(self):
+        print("=" * 70)
+        print("📦 CASE EXPORT BENCHMARK")
+        print("=" * 70)
+        print(f"🖥️  CPUs: {os.cpu_count()}   📁 {self.total_mb} MB in {self.files} files")
+        try:
+            case_id = self._build_case()
+            before = self.benchmark_legacy(case_id)
+            best = None
+            compressions = ['gzip'] + (['zstd'] if ZSTD_AVAILABLE else [])
+            for compression in compressions:
+                for workers in sorted({1, os.cpu_count() or 1, 4}):
+                    row = self.benchmark_stream(case_id, compression, workers)
+                    if best is None or row['seconds'] < best['seconds']:
+                        best = row
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        self.results['speedup'] = round(before['seconds'] / best['seconds'], 1)
+        print(f"\n📈 Best: {best['label']} - {self.results['speedup']}x faster than tarfile w:gz")
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"case_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    total_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    CaseExportBenchmark(total_mb).run()
@@ -0,0 +1,140 @@
+"""
+Honeypot Persistence Benchmark - Inserts per Second
+Compares the legacy connect-per-row pattern with the pooled batch writer
+
+Requires a reachable PostgreSQL (POSTGRES_* environment variables).
+Rows are written to agent_decisions tagged with strategy='benchmark'
+and deleted afterwards; point it at a scratch database when possible.
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import psycopg2
+
+# honeypot modules run as scripts from their own directory
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src' / 'honeypots'))
+
+from persistence import DECISION, PersistenceConfig, PgBatchWriter
+
+DB = {
+    'host': os.getenv('POSTGRES_HOST', 'localhost'),
+    'database': os.getenv('POSTGRES_DB', 'cyber_mirage'),
+    'user': os.getenv('POSTGRES_USER', 'cybermirage'),
+    'password': os.getenv('POSTGRES_PASSWORD', 'SecurePass123!'),
+}
+MARKER = 'benchmark'
+
+
+class PersistenceBenchmark:
+    """Measure agent_decisions insert throughput"""
+
+    def __init__(self, rows=2000):
+        self.rows = rows
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'rows': rows,
+            'tests': []
+        }
+
+    def _row(self):
+        return (str(uuid.uuid4()), str(uuid.uuid4()), 'maintain', MARKER, 1.0, '{}')
+
+    def _ensure_table(self):
+        conn = psycopg2.connect(**DB)
+        cur = conn.cursor()
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS agent_decisions (
+                id UUID PRIMARY KEY, session_id UUID, action VARCHAR(64),
+                strategy VARCHAR(128), reward DOUBLE PRECISION, state JSONB,
+                created_at TIMESTAMP DEFAULT NOW()
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _cleanup(self):
+        conn = psycopg2.connect(**DB)
+        cur = conn.cursor()
+        cur.execute("DELETE FROM agent_decisions WHERE strategy = %s", (MARKER,))
+        conn.commit()
+        conn.close()
+
+    def _record(self, name, elapsed):
+        rate = self.rows / elapsed if elapsed > 0 else 0.0
+        self.results['tests'].append({
+            'name': name,
+            'seconds': round(elapsed, 3),
+            'inserts_per_sec': round(rate, 1),
+        })
+        print(f"  ✅ {name}: {self.rows} rows in {elapsed:.2f}s")
+        print(f"  🚀 Throughput: {rate:,.0f} inserts/sec")
+        return rate
+
+    def benchmark_connect_per_row(self):
+        """Legacy pattern: psycopg2.connect + INSERT + commit for every row"""
+        print("\nTest 1: connect-per-row (before)")
+        start = time.perf_counter()
+        for _ in range(self.rows):
+            conn = psycopg2.connect(**DB)
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO agent_decisions (id, session_id, action, strategy, reward, state) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                self._row(),
+            )
+            conn.commit()
+            cur.close()
+            conn.close()
+        return self._record('connect_per_row', time.perf_counter() - start)
+
+    def benchmark_batch_writer(self):
+        """PgBatchWriter: pooled connection, execute_values every N ms / N rows"""
+        print("\nTest 2: pooled batch writer (after)")
+        writer = PgBatchWriter(PersistenceConfig(
+            host=DB['host'], database=DB['database'], user=DB['user'], password=DB['password'],
+            spill_path=str(Path('data/benchmarks/persistence_spill.jsonl')),
+        ))
+        start = time.perf_counter()
+        for _ in range(self.rows):
+            writer.submit(DECISION, self._row())
+        while writer.stats['rows_written'] + writer.stats['rows_spilled'] < self.rows:
+            time.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        writer.stop()
+        if writer.stats['rows_spilled']:
+            print(f"  ⚠️  {writer.stats['rows_spilled']} rows spilled (PostgreSQL unavailable?)")
+        return self._record('batch_writer', elapsed)
+
+    def run(self):
+        print("=" * 70)
+        print("🗃️  HONEYPOT PERSISTENCE BENCHMARK")
+        print("=" * 70)
+        self._ensure_table()
+        try:
+            before = self.benchmark_connect_per_row()
+            after = self.benchmark_batch_writer()
+        finally:
+            self._cleanup()
+
+        speedup = after / before if before else 0.0
+        self.results['speedup'] = round(speedup, 1)
+        print(f"\n📈 Speedup: {speedup:.1f}x")
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"persistence_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    PersistenceBenchmark(rows).run()
@@ -0,0 +1,142 @@
+"""
+Evidence Hashing Benchmark - Streaming Multi-Hash and Case Verification
+Compares the old read-everything-then-hash-three-times integrity check with
+the single-pass streaming hash_file, and sequential vs process-parallel
+EvidenceCollector.verify_case
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.forensics.evidence_collector as evidence_module
+from src.forensics.evidence_collector import EvidenceCollector, hash_file
+
+logging.getLogger('src.forensics.evidence_collector').setLevel(logging.WARNING)
+
+
+def legacy_hashes(path):
+    """Previous verify_evidence path: whole file in memory, three passes"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return {
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "sha512": hashlib.sha512(data).hexdigest()
+    }
+
+
+class EvidenceHashingBenchmark:
+    """Measure hashing throughput, peak memory and case verification time"""
+
+    def __init__(self, size_mb=256, items=8, item_mb=32):
+        self.size_mb = size_mb
+        self.items = items
+        self.item_mb = item_mb
+        self.workdir = Path(tempfile.mkdtemp(prefix='hash_bench_'))
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'cpu_count': os.cpu_count(),
+            'tests': {}
+        }
+
+    def _write(self, path, size_mb):
+        block = os.urandom(1024 * 1024)
+        with open(path, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(block)
+        return path
+
+    def _measure(self, func, path):
+        tracemalloc.start()
+        start = time.perf_counter()
+        hashes = func(path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return hashes, elapsed, peak
+
+    def benchmark_single_file(self):
+        print(f"\nSingle file: {self.size_mb} MB")
+        path = self._write(self.workdir / 'capture.pcap', self.size_mb)
+        rows = {}
+        for label, func in (('legacy (before)', legacy_hashes), ('streaming (after)', hash_file)):
+            hashes, elapsed, peak = self._measure(func, str(path))
+            rows[label] = {
+                'seconds': round(elapsed, 3),
+                'mb_per_sec': round(self.size_mb / elapsed, 1),
+                'peak_memory_mb': round(peak / 1024 / 1024, 1),
+                'sha256': hashes['sha256'],
+            }
+            print(f"  {label:18s} {rows[label]['mb_per_sec']:8.1f} MB/s   "
+                  f"peak {rows[label]['peak_memory_mb']:7.1f} MB")
+        assert rows['legacy (before)']['sha256'] == rows['streaming (after)']['sha256']
+        self.results['tests']['single_file'] = rows
+
+    def benchmark_verify_case(self):
+        print(f"\nverify_case: {self.items} items x {self.item_mb} MB")
+        collector = EvidenceCollector(evidence_base_path=str(self.workdir / 'evidence'))
+        original = evidence_module.subprocess.run
+        evidence_module.subprocess.run = lambda cmd, **kwargs: type('Result', (), {'stdout': '', 'stderr': ''})()
+        try:
+            case = collector.create_case("Benchmark", "bench", "verify", "intrusion_attempt")
+            for i in range(self.items):
+                evidence = collector.collect_network_data(case.case_id)
+                evidence.file_path = str(self._write(self.workdir / f"capture_{i}.pcap", self.item_mb))
+                hashes = hash_file(evidence.file_path)
+                evidence.hash_md5, evidence.hash_sha256 = hashes['md5'], hashes['sha256']
+        finally:
+            evidence_module.subprocess.run = original
+
+        rows = {}
+        for workers in (1, os.cpu_count() or 1, 4):
+            label = f"{workers} workers"
+            if label in rows:
+                continue
+            start = time.perf_counter()
+            results = collector.verify_case(case.case_id, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            assert all(ok for ok, _ in results.values())
+            rows[label] = {'seconds': round(elapsed, 3),
+                           'mb_per_sec': round(self.items * self.item_mb / elapsed, 1)}
+            print(f"  {label:18s} {elapsed:8.2f}s   {rows[label]['mb_per_sec']:8.1f} MB/s")
+        self.results['tests']['verify_case'] = rows
+
+    def run(self):
+        print("=" * 70)
+        print("🔐 EVIDENCE HASHING BENCHMARK")
+        print("=" * 70)
+        print(f"🖥️  CPUs: {os.cpu_count()}")
+        try:
+            self.benchmark_single_file()
+            self.benchmark_verify_case()
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        single = self.results['tests']['single_file']
+        before, after = single['legacy (before)'], single['streaming (after)']
+        print(f"\n📈 Hashing speedup: {before['seconds'] / after['seconds']:.1f}x, "
+              f"peak memory {before['peak_memory_mb']:.0f} MB -> {after['peak_memory_mb']:.1f} MB")
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"evidence_hashing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    EvidenceHashingBenchmark(size_mb).run()
@@ -0,0 +1,119 @@
+"""
+IP Reputation Benchmark - Lookups per Second
+Compares the old str.startswith prefix scans with the CIDR index,
+and measures check_reputation throughput cold and cached
+"""
+
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# analysis modules are loaded directly; the package __init__ pulls in optional feeds
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src' / 'analysis'))
+
+from ip_reputation import IPReputation, ReputationDatabase
+
+logging.getLogger('ip_reputation').setLevel(logging.ERROR)
+
+
+class IPReputationBenchmark:
+    """Measure range lookup and reputation check throughput"""
+
+    def __init__(self, lookups=200000):
+        self.lookups = lookups
+        self.engine = IPReputation()
+        rng = random.Random(42)
+        # Half inside known ranges, half random internet noise
+        prefixes = [p.rstrip('.').split('.') for p in ReputationDatabase.MALICIOUS_RANGES]
+        self.ips = []
+        for _ in range(lookups):
+            octets = rng.choice(prefixes) if rng.random() < 0.5 else []
+            octets = octets + [str(rng.randint(1, 254)) for _ in range(4 - len(octets))]
+            self.ips.append('.'.join(octets))
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'lookups': lookups,
+            'tests': []
+        }
+
+    def _record(self, name, count, elapsed):
+        rate = count / elapsed if elapsed > 0 else 0.0
+        self.results['tests'].append({
+            'name': name,
+            'count': count,
+            'seconds': round(elapsed, 3),
+            'per_sec': round(rate, 1),
+        })
+        print(f"  ✅ {name}: {count} in {elapsed:.2f}s")
+        print(f"  🚀 Throughput: {rate:,.0f}/sec")
+        return rate
+
+    def benchmark_prefix_scan(self):
+        """Previous range checks: four linear str.startswith scans"""
+        print("\nTest 1: prefix scans (before)")
+        tables = [ReputationDatabase.MALICIOUS_RANGES, ReputationDatabase.VPN_PROXY_RANGES,
+                  ReputationDatabase.CLOUD_PROVIDERS, ReputationDatabase.WHITELISTED_RANGES]
+        start = time.perf_counter()
+        for ip in self.ips:
+            for table in tables:
+                for prefix in table:
+                    if ip.startswith(prefix):
+                        break
+        return self._record('prefix_scan', self.lookups, time.perf_counter() - start)
+
+    def benchmark_cidr_index(self):
+        """CIDRIndex.lookup: one bisect answers all range tables"""
+        print("\nTest 2: CIDR index (after)")
+        lookup = self.engine.range_index.lookup
+        start = time.perf_counter()
+        for ip in self.ips:
+            lookup(ip)
+        return self._record('cidr_index', self.lookups, time.perf_counter() - start)
+
+    def benchmark_check_reputation(self, count=20000):
+        """Full check_reputation on distinct addresses"""
+        print("\nTest 3: check_reputation")
+        ips = self.ips[:count]
+        start = time.perf_counter()
+        for ip in ips:
+            self.engine.check_reputation(ip)
+        return self._record('check_reputation', len(ips), time.perf_counter() - start)
+
+    def benchmark_cached_reputation(self, count=20000):
+        """check_reputation again on the same addresses (in-process LRU tier)"""
+        print("\nTest 4: check_reputation, cached")
+        ips = self.ips[:count]
+        start = time.perf_counter()
+        for ip in ips:
+            self.engine.check_reputation(ip)
+        return self._record('check_reputation_cached', len(ips), time.perf_counter() - start)
+
+    def run(self):
+        print("=" * 70)
+        print("🛡️  IP REPUTATION BENCHMARK")
+        print("=" * 70)
+        before = self.benchmark_prefix_scan()
+        after = self.benchmark_cidr_index()
+        self.benchmark_check_reputation()
+        self.benchmark_cached_reputation()
+
+        speedup = after / before if before else 0.0
+        self.results['speedup'] = round(speedup, 1)
+        print(f"\n📈 Range lookup speedup: {speedup:.1f}x")
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"ip_reputation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    IPReputationBenchmark(lookups).run()
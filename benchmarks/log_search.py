@@ -0,0 +1,167 @@
+"""
+Log Search Benchmark - Forensic Queries over Rotated Logs
+Compares the old LogCollector.search_logs (readlines() and json.loads on
+every line of every file) with the indexed, streaming search for time
+range, source and keyword queries over a month of compressed log files
+"""
+
+import gzip
+import json
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.forensics.log_collector import LogCollector, LogEntry
+
+logging.getLogger('src.forensics.log_collector').setLevel(logging.ERROR)
+
+SOURCES = ['ssh', 'http', 'mysql', 'ftp', 'network']
+MESSAGES = [
+    'Failed password for {user} from {ip} port {port} ssh2',
+    'GET /wp-login.php HTTP/1.1 404 from {ip}',
+    'Connection from {ip} closed after {port} bytes',
+    'Query SELECT * FROM users WHERE name = "{user}" from {ip}',
+]
+
+
+def legacy_search(storage_dir, source=None, level=None, start_time=None, end_time=None, keyword=None):
+    """The previous search_logs body"""
+    results = []
+    for log_file in storage_dir.glob("logs_*.jsonl*"):
+        if log_file.suffix == '.gz':
+            with gzip.open(log_file, 'rt') as f:
+                lines = f.readlines()
+        else:
+            with open(log_file, 'r') as f:
+                lines = f.readlines()
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                if source and entry.get('source') != source:
+                    continue
+                if level and entry.get('level') != level:
+                    continue
+                timestamp = datetime.fromisoformat(entry.get('timestamp'))
+                if start_time and timestamp < start_time:
+                    continue
+                if end_time and timestamp > end_time:
+                    continue
+                if keyword and keyword.lower() not in entry.get('message', '').lower():
+                    continue
+                results.append(entry)
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+class LogSearchBenchmark:
+    """Measure search_logs latency and peak memory"""
+
+    def __init__(self, days=30, lines_per_day=20000):
+        self.days = days
+        self.lines_per_day = lines_per_day
+        self.start = datetime(2026, 9, 1)
+        self.storage_dir = Path(tempfile.mkdtemp(prefix='log_search_'))
+        self.collector = LogCollector(storage_dir=str(self.storage_dir))
+        self.queries = {
+            'one_day': {'start_time': self.start + timedelta(days=14),
+                        'end_time': self.start + timedelta(days=15)},
+            'rare_source': {'source': 'ftp'},
+            'keyword': {'keyword': 'sqlmap'},
+            'keyword_one_day': {'keyword': 'password', 'start_time': self.start + timedelta(days=29)},
+        }
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'days': days,
+            'lines': days * lines_per_day,
+            'tests': []
+        }
+
+    def populate(self):
+        """One rotated file per day; ftp only on day 3, sqlmap only on day 20"""
+        print(f"\n📝 Writing {self.days} days x {self.lines_per_day:,} lines...")
+        rng = random.Random(7)
+        for day in range(self.days):
+            self.collector._rotate_file()
+            for i in range(self.lines_per_day):
+                source = rng.choice(SOURCES[:3] + SOURCES[4:])
+                message = rng.choice(MESSAGES).format(
+                    user=rng.choice(['root', 'admin', 'oracle']),
+                    ip=f"45.155.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                    port=rng.randint(1024, 65535))
+                if day == 3 and i % 100 == 0:
+                    source = 'ftp'
+                if day == 20 and i % 1000 == 0:
+                    message = 'sqlmap/1.7 probe ' + message
+                self.collector._write_log(LogEntry(
+                    timestamp=self.start + timedelta(days=day, seconds=i * 86400 / self.lines_per_day),
+                    source=source, level='INFO', message=message))
+            self.collector._close_current_file()
+
+    def _measure(self, search):
+        """Wall time untraced, then peak allocations in a traced second run"""
+        start = time.perf_counter()
+        count = search()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        search()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return count, elapsed, peak
+
+    def benchmark_query(self, name, query):
+        print(f"\n🔎 Query: {name} {query}")
+        entry = {'name': name}
+        for label, search in [
+            ('before', lambda: len(legacy_search(self.storage_dir, **query))),
+            ('after', lambda: sum(1 for _ in self.collector.search_logs(**query))),
+        ]:
+            count, elapsed, peak = self._measure(search)
+            entry[label] = {'matches': count, 'seconds': round(elapsed, 3), 'peak_mb': round(peak / 1e6, 1)}
+            print(f"  ✅ {label:<6} {count:>7,} matches  {elapsed:>7.2f}s  peak {peak / 1e6:>8.1f} MB")
+        entry['speedup'] = round(entry['before']['seconds'] / max(entry['after']['seconds'], 1e-6), 1)
+        print(f"  🚀 Speedup: {entry['speedup']}x")
+        self.results['tests'].append(entry)
+
+    def benchmark_parallel(self, workers=4):
+        print(f"\n🔎 Full scan, keyword 'root', 1 vs {workers} workers")
+        for count in (1, workers):
+            start = time.perf_counter()
+            matches = sum(1 for _ in self.collector.search_logs(keyword='root', workers=count))
+            elapsed = time.perf_counter() - start
+            self.results['tests'].append({'name': f'full_scan_workers_{count}', 'matches': matches,
+                                          'seconds': round(elapsed, 3)})
+            print(f"  ✅ workers={count}: {matches:,} matches in {elapsed:.2f}s")
+
+    def run(self):
+        print("=" * 70)
+        print("🔍 LOG SEARCH BENCHMARK")
+        print("=" * 70)
+        try:
+            self.populate()
+            for name, query in self.queries.items():
+                self.benchmark_query(name, query)
+            self.benchmark_parallel()
+        finally:
+            shutil.rmtree(self.storage_dir, ignore_errors=True)
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"log_search_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"\n💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    LogSearchBenchmark(days).run()
@@ -0,0 +1,165 @@
+"""
+Log Writer Benchmark - Lines per Second
+Compares the old LogCollector writer (write + flush per line, synchronous
+gzip on rotation) with the group-commit writer at different fsync
+intervals, with rotations every few MB
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.forensics.log_collector import LogCollector, LogEntry
+
+logging.getLogger('src.forensics.log_collector').setLevel(logging.ERROR)
+
+
+class LegacyWriter:
+    """The previous _worker_loop/_write_log/_close_current_file path"""
+
+    def __init__(self, storage_dir, max_file_size):
+        self.storage_dir = Path(storage_dir)
+        self.max_file_size = max_file_size
+        self.current_file = None
+        self.current_file_size = 0
+        self.files = 0
+
+    def write(self, log_entry):
+        if not self.current_file or self.current_file_size >= self.max_file_size:
+            self.close()
+            self.files += 1
+            self.current_file = open(self.storage_dir / f"logs_legacy_{self.files:04d}.jsonl", 'w')
+            self.current_file_size = 0
+        line = log_entry.to_json() + '\n'
+        self.current_file.write(line)
+        self.current_file.flush()
+        self.current_file_size += len(line)
+
+    def close(self):
+        if self.current_file:
+            self.current_file.close()
+            with open(self.current_file.name, 'rb') as f_in:
+                with gzip.open(f"{self.current_file.name}.gz", 'wb') as f_out:
+                    f_out.writelines(f_in)
+            os.remove(self.current_file.name)
+            self.current_file = None
+
+
+class LogWriterBenchmark:
+    """Measure end-to-end collect() -> disk throughput"""
+
+    def __init__(self, lines=200000, max_file_size=4 * 1024 * 1024):
+        self.lines = lines
+        self.max_file_size = max_file_size
+        self.entries = [
+            LogEntry(
+                timestamp=datetime.now(),
+                source='honeypot',
+                level='INFO',
+                message=f"Failed password for root from 45.155.205.{i % 254 + 1} port {30000 + i % 30000} ssh2",
+                metadata={'index': i}
+            )
+            for i in range(lines)
+        ]
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'lines': lines,
+            'max_file_size': max_file_size,
+            'tests': []
+        }
+
+    def _record(self, name, elapsed, extra=None):
+        rate = self.lines / elapsed if elapsed > 0 else 0.0
+        entry = {'name': name, 'seconds': round(elapsed, 3), 'lines_per_sec': round(rate, 1)}
+        entry.update(extra or {})
+        self.results['tests'].append(entry)
+        print(f"  ✅ {name}: {self.lines:,} lines in {elapsed:.2f}s")
+        print(f"  🚀 Throughput: {rate:,.0f} lines/sec")
+        return rate
+
+    def benchmark_legacy(self):
+        print("\nTest 1: write + flush per line, inline compression (before)")
+        storage_dir = tempfile.mkdtemp(prefix='log_writer_')
+        try:
+            writer = LegacyWriter(storage_dir, self.max_file_size)
+            log_queue = __import__('queue').Queue()
+            done = threading.Event()
+
+            def worker():
+                for _ in range(self.lines):
+                    writer.write(log_queue.get())
+                done.set()
+
+            start = time.perf_counter()
+            threading.Thread(target=worker, daemon=True).start()
+            for entry in self.entries:
+                log_queue.put(entry)
+            done.wait()
+            writer.close()
+            return self._record('legacy', time.perf_counter() - start, {'files': writer.files})
+        finally:
+            shutil.rmtree(storage_dir, ignore_errors=True)
+
+    def benchmark_group_commit(self, test_no, fsync_interval, label):
+        print(f"\nTest {test_no}: group commit, fsync {label} (after)")
+        storage_dir = tempfile.mkdtemp(prefix='log_writer_')
+        try:
+            collector = LogCollector(storage_dir=storage_dir, fsync_interval=fsync_interval)
+            collector.max_file_size = self.max_file_size
+            collector.start()
+            start = time.perf_counter()
+            for entry in self.entries:
+                collector.collect(entry)
+            collector.log_queue.join()
+            written = time.perf_counter() - start
+            collector.stop()
+            elapsed = time.perf_counter() - start
+
+            writer = collector.get_stats()['writer']
+            assert writer['lines_written'] == self.lines
+            print(f"  📊 {writer['batches_written']:,} batches (avg {writer['avg_batch_size']}), "
+                  f"{writer['fsyncs']} fsyncs, {writer['files_compressed']} files compressed")
+            return self._record(f'group_commit_fsync_{label}', elapsed, {
+                'seconds_until_written': round(written, 3),
+                'batches': writer['batches_written'],
+                'fsyncs': writer['fsyncs'],
+                'backpressure_waits': writer['backpressure_waits'],
+            })
+        finally:
+            shutil.rmtree(storage_dir, ignore_errors=True)
+
+    def run(self):
+        print("=" * 70)
+        print("📝 LOG WRITER BENCHMARK")
+        print("=" * 70)
+        before = self.benchmark_legacy()
+        after = self.benchmark_group_commit(2, 1.0, '1s')
+        self.benchmark_group_commit(3, 0, 'every_batch')
+        self.benchmark_group_commit(4, None, 'never')
+
+        speedup = after / before if before else 0.0
+        self.results['speedup'] = round(speedup, 1)
+        print(f"\n📈 Writer speedup (fsync 1s): {speedup:.1f}x")
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"log_writer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    LogWriterBenchmark(lines).run()
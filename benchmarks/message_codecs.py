@@ -0,0 +1,154 @@
+"""
+Message Codec Benchmark - Bytes and CPU per Event
+Compares stream entry size and encode+decode time of the JSON codec with
+msgpack and compressed variants, for small attack events and large
+forensics payloads
+"""
+
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pipeline.message_codecs import COMPRESSORS, PAYLOAD_CODECS
+from src.pipeline.message_queue import Message
+
+
+def attack_event(rng, i):
+    return {
+        'event_type': 'attack',
+        'attacker_ip': f"185.220.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+        'service': rng.choice(['SSH', 'HTTP', 'MySQL', 'Redis']),
+        'action': 'brute_force',
+        'details': {'username': rng.choice(['root', 'admin', 'oracle']), 'attempt': i,
+                    'score': round(rng.random(), 3)},
+        'timestamp': datetime.now().isoformat(),
+    }
+
+
+def forensics_event(rng, i):
+    lines = [
+        f"Oct 16 10:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} mirage sshd[{rng.randint(1000, 9999)}]: "
+        f"Failed password for {rng.choice(['root', 'admin', 'test'])} from 45.155.205.{rng.randint(1, 254)} port "
+        f"{rng.randint(30000, 60000)} ssh2"
+        for _ in range(200)
+    ]
+    return {
+        'event_type': 'forensics',
+        'evidence_type': 'session_log',
+        'case_id': f"CASE-{i:05d}",
+        'data': {'lines': lines, 'sha256': '%064x' % rng.getrandbits(256)},
+        'timestamp': datetime.now().isoformat(),
+    }
+
+
+class MessageCodecBenchmark:
+    """Measure bytes and CPU per event for each payload codec"""
+
+    def __init__(self, events=5000, repeats=3):
+        self.events = events
+        self.repeats = repeats
+        rng = random.Random(42)
+        self.workloads = {
+            'attack_event': [attack_event(rng, i) for i in range(events)],
+            'forensics': [forensics_event(rng, i) for i in range(max(1, events // 20))],
+        }
+        self.specs = list(PAYLOAD_CODECS)
+        self.specs += [f"{codec}+{compressor}" for codec in PAYLOAD_CODECS for compressor in COMPRESSORS]
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'events': events,
+            'tests': []
+        }
+
+    @staticmethod
+    def _wire(fields):
+        """Field map as redis-py sends it (bytes)"""
+        return {
+            key.encode(): value if isinstance(value, bytes) else str(value).encode()
+            for key, value in fields.items()
+        }
+
+    def _messages(self, payloads):
+        return [
+            Message(message_id=f"m-{i}", stream='stream:bench', payload=payload, priority=2,
+                    timestamp=datetime.now().isoformat(), producer_id='benchmark')
+            for i, payload in enumerate(payloads)
+        ]
+
+    def benchmark_legacy(self, workload, payloads):
+        """Previous path: JSON text read back through decode_responses=True"""
+        messages = self._messages(payloads)
+
+        def round_trip():
+            size = 0
+            for message in messages:
+                wire = self._wire({**message.to_redis(), 'payload': json.dumps(message.payload)})
+                size += sum(len(k) + len(v) for k, v in wire.items())
+                decoded = {k.decode(): v.decode() for k, v in wire.items()}
+                Message.from_redis('1-0', 'stream:bench', decoded)
+            return size
+
+        return self._timed(workload, 'json (before)', len(messages), round_trip)
+
+    def benchmark_codec(self, workload, payloads, spec):
+        """Codec path: encode, then decode the raw bytes reply"""
+        messages = self._messages(payloads)
+
+        def round_trip():
+            size = 0
+            for message in messages:
+                wire = self._wire(message.to_redis(spec, min_compress_size=1024))
+                size += sum(len(k) + len(v) for k, v in wire.items())
+                Message.from_redis(b'1-0', b'stream:bench', wire)
+            return size
+
+        return self._timed(workload, spec, len(messages), round_trip)
+
+    def _timed(self, workload, spec, count, round_trip):
+        """Best of `repeats` runs"""
+        elapsed = float('inf')
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            size = round_trip()
+            elapsed = min(elapsed, time.perf_counter() - start)
+        return self._record(workload, spec, count, size, elapsed)
+
+    def _record(self, workload, spec, count, size, elapsed):
+        entry = {
+            'workload': workload,
+            'codec': spec,
+            'events': count,
+            'bytes_per_event': round(size / count, 1),
+            'us_per_event': round(elapsed / count * 1e6, 2),
+        }
+        self.results['tests'].append(entry)
+        print(f"  ✅ {spec:<16} {entry['bytes_per_event']:>10,.0f} B/event  {entry['us_per_event']:>9.1f} µs/event")
+        return entry
+
+    def run(self):
+        print("=" * 70)
+        print("🗜️  MESSAGE CODEC BENCHMARK")
+        print("=" * 70)
+        for workload, payloads in self.workloads.items():
+            print(f"\n📦 {workload} ({len(payloads)} events)")
+            self.benchmark_legacy(workload, payloads)
+            for spec in self.specs:
+                self.benchmark_codec(workload, payloads, spec)
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"message_codecs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"\n💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    MessageCodecBenchmark(events).run()
@@ -0,0 +1,221 @@
+"""
+Message Queue Benchmark - Events per Second
+Compares one XADD per publish() with pipelined publish_many() and the
+background BatchPublisher, sequential with pooled handler dispatch, and
+CRITICAL latency behind a LOW flood with and without priority lanes,
+against a local Redis stand-in
+"""
+
+import json
+import logging
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import redis
+
+from src.pipeline.message_queue import ConsumerGroup, MessagePriority, MessageQueueManager, StreamName
+
+logging.getLogger('src.pipeline.message_queue').setLevel(logging.ERROR)
+
+
+def start_backend():
+    """Spawn a throwaway redis-server if one is installed, else use fakeredis"""
+    server = shutil.which('redis-server')
+    if server:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        proc = subprocess.Popen(
+            [server, '--port', str(port), '--save', '', '--appendonly', 'no'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        client = redis.Redis(port=port, decode_responses=True)
+        for _ in range(50):
+            try:
+                client.ping()
+                return client, f'redis-server :{port}', proc.terminate
+            except redis.ConnectionError:
+                time.sleep(0.1)
+        proc.terminate()
+
+    import fakeredis
+    return fakeredis.FakeRedis(decode_responses=True), 'fakeredis', lambda: None
+
+
+class MessageQueueBenchmark:
+    """Measure publish and consume throughput of MessageQueueManager"""
+
+    def __init__(self, events=20000):
+        self.events = events
+        self.client, backend, self._shutdown = start_backend()
+        self.queue = MessageQueueManager(producer_id='benchmark')
+        self.queue._redis = self.client
+        self.payloads = [
+            {
+                'event_type': 'attack',
+                'attacker_ip': f"185.220.{i % 256}.{(i * 7) % 254 + 1}",
+                'service': 'SSH',
+                'action': 'brute_force',
+                'details': {'username': 'root', 'attempt': i},
+            }
+            for i in range(events)
+        ]
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'backend': backend,
+            'events': events,
+            'tests': []
+        }
+        print(f"🔌 Backend: {backend}")
+
+    def _record(self, name, elapsed, round_trips):
+        rate = self.events / elapsed if elapsed > 0 else 0.0
+        self.results['tests'].append({
+            'name': name,
+            'seconds': round(elapsed, 3),
+            'events_per_sec': round(rate, 1),
+            'round_trips': round_trips,
+        })
+        print(f"  ✅ {name}: {self.events} events in {elapsed:.2f}s ({round_trips} round-trips)")
+        print(f"  🚀 Throughput: {rate:,.0f} events/sec")
+        return rate
+
+    def _reset(self):
+        self.client.delete(StreamName.ATTACK_EVENTS.value)
+        self.queue.stats['publish_round_trips'] = 0
+
+    def benchmark_publish(self):
+        """Previous path: one XADD round-trip per event"""
+        print("\nTest 1: publish() per event (before)")
+        self._reset()
+        start = time.perf_counter()
+        for payload in self.payloads:
+            self.queue.publish(StreamName.ATTACK_EVENTS, payload)
+        return self._record('publish', time.perf_counter() - start,
+                            self.queue.stats['publish_round_trips'])
+
+    def benchmark_publish_many(self):
+        """publish_many: pipelined XADD chunks"""
+        print("\nTest 2: publish_many() (after)")
+        self._reset()
+        start = time.perf_counter()
+        self.queue.publish_many(StreamName.ATTACK_EVENTS, self.payloads)
+        return self._record('publish_many', time.perf_counter() - start,
+                            self.queue.stats['publish_round_trips'])
+
+    def benchmark_batch_publisher(self):
+        """publish_async from the producer thread, flushed in the background"""
+        print("\nTest 3: BatchPublisher via publish_async (after)")
+        self._reset()
+        start = time.perf_counter()
+        for payload in self.payloads:
+            self.queue.publish_async(StreamName.ATTACK_EVENTS, payload)
+        self.queue.publisher.stop()
+        elapsed = time.perf_counter() - start
+        assert self.client.xlen(StreamName.ATTACK_EVENTS.value) == self.events
+        return self._record('batch_publisher', elapsed, self.queue.stats['publish_round_trips'])
+
+    def benchmark_consume(self, test_no, concurrency, count=500, handler_latency=0.002):
+        """Consume through _dispatch_batch with an I/O-bound handler"""
+        print(f"\nTest {test_no}: consume with {concurrency} handler(s) in flight")
+        stream, group = StreamName.ATTACK_EVENTS, ConsumerGroup.AI_PROCESSOR
+        self.client.delete(stream.value)
+        self.queue._groups_ready.clear()
+        self.queue.publish_many(stream, self.payloads[:count])
+        self.queue.set_stream_concurrency(stream, concurrency)
+        self.queue._handlers[stream.value] = [lambda message: time.sleep(handler_latency) or True]
+        self.queue.stats['ack_round_trips'] = 0
+
+        start = time.perf_counter()
+        while True:
+            messages = self.queue.consume(stream, group, 'benchmark', count=50, block=None)
+            if not messages:
+                break
+            self.queue._dispatch_batch(stream, group, messages)
+        elapsed = time.perf_counter() - start
+
+        rate = count / elapsed if elapsed > 0 else 0.0
+        self.results['tests'].append({
+            'name': f'consume_x{concurrency}',
+            'seconds': round(elapsed, 3),
+            'events_per_sec': round(rate, 1),
+            'ack_round_trips': self.queue.stats['ack_round_trips'],
+        })
+        print(f"  ✅ {count} events in {elapsed:.2f}s ({self.queue.stats['ack_round_trips']} XACKs)")
+        print(f"  🚀 Throughput: {rate:,.0f} events/sec")
+        return rate
+
+    def benchmark_priority(self, test_no, lanes, flood=5000, alerts=20):
+        """Drain a LOW flood with CRITICAL alerts published last"""
+        print(f"\nTest {test_no}: CRITICAL behind {flood} LOW events, lanes {'on' if lanes else 'off'}")
+        stream, group = StreamName.ALERTS, ConsumerGroup.ALERT_MANAGER
+        queue = MessageQueueManager(producer_id='benchmark', priority_lanes=lanes)
+        queue._redis = self.client
+        queue.flush_stream(stream)
+        queue.publish_many(stream, self.payloads[:flood], MessagePriority.LOW)
+        queue.publish_many(stream, [{'alert': i} for i in range(alerts)], MessagePriority.CRITICAL)
+        queue.register_handler(stream, lambda message: True)
+
+        batches = 0
+        while not queue.get_latency_stats().get('CRITICAL', {}).get('samples', 0) >= alerts:
+            messages = queue.consume(stream, group, 'benchmark', count=50, block=None)
+            if not messages:
+                break
+            queue._dispatch_batch(stream, group, messages)
+            batches += 1
+
+        critical = queue.get_latency_stats()['CRITICAL']
+        queue.flush_stream(stream)
+        self.results['tests'].append({
+            'name': f"priority_lanes_{'on' if lanes else 'off'}",
+            'batches_until_critical_acked': batches,
+            'critical_p99_ms': critical['p99_ms'],
+        })
+        print(f"  ✅ All CRITICAL acked after {batches} batches")
+        print(f"  ⏱️  CRITICAL p99 latency: {critical['p99_ms']:.1f} ms")
+        return critical['p99_ms']
+
+    def run(self):
+        print("=" * 70)
+        print("📨 MESSAGE QUEUE BENCHMARK")
+        print("=" * 70)
+        try:
+            before = self.benchmark_publish()
+            after = self.benchmark_publish_many()
+            self.benchmark_batch_publisher()
+            sequential = self.benchmark_consume(4, 1)
+            pooled = self.benchmark_consume(5, 16)
+            fifo_p99 = self.benchmark_priority(6, lanes=False)
+            lanes_p99 = self.benchmark_priority(7, lanes=True)
+            self.queue.stop_consumers()
+        finally:
+            self.client.delete(StreamName.ATTACK_EVENTS.value)
+            self._shutdown()
+
+        speedup = after / before if before else 0.0
+        self.results['speedup'] = round(speedup, 1)
+        print(f"\n📈 Publish speedup: {speedup:.1f}x")
+        consume_speedup = pooled / sequential if sequential else 0.0
+        self.results['consume_speedup'] = round(consume_speedup, 1)
+        print(f"📈 Consume speedup (16 handlers): {consume_speedup:.1f}x")
+        print(f"📈 CRITICAL p99: {fifo_p99:.1f} ms FIFO -> {lanes_p99:.1f} ms with lanes")
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"message_queue_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    MessageQueueBenchmark(events).run()
@@ -0,0 +1,215 @@
+"""
+Packet Detector Benchmark - Packets per Second
+Compares the old per-PacketInfo loops of PcapAnalyzer.detect_port_scan,
+detect_brute_force, detect_data_exfiltration and build_sessions with the
+grouped detectors on the columnar PacketTable (NumPy and pure Python)
+"""
+
+import json
+import logging
+import random
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.forensics.packet_table import NUMPY_AVAILABLE, PacketTable
+from src.forensics.pcap_analyzer import PacketInfo, PcapAnalyzer
+
+logging.getLogger('src.forensics.pcap_analyzer').setLevel(logging.ERROR)
+
+AUTH_PORTS = [21, 22, 23, 2222, 2121, 3306, 3389]
+
+
+def honeypot_packets(count, seed=11):
+    """Connections of 1-20 packets: brute force, port scans and a few large transfers"""
+    rng = random.Random(seed)
+    attackers = [f"45.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(2000)]
+    honeypots = ['10.0.0.5', '10.0.0.6', '10.0.0.7']
+    start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    packets = []
+    while len(packets) < count:
+        attacker, honeypot = rng.choice(attackers), rng.choice(honeypots)
+        sport = rng.randint(1024, 65535)
+        dport = rng.choice([22, 22, 22, 2222, 3306, 80, rng.randint(1, 65535)])
+        size = rng.choice([60, 120, 1500])
+        for _ in range(rng.choice([1, 1, 2, 3, 8, 20])):
+            packets.append(PacketInfo(
+                timestamp=(start + timedelta(milliseconds=len(packets) * 3)).isoformat(),
+                src_ip=attacker,
+                dst_ip=honeypot,
+                src_port=sport,
+                dst_port=dport,
+                protocol='TCP',
+                length=size,
+                flags=rng.choice(['SYN', 'ACK', 'PSH|ACK'])
+            ))
+    return packets[:count]
+
+
+def write_capture(path, packets):
+    """The same packets as an Ethernet/IPv4 pcap (orig_len carries the length)"""
+    eth = b'\x00\x11\x22\x33\x44\x55\x66\x77\x88\x99\xaa\xbb\x08\x00'
+    flag_bits = {'SYN': 0x02, 'ACK': 0x10, 'PSH|ACK': 0x18}
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1))
+        for i, p in enumerate(packets):
+            tcp = struct.pack('!HHIIBBHHH', p.src_port, p.dst_port, i, 0, 0x50, flag_bits[p.flags], 65535, 0, 0)
+            ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 40, i & 0xFFFF, 0, 64, 6, 0,
+                             socket.inet_aton(p.src_ip), socket.inet_aton(p.dst_ip))
+            frame = eth + ip + tcp
+            ts_us = 1790000000_000000 + i * 3000
+            f.write(struct.pack('<IIII', ts_us // 1000000, ts_us % 1000000, len(frame), p.length))
+            f.write(frame)
+
+
+def legacy_detectors(packets):
+    """The previous detect_* loops"""
+    src_ports = defaultdict(set)
+    auth_attempts = defaultdict(int)
+    outbound = defaultdict(int)
+    for p in packets:
+        if p.src_ip and p.dst_port:
+            src_ports[(p.src_ip, p.dst_ip)].add(p.dst_port)
+    for p in packets:
+        if p.dst_port in AUTH_PORTS:
+            auth_attempts[(p.src_ip, p.dst_ip, p.dst_port)] += 1
+    for p in packets:
+        if p.src_ip and p.length:
+            outbound[(p.src_ip, p.dst_ip)] += p.length
+    return (sum(1 for ports in src_ports.values() if len(ports) >= 10),
+            sum(1 for count in auth_attempts.values() if count >= 20),
+            sum(1 for total in outbound.values() if total >= 1000000))
+
+
+def legacy_sessions(packets):
+    """The previous build_sessions loop"""
+    sessions = {}
+    for p in packets:
+        endpoints = sorted([f"{p.src_ip}:{p.src_port}", f"{p.dst_ip}:{p.dst_port}"])
+        key = f"{endpoints[0]}<->{endpoints[1]}"
+        if key not in sessions:
+            sessions[key] = {'packets': 0, 'bytes': 0, 'start': p.timestamp, 'flags': []}
+        session = sessions[key]
+        session['packets'] += 1
+        session['bytes'] += p.length
+        session['end'] = p.timestamp
+        if p.flags:
+            session['flags'].append(p.flags)
+
+    return len(sessions)
+
+
+def table_detectors(table, window=None):
+    return (len(table.port_scans(10, window)),
+            len(table.brute_force(AUTH_PORTS, 20, window)),
+            len(table.transfers(1000000, window)))
+
+
+class PacketDetectorBenchmark:
+    """Measure detector throughput over one capture"""
+
+    def __init__(self, packets=300000):
+        self.packets = honeypot_packets(packets)
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'packets': packets,
+            'numpy': NUMPY_AVAILABLE,
+            'tests': []
+        }
+
+    def _record(self, name, elapsed, detections=None):
+        rate = len(self.packets) / elapsed if elapsed > 0 else 0.0
+        self.results['tests'].append({
+            'name': name,
+            'seconds': round(elapsed, 3),
+            'packets_per_sec': round(rate, 1),
+            'detections': detections,
+        })
+        suffix = f"  -> {detections}" if detections else ""
+        print(f"  ✅ {name}: {elapsed:.3f}s, {rate:,.0f} packets/sec{suffix}")
+        return elapsed
+
+    def _timed(self, name, func, detections=True):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        return self._record(name, elapsed, result if detections else None), result
+
+    def benchmark_capture(self):
+        """End to end from a capture file: load_packets + loops vs load_table + table"""
+        workdir = Path(tempfile.mkdtemp(prefix='pcap_detect_'))
+        try:
+            capture = workdir / 'span.pcap'
+            write_capture(capture, self.packets)
+
+            print("\nTest: capture file, load_packets + per-PacketInfo loops (before)")
+
+            def before():
+                analyzer = PcapAnalyzer()
+                analyzer.load_packets(str(capture))
+                return legacy_detectors(analyzer.packets) + (legacy_sessions(analyzer.packets),)
+            elapsed_before, expected = self._timed('capture_legacy', before)
+
+            print("\nTest: capture file, load_table + PacketTable detectors (after)")
+
+            def after():
+                analyzer = PcapAnalyzer()
+                analyzer.load_table(str(capture))
+                return table_detectors(analyzer.table) + (len(analyzer.table.sessions()),)
+            elapsed_after, found = self._timed(f'capture_{PacketTable().backend}', after)
+            assert found == expected, (found, expected)
+
+            speedup = elapsed_before / elapsed_after if elapsed_after else 0.0
+            self.results['capture_speedup'] = round(speedup, 1)
+            print(f"  📈 End-to-end speedup: {speedup:.1f}x")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def run(self):
+        print("=" * 70)
+        print("🔎 PACKET DETECTOR BENCHMARK")
+        print("=" * 70)
+        print(f"📝 {len(self.packets):,} packets, numpy={'yes' if NUMPY_AVAILABLE else 'no'}")
+
+        print("\nTest 1: per-PacketInfo loops (before)")
+        legacy, expected = self._timed('legacy_detectors', lambda: legacy_detectors(self.packets))
+        legacy_build, sessions = self._timed('legacy_sessions', lambda: legacy_sessions(self.packets))
+
+        backends = ['python'] + (['numpy'] if NUMPY_AVAILABLE else [])
+        for i, backend in enumerate(backends, 2):
+            print(f"\nTest {i}: PacketTable, {backend} backend")
+            build, table = self._timed(f'{backend}_build_table',
+                                       lambda: PacketTable.from_packets(self.packets, use_numpy=backend == 'numpy'),
+                                       detections=False)
+            detect, found = self._timed(f'{backend}_detectors', lambda: table_detectors(table))
+            assert found == expected, (found, expected)
+            self._timed(f'{backend}_detectors_60s_window', lambda: table_detectors(table, window=60))
+            grouped, found = self._timed(f'{backend}_sessions', lambda: len(table.sessions()))
+            assert found == sessions, (found, sessions)
+            speedup = legacy / detect if detect else 0.0
+            self.results[f'{backend}_speedup'] = round(speedup, 1)
+            print(f"  📈 Detector speedup: {speedup:.1f}x, sessions {legacy_build / grouped:.1f}x, "
+                  f"end to end {(legacy + legacy_build) / (build + detect + grouped):.1f}x")
+
+        self.benchmark_capture()
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"packet_detectors_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"\n💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    packets = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    PacketDetectorBenchmark(packets).run()
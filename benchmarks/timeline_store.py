@@ -0,0 +1,158 @@
+"""
+Timeline Store Benchmark - Incremental Timelines and Indexed Queries
+Compares the old rebuild-everything timelines (re-parse all evidence, full
+sort, linear filter scans) with the incremental, index-backed TimelineStore
+in TimelineBuilder and EvidenceCollector.build_timeline
+"""
+
+import json
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.forensics.evidence_collector import EvidenceCollector, TimelineEvent as EvidenceEvent
+from src.forensics.timeline_builder import Severity, TimelineBuilder, TimelineEvent
+
+logging.getLogger('src.forensics.evidence_collector').setLevel(logging.WARNING)
+
+BASE_TIME = datetime(2026, 10, 16, 0, 0, 0)
+
+
+def legacy_build_timeline(collector, case_id):
+    """Previous build_timeline: every file re-read, parsed and fully sorted on each call"""
+    timeline = []
+    for evidence in collector.get_evidence_for_case(case_id):
+        timeline.append(EvidenceEvent(
+            timestamp=evidence.collected_at, event_type="evidence_collected", source=evidence.source,
+            description=f"Evidence collected: {evidence.description}", evidence_id=evidence.evidence_id,
+            actor="system", target=evidence.source, severity="info", indicators=evidence.tags))
+        with open(evidence.file_path, 'r') as f:
+            content = f.read()
+        timeline.extend(collector._extract_events_from_json(json.loads(content), evidence))
+    timeline.sort(key=lambda x: x.timestamp)
+    collector.cases[case_id].timeline_events = [e.to_dict() for e in timeline]
+    return timeline
+
+
+class TimelineStoreBenchmark:
+    """Measure incremental ingestion and query cost, before vs after"""
+
+    def __init__(self, batches=200, batch_size=500, evidence_items=200):
+        self.batches = batches
+        self.batch_size = batch_size
+        self.evidence_items = evidence_items
+        self.rng = random.Random(11)
+        self.workdir = Path(tempfile.mkdtemp(prefix='timeline_bench_'))
+        self.results = {
+            'timestamp': datetime.now().isoformat(),
+            'tests': {}
+        }
+
+    def _batch(self, n):
+        # دفعة مصدر واحد: مرتبة تقريباً وتتداخل مع الدفعات السابقة
+        start = n * 300 - self.rng.randint(0, 3000)
+        return [TimelineEvent(
+            timestamp=(BASE_TIME + timedelta(seconds=start + i)).isoformat(),
+            event_type='login_attempt', source=f"src-{n}", description='login',
+            severity=self.rng.choice(list(Severity)).value,
+            attacker_ip=f"45.155.{self.rng.randint(0, 20)}.{self.rng.randint(0, 50)}",
+            service=self.rng.choice(['SSH', 'FTP', 'HTTP', 'MySQL'])
+        ) for i in range(self.batch_size)]
+
+    def benchmark_builder(self):
+        print(f"\nTimelineBuilder: {self.batches} batches x {self.batch_size} events, "
+              f"queries after every batch")
+        batches = [self._batch(n) for n in range(self.batches)]
+        window = timedelta(minutes=10)
+
+        # قبل: قائمة مسطحة، فرز كامل ثم فحص خطي عند كل استعلام
+        start = time.perf_counter()
+        events = []
+        for n, batch in enumerate(batches):
+            events.extend(batch)
+            events.sort(key=lambda e: e.timestamp)
+            [e for e in events if e.attacker_ip == '45.155.1.1']
+            [e for e in events if e.severity == 'critical']
+            low, high = BASE_TIME + timedelta(seconds=n * 300), BASE_TIME + timedelta(seconds=n * 300) + window
+            [e for e in events if low <= datetime.fromisoformat(e.timestamp) <= high]
+        before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        builder = TimelineBuilder("BENCH")
+        for n, batch in enumerate(batches):
+            builder.store.extend(batch, source=f"src-{n}")
+            builder.filter_by_ip('45.155.1.1')
+            builder.filter_by_severity(Severity.CRITICAL)
+            low = BASE_TIME + timedelta(seconds=n * 300)
+            builder.filter_by_time_range(low, low + window)
+        after = time.perf_counter() - start
+
+        return self._record('builder', before, after)
+
+    def benchmark_collector(self):
+        print(f"\nEvidenceCollector.build_timeline: {self.evidence_items} evidence files, "
+              f"rebuilt after each collection")
+        collector = EvidenceCollector(evidence_base_path=str(self.workdir / 'evidence'))
+        case = collector.create_case("Benchmark", "bench", "timeline", "intrusion_attempt")
+        items = []
+        for n in range(self.evidence_items):
+            evidence = collector.collect_network_data(case.case_id)
+            path = self.workdir / f"sessions_{n}.json"
+            sessions = [{"timestamp": (BASE_TIME + timedelta(seconds=n * 60 - i)).isoformat(),
+                         "source_ip": f"45.155.205.{i % 200}", "service": "ssh", "severity": "high",
+                         "attack_type": "brute_force"} for i in range(50)]
+            path.write_text(json.dumps({"attack_sessions": sessions, "padding": ["x" * 64] * 200}))
+            evidence.file_path = str(path)
+            items.append(evidence)
+
+        def timed(build):
+            # الأدلة تصل واحداً تلو الآخر ويُعاد البناء بعد كل دليل
+            for evidence in items:
+                collector.evidence_items.pop(evidence.evidence_id)
+            start = time.perf_counter()
+            for evidence in items:
+                collector.evidence_items[evidence.evidence_id] = evidence
+                timeline = build(collector, case.case_id)
+            return time.perf_counter() - start, len(timeline)
+
+        before, count_before = timed(legacy_build_timeline)
+        after, count_after = timed(EvidenceCollector.build_timeline)
+        assert count_before == count_after
+        return self._record('collector', before, after)
+
+    def _record(self, name, before, after):
+        row = {'before_seconds': round(before, 3), 'after_seconds': round(after, 3),
+               'speedup': round(before / after, 1)}
+        self.results['tests'][name] = row
+        print(f"  ⏱️  Before: {before:.2f}s   After: {after:.2f}s   ({row['speedup']}x)")
+        return row
+
+    def run(self):
+        print("=" * 70)
+        print("🕒 TIMELINE STORE BENCHMARK")
+        print("=" * 70)
+        try:
+            self.benchmark_builder()
+            self.benchmark_collector()
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        output_dir = Path('data/benchmarks')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"timeline_store_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        print(f"\n💾 Results saved to: {output_file}")
+        return self.results
+
+
+if __name__ == "__main__":
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    TimelineStoreBenchmark(batches).run()
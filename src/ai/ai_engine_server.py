@@ -2,14 +2,37 @@
 """
 AI Engine Server - Neural Deception & Multi-Agent Intelligence
 Serves ML models for attack prediction and adaptive deception
+
+Attack events are consumed from the pipeline's Redis Streams
+(src/pipeline/message_queue.py) with blocking batched XREADGROUP,
+scored concurrently and acknowledged per batch. Publish-to-ack latency,
+scoring time and dead-letter counts are only known to this consumer, so
+they are exported on its own /metrics alongside the engine counters.
 """
 
 import os
 import sys
+import socket
+import json
+import time
 import asyncio
 import logging
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from redis.exceptions import ResponseError
+
+from src.pipeline.message_queue import (
+    END_TO_END_BUCKETS, HANDLER_BUCKETS, ConsumerGroup, LatencyHistogram, Message, MessagePriority,
+    MessageQueueManager, StreamName
+)
+from src.pipeline.pipeline_metrics import PROMETHEUS_AVAILABLE, PipelineCollector
+
+if PROMETHEUS_AVAILABLE:
+    from prometheus_client import CollectorRegistry, generate_latest
 
 # Configure logging
 log_handlers = [logging.StreamHandler(sys.stdout)]
@@ -35,13 +58,70 @@ POSTGRES_DB = os.getenv('POSTGRES_DB', 'cyber_mirage')
 POSTGRES_USER = os.getenv('POSTGRES_USER', 'cybermirage')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'SecurePass123!')
 
+# Stream ingestion
+INGEST_STREAMS = [
+    StreamName(name.strip())
+    for name in os.getenv('AI_ENGINE_STREAMS', StreamName.ATTACK_EVENTS.value).split(',') if name.strip()
+]
+INGEST_GROUP = ConsumerGroup.AI_PROCESSOR
+INGEST_CONSUMER = os.getenv('AI_ENGINE_CONSUMER', f"ai-engine-{socket.gethostname()}")
+INGEST_BATCH_SIZE = int(os.getenv('AI_ENGINE_BATCH_SIZE', 100))
+INGEST_BLOCK_MS = int(os.getenv('AI_ENGINE_BLOCK_MS', 1000))
+INGEST_CONCURRENCY = int(os.getenv('AI_ENGINE_CONCURRENCY', 32))
+# Must match the producers' MessageQueueManager(priority_lanes=...)
+PRIORITY_LANES = os.getenv('PIPELINE_PRIORITY_LANES', 'false').lower() in ('1', 'true', 'yes')
+THREAT_TTL = 86400  # 24 hours
+DEAD_LETTER_STREAM = 'stream:dead_letter'
+DLQ_RATE_WINDOW = 300.0  # seconds
+
 class AIEngineServer:
     """Main AI Engine Server"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        streams: Optional[List[StreamName]] = None,
+        consumer_name: str = INGEST_CONSUMER,
+        batch_size: int = INGEST_BATCH_SIZE,
+        block_ms: int = INGEST_BLOCK_MS,
+        concurrency: int = INGEST_CONCURRENCY,
+        priority_lanes: bool = PRIORITY_LANES
+    ):
         self.running = False
         self.redis_client = None
+        # Undecoded client for stream reads: entries may carry binary payloads
+        self.stream_client = None
         self.db_connection = None
+        
+        self.streams = streams or INGEST_STREAMS
+        self.group = INGEST_GROUP
+        self.consumer_name = consumer_name
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.priority_lanes = priority_lanes
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Stream key (base or priority lane) -> base stream
+        self._base_stream = {
+            MessageQueueManager._lane_key(stream, priority): stream.value
+            for stream in self.streams for priority in MessagePriority
+        }
+        
+        # Metrics counters
+        self.attack_count = 0
+        self.redis_errors = 0
+        self.db_errors = 0
+        self.batches_processed = 0
+        self.messages_acked = 0
+        self.dead_lettered = 0
+        
+        # Pipeline metrics per base stream
+        self._end_to_end = {stream.value: LatencyHistogram(END_TO_END_BUCKETS) for stream in self.streams}
+        self._handler_duration = {stream.value: LatencyHistogram(HANDLER_BUCKETS) for stream in self.streams}
+        self._dlq_by_stream: Dict[str, int] = {stream.value: 0 for stream in self.streams}
+        self._dlq_times: Deque[float] = deque(maxlen=10000)
+        self._metrics_registry = None
+        if PROMETHEUS_AVAILABLE:
+            self._metrics_registry = CollectorRegistry()
+            self._metrics_registry.register(PipelineCollector(self))
         logger.info("AI Engine Server initialized")
     
     async def connect_redis(self):
@@ -54,6 +134,9 @@ class AIEngineServer:
                 decode_responses=True
             )
             await self.redis_client.ping()
+            self.stream_client = await aioredis.from_url(
+                f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}"
+            )
             logger.info(f"Connected to Redis at {REDIS_HOST}:{REDIS_PORT}")
             return True
         except Exception as e:
@@ -76,57 +159,291 @@ class AIEngineServer:
             logger.error(f"Failed to connect to PostgreSQL: {e}")
             return False
     
+    async def score_attack_event(self, event: Dict) -> float:
+        """Threat score for one attack event (placeholder for real ML model)"""
+        return 0.5
+    
+    async def _bounded_score(self, event: Dict, histogram: Optional[LatencyHistogram] = None) -> float:
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                return await self.score_attack_event(event)
+            finally:
+                if histogram is not None:
+                    histogram.observe(time.perf_counter() - started)
+    
     async def process_attack_event(self, event: Dict):
         """Process incoming attack event with ML prediction"""
-        try:
-            # Increment attack counter for metrics
-            if hasattr(self, 'attack_count'):
-                self.attack_count += 1
-            
-            # Simple threat scoring (placeholder for real ML model)
-            threat_score = 0.5
-            
-            # Extract features
-            source_ip = event.get('source_ip', 'unknown')
-            attack_type = event.get('attack_type', 'unknown')
-            
-            # Update threat intelligence
-            if self.redis_client:
-                key = f"threat:{source_ip}"
-                await self.redis_client.hincrby(key, 'count', 1)
-                await self.redis_client.hset(key, 'last_seen', datetime.utcnow().isoformat())
-                await self.redis_client.expire(key, 86400)  # 24 hours
-            
-            logger.info(f"Processed attack from {source_ip} - Type: {attack_type} - Score: {threat_score}")
-            return threat_score
+        scores = await self.process_events([event])
+        return scores[0]
+    
+    async def process_events(
+        self,
+        events: List[Dict],
+        histograms: Optional[List[Optional[LatencyHistogram]]] = None
+    ) -> List[float]:
+        """
+        Score a batch of attack events concurrently and record them
         
-        except Exception as e:
-            logger.error(f"Error processing attack event: {e}")
-            if hasattr(self, 'redis_errors'):
+        Scoring is bounded by the concurrency semaphore; threat intelligence
+        updates for the whole batch go out in one Redis pipeline.
+        
+        Args:
+            histograms: per event, where to record its scoring time
+        """
+        histograms = histograms or [None] * len(events)
+        results = await asyncio.gather(
+            *(self._bounded_score(event, histogram) for event, histogram in zip(events, histograms)),
+            return_exceptions=True
+        )
+        scores = []
+        for event, result in zip(events, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing attack event: {result}")
+                result = 0.0
+            scores.append(result)
+            logger.debug(
+                f"Processed attack from {self._source_ip(event)} - "
+                f"Type: {self._attack_type(event)} - Score: {result}"
+            )
+        
+        if self.redis_client and events:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_threat_updates(pipe, events)
+                await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error recording attack events: {e}")
                 self.redis_errors += 1
-            return 0.0
+        
+        self.attack_count += len(events)
+        return scores
+    
+    @staticmethod
+    def _source_ip(event: Dict) -> str:
+        # Pipeline attack events carry attacker_ip/action, legacy ones source_ip/attack_type
+        return event.get('source_ip') or event.get('attacker_ip') or 'unknown'
+    
+    @staticmethod
+    def _attack_type(event: Dict) -> str:
+        return event.get('attack_type') or event.get('action') or 'unknown'
+    
+    def _queue_threat_updates(self, pipe, events: List[Dict]):
+        """Queue threat intelligence updates (one key per source IP) on a pipeline"""
+        counts: Dict[str, int] = {}
+        for event in events:
+            source_ip = self._source_ip(event)
+            counts[source_ip] = counts.get(source_ip, 0) + 1
+        
+        last_seen = datetime.utcnow().isoformat()
+        for source_ip, count in counts.items():
+            key = f"threat:{source_ip}"
+            pipe.hincrby(key, 'count', count)
+            pipe.hset(key, 'last_seen', last_seen)
+            pipe.expire(key, THREAT_TTL)
+    
+    # =========================================================================
+    # STREAM INGESTION
+    # =========================================================================
+    
+    def _stream_keys(self) -> List[str]:
+        """Stream keys to read, priority lanes highest first"""
+        if not self.priority_lanes:
+            return [stream.value for stream in self.streams]
+        priorities = sorted(MessagePriority, key=lambda p: p.value, reverse=True)
+        return [
+            MessageQueueManager._lane_key(stream, priority)
+            for stream in self.streams for priority in priorities
+        ]
+    
+    async def ensure_groups(self):
+        """Create the consumer group on every stream key (BUSYGROUP is fine)"""
+        for key in self._stream_keys():
+            try:
+                await self.stream_client.xgroup_create(key, self.group.value, id='0', mkstream=True)
+                logger.info(f"Created consumer group {self.group.value} for stream {key}")
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+    
+    async def read_batch(self, pending: bool = False) -> List[Message]:
+        """
+        One XREADGROUP over all stream keys
+        
+        Args:
+            pending: re-read entries delivered to this consumer but never
+                acknowledged (e.g. before a restart) instead of new ones
+        """
+        keys = self._stream_keys()
+        while True:
+            reply = await self.stream_client.xreadgroup(
+                self.group.value,
+                self.consumer_name,
+                {key: '0' if pending else '>' for key in keys},
+                count=self.batch_size,
+                block=None if pending else self.block_ms
+            )
+            messages, trimmed, undecodable = [], [], []
+            for stream_name, entries in reply or []:
+                key = stream_name.decode() if isinstance(stream_name, bytes) else stream_name
+                for entry_id, data in entries:
+                    # Pending entries trimmed from the stream come back empty
+                    if not data:
+                        trimmed.append((key, entry_id))
+                        continue
+                    try:
+                        messages.append(Message.from_redis(entry_id, key, data))
+                    except Exception as e:
+                        logger.error(f"Undecodable entry {entry_id!r} on {key}: {e}")
+                        undecodable.append((key, entry_id, data, e))
+            
+            if trimmed or undecodable:
+                await self._discard_entries(trimmed, undecodable)
+            # Discarded entries are acked, so a pending re-read moves past them
+            if messages or not pending or not (trimmed or undecodable):
+                break
+        
+        messages.sort(key=lambda m: m.priority, reverse=True)
+        return messages
+    
+    async def _discard_entries(self, trimmed: List, undecodable: List):
+        """Dead-letter undecodable entries and acknowledge them with trimmed ones in one pipeline"""
+        pipe = self.stream_client.pipeline(transaction=False)
+        failed_at = datetime.now().isoformat()
+        for key, entry_id, data, error in undecodable:
+            dlq_payload = {
+                'original_stream': key,
+                'original_id': entry_id.decode() if isinstance(entry_id, bytes) else entry_id,
+                'error': str(error),
+                'failed_at': failed_at,
+                'retry_count': 0
+            }
+            # Raw fields ride along as-is so the entry can be inspected or replayed
+            fields = {'payload': json.dumps(dlq_payload)}
+            fields.update({
+                b'raw:' + (name if isinstance(name, bytes) else name.encode()): value
+                for name, value in data.items()
+            })
+            pipe.xadd(DEAD_LETTER_STREAM, fields, maxlen=10000, approximate=True)
+        
+        by_key: Dict[str, List] = {}
+        for key, entry_id, *_ in trimmed + undecodable:
+            by_key.setdefault(key, []).append(entry_id)
+        for key, ids in by_key.items():
+            pipe.xack(key, self.group.value, *ids)
+        await pipe.execute()
+        
+        now = time.time()
+        for key, *_ in undecodable:
+            base = self._base_stream.get(key, key)
+            self._dlq_by_stream[base] = self._dlq_by_stream.get(base, 0) + 1
+            self._dlq_times.append(now)
+        self.dead_lettered += len(undecodable)
+        if trimmed:
+            logger.warning(f"Acknowledged {len(trimmed)} pending entries trimmed from their stream")
+    
+    async def process_batch(self, messages: List[Message]) -> List[float]:
+        """Score a batch of stream messages and acknowledge them"""
+        scores = await self.process_events(
+            [message.payload for message in messages],
+            [self._handler_duration.get(self._base_stream.get(message.stream)) for message in messages]
+        )
+        
+        by_key: Dict[str, List[str]] = {}
+        for message in messages:
+            by_key.setdefault(message.stream, []).append(message.redis_id)
+        pipe = self.stream_client.pipeline(transaction=False)
+        for key, ids in by_key.items():
+            pipe.xack(key, self.group.value, *ids)
+        await pipe.execute()
+        self._record_latency(messages)
+        
+        self.messages_acked += len(messages)
+        self.batches_processed += 1
+        return scores
+    
+    def _record_latency(self, messages: List[Message]):
+        """Sample publish-to-ack latency per base stream"""
+        now = datetime.now()
+        for message in messages:
+            histogram = self._end_to_end.get(self._base_stream.get(message.stream))
+            try:
+                published = datetime.fromisoformat(message.timestamp)
+            except (TypeError, ValueError):
+                continue
+            if histogram is not None:
+                histogram.observe(max(0.0, (now - published).total_seconds()))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Pipeline statistics of this consumer, shaped like MessageQueueManager.get_stats()"""
+        cutoff = time.time() - DLQ_RATE_WINDOW
+        recent = sum(1 for ts in self._dlq_times if ts >= cutoff)
+        return {
+            'messages_consumed': self.messages_acked,
+            'messages_dead_lettered': self.dead_lettered,
+            'end_to_end_latency': {
+                key: histogram.snapshot() for key, histogram in self._end_to_end.items()
+            },
+            'handler_duration': {
+                key: histogram.snapshot() for key, histogram in self._handler_duration.items()
+            },
+            'dead_letter': {
+                'total': self.dead_lettered,
+                'by_stream': dict(self._dlq_by_stream),
+                'rate_per_minute': round(recent * 60 / DLQ_RATE_WINDOW, 3)
+            }
+        }
+    
+    def pipeline_metrics(self) -> str:
+        """Prometheus text for the pipeline metrics of this consumer"""
+        if self._metrics_registry is None:
+            return ''
+        return generate_latest(self._metrics_registry).decode()
     
     async def monitor_attacks(self):
-        """Monitor attack queue from Redis"""
-        logger.info("Starting attack monitoring...")
+        """Consume attack events from the pipeline streams"""
+        logger.info(f"Starting attack monitoring on {', '.join(self._stream_keys())}...")
+        groups_ready = False
+        recovering = True
+        last_pending: Optional[List[str]] = None
         
         while self.running:
             try:
-                if self.redis_client:
-                    # Check for new attacks in queue
-                    attack_data = await self.redis_client.lpop('attack_queue')
-                    
-                    if attack_data:
-                        import json
-                        event = json.loads(attack_data)
-                        await self.process_attack_event(event)
-                    else:
-                        await asyncio.sleep(1)
-                else:
+                if not self.stream_client:
                     await asyncio.sleep(5)
-                    
+                    continue
+                if not groups_ready:
+                    await self.ensure_groups()
+                    groups_ready = True
+                
+                # Blocks server-side for up to block_ms when there is nothing new
+                messages = await self.read_batch(pending=recovering)
+                if recovering:
+                    ids = [message.redis_id for message in messages]
+                    # Same entries as last time: processing them keeps failing,
+                    # leave them pending and move on to new traffic
+                    stalled = ids == last_pending
+                    last_pending = ids
+                    if not messages or stalled:
+                        logger.info("Pending entry recovery finished" if not messages
+                                    else f"Pending entry recovery stalled on {len(ids)} entries")
+                        recovering = False
+                        continue
+                if not messages:
+                    continue
+                await self.process_batch(messages)
+            
+            except ResponseError as e:
+                if "NOGROUP" in str(e):
+                    # Stream or group deleted underneath us
+                    groups_ready = False
+                    continue
+                logger.error(f"Error in attack monitoring: {e}")
+                self.redis_errors += 1
+                await asyncio.sleep(5)
             except Exception as e:
                 logger.error(f"Error in attack monitoring: {e}")
+                self.redis_errors += 1
                 await asyncio.sleep(5)
     
     async def health_check_server(self):
@@ -134,11 +451,6 @@ class AIEngineServer:
         try:
             from aiohttp import web
             
-            # Metrics counters
-            self.attack_count = 0
-            self.redis_errors = 0
-            self.db_errors = 0
-            
             async def health(request):
                 status = {
                     'status': 'healthy',
@@ -154,6 +466,10 @@ class AIEngineServer:
 # TYPE ai_engine_attacks_total counter
 ai_engine_attacks_total {self.attack_count}
 
+# HELP ai_engine_batches_total Total number of stream batches processed
+# TYPE ai_engine_batches_total counter
+ai_engine_batches_total {self.batches_processed}
+
 # HELP ai_engine_redis_errors_total Total Redis errors
 # TYPE ai_engine_redis_errors_total counter
 ai_engine_redis_errors_total {self.redis_errors}
@@ -169,7 +485,8 @@ ai_engine_redis_connected {1 if self.redis_client else 0}
 # HELP ai_engine_db_connected Database connection status (1=connected, 0=disconnected)
 # TYPE ai_engine_db_connected gauge
 ai_engine_db_connected {1 if self.db_connection else 0}
-"""
+
+""" + self.pipeline_metrics()
                 return web.Response(text=metrics_text, content_type='text/plain')
             
             app = web.Application()
@@ -216,6 +533,8 @@ ai_engine_db_connected {1 if self.db_connection else 0}
             # Cleanup
             if self.redis_client:
                 await self.redis_client.close()
+            if self.stream_client:
+                await self.stream_client.close()
             if self.db_connection:
                 await self.db_connection.close()
 
@@ -25,6 +25,17 @@ from collections import defaultdict, deque
 from functools import lru_cache
 import threading
 
+try:  # Python 3.11+
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+try:
+    from .bounded_store import BoundedStore
+except ImportError:  # loaded as a standalone module
+    from bounded_store import BoundedStore
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -667,6 +678,97 @@ class AttackPatternDB:
     }
 
 
+# =============================================================================
+# MULTI-PATTERN MATCHER
+# =============================================================================
+
+# Characters IGNORECASE treats as ASCII letters that str.lower() does not fold
+_CASE_FOLD = {0x130: "i", 0x131: "i", 0x17F: "s", 0x212A: "k"}
+
+
+def _required_literals(items) -> Optional[Set[str]]:
+    """
+    Literal strings of which every match of a parsed regex contains at least one
+
+    Returns the most selective alternative set found in the pattern (longest
+    shortest literal), or None when no literal is guaranteed to appear.
+    """
+    candidates: List[Set[str]] = []
+    run: List[str] = []
+
+    def close_run():
+        if run:
+            candidates.append({"".join(run)})
+            run.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL and av < 128:
+            run.append(chr(av).lower())
+            continue
+        close_run()
+        if op is sre_constants.SUBPATTERN:
+            literals = _required_literals(av[-1])
+            if literals:
+                candidates.append(literals)
+        elif op is sre_constants.BRANCH:
+            branches = [_required_literals(branch) for branch in av[1]]
+            if all(branches):
+                candidates.append(set().union(*branches))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            literals = _required_literals(av[2])
+            if literals:
+                candidates.append(literals)
+    close_run()
+
+    if not candidates:
+        return None
+    return max(candidates, key=lambda literals: min(len(l) for l in literals))
+
+
+class PatternMatcher:
+    """
+    Single-pass matcher over an ordered pattern table
+
+    Every regex is reduced to the literals a match must contain. A line is
+    lowercased once, scanned for the table's distinct literals, and only the
+    regexes whose literals are present are run. Benign lines, the bulk of
+    honeypot traffic, cost one substring scan per literal instead of one
+    regex search per pattern. Results are identical to searching each
+    pattern in table order.
+    """
+
+    def __init__(self, pattern_sets: Dict[str, Dict]):
+        # (pattern_key, config, compiled, literals or None) in table order
+        self.entries: List[Tuple[str, Dict, re.Pattern, Optional[frozenset]]] = []
+        for pattern_key, pattern_data in pattern_sets.items():
+            for compiled in pattern_data["compiled"]:
+                literals = _required_literals(sre_parse.parse(compiled.pattern))
+                self.entries.append((
+                    pattern_key, pattern_data["config"], compiled,
+                    frozenset(literals) if literals else None
+                ))
+
+        self.literals = tuple(sorted({l for entry in self.entries if entry[3] for l in entry[3]}))
+        self.unfiltered = sum(1 for entry in self.entries if entry[3] is None)
+
+    def match(self, content: str) -> List[Tuple[str, Dict, re.Match]]:
+        """Return (pattern_key, config, match) for every pattern matching content"""
+        folded = content if content.isascii() else content.translate(_CASE_FOLD)
+        folded = folded.lower()
+        present = {literal for literal in self.literals if literal in folded}
+        if not present and not self.unfiltered:
+            return []
+
+        matches = []
+        for pattern_key, config, compiled, literals in self.entries:
+            if literals is not None and literals.isdisjoint(present):
+                continue
+            match = compiled.search(content)
+            if match:
+                matches.append((pattern_key, config, match))
+        return matches
+
+
 # =============================================================================
 # ATTACK PATTERN ANALYZER
 # =============================================================================
@@ -677,13 +779,24 @@ class AttackPatternAnalyzer:
     Detects and classifies attacks using pattern matching and behavioral analysis
     """
     
-    def __init__(self, redis_client=None, db_connection=None):
+    # Redis key prefix for attacker profiles evicted from memory
+    PROFILE_OFFLOAD_PREFIX = "attacker_profile:"
+    
+    def __init__(self, redis_client=None, db_connection=None,
+                 max_sessions: int = 50000, max_profiles: int = 100000,
+                 profile_ttl: int = 86400, profile_offload_ttl: int = 604800,
+                 max_patterns_per_session: int = 500):
         """
         Initialize analyzer
         
         Args:
             redis_client: Redis client for caching and history
             db_connection: PostgreSQL connection
+            max_sessions: Attack sessions (and IPs with failure counts) kept in memory
+            max_profiles: Attacker profiles kept in memory
+            profile_ttl: Seconds an idle profile stays in memory
+            profile_offload_ttl: Seconds an evicted profile is kept in Redis
+            max_patterns_per_session: Most recent patterns kept per session
         """
         self.redis = redis_client
         self.db = db_connection
@@ -696,15 +809,29 @@ class AttackPatternAnalyzer:
         self._compiled_patterns: Dict[str, Dict] = {}
         self._compile_patterns()
         
-        # Attack tracking
-        self.attack_sessions: Dict[str, AttackSession] = {}
-        self.attacker_profiles: Dict[str, AttackerProfile] = {}
-        self.ip_failure_counts: Dict[str, Dict] = defaultdict(lambda: defaultdict(int))
+        # Per-service pattern tables and matchers, built once
+        self._service_tables: Dict[str, Dict[str, Dict]] = {}
+        self._service_matchers: Dict[str, PatternMatcher] = {}
+        self._build_service_tables()
         
         # Time windows for correlation
         self.session_timeout = 1800  # 30 minutes
         self.correlation_window = 300  # 5 minutes
         
+        # Attack tracking - LRU bounded, idle entries expire
+        self.profile_offload_ttl = profile_offload_ttl
+        self.max_patterns_per_session = max_patterns_per_session
+        self.attack_sessions: BoundedStore = BoundedStore(
+            max_entries=max_sessions, ttl=self.session_timeout
+        )
+        self.attacker_profiles: BoundedStore = BoundedStore(
+            max_entries=max_profiles, ttl=profile_ttl, on_evict=self._offload_profile
+        )
+        self.ip_failure_counts: BoundedStore = BoundedStore(
+            max_entries=max_sessions, ttl=self.session_timeout,
+            default_factory=lambda: defaultdict(int)
+        )
+        
         # Statistics
         self.statistics = defaultdict(int)
         
@@ -753,31 +880,24 @@ class AttackPatternAnalyzer:
         
         self.statistics["analysis_count"] += 1
         
-        # Select relevant pattern sets based on service
-        pattern_sets = self._get_relevant_patterns(service)
+        # Match every relevant pattern in one pass over the content
+        matcher = self._service_matchers[self._service_category(service)]
         
-        # Check all relevant patterns
-        for pattern_key, pattern_data in pattern_sets.items():
-            for compiled_pattern in pattern_data["compiled"]:
-                match = compiled_pattern.search(content)
-                
-                if match:
-                    config = pattern_data["config"]
-                    
-                    pattern = self._create_pattern(
-                        pattern_key=pattern_key,
-                        config=config,
-                        match=match,
-                        content=content,
-                        source_ip=source_ip,
-                        service=service
-                    )
-                    
-                    detected_patterns.append(pattern)
-                    self.statistics["patterns_detected"] += 1
-                    
-                    # Track failure counts for threshold-based detection
-                    self._track_failures(source_ip, pattern_key, config)
+        for pattern_key, config, match in matcher.match(content):
+            pattern = self._create_pattern(
+                pattern_key=pattern_key,
+                config=config,
+                match=match,
+                content=content,
+                source_ip=source_ip,
+                service=service
+            )
+            
+            detected_patterns.append(pattern)
+            self.statistics["patterns_detected"] += 1
+            
+            # Track failure counts for threshold-based detection
+            self._track_failures(source_ip, pattern_key, config)
         
         # Additional behavioral analysis
         behavioral_patterns = self._behavioral_analysis(
@@ -791,36 +911,44 @@ class AttackPatternAnalyzer:
         
         return detected_patterns
     
+    # Service name -> pattern table
+    SERVICE_CATEGORIES = {
+        "ssh": "ssh", "openssh": "ssh",
+        "http": "http", "https": "http", "nginx": "http", "apache": "http", "web": "http",
+        "mysql": "mysql", "mariadb": "mysql",
+        "redis": "redis",
+        "mongodb": "mongo", "mongo": "mongo",
+        "modbus": "ics", "scada": "ics", "ics": "ics",
+    }
+    
+    def _build_service_tables(self):
+        """Precompute the pattern table and matcher for every service category"""
+        selectors = {
+            "ssh": lambda k: k.startswith("ssh:"),
+            "http": lambda k: k.startswith("http:"),
+            "mysql": lambda k: k.startswith("database:") or "mysql" in k,
+            "redis": lambda k: "redis" in k,
+            "mongo": lambda k: "mongo" in k,
+            "ics": lambda k: k.startswith("ics:"),
+            "all": lambda k: True,
+        }
+        
+        for category, selector in selectors.items():
+            relevant = {k: v for k, v in self._compiled_patterns.items() if selector(k)}
+            
+            # Always check malware patterns
+            relevant.update({k: v for k, v in self._compiled_patterns.items() if k.startswith("malware:")})
+            
+            self._service_tables[category] = relevant
+            self._service_matchers[category] = PatternMatcher(relevant)
+    
+    def _service_category(self, service: str) -> str:
+        """Map a service name to its pattern table (unknown services get all patterns)"""
+        return self.SERVICE_CATEGORIES.get(service.lower(), "all")
+    
     def _get_relevant_patterns(self, service: str) -> Dict:
         """Get pattern sets relevant to the service"""
-        service_lower = service.lower()
-        
-        # Map services to pattern categories
-        relevant = {}
-        
-        if service_lower in ["ssh", "openssh"]:
-            relevant.update({k: v for k, v in self._compiled_patterns.items() if k.startswith("ssh:")})
-        elif service_lower in ["http", "https", "nginx", "apache", "web"]:
-            relevant.update({k: v for k, v in self._compiled_patterns.items() if k.startswith("http:")})
-        elif service_lower in ["mysql", "mariadb"]:
-            relevant.update({k: v for k, v in self._compiled_patterns.items() 
-                           if k.startswith("database:") or "mysql" in k})
-        elif service_lower in ["redis"]:
-            relevant.update({k: v for k, v in self._compiled_patterns.items() 
-                           if "redis" in k})
-        elif service_lower in ["mongodb", "mongo"]:
-            relevant.update({k: v for k, v in self._compiled_patterns.items() 
-                           if "mongo" in k})
-        elif service_lower in ["modbus", "scada", "ics"]:
-            relevant.update({k: v for k, v in self._compiled_patterns.items() if k.startswith("ics:")})
-        else:
-            # Return all patterns for unknown services
-            relevant = self._compiled_patterns.copy()
-        
-        # Always check malware patterns
-        relevant.update({k: v for k, v in self._compiled_patterns.items() if k.startswith("malware:")})
-        
-        return relevant
+        return self._service_tables[self._service_category(service)]
     
     def _create_pattern(self, pattern_key: str, config: Dict, match: re.Match,
                        content: str, source_ip: str, service: str) -> AttackPattern:
@@ -1002,6 +1130,8 @@ class AttackPatternAnalyzer:
             session.duration_seconds = (now - start).total_seconds()
             
             session.patterns_detected.extend(patterns)
+            if len(session.patterns_detected) > self.max_patterns_per_session:
+                del session.patterns_detected[:-self.max_patterns_per_session]
             session.total_events += len(patterns)
             
             max_stage = max(max(p.attack_stage for p in patterns), session.max_stage_reached)
@@ -1025,6 +1155,9 @@ class AttackPatternAnalyzer:
         """Update attacker profile"""
         now = datetime.now()
         
+        if source_ip not in self.attacker_profiles:
+            self._restore_profile(source_ip)
+        
         if source_ip not in self.attacker_profiles:
             # Create new profile
             self.attacker_profiles[source_ip] = AttackerProfile(
@@ -1102,6 +1235,43 @@ class AttackPatternAnalyzer:
         else:
             return "low"
     
+    # =========================================================================
+    # PROFILE OFFLOAD
+    # =========================================================================
+    
+    def _offload_profile(self, source_ip: str, profile: AttackerProfile, reason: str):
+        """Keep a profile evicted from memory in Redis so a returning IP resumes it"""
+        if not self.redis:
+            return
+        
+        try:
+            self.redis.setex(
+                f"{self.PROFILE_OFFLOAD_PREFIX}{source_ip}",
+                self.profile_offload_ttl,
+                json.dumps(profile.to_dict())
+            )
+            self.statistics["profiles_offloaded"] += 1
+        except Exception as e:
+            logger.warning(f"Profile offload failed for {source_ip}: {e}")
+    
+    def _restore_profile(self, source_ip: str) -> Optional[AttackerProfile]:
+        """Reload an offloaded profile from Redis into memory"""
+        if not self.redis:
+            return None
+        
+        try:
+            data = self.redis.get(f"{self.PROFILE_OFFLOAD_PREFIX}{source_ip}")
+            if not data:
+                return None
+            profile = AttackerProfile(**json.loads(data))
+        except Exception as e:
+            logger.warning(f"Profile restore failed for {source_ip}: {e}")
+            return None
+        
+        self.attacker_profiles[source_ip] = profile
+        self.statistics["profiles_restored"] += 1
+        return profile
+    
     # =========================================================================
     # REPORTING
     # =========================================================================
@@ -1113,7 +1283,7 @@ class AttackPatternAnalyzer:
     
     def get_attacker_profile(self, source_ip: str) -> Optional[AttackerProfile]:
         """Get attacker profile for IP"""
-        return self.attacker_profiles.get(source_ip)
+        return self.attacker_profiles.get(source_ip) or self._restore_profile(source_ip)
     
     def get_all_sessions(self) -> List[AttackSession]:
         """Get all attack sessions"""
@@ -1143,6 +1313,13 @@ class AttackPatternAnalyzer:
             "attack_type_distribution": dict(attack_type_dist),
             "severity_distribution": dict(severity_dist),
             "kill_chain_distribution": dict(stage_dist),
+            "profiles_offloaded": self.statistics["profiles_offloaded"],
+            "profiles_restored": self.statistics["profiles_restored"],
+            "memory": {
+                "attack_sessions": self.attack_sessions.get_stats(),
+                "attacker_profiles": self.attacker_profiles.get_stats(),
+                "ip_failure_counts": self.ip_failure_counts.get_stats(),
+            },
             "generated_at": datetime.now().isoformat()
         }
     
@@ -0,0 +1,230 @@
+"""
+🗄️ Bounded Store - LRU + TTL
+Cyber Mirage - Role 4: Threat Intelligence Analyst
+
+Size- and age-bounded mapping for per-IP analysis state:
+- Least recently used entries are evicted once max_entries is reached
+- Entries idle for longer than ttl seconds expire
+- An on_evict hook lets owners offload evicted values (e.g. to Redis)
+- Entry counts, eviction counters and an estimated memory footprint
+  for statistics endpoints
+
+Author: Cyber Mirage Team
+Version: 2.0.0 - Production
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Eviction reasons passed to on_evict
+EVICT_CAPACITY = "capacity"
+EVICT_EXPIRED = "expired"
+
+
+class BoundedStore:
+    """
+    Thread-safe LRU mapping with idle-time expiry
+
+    Reads and writes refresh an entry's recency and age. Expired entries are
+    dropped lazily on access and swept from the cold end on every write, so
+    the store never needs a background thread. With default_factory set,
+    store[key] creates missing entries like collections.defaultdict.
+    """
+
+    def __init__(self, max_entries: int = 100000, ttl: Optional[float] = 1800,
+                 on_evict: Optional[Callable[[Hashable, Any, str], None]] = None,
+                 default_factory: Optional[Callable[[], Any]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.default_factory = default_factory
+        self.clock = clock
+        # key -> (value, last_access), least recently used first
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'inserts': 0,
+            'evicted_capacity': 0,
+            'evicted_expired': 0,
+            'peak_entries': 0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Mapping interface
+    # -------------------------------------------------------------------------
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the live value for key (refreshing it) or default"""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return default
+            self.stats['hits'] += 1
+            return entry
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.stats['hits'] += 1
+                return entry
+            self.stats['misses'] += 1
+            if self.default_factory is None:
+                raise KeyError(key)
+            value = self.default_factory()
+            self._insert(key, value)
+            return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._insert(key, value)
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            del self._data[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False
+            if self._is_expired(entry[1], self.clock()):
+                self._evict(key, EVICT_EXPIRED)
+                return False
+            return True
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.keys())
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def keys(self) -> List[Hashable]:
+        return [key for key, _ in self.items()]
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self.items()]
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of live entries, least recently used first"""
+        with self._lock:
+            self.expire()
+            return [(key, value) for key, (value, _) in self._data.items()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    # -------------------------------------------------------------------------
+    # Eviction
+    # -------------------------------------------------------------------------
+
+    def expire(self) -> int:
+        """Drop entries idle for longer than ttl; returns how many"""
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            now = self.clock()
+            expired = 0
+            while self._data:
+                key, (_, last_access) = next(iter(self._data.items()))
+                if not self._is_expired(last_access, now):
+                    break  # ordered by access, the rest are newer
+                self._evict(key, EVICT_EXPIRED)
+                expired += 1
+            return expired
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        now = self.clock()
+        if self._is_expired(entry[1], now):
+            self._evict(key, EVICT_EXPIRED)
+            return None
+        self._data[key] = (entry[0], now)
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def _insert(self, key: Hashable, value: Any) -> None:
+        if key not in self._data:
+            self.stats['inserts'] += 1
+        self._data[key] = (value, self.clock())
+        self._data.move_to_end(key)
+
+        self.expire()
+        while len(self._data) > self.max_entries:
+            self._evict(next(iter(self._data)), EVICT_CAPACITY)
+        self.stats['peak_entries'] = max(self.stats['peak_entries'], len(self._data))
+
+    def _is_expired(self, last_access: float, now: float) -> bool:
+        return self.ttl is not None and now - last_access > self.ttl
+
+    def _evict(self, key: Hashable, reason: str) -> None:
+        value, _ = self._data.pop(key)
+        self.stats[f'evicted_{reason}'] += 1
+        if self.on_evict is not None:
+            try:
+                self.on_evict(key, value, reason)
+            except Exception as e:
+                logger.warning(f"Eviction hook failed for {key}: {e}")
+
+    # -------------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------------
+
+    def estimated_bytes(self, sample_size: int = 32) -> int:
+        """Approximate memory held, extrapolated from the most recent entries"""
+        with self._lock:
+            count = len(self._data)
+            if not count:
+                return sys.getsizeof(self._data)
+            sample = []
+            for key in reversed(self._data):
+                sample.append((key, self._data[key][0]))
+                if len(sample) >= sample_size:
+                    break
+        per_entry = sum(_deep_sizeof(key) + _deep_sizeof(value) for key, value in sample) / len(sample)
+        return int(sys.getsizeof(self._data) + per_entry * count)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Store counters for statistics endpoints"""
+        return {
+            'entries': len(self._data),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'estimated_bytes': self.estimated_bytes(),
+            **self.stats,
+        }
+
+
+def _deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Recursive sys.getsizeof over containers and dataclass/object attributes"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += _deep_sizeof(vars(obj), seen)
+    return size
@@ -18,13 +18,22 @@ import logging
 import hashlib
 import re
 import asyncio
+import socket
+import ipaddress
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional, Any, Tuple, NamedTuple
+from dataclasses import dataclass, asdict, field, fields
 from enum import Enum
 from collections import defaultdict
 from functools import lru_cache
 import threading
+import time
+
+try:
+    from .bounded_store import BoundedStore
+except ImportError:  # loaded as a standalone module
+    from bounded_store import BoundedStore
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -107,6 +116,29 @@ class IPReputationResult:
     
     def to_json(self) -> str:
         return json.dumps(self.to_dict(), indent=2)
+    
+    # Bump when fields change so stale cache entries are ignored
+    CACHE_FORMAT = 1
+    
+    def to_cache(self) -> str:
+        """Compact positional JSON for the shared Redis cache"""
+        values = [self.CACHE_FORMAT] + [getattr(self, f.name) for f in fields(self)]
+        return json.dumps(values, separators=(",", ":"), default=_json_default)
+    
+    @classmethod
+    def from_cache(cls, data: str) -> Optional["IPReputationResult"]:
+        """Inverse of to_cache; None if the entry has another format"""
+        values = json.loads(data)
+        if not values or values[0] != cls.CACHE_FORMAT or len(values) != len(fields(cls)) + 1:
+            return None
+        return cls(*values[1:])
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize enums embedded in raw_data by value"""
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
 
 
 @dataclass
@@ -350,6 +382,151 @@ class ReputationDatabase:
     }
 
 
+# =============================================================================
+# CIDR INDEX
+# =============================================================================
+
+class RangeMatch(NamedTuple):
+    """Most specific ReputationDatabase entry per table for one address"""
+    malicious: Optional[Dict] = None
+    vpn_proxy: Optional[Dict] = None
+    cloud: Optional[Dict] = None
+    whitelist: Optional[Dict] = None
+    geoip: Optional[Dict] = None
+
+
+NO_MATCH = RangeMatch()
+
+
+def parse_range(prefix: str):
+    """
+    Convert a ReputationDatabase key to an ip_network
+
+    Accepts CIDR notation ("203.0.113.0/25", "2a0b:f4c0::/32") and the
+    legacy octet prefixes ("185.220.101.", "209.58.", "8.8").
+    """
+    if "/" in prefix:
+        return ipaddress.ip_network(prefix, strict=False)
+    
+    octets = prefix.rstrip(".").split(".")
+    if not 1 <= len(octets) <= 4 or not all(o.isdigit() and int(o) <= 255 for o in octets):
+        raise ValueError(f"Invalid range prefix: {prefix!r}")
+    address = ".".join(octets + ["0"] * (4 - len(octets)))
+    return ipaddress.ip_network(f"{address}/{8 * len(octets)}")
+
+
+def ip_to_int(ip: str) -> Tuple[int, int]:
+    """Return (version, integer value) for an address string, or (0, 0) if invalid"""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, ValueError):
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+    except (OSError, ValueError):
+        return 0, 0
+
+
+class CIDRIndex:
+    """
+    Longest-prefix-match index over the ReputationDatabase range tables
+    
+    All ranges are flattened into disjoint address segments, each holding
+    the most specific entry of every table that covers it. A lookup is one
+    address parse plus one bisect per IP version and answers the malicious,
+    VPN/proxy, cloud, whitelist and GeoIP checks together.
+    """
+    
+    # RangeMatch field -> ReputationDatabase table
+    TABLES = {
+        "malicious": "MALICIOUS_RANGES",
+        "vpn_proxy": "VPN_PROXY_RANGES",
+        "cloud": "CLOUD_PROVIDERS",
+        "whitelist": "WHITELISTED_RANGES",
+        "geoip": "GEOIP_DATA",
+    }
+    
+    def __init__(self, tables: Dict[str, Dict[str, Dict]]):
+        """
+        Args:
+            tables: RangeMatch field -> {prefix or CIDR: info}
+        """
+        self.range_count = 0
+        # version -> (segment starts, RangeMatch per segment)
+        self._segments: Dict[int, Tuple[List[int], List[RangeMatch]]] = {}
+        
+        for version, bits in ((4, 32), (6, 128)):
+            ranges = []
+            for field_index, field_name in enumerate(RangeMatch._fields):
+                for prefix, info in tables.get(field_name, {}).items():
+                    network = parse_range(prefix)
+                    if network.version == version:
+                        ranges.append((network, field_index, info))
+            self.range_count += len(ranges)
+            self._segments[version] = self._build(ranges, bits)
+    
+    @classmethod
+    def from_database(cls, rep_db: "ReputationDatabase") -> "CIDRIndex":
+        """Build the index from a ReputationDatabase"""
+        tables = {field_name: dict(getattr(rep_db, table)) for field_name, table in cls.TABLES.items()}
+        
+        # _check_malicious_ranges returns a trimmed copy of the entry
+        tables["malicious"] = {
+            prefix: {
+                'category': info['category'],
+                'risk': info['risk'],
+                'description': info['description'],
+                'blacklisted_on': info.get('blacklisted_on', [])
+            }
+            for prefix, info in tables["malicious"].items()
+        }
+        return cls(tables)
+    
+    @staticmethod
+    def _build(ranges: List[Tuple[Any, int, Dict]], bits: int) -> Tuple[List[int], List[RangeMatch]]:
+        """Split the address space at range edges and paint each table, widest first"""
+        edges = {0}
+        for network, _, _ in ranges:
+            edges.add(int(network.network_address))
+            end = int(network.broadcast_address) + 1
+            if end < 1 << bits:
+                edges.add(end)
+        starts = sorted(edges)
+        painted = [[None] * len(RangeMatch._fields) for _ in starts]
+        
+        # Narrower networks are painted last so the longest prefix wins
+        for network, field_index, info in sorted(ranges, key=lambda r: r[0].prefixlen):
+            first = bisect_right(starts, int(network.network_address)) - 1
+            last = bisect_right(starts, int(network.broadcast_address)) - 1
+            for segment in range(first, last + 1):
+                painted[segment][field_index] = info
+        
+        matches = [RangeMatch(*values) if any(v is not None for v in values) else NO_MATCH
+                   for values in painted]
+        return starts, matches
+    
+    def lookup(self, ip: str) -> RangeMatch:
+        """Most specific entry of every table covering ip (NO_MATCH if none or invalid)"""
+        # Inlined IPv4 fast path of ip_to_int; this runs for every connection
+        try:
+            value = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+            starts, matches = self._segments[4]
+        except (OSError, ValueError):
+            version, value = ip_to_int(ip)
+            if not version:
+                return NO_MATCH
+            starts, matches = self._segments[version]
+        return matches[bisect_right(starts, value) - 1]
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Index size for statistics"""
+        return {
+            "ranges": self.range_count,
+            "ipv4_segments": len(self._segments[4][0]),
+            "ipv6_segments": len(self._segments[6][0]),
+        }
+
+
 # =============================================================================
 # IP REPUTATION ENGINE
 # =============================================================================
@@ -360,7 +537,21 @@ class IPReputation:
     Provides comprehensive reputation analysis with multiple data sources
     """
     
-    def __init__(self, redis_client=None, db_connection=None, api_keys: Dict = None):
+    # Redis tier key prefix (hash: summary fields plus serialized result)
+    CACHE_PREFIX = "ip_reputation:"
+    
+    # Cache lifetime by reputation label; bad actors rarely turn good
+    LABEL_TTLS = {
+        "BLOCKED": 86400,
+        "MALICIOUS": 86400,
+        "SUSPICIOUS": 21600,
+        "NEUTRAL": 3600,
+        "GOOD": 21600,
+        "TRUSTED": 86400,
+    }
+    
+    def __init__(self, redis_client=None, db_connection=None, api_keys: Dict = None,
+                 cache_size: int = 100000, negative_ttl: int = 300):
         """
         Initialize IP reputation engine
         
@@ -368,13 +559,15 @@ class IPReputation:
             redis_client: Redis client for caching
             db_connection: PostgreSQL connection
             api_keys: API keys for external services (AbuseIPDB, VirusTotal, etc.)
+            cache_size: Results kept in the in-process LRU
+            negative_ttl: Seconds to cache results with no intelligence at all
         """
         self.redis = redis_client
         self.db = db_connection
         self.api_keys = api_keys or {}
         
-        # Internal storage
-        self.cache: Dict[str, IPReputationResult] = {}
+        # Internal storage - LRU of ip -> (result, expires_at monotonic, negative)
+        self.cache: BoundedStore = BoundedStore(max_entries=cache_size, ttl=None)
         self.abuse_reports: Dict[str, List[AbuseReport]] = defaultdict(list)
         self.ip_history: Dict[str, List[IPHistoryEntry]] = defaultdict(list)
         
@@ -383,9 +576,11 @@ class IPReputation:
         
         # Database reference
         self.rep_db = ReputationDatabase()
+        self.range_index = CIDRIndex.from_database(self.rep_db)
         
         # Cache settings
-        self.cache_ttl = 3600  # 1 hour
+        self.cache_ttl = 3600  # 1 hour, labels not in LABEL_TTLS
+        self.negative_ttl = negative_ttl
         
         logger.info("IPReputation engine initialized")
     
@@ -405,13 +600,18 @@ class IPReputation:
             IPReputationResult with comprehensive analysis
         """
         # Check memory cache
-        if ip in self.cache:
-            cached = self.cache[ip]
-            cached.last_seen = datetime.now().isoformat()
-            self.statistics["cache_hits"] += 1
-            return cached
+        entry = self.cache.get(ip)
+        if entry is not None:
+            cached, expires_at, negative = entry
+            if time.monotonic() < expires_at:
+                cached.last_seen = datetime.now().isoformat()
+                self.statistics["cache_hits"] += 1
+                if negative:
+                    self.statistics["negative_hits"] += 1
+                return cached
+            self.cache.pop(ip)
         
-        # Check Redis cache
+        # Check Redis cache (shared by all workers)
         if self.redis:
             cached = self._check_redis_cache(ip)
             if cached:
@@ -419,6 +619,7 @@ class IPReputation:
                 return cached
         
         # Start fresh analysis
+        self.statistics["cache_misses"] += 1
         self.statistics["ips_checked"] += 1
         
         # Initialize scoring
@@ -429,8 +630,11 @@ class IPReputation:
         blacklist_status = {}
         services_targeted = []
         
+        # One index traversal answers every range table
+        ranges = self.range_index.lookup(ip)
+        
         # 1. Check malicious ranges
-        malicious_info = self._check_malicious_ranges(ip)
+        malicious_info = ranges.malicious
         if malicious_info:
             score -= malicious_info['risk']
             risk_factors.append(f"Known malicious range: {malicious_info['description']}")
@@ -441,7 +645,7 @@ class IPReputation:
                 blacklist_status[bl] = True
         
         # 2. Check VPN/Proxy ranges
-        vpn_info = self._check_vpn_proxy(ip)
+        vpn_info = ranges.vpn_proxy
         if vpn_info:
             score -= vpn_info['risk']
             risk_factors.append(f"VPN/Proxy service: {vpn_info['provider']}")
@@ -449,7 +653,7 @@ class IPReputation:
                 category = vpn_info['category']
         
         # 3. Check cloud providers
-        cloud_info = self._check_cloud_provider(ip)
+        cloud_info = ranges.cloud
         if cloud_info:
             score -= cloud_info['risk']
             if cloud_info['risk'] <= 20:
@@ -458,7 +662,7 @@ class IPReputation:
                 category = cloud_info['category']
         
         # 4. Check whitelist
-        whitelist_info = self._check_whitelist(ip)
+        whitelist_info = ranges.whitelist
         if whitelist_info:
             score = 90
             positive_factors.append(f"Whitelisted: {whitelist_info['provider']}")
@@ -517,7 +721,7 @@ class IPReputation:
         reputation_label = self._score_to_label(score)
         
         # Get geographic info
-        geo_info = self._get_geoip(ip)
+        geo_info = ranges.geoip or self._unknown_geoip()
         
         # Get ASN info
         asn_info = {
@@ -558,60 +762,69 @@ class IPReputation:
         )
         
         # Cache result
-        self.cache[ip] = result
-        self._cache_to_redis(ip, result)
+        ttl, negative = self._cache_ttl(result)
+        self._cache_locally(ip, result, ttl, negative)
+        self._cache_to_redis(ip, result, ttl, negative)
         
         return result
     
+    def _cache_ttl(self, result: IPReputationResult) -> Tuple[int, bool]:
+        """TTL for a result and whether it is a negative (no intelligence) entry"""
+        if not result.risk_factors and not result.positive_factors and not result.attack_count:
+            return self.negative_ttl, True
+        return self.LABEL_TTLS.get(result.reputation_label, self.cache_ttl), False
+    
+    def _cache_locally(self, ip: str, result: IPReputationResult, ttl: int, negative: bool):
+        """Store a result in the in-process LRU tier"""
+        self.cache[ip] = (result, time.monotonic() + ttl, negative)
+    
     def _check_redis_cache(self, ip: str) -> Optional[IPReputationResult]:
         """Check Redis cache for reputation data"""
         if not self.redis:
             return None
         
         try:
-            cache_key = f"ip_reputation:{ip}"
-            data = self.redis.hgetall(cache_key)
+            cache_key = f"{self.CACHE_PREFIX}{ip}"
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hmget(cache_key, 'data', 'negative')
+            pipe.ttl(cache_key)
+            (data, negative), ttl = pipe.execute()
             
-            if data:
-                # Reconstruct from cache (simplified)
-                return None  # For now, always do fresh analysis
+            if not data:
+                return None
+            result = IPReputationResult.from_cache(data)
+            if result is None:
+                return None
         except Exception as e:
+            self.statistics["redis_errors"] += 1
             logger.error(f"Redis cache error: {e}")
+            return None
         
-        return None
+        negative = negative in ("1", b"1")
+        if negative:
+            self.statistics["negative_hits"] += 1
+        
+        # Promote to the local tier for the rest of the entry's lifetime
+        result.last_seen = datetime.now().isoformat()
+        if ttl and ttl > 0:
+            self._cache_locally(ip, result, ttl, negative)
+        return result
     
     def _check_malicious_ranges(self, ip: str) -> Optional[Dict]:
         """Check if IP is in known malicious ranges"""
-        for prefix, info in self.rep_db.MALICIOUS_RANGES.items():
-            if ip.startswith(prefix):
-                return {
-                    'category': info['category'],
-                    'risk': info['risk'],
-                    'description': info['description'],
-                    'blacklisted_on': info.get('blacklisted_on', [])
-                }
-        return None
+        return self.range_index.lookup(ip).malicious
     
     def _check_vpn_proxy(self, ip: str) -> Optional[Dict]:
         """Check if IP is from VPN/Proxy service"""
-        for prefix, info in self.rep_db.VPN_PROXY_RANGES.items():
-            if ip.startswith(prefix):
-                return info
-        return None
+        return self.range_index.lookup(ip).vpn_proxy
     
     def _check_cloud_provider(self, ip: str) -> Optional[Dict]:
         """Check if IP belongs to cloud provider"""
-        for prefix, info in self.rep_db.CLOUD_PROVIDERS.items():
-            if ip.startswith(prefix):
-                return info
-        return None
+        return self.range_index.lookup(ip).cloud
     
     def _check_whitelist(self, ip: str) -> Optional[Dict]:
         """Check if IP is whitelisted"""
-        for prefix, info in self.rep_db.WHITELISTED_RANGES.items():
-            if ip.startswith(prefix):
-                return info
-        return None
+        return self.range_index.lookup(ip).whitelist
     
     def _analyze_ip_structure(self, ip: str) -> Dict[str, Any]:
         """Analyze IP address structure"""
@@ -691,23 +904,21 @@ class IPReputation:
                 if bl in blacklist_status:
                     blacklist_status[bl] = True
         else:
-            # Check known malicious prefixes
-            for prefix in self.rep_db.MALICIOUS_RANGES.keys():
-                if ip.startswith(prefix):
-                    info = self.rep_db.MALICIOUS_RANGES[prefix]
-                    for bl in info.get('blacklisted_on', []):
-                        if bl in blacklist_status:
-                            blacklist_status[bl] = True
-                    break
+            # Check known malicious ranges
+            info = self.range_index.lookup(ip).malicious
+            if info:
+                for bl in info.get('blacklisted_on', []):
+                    if bl in blacklist_status:
+                        blacklist_status[bl] = True
         
         return blacklist_status
     
     def _get_geoip(self, ip: str) -> Dict[str, Any]:
         """Get GeoIP data for IP"""
-        for prefix, data in self.rep_db.GEOIP_DATA.items():
-            if ip.startswith(prefix):
-                return data
-        
+        return self.range_index.lookup(ip).geoip or self._unknown_geoip()
+    
+    def _unknown_geoip(self) -> Dict[str, Any]:
+        """GeoIP placeholder for addresses outside GEOIP_DATA"""
         return {
             "country": "Unknown",
             "country_code": "XX",
@@ -790,22 +1001,27 @@ class IPReputation:
         
         return recommendations
     
-    def _cache_to_redis(self, ip: str, result: IPReputationResult):
+    def _cache_to_redis(self, ip: str, result: IPReputationResult, ttl: int, negative: bool = False):
         """Cache result to Redis"""
         if not self.redis:
             return
         
         try:
-            cache_key = f"ip_reputation:{ip}"
-            self.redis.hset(cache_key, mapping={
+            cache_key = f"{self.CACHE_PREFIX}{ip}"
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(cache_key, mapping={
                 'score': str(result.reputation_score),
                 'label': result.reputation_label,
                 'category': result.category,
                 'confidence': str(result.confidence),
-                'cached_at': datetime.now().isoformat()
+                'cached_at': datetime.now().isoformat(),
+                'negative': '1' if negative else '0',
+                'data': result.to_cache()
             })
-            self.redis.expire(cache_key, self.cache_ttl)
+            pipe.expire(cache_key, ttl)
+            pipe.execute()
         except Exception as e:
+            self.statistics["redis_errors"] += 1
             logger.error(f"Failed to cache to Redis: {e}")
     
     # =========================================================================
@@ -847,8 +1063,13 @@ class IPReputation:
         self.abuse_reports[ip].append(report)
         
         # Invalidate cache for this IP
-        if ip in self.cache:
-            del self.cache[ip]
+        self.cache.pop(ip)
+        if self.redis:
+            try:
+                self.redis.delete(f"{self.CACHE_PREFIX}{ip}")
+            except Exception as e:
+                self.statistics["redis_errors"] += 1
+                logger.error(f"Failed to invalidate Redis cache: {e}")
         
         self.statistics["abuse_reports"] += 1
         
@@ -883,7 +1104,7 @@ class IPReputation:
         """Get IPs with worst reputation"""
         offenders = []
         
-        for ip, result in self.cache.items():
+        for ip, (result, _, _) in self.cache.items():
             offenders.append({
                 "ip": ip,
                 "score": result.reputation_score,
@@ -908,7 +1129,7 @@ class IPReputation:
         reputation_dist = defaultdict(int)
         category_dist = defaultdict(int)
         
-        for result in self.cache.values():
+        for result, _, _ in self.cache.values():
             reputation_dist[result.reputation_label] += 1
             category_dist[result.category] += 1
         
@@ -916,11 +1137,21 @@ class IPReputation:
             "total_ips_checked": self.statistics["ips_checked"],
             "cache_hits": self.statistics["cache_hits"],
             "redis_hits": self.statistics["redis_hits"],
+            "cache_misses": self.statistics["cache_misses"],
+            "negative_hits": self.statistics["negative_hits"],
+            "redis_errors": self.statistics["redis_errors"],
+            "cache_hit_rate": round(
+                (self.statistics["cache_hits"] + self.statistics["redis_hits"]) /
+                max(self.statistics["cache_hits"] + self.statistics["redis_hits"] +
+                    self.statistics["cache_misses"], 1), 3
+            ),
             "cached_ips": len(self.cache),
+            "local_cache": self.cache.get_stats(),
             "abuse_reports": self.statistics["abuse_reports"],
             "bulk_checks": self.statistics["bulk_checks"],
             "reputation_distribution": dict(reputation_dist),
             "category_distribution": dict(category_dist),
+            "range_index": self.range_index.get_stats(),
             "generated_at": datetime.now().isoformat()
         }
     
@@ -941,7 +1172,7 @@ class IPReputation:
 ════════════════════════════════════════════════════════════════════════════
   Total IPs Checked: {stats['total_ips_checked']}
   Cached IPs: {stats['cached_ips']}
-  Cache Hit Rate: {(stats['cache_hits'] / max(stats['total_ips_checked'], 1)) * 100:.1f}%
+  Cache Hit Rate: {stats['cache_hit_rate'] * 100:.1f}%
   Abuse Reports Filed: {stats['abuse_reports']}
 
 📈 REPUTATION DISTRIBUTION
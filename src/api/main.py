@@ -6,8 +6,8 @@ Full production-ready API with security, monitoring, and error handling
 from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
 from contextlib import asynccontextmanager
 import structlog
 import time
@@ -19,6 +19,8 @@ import traceback
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from src.environment.comprehensive_env import ComprehensiveHoneynetEnv
+from src.pipeline.message_queue import get_queue
+from src.pipeline.pipeline_metrics import PipelineCollector
 from stable_baselines3 import PPO
 import numpy as np
 
@@ -49,10 +51,12 @@ ATTACK_DETECTED = None
 ATTACK_DURATION = None
 MODEL_INFERENCE = None
 ERRORS_TOTAL = None
+PIPELINE_COLLECTOR = None
 
 def init_metrics():
     """Initialize metrics only if not already initialized"""
     global REQUEST_COUNT, REQUEST_DURATION, ATTACK_DETECTED, ATTACK_DURATION, MODEL_INFERENCE, ERRORS_TOTAL
+    global PIPELINE_COLLECTOR
     
     if REQUEST_COUNT is None:
         try:
@@ -64,6 +68,19 @@ def init_metrics():
             ERRORS_TOTAL = Counter('errors_total', 'Total errors', ['error_type'])
         except Exception as e:
             logger.error(f"Metrics already initialized: {e}")
+    
+    if PIPELINE_COLLECTOR is None:
+        # Message pipeline stream length and lag (one Redis pipeline per scrape).
+        # The API does not consume: latency and DLQ metrics come from the AI engine
+        try:
+            PIPELINE_COLLECTOR = PipelineCollector(get_queue(
+                redis_host=os.getenv('REDIS_HOST', 'redis'),
+                redis_port=int(os.getenv('REDIS_PORT', 6379)),
+                redis_password=os.getenv('REDIS_PASSWORD')
+            ), local_metrics=False)
+            REGISTRY.register(PIPELINE_COLLECTOR)
+        except Exception as e:
+            logger.error(f"Pipeline metrics not registered: {e}")
 
 # Global state
 app_state = {
@@ -262,7 +279,7 @@ async def readiness_check():
 @app.get("/metrics", tags=["System"])
 async def metrics():
     """Prometheus metrics endpoint"""
-    return generate_latest()
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 # API endpoints
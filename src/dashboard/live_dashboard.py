@@ -881,11 +881,12 @@ def render_attack_map():
             
             # Prepare map data
             map_data = []
+            locations = geo_service.bulk_locate(attack[0] for attack in attacks)
             for attack in attacks:
                 ip, service, timestamp, skill, detected, data = attack
                 
                 # Get geolocation
-                location = geo_service.get_location(ip)
+                location = locations[ip]
                 
                 if location['latitude'] != 0.0 or location['longitude'] != 0.0:
                     map_data.append({
@@ -15,6 +15,7 @@ from .evidence_collector import EvidenceCollector
 from .timeline_builder import TimelineBuilder
 from .log_parser import LogParser
 from .pcap_analyzer import PcapAnalyzer
+from .pcap_reader import PcapReader
 from .chain_of_custody import ChainOfCustody
 from .report_generator import ForensicReportGenerator
 
@@ -23,6 +24,7 @@ __all__ = [
     'TimelineBuilder', 
     'LogParser',
     'PcapAnalyzer',
+    'PcapReader',
     'ChainOfCustody',
     'ForensicReportGenerator'
 ]
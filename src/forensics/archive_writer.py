@@ -0,0 +1,161 @@
+"""
+Archive Writer - كاتب الأرشيف المضغوط
+Cyber Mirage Forensics Module
+
+كتّاب ضغط متدفقة متعددة الخيوط لتصدير القضايا:
+- gzip: ضغط كتل متوازٍ بأسلوب pigz، والناتج ملف gzip عادي يفكه أي gunzip
+- zstd: خيوط zstd الأصلية (يتطلب zstandard)
+
+كل كاتب كائن شبيه بالملف (write/close) يكتب في أي مصبّ ثنائي، فيمكن
+تمرير ناتج tarfile في وضع التدفق 'w|' إليه مباشرة.
+"""
+
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# حجم الكتلة المضغوطة باستقلال (pigz يستخدم 128KiB)
+GZIP_BLOCK_SIZE = 1024 * 1024
+# نافذة deflate: آخر 32KiB من الكتلة السابقة قاموس للتالية
+DEFLATE_WINDOW = 32 * 1024
+
+COMPRESSION_SUFFIXES = {'gzip': 'tar.gz', 'zstd': 'tar.zst'}
+
+
+def _deflate_block(block: bytes, dictionary: bytes, level: int, last: bool) -> bytes:
+    """ضغط كتلة deflate خام؛ الكتل غير الأخيرة تنتهي بـ sync flush لتتصل ببعضها"""
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ParallelGzipWriter:
+    """
+    ضغط gzip متوازٍ بالكتل
+
+    zlib يحرر GIL أثناء الضغط، فتعمل الكتل على خيوط متعددة فعلياً.
+    عدد الكتل قيد الضغط محدود بـ workers * 2 لتقييد الذاكرة، و CRC32
+    يُحسب بالترتيب في خيط الكاتب.
+    """
+
+    def __init__(self, sink: BinaryIO, level: int = 6, workers: Optional[int] = None,
+                 block_size: int = GZIP_BLOCK_SIZE):
+        self.sink = sink
+        self.level = level
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.block_size = block_size
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.closed = False
+
+        self._buffer = bytearray()
+        self._previous_tail = b''
+        self._crc = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gzip-block")
+        self._in_flight = deque()
+
+        # ترويسة gzip: بلا اسم ملف، OS غير معروف
+        self._emit(struct.pack('<BBBBIBB', 0x1f, 0x8b, 8, 0, int(time.time()), 0, 255))
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed ParallelGzipWriter")
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            block = bytes(self._buffer[:self.block_size])
+            del self._buffer[:self.block_size]
+            self._submit(block, last=False)
+        return len(data)
+
+    def _submit(self, block: bytes, last: bool):
+        self._crc = zlib.crc32(block, self._crc)
+        self.bytes_in += len(block)
+        self._in_flight.append(self._pool.submit(_deflate_block, block, self._previous_tail, self.level, last))
+        self._previous_tail = block[-DEFLATE_WINDOW:]
+        while len(self._in_flight) > self.workers * 2:
+            self._emit(self._in_flight.popleft().result())
+
+    def _emit(self, data: bytes):
+        self.sink.write(data)
+        self.bytes_out += len(data)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            # الكتلة الأخيرة (وإن كانت فارغة) تحمل علامة نهاية deflate
+            self._submit(bytes(self._buffer), last=True)
+            self._buffer.clear()
+            while self._in_flight:
+                self._emit(self._in_flight.popleft().result())
+            self._emit(struct.pack('<II', self._crc, self.bytes_in & 0xffffffff))
+        finally:
+            self._pool.shutdown(wait=True)
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ZstdStreamWriter:
+    """ضغط zstd بخيوط المكتبة الأصلية"""
+
+    def __init__(self, sink: BinaryIO, level: int = 3, workers: Optional[int] = None):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        self.sink = sink
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.bytes_in = 0
+        self.closed = False
+        compressor = zstandard.ZstdCompressor(level=level, threads=self.workers if self.workers > 1 else 0)
+        self._writer = compressor.stream_writer(sink, closefd=False)
+
+    @property
+    def bytes_out(self) -> int:
+        return self._writer.tell()
+
+    def write(self, data) -> int:
+        self.bytes_in += len(data)
+        return self._writer.write(data)
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        if not self.closed:
+            self._writer.close()
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_compressed(sink: BinaryIO, compression: str = 'gzip', level: Optional[int] = None,
+                    workers: Optional[int] = None):
+    """كاتب ضغط متعدد الخيوط حسب الاسم (gzip أو zstd)"""
+    if compression == 'gzip':
+        return ParallelGzipWriter(sink, level=6 if level is None else level, workers=workers)
+    if compression == 'zstd':
+        return ZstdStreamWriter(sink, level=3 if level is None else level, workers=workers)
+    raise ValueError(f"Unsupported compression: {compression}")
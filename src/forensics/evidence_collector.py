@@ -5,8 +5,10 @@ Cyber Mirage - Role 4: Threat Intelligence Analyst
 Production-ready digital forensics evidence collection:
 - Comprehensive evidence gathering from all services
 - Chain of custody tracking
-- Evidence integrity verification (hashing)
-- Timeline reconstruction
+- Evidence integrity verification (single-pass streaming hashes)
+- Concurrent collection sweeps with per-collector timings
+- Incremental, indexed timeline reconstruction
+- Streaming case export with parallel compression and hash manifest
 - Automated forensic reporting
 
 Author: Cyber Mirage Team
@@ -16,13 +18,17 @@ Version: 2.0.0 - Production
 import json
 import logging
 import hashlib
+import io
 import os
 import tarfile
 import tempfile
 import subprocess
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from functools import partial
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict, field
 from enum import Enum
 from collections import defaultdict
@@ -30,6 +36,13 @@ from pathlib import Path
 import threading
 import uuid
 
+try:
+    from .archive_writer import COMPRESSION_SUFFIXES, open_compressed
+    from .timeline_store import TimelineStore
+except ImportError:  # run as a script from src/forensics
+    from archive_writer import COMPRESSION_SUFFIXES, open_compressed
+    from timeline_store import TimelineStore
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -160,6 +173,139 @@ class TimelineEvent:
         return asdict(self)
 
 
+@dataclass
+class CollectionResult:
+    """Outcome of one collector in a collection sweep"""
+    collector: str
+    status: str                      # collected, failed, timeout
+    evidence_id: Optional[str] = None
+    started_at: Optional[str] = None
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class CollectionReport:
+    """Per-collector timings and partial results of a collection sweep"""
+    case_id: str
+    started_at: str
+    max_workers: int
+    duration_seconds: float = 0.0
+    time_to_first_evidence: Optional[float] = None
+    results: List[CollectionResult] = field(default_factory=list)
+    evidence: List[EvidenceItem] = field(default_factory=list)
+    
+    @property
+    def complete(self) -> bool:
+        return all(r.status == "collected" for r in self.results)
+    
+    def to_dict(self) -> Dict:
+        return {
+            "case_id": self.case_id,
+            "started_at": self.started_at,
+            "max_workers": self.max_workers,
+            "duration_seconds": self.duration_seconds,
+            "time_to_first_evidence": self.time_to_first_evidence,
+            "complete": self.complete,
+            "results": [r.to_dict() for r in self.results],
+            "evidence_ids": [e.evidence_id for e in self.evidence]
+        }
+
+
+# =============================================================================
+# HASHING
+# =============================================================================
+
+HASH_ALGORITHMS = ("md5", "sha256", "sha512")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Hash a file with all integrity algorithms in a single streaming pass
+    
+    Chunks are read into one reusable buffer and fed to every digest, so
+    memory use stays at chunk_size regardless of the evidence size.
+    
+    Args:
+        path: File to hash
+        chunk_size: Read size in bytes
+    
+    Returns:
+        Dict of hex digests keyed by algorithm, plus "size" in bytes
+    """
+    digests = [hashlib.new(name) for name in HASH_ALGORITHMS]
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    size = 0
+    
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            chunk = view[:read]
+            for digest in digests:
+                digest.update(chunk)
+            size += read
+    
+    hashes: Dict[str, Any] = {name: digest.hexdigest() for name, digest in zip(HASH_ALGORITHMS, digests)}
+    hashes["size"] = size
+    return hashes
+
+
+class HashingWriter:
+    """
+    File-like sink that hashes everything written through it
+    
+    Wraps a binary file and updates all integrity digests as data is
+    written, so streamed exports are hashed without being read back.
+    """
+    
+    def __init__(self, raw, encoding: str = "utf-8"):
+        self.raw = raw
+        self.encoding = encoding
+        self.size = 0
+        self._digests = [hashlib.new(name) for name in HASH_ALGORITHMS]
+    
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            data = data.encode(self.encoding)
+        for digest in self._digests:
+            digest.update(data)
+        self.size += len(data)
+        self.raw.write(data)
+        return len(data)
+    
+    def flush(self):
+        self.raw.flush()
+    
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: digest.hexdigest() for name, digest in zip(HASH_ALGORITHMS, self._digests)}
+
+
+class HashingReader:
+    """File-like source that hashes everything read through it"""
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self.size = 0
+        self._digests = [hashlib.new(name) for name in HASH_ALGORITHMS]
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        for digest in self._digests:
+            digest.update(data)
+        self.size += len(data)
+        return data
+    
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: digest.hexdigest() for name, digest in zip(HASH_ALGORITHMS, self._digests)}
+
+
 # =============================================================================
 # EVIDENCE COLLECTOR
 # =============================================================================
@@ -210,6 +356,29 @@ class EvidenceCollector:
         }
     }
     
+    # Thread pool size for concurrent collection sweeps (all collectors are I/O bound)
+    DEFAULT_COLLECTION_WORKERS = 8
+    
+    # Items smaller than this are verified in-process by verify_case
+    PARALLEL_VERIFY_MIN_BYTES = 8 * 1024 * 1024
+    
+    # Database export: (evidence key, table, query, row limit of the json snapshot)
+    DATABASE_EXPORT_TABLES = [
+        ("attack_sessions", "attack_sessions",
+         "SELECT * FROM attack_sessions ORDER BY timestamp DESC", 1000),
+        ("threat_intelligence", "threat_intelligence",
+         "SELECT * FROM threat_intelligence ORDER BY collected_at DESC", 500),
+        ("recent_alerts", "alerts",
+         "SELECT * FROM alerts WHERE created_at > NOW() - INTERVAL '7 days' ORDER BY created_at DESC", None),
+    ]
+    DATABASE_EXPORT_FORMATS = ("json", "jsonl", "csv")
+    
+    # Rows fetched per round trip by server-side cursors
+    DATABASE_EXPORT_ITERSIZE = 2000
+    
+    # Indexed fields of case timelines
+    TIMELINE_INDEX_FIELDS = ("actor", "source", "severity")
+    
     def __init__(self, redis_client=None, db_connection=None, evidence_base_path: str = "/tmp/evidence"):
         """
         Initialize evidence collector
@@ -231,8 +400,13 @@ class EvidenceCollector:
         self.cases: Dict[str, ForensicCase] = {}
         self.timeline: List[TimelineEvent] = []
         
+        # Per-case incremental timelines and the serialized form of their events
+        self._timelines: Dict[str, TimelineStore] = {}
+        self._timeline_dicts: Dict[str, Dict[int, Dict]] = defaultdict(dict)
+        
         # Statistics
         self.statistics = defaultdict(int)
+        self.last_collection: Optional[CollectionReport] = None
         
         # Lock for thread safety
         self._lock = threading.Lock()
@@ -306,64 +480,137 @@ class EvidenceCollector:
     # EVIDENCE COLLECTION
     # =========================================================================
     
-    def collect_all(self, case_id: str) -> List[EvidenceItem]:
+    def collect_all(self, case_id: str, max_workers: int = 1) -> List[EvidenceItem]:
         """
         Collect all available evidence for a case
         
         Args:
             case_id: Case ID to associate evidence with
+            max_workers: Collectors to run concurrently (1 = one after another)
         
         Returns:
             List of collected evidence items
         """
-        collected = []
+        return self.run_collection(case_id, max_workers=max_workers).evidence
+    
+    def run_collection(self, case_id: str, max_workers: Optional[int] = None,
+                       timeout: Optional[float] = None,
+                       on_evidence: Optional[Callable[[EvidenceItem], None]] = None) -> CollectionReport:
+        """
+        Run every collector for a case on a bounded thread pool
+        
+        Container logs, database, Redis, threat intel and network collectors
+        are independent and I/O bound, so they run concurrently. Evidence is
+        handed to on_evidence as soon as each collector finishes.
+        
+        Args:
+            case_id: Case ID to associate evidence with
+            max_workers: Pool size (default DEFAULT_COLLECTION_WORKERS, 1 = sequential)
+            timeout: Seconds to wait for the whole sweep; unfinished collectors
+                     are reported as "timeout" (their evidence is still stored
+                     on the case if they complete later)
+            on_evidence: Callback for each evidence item, in completion order
         
-        logger.info(f"Starting comprehensive evidence collection for case {case_id}")
+        Returns:
+            CollectionReport with per-collector results in plan order
+        """
+        plan = self._collection_plan(case_id)
+        workers = max(1, min(max_workers or self.DEFAULT_COLLECTION_WORKERS, len(plan)))
+        report = CollectionReport(case_id=case_id, started_at=datetime.now().isoformat(), max_workers=workers)
+        outcomes: Dict[str, Tuple[CollectionResult, Optional[EvidenceItem]]] = {}
+        start = time.perf_counter()
+        
+        logger.info(f"Starting comprehensive evidence collection for case {case_id} ({workers} workers)")
+        
+        def finished(name: str, outcome: Tuple[CollectionResult, Optional[EvidenceItem]]):
+            outcomes[name] = outcome
+            evidence = outcome[1]
+            if evidence is None:
+                return
+            if report.time_to_first_evidence is None:
+                report.time_to_first_evidence = round(time.perf_counter() - start, 3)
+            if on_evidence:
+                try:
+                    on_evidence(evidence)
+                except Exception as e:
+                    logger.error(f"Evidence callback failed for {evidence.evidence_id}: {e}")
         
-        # 1. Collect container logs
-        for container_name, config in self.CONTAINER_SERVICES.items():
+        if workers == 1:
+            for name, collector in plan:
+                if timeout is not None and time.perf_counter() - start > timeout:
+                    break
+                finished(name, self._run_collector(name, collector))
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evidence")
+            futures = {executor.submit(self._run_collector, name, collector): name for name, collector in plan}
             try:
-                evidence = self.collect_container_logs(case_id, container_name)
-                if evidence:
-                    collected.append(evidence)
-            except Exception as e:
-                logger.error(f"Failed to collect from {container_name}: {e}")
+                for future in as_completed(futures, timeout=timeout):
+                    finished(futures[future], future.result())
+            except FuturesTimeout:
+                logger.warning(f"Evidence collection for {case_id} timed out after {timeout}s")
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        for name, _ in plan:
+            if name in outcomes:
+                result, evidence = outcomes[name]
+                report.results.append(result)
+                if evidence is not None:
+                    report.evidence.append(evidence)
+            else:
+                report.results.append(CollectionResult(
+                    collector=name, status="timeout", error=f"Not finished within {timeout}s"))
         
-        # 2. Collect database evidence
-        try:
-            db_evidence = self.collect_database_evidence(case_id)
-            if db_evidence:
-                collected.append(db_evidence)
-        except Exception as e:
-            logger.error(f"Failed to collect database evidence: {e}")
+        report.duration_seconds = round(time.perf_counter() - start, 3)
+        with self._lock:
+            self.last_collection = report
+            self.statistics["collection_sweeps"] += 1
         
-        # 3. Collect Redis session data
-        try:
-            redis_evidence = self.collect_redis_evidence(case_id)
-            if redis_evidence:
-                collected.append(redis_evidence)
-        except Exception as e:
-            logger.error(f"Failed to collect Redis evidence: {e}")
+        logger.info(f"Evidence collection complete. Collected {len(report.evidence)} items "
+                    f"in {report.duration_seconds:.2f}s")
         
-        # 4. Collect threat intelligence data
-        try:
-            intel_evidence = self.collect_threat_intel(case_id)
-            if intel_evidence:
-                collected.append(intel_evidence)
-        except Exception as e:
-            logger.error(f"Failed to collect threat intelligence: {e}")
+        return report
+    
+    def _collection_plan(self, case_id: str) -> List[Tuple[str, Callable[[], Optional[EvidenceItem]]]]:
+        """Named collectors of a full sweep, in report order"""
+        plan = [
+            (f"container_logs:{container_name}", partial(self.collect_container_logs, case_id, container_name))
+            for container_name in self.CONTAINER_SERVICES
+        ]
+        plan += [
+            ("database", partial(self.collect_database_evidence, case_id)),
+            ("redis", partial(self.collect_redis_evidence, case_id)),
+            ("threat_intel", partial(self.collect_threat_intel, case_id)),
+            ("network", partial(self.collect_network_data, case_id)),
+        ]
+        return plan
+    
+    def _run_collector(
+        self, name: str, collector: Callable[[], Optional[EvidenceItem]]
+    ) -> Tuple[CollectionResult, Optional[EvidenceItem]]:
+        """Run one collector and time it"""
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        evidence = None
+        error = None
         
-        # 5. Collect network data
         try:
-            network_evidence = self.collect_network_data(case_id)
-            if network_evidence:
-                collected.append(network_evidence)
+            evidence = collector()
+            if evidence is None:
+                error = "No evidence returned"
         except Exception as e:
-            logger.error(f"Failed to collect network data: {e}")
-        
-        logger.info(f"Evidence collection complete. Collected {len(collected)} items")
-        
-        return collected
+            logger.error(f"Failed to collect {name}: {e}")
+            error = str(e)
+        
+        result = CollectionResult(
+            collector=name,
+            status="collected" if evidence is not None else "failed",
+            evidence_id=evidence.evidence_id if evidence is not None else None,
+            started_at=started_at,
+            duration_seconds=round(time.perf_counter() - start, 3),
+            error=error
+        )
+        return result, evidence
     
     def collect_container_logs(self, case_id: str, container_name: str,
                                time_range: int = 24) -> Optional[EvidenceItem]:
@@ -464,8 +711,7 @@ class EvidenceCollector:
                 self.evidence_items[evidence_id] = evidence
                 if case_id in self.cases:
                     self.cases[case_id].evidence_items.append(evidence_id)
-            
-            self.statistics["container_logs_collected"] += 1
+                self.statistics["container_logs_collected"] += 1
             
             logger.info(f"Collected logs from {container_name}: {evidence_id}")
             
@@ -478,96 +724,50 @@ class EvidenceCollector:
             logger.error(f"Error collecting logs from {container_name}: {e}")
             return None
     
-    def collect_database_evidence(self, case_id: str) -> Optional[EvidenceItem]:
+    def collect_database_evidence(self, case_id: str, export_format: str = "json",
+                                  itersize: Optional[int] = None) -> Optional[EvidenceItem]:
         """
         Collect evidence from PostgreSQL database
         
+        "json" writes a capped snapshot of the most recent rows as one
+        document. "jsonl" and "csv" stream complete tables to disk in
+        bounded memory and hash the file while it is written:
+        - jsonl: one JSON object per row, read through server-side cursors
+        - csv: COPY ... TO STDOUT blocks, replayable with psql
+        
         Args:
             case_id: Case ID
+            export_format: json, jsonl or csv
+            itersize: Rows per round trip for server-side cursors
         
         Returns:
             EvidenceItem or None
         """
+        if export_format not in self.DATABASE_EXPORT_FORMATS:
+            raise ValueError(f"Unsupported database export format: {export_format}")
+        
         evidence_id = f"EVD-{uuid.uuid4().hex[:12].upper()}"
         timestamp = datetime.now()
         
-        file_name = f"database_evidence_{timestamp.strftime('%Y%m%d_%H%M%S')}.json"
+        file_name = f"database_evidence_{timestamp.strftime('%Y%m%d_%H%M%S')}.{export_format}"
         file_path = self.evidence_path / case_id / file_name
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
+        header = {
+            "collection_time": timestamp.isoformat(),
+            "case_id": case_id,
+            "evidence_id": evidence_id,
+            "database": "cyber_mirage"
+        }
+        
         try:
-            evidence_data = {
-                "collection_time": timestamp.isoformat(),
-                "case_id": case_id,
-                "evidence_id": evidence_id,
-                "database": "cyber_mirage",
-                "tables_collected": []
-            }
-            
-            if self.db:
-                cursor = self.db.cursor()
-                
-                # Collect attack data
-                try:
-                    cursor.execute("""
-                        SELECT * FROM attack_sessions 
-                        ORDER BY timestamp DESC 
-                        LIMIT 1000
-                    """)
-                    columns = [desc[0] for desc in cursor.description]
-                    rows = cursor.fetchall()
-                    evidence_data["attack_sessions"] = [
-                        dict(zip(columns, row)) for row in rows
-                    ]
-                    evidence_data["tables_collected"].append("attack_sessions")
-                except:
-                    evidence_data["attack_sessions"] = []
-                
-                # Collect threat intel
-                try:
-                    cursor.execute("""
-                        SELECT * FROM threat_intelligence 
-                        ORDER BY collected_at DESC 
-                        LIMIT 500
-                    """)
-                    columns = [desc[0] for desc in cursor.description]
-                    rows = cursor.fetchall()
-                    evidence_data["threat_intelligence"] = [
-                        dict(zip(columns, row)) for row in rows
-                    ]
-                    evidence_data["tables_collected"].append("threat_intelligence")
-                except:
-                    evidence_data["threat_intelligence"] = []
-                
-                # Collect alerts
-                try:
-                    cursor.execute("""
-                        SELECT * FROM alerts 
-                        WHERE created_at > NOW() - INTERVAL '7 days'
-                        ORDER BY created_at DESC
-                    """)
-                    columns = [desc[0] for desc in cursor.description]
-                    rows = cursor.fetchall()
-                    evidence_data["recent_alerts"] = [
-                        dict(zip(columns, row)) for row in rows
-                    ]
-                    evidence_data["tables_collected"].append("alerts")
-                except:
-                    evidence_data["recent_alerts"] = []
-                
-                cursor.close()
+            truncated: List[str] = []
+            if export_format == "json":
+                tables, record_counts, file_size, hashes = self._write_database_snapshot(file_path, header)
             else:
-                evidence_data["note"] = "Database connection not available - sample data"
-                evidence_data["attack_sessions"] = []
-                evidence_data["threat_intelligence"] = []
-            
-            # Write to file
-            json_content = json.dumps(evidence_data, indent=2, default=str)
-            file_path.write_text(json_content)
-            
-            # Calculate hashes
-            file_data = json_content.encode()
-            hashes = self._calculate_hashes(file_data)
+                tables, record_counts, truncated, file_size, hashes = self._stream_database_export(
+                    file_path, header, export_format, itersize or self.DATABASE_EXPORT_ITERSIZE
+                )
             
             # Create evidence item
             evidence = EvidenceItem(
@@ -579,18 +779,16 @@ class EvidenceCollector:
                 collected_at=timestamp.isoformat(),
                 collector="CyberMirage_EvidenceCollector",
                 file_path=str(file_path),
-                file_size=len(file_data),
+                file_size=file_size,
                 hash_md5=hashes["md5"],
                 hash_sha256=hashes["sha256"],
                 hash_sha512=hashes["sha512"],
                 metadata={
                     "database": "cyber_mirage",
-                    "tables": evidence_data["tables_collected"],
-                    "record_counts": {
-                        "attack_sessions": len(evidence_data.get("attack_sessions", [])),
-                        "threat_intelligence": len(evidence_data.get("threat_intelligence", [])),
-                        "recent_alerts": len(evidence_data.get("recent_alerts", []))
-                    }
+                    "format": export_format,
+                    "tables": tables,
+                    "record_counts": record_counts,
+                    "truncated_tables": truncated
                 },
                 tags=["database", "postgresql", "structured"],
                 status=EvidenceStatus.COLLECTED.value,
@@ -608,10 +806,9 @@ class EvidenceCollector:
                 self.evidence_items[evidence_id] = evidence
                 if case_id in self.cases:
                     self.cases[case_id].evidence_items.append(evidence_id)
+                self.statistics["database_dumps_collected"] += 1
             
-            self.statistics["database_dumps_collected"] += 1
-            
-            logger.info(f"Collected database evidence: {evidence_id}")
+            logger.info(f"Collected database evidence ({export_format}): {evidence_id}")
             
             return evidence
             
@@ -619,6 +816,137 @@ class EvidenceCollector:
             logger.error(f"Error collecting database evidence: {e}")
             return None
     
+    def _write_database_snapshot(self, file_path: Path,
+                                 header: Dict) -> Tuple[List[str], Dict[str, int], int, Dict[str, str]]:
+        """Write the capped single-document JSON snapshot"""
+        evidence_data = dict(header, tables_collected=[])
+        
+        if self.db:
+            cursor = self.db.cursor()
+            
+            for key, table, query, limit in self.DATABASE_EXPORT_TABLES:
+                try:
+                    cursor.execute(f"{query} LIMIT {limit}" if limit else query)
+                    columns = [desc[0] for desc in cursor.description]
+                    rows = cursor.fetchall()
+                    evidence_data[key] = [
+                        dict(zip(columns, row)) for row in rows
+                    ]
+                    evidence_data["tables_collected"].append(table)
+                except Exception:
+                    evidence_data[key] = []
+            
+            cursor.close()
+        else:
+            evidence_data["note"] = "Database connection not available - sample data"
+            evidence_data["attack_sessions"] = []
+            evidence_data["threat_intelligence"] = []
+        
+        # Write to file
+        json_content = json.dumps(evidence_data, indent=2, default=str)
+        file_path.write_text(json_content)
+        
+        file_data = json_content.encode()
+        record_counts = {
+            key: len(evidence_data.get(key, [])) for key, _, _, _ in self.DATABASE_EXPORT_TABLES
+        }
+        return evidence_data["tables_collected"], record_counts, len(file_data), self._calculate_hashes(file_data)
+    
+    def _stream_database_export(
+        self, file_path: Path, header: Dict, export_format: str, itersize: int
+    ) -> Tuple[List[str], Dict[str, Optional[int]], List[str], int, Dict[str, str]]:
+        """
+        Stream complete tables as JSONL or COPY CSV, hashing while writing
+        
+        A table that fails midway keeps the rows already written: it is
+        followed by a truncation marker, listed in the truncated tables and
+        its record count is the rows written (None for CSV, where COPY does
+        not report a partial count).
+        """
+        tables: List[str] = []
+        truncated: List[str] = []
+        record_counts: Dict[str, Optional[int]] = {}
+        
+        with open(file_path, 'wb') as raw:
+            out = HashingWriter(raw)
+            if export_format == "jsonl":
+                out.write(json.dumps(dict(header, type="header", format="jsonl")) + "\n")
+            else:
+                out.write(f"-- Cyber Mirage database evidence {header['evidence_id']}\n"
+                          f"-- Case: {header['case_id']}  Collected: {header['collection_time']}\n")
+            
+            if not self.db:
+                logger.warning("Database connection not available - empty database export")
+            
+            for key, table, query, _ in (self.DATABASE_EXPORT_TABLES if self.db else []):
+                try:
+                    if export_format == "jsonl":
+                        self._stream_table_jsonl(out, header["evidence_id"], key, query, itersize, record_counts)
+                    else:
+                        record_counts[key] = None
+                        record_counts[key] = self._stream_table_copy(out, table, query)
+                    tables.append(table)
+                except Exception as e:
+                    logger.warning(f"Database export of {table} failed after {record_counts[key]} rows: {e}")
+                    # A failed statement aborts the transaction; later tables need a fresh one
+                    self.db.rollback()
+                    truncated.append(table)
+                    if export_format == "jsonl":
+                        out.write(json.dumps({"type": "truncated", "table": key,
+                                              "rows": record_counts[key], "error": str(e)}) + "\n")
+                    else:
+                        error = " ".join(str(e).split())
+                        out.write(f"-- TRUNCATED {table}: {error}\n")
+            
+            if export_format == "jsonl":
+                out.write(json.dumps({
+                    "type": "summary",
+                    "tables_collected": tables,
+                    "record_counts": record_counts,
+                    "truncated_tables": truncated
+                }) + "\n")
+            out.flush()
+        
+        return tables, record_counts, truncated, out.size, out.hexdigests()
+    
+    def _stream_table_jsonl(self, out: HashingWriter, evidence_id: str, key: str,
+                            query: str, itersize: int, record_counts: Dict[str, Optional[int]]) -> int:
+        """
+        Write one JSONL line per row from a named (server-side) cursor
+        
+        record_counts[key] holds the rows written, also when the read fails midway.
+        """
+        # withhold keeps the cursor usable on autocommit connections
+        cursor = self.db.cursor(name=f"evidence_{evidence_id.lower().replace('-', '_')}_{key}",
+                                withhold=bool(getattr(self.db, "autocommit", False)))
+        cursor.itersize = itersize
+        count = 0
+        try:
+            cursor.execute(query)
+            columns = None
+            for row in cursor:
+                if columns is None:
+                    columns = [desc[0] for desc in cursor.description]
+                out.write(json.dumps({"type": "row", "table": key, "data": dict(zip(columns, row))},
+                                     default=str) + "\n")
+                count += 1
+        finally:
+            record_counts[key] = count
+            cursor.close()
+        return count
+    
+    def _stream_table_copy(self, out: HashingWriter, table: str, query: str) -> int:
+        """Append a pg_dump style COPY block for one table"""
+        out.write(f"\nCOPY {table} FROM stdin WITH (FORMAT csv, HEADER);\n")
+        cursor = self.db.cursor()
+        try:
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+            count = max(cursor.rowcount, 0)
+        finally:
+            cursor.close()
+            out.write("\\.\n")
+        return count
+    
     def collect_redis_evidence(self, case_id: str) -> Optional[EvidenceItem]:
         """
         Collect evidence from Redis cache
@@ -732,8 +1060,7 @@ class EvidenceCollector:
                 self.evidence_items[evidence_id] = evidence
                 if case_id in self.cases:
                     self.cases[case_id].evidence_items.append(evidence_id)
-            
-            self.statistics["redis_exports"] += 1
+                self.statistics["redis_exports"] += 1
             
             logger.info(f"Collected Redis evidence: {evidence_id}")
             
@@ -844,8 +1171,7 @@ class EvidenceCollector:
                 self.evidence_items[evidence_id] = evidence
                 if case_id in self.cases:
                     self.cases[case_id].evidence_items.append(evidence_id)
-            
-            self.statistics["threat_intel_collected"] += 1
+                self.statistics["threat_intel_collected"] += 1
             
             logger.info(f"Collected threat intel evidence: {evidence_id}")
             
@@ -949,8 +1275,7 @@ class EvidenceCollector:
                 self.evidence_items[evidence_id] = evidence
                 if case_id in self.cases:
                     self.cases[case_id].evidence_items.append(evidence_id)
-            
-            self.statistics["network_data_collected"] += 1
+                self.statistics["network_data_collected"] += 1
             
             logger.info(f"Collected network evidence: {evidence_id}")
             
@@ -965,17 +1290,16 @@ class EvidenceCollector:
     # =========================================================================
     
     def _calculate_hashes(self, data: bytes) -> Dict[str, str]:
-        """Calculate multiple hash values for data integrity"""
-        return {
-            "md5": hashlib.md5(data).hexdigest(),
-            "sha256": hashlib.sha256(data).hexdigest(),
-            "sha512": hashlib.sha512(data).hexdigest()
-        }
+        """Calculate multiple hash values for in-memory data"""
+        return {name: hashlib.new(name, data).hexdigest() for name in HASH_ALGORITHMS}
     
     def verify_evidence(self, evidence_id: str) -> Tuple[bool, str]:
         """
         Verify evidence integrity
         
+        The file is streamed through all digests in one pass, so
+        multi-GB captures are verified in constant memory.
+        
         Args:
             evidence_id: Evidence ID to verify
         
@@ -990,12 +1314,65 @@ class EvidenceCollector:
         if not evidence.file_path or not Path(evidence.file_path).exists():
             return False, "Evidence file not found"
         
-        # Read file and calculate hashes
-        with open(evidence.file_path, 'rb') as f:
-            file_data = f.read()
+        try:
+            current_hashes = hash_file(evidence.file_path)
+        except OSError as e:
+            return False, f"Error reading evidence file: {e}"
+        
+        return self._apply_verification(evidence, current_hashes)
+    
+    def verify_case(self, case_id: str, max_workers: Optional[int] = None) -> Dict[str, Tuple[bool, str]]:
+        """
+        Verify the integrity of every evidence item in a case
+        
+        Large files are hashed in parallel worker processes; small files
+        and missing files are handled in-process.
         
-        current_hashes = self._calculate_hashes(file_data)
+        Args:
+            case_id: Case ID
+            max_workers: Worker processes (default: CPU count, 1 = in-process)
+        
+        Returns:
+            Dict of evidence_id -> (is_valid, message), in case order
+        """
+        case = self.cases.get(case_id)
+        evidence_ids = list(case.evidence_items) if case else [
+            e.evidence_id for e in self.get_evidence_for_case(case_id)
+        ]
         
+        results: Dict[str, Tuple[bool, str]] = {evidence_id: None for evidence_id in evidence_ids}
+        large = []
+        for evidence_id in evidence_ids:
+            evidence = self.evidence_items.get(evidence_id)
+            path = Path(evidence.file_path) if evidence and evidence.file_path else None
+            if path and path.exists() and path.stat().st_size >= self.PARALLEL_VERIFY_MIN_BYTES:
+                large.append(evidence)
+            else:
+                results[evidence_id] = self.verify_evidence(evidence_id)
+        
+        workers = min(max_workers or os.cpu_count() or 1, len(large))
+        if workers <= 1:
+            for evidence in large:
+                results[evidence.evidence_id] = self.verify_evidence(evidence.evidence_id)
+        elif large:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(hash_file, e.file_path): e for e in large}
+                for future in as_completed(futures):
+                    evidence = futures[future]
+                    try:
+                        current_hashes = future.result()
+                    except OSError as e:
+                        results[evidence.evidence_id] = (False, f"Error reading evidence file: {e}")
+                        continue
+                    results[evidence.evidence_id] = self._apply_verification(evidence, current_hashes)
+        
+        verified = sum(1 for ok, _ in results.values() if ok)
+        logger.info(f"Verified case {case_id}: {verified}/{len(results)} items intact")
+        
+        return results
+    
+    def _apply_verification(self, evidence: EvidenceItem, current_hashes: Dict[str, Any]) -> Tuple[bool, str]:
+        """Compare freshly computed hashes with the recorded ones and update the item"""
         # Compare hashes
         if current_hashes["sha256"] != evidence.hash_sha256:
             evidence.status = EvidenceStatus.CORRUPTED.value
@@ -1005,18 +1382,19 @@ class EvidenceCollector:
         if current_hashes["md5"] != evidence.hash_md5:
             return False, "MD5 hash mismatch - evidence may be tampered"
         
-        # Update chain of custody
-        evidence.chain_of_custody.append({
-            "action": ChainOfCustodyAction.VERIFIED.value,
-            "timestamp": datetime.now().isoformat(),
-            "actor": "system",
-            "details": "Integrity verification passed"
-        })
-        
-        evidence.status = EvidenceStatus.VERIFIED.value
-        evidence.integrity_verified = True
-        
-        self.statistics["verifications"] += 1
+        with self._lock:
+            # Update chain of custody
+            evidence.chain_of_custody.append({
+                "action": ChainOfCustodyAction.VERIFIED.value,
+                "timestamp": datetime.now().isoformat(),
+                "actor": "system",
+                "details": "Integrity verification passed"
+            })
+            
+            evidence.status = EvidenceStatus.VERIFIED.value
+            evidence.integrity_verified = True
+            
+            self.statistics["verifications"] += 1
         
         return True, "Evidence integrity verified"
     
@@ -1039,54 +1417,94 @@ class EvidenceCollector:
         """
         Build forensic timeline from collected evidence
         
+        The timeline is kept per case and built incrementally: only
+        evidence not seen by a previous call is parsed, and each item's
+        events are merged into the sorted timeline as one run.
+        
         Args:
             case_id: Case ID
         
         Returns:
             List of timeline events
         """
-        timeline = []
-        evidence_items = self.get_evidence_for_case(case_id)
-        
-        for evidence in evidence_items:
-            # Add collection event
-            timeline.append(TimelineEvent(
-                timestamp=evidence.collected_at,
-                event_type="evidence_collected",
-                source=evidence.source,
-                description=f"Evidence collected: {evidence.description}",
-                evidence_id=evidence.evidence_id,
-                actor="system",
-                target=evidence.source,
-                severity="info",
-                indicators=evidence.tags
-            ))
-            
-            # Parse evidence file for events (if applicable)
-            if evidence.file_path and Path(evidence.file_path).exists():
-                try:
-                    with open(evidence.file_path, 'r') as f:
-                        content = f.read()
-                    
-                    # Extract events from JSON evidence
-                    if evidence.file_path.endswith('.json'):
-                        data = json.loads(content)
-                        extracted_events = self._extract_events_from_json(data, evidence)
-                        timeline.extend(extracted_events)
-                except Exception as e:
-                    logger.debug(f"Could not parse events from {evidence.file_path}: {e}")
+        store = self._timelines.get(case_id)
+        if store is None:
+            store = self._timelines[case_id] = TimelineStore(index_fields=self.TIMELINE_INDEX_FIELDS)
         
-        # Sort by timestamp
-        timeline.sort(key=lambda x: x.timestamp)
+        runs = []
+        for evidence in self.get_evidence_for_case(case_id):
+            if store.has_source(evidence.evidence_id):
+                continue
+            runs.append((evidence.evidence_id, self._timeline_events_for(evidence)))
+        
+        if runs:
+            store.extend_runs(runs)
+            logger.debug(f"Timeline {case_id}: parsed {len(runs)} new evidence items")
+        
+        timeline = store.events
         
         # Store timeline
         self.timeline = timeline
         
         if case_id in self.cases:
-            self.cases[case_id].timeline_events = [e.to_dict() for e in timeline]
+            # Events are serialized once, when first seen
+            dicts = self._timeline_dicts[case_id]
+            for event in timeline:
+                if id(event) not in dicts:
+                    dicts[id(event)] = event.to_dict()
+            self.cases[case_id].timeline_events = [dicts[id(e)] for e in timeline]
         
         return timeline
     
+    def query_timeline(self, case_id: str, start: Any = None, end: Any = None,
+                       field: Optional[str] = None, value: Any = None) -> List[TimelineEvent]:
+        """
+        Query a built case timeline through its indexes
+        
+        Args:
+            case_id: Case ID
+            start: Range start (datetime or ISO string), requires end
+            end: Range end, inclusive
+            field: Indexed field (actor, source, severity)
+            value: Field value to match
+        
+        Returns:
+            Matching events in time order
+        """
+        store = self._timelines.get(case_id)
+        if store is None:
+            return []
+        if start is not None and end is not None:
+            return store.between(start, end, field=field, value=value)
+        if field is not None:
+            return store.lookup(field, value)
+        return store.events
+    
+    def _timeline_events_for(self, evidence: EvidenceItem) -> List[TimelineEvent]:
+        """Collection event plus events parsed from one evidence file"""
+        events = [TimelineEvent(
+            timestamp=evidence.collected_at,
+            event_type="evidence_collected",
+            source=evidence.source,
+            description=f"Evidence collected: {evidence.description}",
+            evidence_id=evidence.evidence_id,
+            actor="system",
+            target=evidence.source,
+            severity="info",
+            indicators=evidence.tags
+        )]
+        
+        # Parse evidence file for events (if applicable)
+        if evidence.file_path and evidence.file_path.endswith('.json') and Path(evidence.file_path).exists():
+            try:
+                with open(evidence.file_path, 'r') as f:
+                    data = json.load(f)
+                events.extend(self._extract_events_from_json(data, evidence))
+            except Exception as e:
+                logger.debug(f"Could not parse events from {evidence.file_path}: {e}")
+        
+        return events
+    
     def _extract_events_from_json(self, data: Dict, evidence: EvidenceItem) -> List[TimelineEvent]:
         """Extract timeline events from JSON evidence"""
         events = []
@@ -1112,13 +1530,16 @@ class EvidenceCollector:
     # EXPORT
     # =========================================================================
     
-    def export_case(self, case_id: str, format: str = "archive") -> Optional[str]:
+    def export_case(self, case_id: str, format: str = "archive", compression: str = "gzip",
+                    workers: Optional[int] = None) -> Optional[str]:
         """
         Export complete case with all evidence
         
         Args:
             case_id: Case ID
             format: Export format (archive, json)
+            compression: Archive compression (gzip, zstd)
+            workers: Compression threads (default: CPU count)
         
         Returns:
             Path to exported file
@@ -1131,54 +1552,148 @@ class EvidenceCollector:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if format == "archive":
-            # Create tar.gz archive
-            archive_name = f"{case_id}_export_{timestamp}.tar.gz"
+            if compression not in COMPRESSION_SUFFIXES:
+                logger.error(f"Unsupported compression: {compression}")
+                return None
+            
+            archive_name = f"{case_id}_export_{timestamp}.{COMPRESSION_SUFFIXES[compression]}"
             archive_path = self.evidence_path / archive_name
             
             try:
-                with tarfile.open(archive_path, 'w:gz') as tar:
-                    # Add case metadata
-                    case_json = json.dumps(case.to_dict(), indent=2, default=str)
-                    case_info = tarfile.TarInfo(name=f"{case_id}/case_info.json")
-                    case_info.size = len(case_json.encode())
-                    tar.addfile(case_info, fileobj=__import__('io').BytesIO(case_json.encode()))
-                    
-                    # Add all evidence files
-                    case_dir = self.evidence_path / case_id
-                    if case_dir.exists():
-                        for file_path in case_dir.glob('*'):
-                            tar.add(file_path, arcname=f"{case_id}/{file_path.name}")
+                with open(archive_path, 'wb') as sink:
+                    manifest = self.stream_case(case_id, sink, compression=compression, workers=workers)
                 
-                self.statistics["exports"] += 1
-                
-                logger.info(f"Exported case {case_id} to {archive_path}")
+                logger.info(f"Exported case {case_id} to {archive_path} "
+                            f"({len(manifest['files'])} files, sha256 {manifest['archive']['sha256'][:16]})")
                 return str(archive_path)
                 
             except Exception as e:
                 logger.error(f"Export failed: {e}")
+                archive_path.unlink(missing_ok=True)
                 return None
         
         elif format == "json":
-            # Export as JSON
+            # Export as JSON, one record at a time
             export_name = f"{case_id}_export_{timestamp}.json"
             export_path = self.evidence_path / export_name
             
-            export_data = {
-                "case": case.to_dict(),
-                "evidence": [e.to_dict() for e in self.get_evidence_for_case(case_id)],
-                "timeline": [e.to_dict() for e in self.timeline if e.evidence_id and self.evidence_items.get(e.evidence_id, {}).case_id == case_id],
-                "exported_at": datetime.now().isoformat()
-            }
+            evidence = self.get_evidence_for_case(case_id)
+            case_evidence_ids = {e.evidence_id for e in evidence}
             
-            export_path.write_text(json.dumps(export_data, indent=2, default=str))
+            with open(export_path, 'w') as f:
+                f.write('{\n  "case": ')
+                f.write(json.dumps(case.to_dict(), indent=2, default=str))
+                self._write_json_array(f, "evidence", (e.to_dict() for e in evidence))
+                self._write_json_array(f, "timeline", (
+                    e.to_dict() for e in self.timeline if e.evidence_id in case_evidence_ids
+                ))
+                f.write(f',\n  "exported_at": {json.dumps(datetime.now().isoformat())}\n}}\n')
             
-            self.statistics["exports"] += 1
+            with self._lock:
+                self.statistics["exports"] += 1
             
             logger.info(f"Exported case {case_id} to {export_path}")
             return str(export_path)
         
         return None
     
+    @staticmethod
+    def _write_json_array(f, key: str, items):
+        """Write a top-level JSON array member item by item"""
+        f.write(f',\n  "{key}": [')
+        empty = True
+        for item in items:
+            f.write("\n    " if empty else ",\n    ")
+            f.write(json.dumps(item, default=str))
+            empty = False
+        f.write("]" if empty else "\n  ]")
+    
+    def stream_case(self, case_id: str, sink, compression: str = "gzip", level: Optional[int] = None,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Stream a case as a compressed tar archive to a file-like sink
+        
+        Evidence files are read once: the same pass feeds the archive and
+        the per-file hashes of the manifest, which is appended to the
+        archive as <case_id>/manifest.json.
+        
+        Args:
+            case_id: Case ID
+            sink: Binary file-like object with write()
+            compression: gzip (block-parallel) or zstd (multithreaded)
+            level: Compression level (default: 6 for gzip, 3 for zstd)
+            workers: Compression threads (default: CPU count)
+        
+        Returns:
+            Manifest dict, plus the size and hashes of the archive itself
+        """
+        case = self.cases.get(case_id)
+        if case is None:
+            raise ValueError(f"Case {case_id} not found")
+        
+        recorded = {
+            Path(e.file_path).name: e for e in self.get_evidence_for_case(case_id) if e.file_path
+        }
+        manifest: Dict[str, Any] = {
+            "case_id": case_id,
+            "exported_at": datetime.now().isoformat(),
+            "compression": compression,
+            "files": []
+        }
+        
+        archive_out = HashingWriter(sink)
+        compressor = open_compressed(archive_out, compression, level=level, workers=workers)
+        with compressor:
+            with tarfile.open(fileobj=compressor, mode='w|') as tar:
+                case_json = json.dumps(case.to_dict(), indent=2, default=str).encode()
+                self._add_to_archive(tar, manifest, f"{case_id}/case_info.json",
+                                     io.BytesIO(case_json), len(case_json))
+                
+                case_dir = self.evidence_path / case_id
+                if case_dir.exists():
+                    for file_path in sorted(p for p in case_dir.rglob('*') if p.is_file()):
+                        arcname = f"{case_id}/{file_path.relative_to(case_dir).as_posix()}"
+                        with open(file_path, 'rb') as f:
+                            stat = os.fstat(f.fileno())
+                            entry = self._add_to_archive(tar, manifest, arcname, f, stat.st_size, stat.st_mtime)
+                        
+                        evidence = recorded.get(file_path.name)
+                        if evidence:
+                            entry["evidence_id"] = evidence.evidence_id
+                            entry["matches_recorded"] = entry["sha256"] == evidence.hash_sha256
+                            if not entry["matches_recorded"]:
+                                logger.warning(f"Exported {arcname} does not match recorded hash "
+                                               f"of {evidence.evidence_id}")
+                
+                manifest_json = json.dumps(manifest, indent=2).encode()
+                info = tarfile.TarInfo(name=f"{case_id}/manifest.json")
+                info.size = len(manifest_json)
+                info.mtime = time.time()
+                tar.addfile(info, fileobj=io.BytesIO(manifest_json))
+        
+        manifest["archive"] = dict(archive_out.hexdigests(), size=archive_out.size,
+                                   uncompressed_size=compressor.bytes_in)
+        
+        with self._lock:
+            self.statistics["exports"] += 1
+        
+        return manifest
+    
+    @staticmethod
+    def _add_to_archive(tar: tarfile.TarFile, manifest: Dict, arcname: str, fileobj, size: int,
+                        mtime: Optional[float] = None) -> Dict[str, Any]:
+        """Add one member through a hashing reader and record it in the manifest"""
+        info = tarfile.TarInfo(name=arcname)
+        info.size = size
+        info.mtime = mtime if mtime is not None else time.time()
+        
+        reader = HashingReader(fileobj)
+        tar.addfile(info, fileobj=reader)
+        
+        entry = dict(path=arcname, size=reader.size, **reader.hexdigests())
+        manifest["files"].append(entry)
+        return entry
+    
     # =========================================================================
     # REPORTING
     # =========================================================================
@@ -1195,6 +1710,12 @@ class EvidenceCollector:
             "network_data_collected": self.statistics["network_data_collected"],
             "verifications": self.statistics["verifications"],
             "exports": self.statistics["exports"],
+            "collection_sweeps": self.statistics["collection_sweeps"],
+            "last_collection": {
+                "duration_seconds": self.last_collection.duration_seconds,
+                "time_to_first_evidence": self.last_collection.time_to_first_evidence,
+                "complete": self.last_collection.complete
+            } if self.last_collection else None,
             "evidence_path": str(self.evidence_path),
             "generated_at": datetime.now().isoformat()
         }
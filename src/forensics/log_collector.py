@@ -3,18 +3,31 @@
 نظام جمع السجلات المركزي
 
 يجمع السجلات من جميع المصادر ويحللها
+
+كل ملف سجلات مغلق يُرفق بفهرس جانبي (logs_*.idx.json) يحوي أقدم وأحدث
+طابع زمني والمصادر والمستويات و Bloom filter لثلاثيات أحرف كلمات الرسائل،
+فيتخطى البحث الملفات التي لا يمكن أن تطابق دون فك ضغطها.
+
+الكتابة بأسلوب Group commit: دفعة من الطابور في write واحد، و fsync على
+فترات، والضغط في الخلفية.
 """
 
 import logging
 import json
 import gzip
 import os
+import math
+import base64
+import shutil
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 from pathlib import Path
 import threading
 import queue
 import hashlib
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -57,28 +70,435 @@ class LogEntry:
         return json.dumps(self.to_dict())
 
 
+# =============================================================================
+# فهرس ملفات السجلات
+# =============================================================================
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx.json'
+
+
+# عدد الكلمات المميزة قبل تحويلها إلى ثلاثيات (حد للذاكرة)
+TOKEN_FOLD_THRESHOLD = 100000
+
+
+def _trigrams(text: str) -> Set[str]:
+    """ثلاثيات الأحرف في نص (بأحرف صغيرة)"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _token_trigrams(tokens: Iterable[str]) -> Set[str]:
+    """ثلاثيات أحرف مجموعة كلمات (بدون الثلاثيات العابرة بين كلمتين)"""
+    text = ' '.join(tokens)
+    return {''.join(t) for t in set(zip(text, text[1:], text[2:])) if ' ' not in t}
+
+
+class TrigramBloom:
+    """
+    Bloom filter لثلاثيات أحرف الكلمات
+    
+    كل جزء من كلمة البحث بلا مسافات يقع داخل كلمة واحدة من الرسالة، فلا
+    يمكن أن تطابق رسالة في الملف إلا إذا كانت كل ثلاثياته موجودة، لذا
+    فالنتيجة السلبية مؤكدة.
+    """
+    
+    def __init__(self, size_bits: int, hash_count: int, bits: Optional[bytearray] = None):
+        self.size_bits = max(8, size_bits)
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((self.size_bits + 7) // 8)
+    
+    @classmethod
+    def for_items(cls, items: Iterable[str], error_rate: float = 0.01) -> 'TrigramBloom':
+        """بناء فلتر بحجم مناسب لعدد العناصر"""
+        items = list(items)
+        count = max(1, len(items))
+        size_bits = int(math.ceil(-count * math.log(error_rate) / (math.log(2) ** 2)))
+        hash_count = max(1, round(size_bits / count * math.log(2)))
+        bloom = cls(size_bits, hash_count)
+        for item in items:
+            bloom.add(item)
+        return bloom
+    
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing over a stable digest (hash() is salted per process)
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size_bits
+    
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+    
+    def may_contain(self, keyword: str) -> bool:
+        """هل يمكن أن تكون الكلمة جزءاً من رسالة؟"""
+        return all(
+            trigram in self
+            for part in keyword.lower().split()
+            for trigram in _trigrams(part)
+        )
+    
+    def to_dict(self) -> Dict:
+        return {
+            'size_bits': self.size_bits,
+            'hash_count': self.hash_count,
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii')
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TrigramBloom':
+        return cls(data['size_bits'], data['hash_count'], bytearray(base64.b64decode(data['bits'])))
+
+
+class LogFileIndex:
+    """
+    الفهرس الجانبي لملف سجلات
+    """
+    
+    def __init__(self):
+        self.lines = 0
+        self.min_timestamp: Optional[datetime] = None
+        self.max_timestamp: Optional[datetime] = None
+        self.sources: Set[str] = set()
+        self.levels: Set[str] = set()
+        self.bloom: Optional[TrigramBloom] = None
+        self._tokens: Set[str] = set()
+        self._trigrams: Set[str] = set()
+    
+    def _add_timestamps(self, earliest: datetime, latest: datetime):
+        if self.min_timestamp is None or earliest < self.min_timestamp:
+            self.min_timestamp = earliest
+        if self.max_timestamp is None or latest > self.max_timestamp:
+            self.max_timestamp = latest
+    
+    def _add_messages(self, messages: Iterable[str]):
+        self._tokens.update(' '.join(messages).lower().split())
+        if len(self._tokens) >= TOKEN_FOLD_THRESHOLD:
+            self._fold_tokens()
+    
+    def _fold_tokens(self):
+        self._trigrams.update(_token_trigrams(self._tokens))
+        self._tokens = set()
+    
+    def add(self, entry: Dict):
+        """إضافة إدخال (dict مقروء من ملف) إلى الفهرس"""
+        self.lines += 1
+        timestamp = datetime.fromisoformat(entry.get('timestamp'))
+        self._add_timestamps(timestamp, timestamp)
+        self.sources.add(entry.get('source'))
+        self.levels.add(entry.get('level'))
+        self._add_messages([entry.get('message', '')])
+    
+    def add_batch(self, batch: List['LogEntry']):
+        """إضافة دفعة مكتوبة إلى الفهرس دون إعادة تحليل JSON"""
+        self.lines += len(batch)
+        timestamps = [log_entry.timestamp for log_entry in batch]
+        self._add_timestamps(min(timestamps), max(timestamps))
+        self.sources.update(log_entry.source for log_entry in batch)
+        self.levels.update(log_entry.level for log_entry in batch)
+        self._add_messages(log_entry.message for log_entry in batch)
+    
+    def finalize(self) -> 'LogFileIndex':
+        """بناء الـ Bloom filter بعد آخر إدخال"""
+        self._fold_tokens()
+        self.bloom = TrigramBloom.for_items(self._trigrams)
+        self._trigrams = set()
+        return self
+    
+    @staticmethod
+    def path_for(log_file: Path) -> Path:
+        """logs_X.jsonl / logs_X.jsonl.gz -> logs_X.idx.json"""
+        return log_file.with_name(log_file.name.split('.jsonl')[0] + INDEX_SUFFIX)
+    
+    def save(self, log_file: Path):
+        """كتابة الفهرس بجانب ملف السجلات"""
+        data = {
+            'version': INDEX_VERSION,
+            'lines': self.lines,
+            'min_timestamp': self.min_timestamp.isoformat() if self.min_timestamp else None,
+            'max_timestamp': self.max_timestamp.isoformat() if self.max_timestamp else None,
+            'sources': sorted(self.sources, key=str),
+            'levels': sorted(self.levels, key=str),
+            'bloom': self.bloom.to_dict() if self.bloom else None
+        }
+        path = self.path_for(log_file)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, log_file: Path) -> Optional['LogFileIndex']:
+        """قراءة الفهرس الجانبي إن وجد"""
+        try:
+            with open(cls.path_for(log_file)) as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return None
+            index = cls()
+            index.lines = data['lines']
+            if data['min_timestamp']:
+                index.min_timestamp = datetime.fromisoformat(data['min_timestamp'])
+                index.max_timestamp = datetime.fromisoformat(data['max_timestamp'])
+            index.sources = set(data['sources'])
+            index.levels = set(data['levels'])
+            if data['bloom']:
+                index.bloom = TrigramBloom.from_dict(data['bloom'])
+            return index
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+class LogQuery:
+    """
+    شروط البحث في السجلات
+    """
+    
+    def __init__(
+        self,
+        source: Optional[str] = None,
+        level: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        keyword: Optional[str] = None
+    ):
+        self.source = source
+        self.level = level
+        self.start_time = start_time
+        self.end_time = end_time
+        self.keyword = keyword.lower() if keyword else None
+        # Raw-line pre-check is exact only for keywords json.dumps leaves as-is
+        self._raw_keyword = self.keyword if self.keyword and self.keyword.isascii() \
+            and self.keyword.isprintable() and '"' not in self.keyword and '\\' not in self.keyword else None
+    
+    def may_match_file(self, index: LogFileIndex) -> bool:
+        """هل يمكن أن يحوي الملف نتائج؟ (حسب الفهرس)"""
+        if index.lines == 0:
+            return False
+        if self.source and self.source not in index.sources:
+            return False
+        if self.level and self.level not in index.levels:
+            return False
+        if self.start_time and index.max_timestamp < self.start_time:
+            return False
+        if self.end_time and index.min_timestamp > self.end_time:
+            return False
+        if self.keyword and len(self.keyword) >= 3 and index.bloom and not index.bloom.may_contain(self.keyword):
+            return False
+        return True
+    
+    def may_match_line(self, line: str) -> bool:
+        """فحص سريع للسطر قبل json.loads"""
+        if self._raw_keyword is None or '\\u' in line:
+            return True
+        return self._raw_keyword in line.lower()
+    
+    def matches(self, entry: Dict) -> bool:
+        """تطبيق الفلاتر على إدخال"""
+        if self.source and entry.get('source') != self.source:
+            return False
+        
+        if self.level and entry.get('level') != self.level:
+            return False
+        
+        if self.start_time or self.end_time:
+            timestamp = datetime.fromisoformat(entry.get('timestamp'))
+            
+            if self.start_time and timestamp < self.start_time:
+                return False
+            
+            if self.end_time and timestamp > self.end_time:
+                return False
+        
+        if self.keyword and self.keyword not in entry.get('message', '').lower():
+            return False
+        
+        return True
+
+
+def _open_log(log_file: Path):
+    """فتح ملف سجلات (مضغوط أو لا) للقراءة سطراً بسطر"""
+    if log_file.suffix == '.gz':
+        return gzip.open(log_file, 'rt')
+    try:
+        return open(log_file, 'r')
+    except FileNotFoundError:
+        # ضُغط في الخلفية بعد سرد الملفات
+        return gzip.open(f"{log_file}.gz", 'rt')
+
+
+def _iter_log_file(log_file: Path, log_query: LogQuery) -> Iterator[Dict]:
+    """البحث في ملف واحد دون تحميله في الذاكرة"""
+    with _open_log(log_file) as f:
+        for line in f:
+            if not log_query.may_match_line(line):
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if log_query.matches(entry):
+                yield entry
+
+
+def _scan_log_file(log_file: Path, log_query: LogQuery) -> List[Dict]:
+    """نتائج ملف واحد (للبحث المتوازي في عمليات منفصلة)"""
+    try:
+        return list(_iter_log_file(log_file, log_query))
+    except Exception as e:
+        logger.error(f"Error searching {log_file}: {e}")
+        return []
+
+
+def build_log_index(log_file: Path) -> LogFileIndex:
+    """بناء فهرس لملف سجلات موجود"""
+    index = LogFileIndex()
+    with _open_log(log_file) as f:
+        for line in f:
+            try:
+                index.add(json.loads(line))
+            except (json.JSONDecodeError, TypeError, ValueError):
+                continue
+    return index.finalize()
+
+
+class BatchQueue:
+    """
+    طابور محدود يُسحب منه دفعة كاملة بقفل واحد
+    
+    واجهة queue.Queue المستخدمة هنا (put/get_batch/task_done/join) دون
+    كلفة القفل لكل عنصر عند السحب.
+    """
+    
+    def __init__(self, maxsize: int = 0):
+        self.maxsize = maxsize
+        self.high_watermark = 0
+        self._items = deque()
+        self._unfinished = 0
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._all_done = threading.Condition(self._mutex)
+    
+    def put(self, item, block: bool = True, timeout: Optional[float] = None):
+        with self._not_full:
+            if self.maxsize > 0 and len(self._items) >= self.maxsize:
+                if not block:
+                    raise queue.Full
+                if not self._not_full.wait_for(lambda: len(self._items) < self.maxsize, timeout):
+                    raise queue.Full
+            self._items.append(item)
+            self._unfinished += 1
+            if len(self._items) > self.high_watermark:
+                self.high_watermark = len(self._items)
+            self._not_empty.notify()
+    
+    def put_nowait(self, item):
+        self.put(item, block=False)
+    
+    def get_batch(self, max_items: int, timeout: Optional[float] = None) -> List:
+        """حتى max_items عنصراً، بانتظار أول عنصر حتى timeout"""
+        with self._not_empty:
+            if not self._items and not self._not_empty.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            count = min(max_items, len(self._items))
+            batch = [self._items.popleft() for _ in range(count)]
+            self._not_full.notify(count)
+            return batch
+    
+    def task_done(self, count: int = 1):
+        with self._all_done:
+            self._unfinished -= count
+            if self._unfinished <= 0:
+                self._unfinished = 0
+                self._all_done.notify_all()
+    
+    def join(self):
+        with self._all_done:
+            self._all_done.wait_for(lambda: self._unfinished == 0)
+    
+    def qsize(self) -> int:
+        return len(self._items)
+    
+    def empty(self) -> bool:
+        return not self._items
+
+
 class LogCollector:
     """
     جامع السجلات المركزي
     """
     
-    def __init__(self, storage_dir: str = "./data/logs"):
+    def __init__(
+        self,
+        storage_dir: str = "./data/logs",
+        max_queue_size: int = 100000,
+        batch_size: int = 1000,
+        fsync_interval: Optional[float] = 1.0,
+        compression_workers: int = 1,
+        put_timeout: Optional[float] = 5.0
+    ):
+        """
+        Args:
+            max_queue_size: حد الطابور؛ collect() ينتظر عند امتلائه
+            batch_size: أقصى عدد سجلات في كتابة واحدة
+            fsync_interval: ثوانٍ بين fsync (0 = بعد كل دفعة، None = أبداً)
+            compression_workers: خيوط ضغط الملفات المغلقة في الخلفية
+            put_timeout: أقصى انتظار لـ collect() قبل إسقاط السجل (None = بلا حد)
+        """
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         
-        self.log_queue = queue.Queue()
+        self.log_queue = BatchQueue(maxsize=max_queue_size)
         self.running = False
         self.worker_thread = None
         
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.put_timeout = put_timeout
+        self._last_fsync = time.monotonic()
+        
         self.current_file = None
         self.current_file_size = 0
         self.max_file_size = 10 * 1024 * 1024  # 10 MB
+        self.current_index: Optional[LogFileIndex] = None
+        self.compress_level = 6
+        
+        # الضغط في الخلفية حتى لا يوقف الكتابة
+        self._compression_pool = ThreadPoolExecutor(
+            max_workers=compression_workers, thread_name_prefix="log-compress"
+        )
+        self._compressions: List[Future] = []
+        self._compressions_lock = threading.Lock()
+        
+        self._stats_lock = threading.Lock()
+        self.writer_stats = {
+            'batches_written': 0,
+            'lines_written': 0,
+            'bytes_written': 0,
+            'fsyncs': 0,
+            'backpressure_waits': 0,
+            'backpressure_seconds': 0.0,
+            'dropped': 0,
+            'files_compressed': 0
+        }
         
         self.stats = {
             'total_logs': 0,
             'logs_by_source': {},
             'logs_by_level': {}
         }
+        
+        self.search_stats = {
+            'searches': 0,
+            'files_scanned': 0,
+            'files_skipped': 0
+        }
     
     def start(self):
         """بدء جامع السجلات"""
@@ -98,16 +518,39 @@ class LogCollector:
         logger.info("🔍 Stopping Log Collector")
         self.running = False
         
+        # العامل يفرغ الطابور ثم يغلق ملفه بنفسه؛ الانتظار بلا مهلة حتى
+        # لا يُفتح ملف بعد التدوير دون إغلاق أو فهرسة أو ضغط
         if self.worker_thread:
-            self.worker_thread.join(timeout=5)
+            self.worker_thread.join()
+            self.worker_thread = None
         
         self._close_current_file()
+        self.wait_for_compression()
     
-    def collect(self, log_entry: LogEntry):
-        """جمع إدخال سجل"""
-        self.log_queue.put(log_entry)
-    
-    def collect_dict(self, log_dict: Dict):
+    def collect(self, log_entry: LogEntry) -> bool:
+        """
+        جمع إدخال سجل
+        
+        ينتظر حتى put_timeout إذا امتلأ الطابور (ضغط عكسي على المُنتِج)،
+        ثم يُسقط السجل ويعيد False.
+        """
+        try:
+            self.log_queue.put_nowait(log_entry)
+        except queue.Full:
+            started = time.monotonic()
+            try:
+                self.log_queue.put(log_entry, timeout=self.put_timeout)
+            except queue.Full:
+                with self._stats_lock:
+                    self.writer_stats['dropped'] += 1
+                return False
+            finally:
+                with self._stats_lock:
+                    self.writer_stats['backpressure_waits'] += 1
+                    self.writer_stats['backpressure_seconds'] += time.monotonic() - started
+        return True
+    
+    def collect_dict(self, log_dict: Dict) -> bool:
         """جمع سجل من dict"""
         entry = LogEntry(
             timestamp=datetime.fromisoformat(log_dict.get('timestamp', datetime.now().isoformat())),
@@ -116,46 +559,73 @@ class LogCollector:
             message=log_dict.get('message', ''),
             metadata=log_dict.get('metadata', {})
         )
-        self.collect(entry)
+        return self.collect(entry)
     
     def _worker_loop(self):
-        """حلقة المعالجة"""
-        while self.running:
-            try:
-                # الحصول على سجل من الطابور
-                log_entry = self.log_queue.get(timeout=1)
-                
-                # كتابة السجل
-                self._write_log(log_entry)
-                
-                # تحديث الإحصائيات
-                self._update_stats(log_entry)
+        """حلقة المعالجة: Group commit لدفعات من الطابور"""
+        try:
+            while self.running or not self.log_queue.empty():
+                try:
+                    # الحصول على دفعة من الطابور
+                    batch = self.log_queue.get_batch(self.batch_size, timeout=1 if self.running else 0.1)
+                except queue.Empty:
+                    self._maybe_fsync()
+                    continue
                 
-                self.log_queue.task_done()
+                try:
+                    # كتابة الدفعة
+                    self._write_batch(batch)
+                    
+                    # تحديث الإحصائيات
+                    for log_entry in batch:
+                        self._update_stats(log_entry)
                 
-            except queue.Empty:
-                continue
-            except Exception as e:
-                logger.error(f"Error in worker loop: {e}")
+                except Exception as e:
+                    logger.error(f"Error in worker loop: {e}")
+                finally:
+                    self.log_queue.task_done(len(batch))
+        finally:
+            # الملف ملك العامل: يُغلق ويُفهرس ويُضغط من خيطه بعد آخر دفعة
+            self._close_current_file()
     
     def _write_log(self, log_entry: LogEntry):
         """كتابة السجل إلى ملف"""
+        self._write_batch([log_entry])
+    
+    def _write_batch(self, batch: List[LogEntry]):
+        """كتابة دفعة سجلات باستدعاء write واحد"""
         try:
             # فتح ملف جديد إذا لزم الأمر
             if self._needs_new_file():
                 self._rotate_file()
             
-            # كتابة السجل
+            # كتابة السجلات
             if self.current_file:
-                line = log_entry.to_json() + '\n'
-                self.current_file.write(line)
+                data = ''.join([log_entry.to_json() + '\n' for log_entry in batch])
+                self.current_file.write(data)
                 self.current_file.flush()
                 
-                self.current_file_size += len(line)
+                self.current_file_size += len(data)
+                self.current_index.add_batch(batch)
+                self.writer_stats['batches_written'] += 1
+                self.writer_stats['lines_written'] += len(batch)
+                self.writer_stats['bytes_written'] += len(data)
+                self._maybe_fsync()
                 
         except Exception as e:
             logger.error(f"Error writing log: {e}")
     
+    def _maybe_fsync(self, force: bool = False):
+        """fsync كل fsync_interval ثانية"""
+        if not self.current_file or (self.fsync_interval is None and not force):
+            return
+        now = time.monotonic()
+        if force or now - self._last_fsync >= self.fsync_interval:
+            self.current_file.flush()
+            os.fsync(self.current_file.fileno())
+            self._last_fsync = now
+            self.writer_stats['fsyncs'] += 1
+    
     def _needs_new_file(self) -> bool:
         """التحقق من الحاجة لملف جديد"""
         if not self.current_file:
@@ -174,31 +644,58 @@ class LogCollector:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = self.storage_dir / f"logs_{timestamp}.jsonl"
         
+        # عدة تدويرات في نفس الثانية لا تكتب فوق ملف سابق
+        suffix = 0
+        while filename.exists() or LogFileIndex.path_for(filename).exists():
+            suffix += 1
+            filename = self.storage_dir / f"logs_{timestamp}_{suffix}.jsonl"
+        
         self.current_file = open(filename, 'w')
         self.current_file_size = 0
+        self.current_index = LogFileIndex()
         
         logger.info(f"Created new log file: {filename}")
     
     def _close_current_file(self):
-        """إغلاق الملف الحالي"""
+        """إغلاق الملف الحالي وضغطه في الخلفية"""
         if self.current_file:
+            self._maybe_fsync(force=self.fsync_interval is not None)
             self.current_file.close()
             
+            # الفهرس قبل الضغط: الملف المضغوط لا يظهر أبداً دون فهرس
+            try:
+                self.current_index.finalize().save(Path(self.current_file.name))
+            except Exception as e:
+                logger.error(f"Error writing log index: {e}")
+            self.current_index = None
+            
             # ضغط الملف
-            self._compress_file(self.current_file.name)
+            future = self._compression_pool.submit(self._compress_file, self.current_file.name)
+            with self._compressions_lock:
+                self._compressions = [f for f in self._compressions if not f.done()]
+                self._compressions.append(future)
             
             self.current_file = None
     
+    def wait_for_compression(self, timeout: Optional[float] = None) -> bool:
+        """انتظار انتهاء الضغط الجاري"""
+        with self._compressions_lock:
+            pending = list(self._compressions)
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+    
     def _compress_file(self, filename: str):
         """ضغط ملف السجل"""
         try:
             with open(filename, 'rb') as f_in:
-                with gzip.open(f"{filename}.gz", 'wb') as f_out:
-                    f_out.writelines(f_in)
+                with gzip.open(f"{filename}.gz", 'wb', compresslevel=self.compress_level) as f_out:
+                    shutil.copyfileobj(f_in, f_out, 1024 * 1024)
             
             # حذف الملف الأصلي
             os.remove(filename)
             
+            with self._stats_lock:
+                self.writer_stats['files_compressed'] += 1
             logger.info(f"Compressed log file: {filename}.gz")
             
         except Exception as e:
@@ -220,7 +717,40 @@ class LogCollector:
     
     def get_stats(self) -> Dict:
         """الحصول على الإحصائيات"""
-        return self.stats.copy()
+        stats = self.stats.copy()
+        with self._compressions_lock:
+            compressions_pending = sum(1 for f in self._compressions if not f.done())
+        stats['writer'] = {
+            **self.writer_stats,
+            'queue_depth': self.log_queue.qsize(),
+            'queue_high_watermark': self.log_queue.high_watermark,
+            'queue_capacity': self.log_queue.maxsize,
+            'avg_batch_size': round(
+                self.writer_stats['lines_written'] / max(1, self.writer_stats['batches_written']), 1
+            ),
+            'compressions_pending': compressions_pending
+        }
+        return stats
+    
+    def _log_files(self) -> List[Path]:
+        """ملفات السجلات بالترتيب الزمني"""
+        files = [
+            log_file for log_file in sorted(self.storage_dir.glob("logs_*.jsonl*"))
+            if log_file.name.endswith(('.jsonl', '.jsonl.gz'))
+        ]
+        # ملف قيد الضغط يظهر بالصيغتين: الأصل هو الكامل
+        names = {log_file.name for log_file in files}
+        return [f for f in files if not (f.suffix == '.gz' and f.name[:-3] in names)]
+    
+    def _candidate_files(self, log_query: LogQuery) -> Iterator[Path]:
+        """الملفات التي لا يستبعدها فهرسها (الملف الحالي بلا فهرس فيُفحص دائماً)"""
+        for log_file in self._log_files():
+            index = LogFileIndex.load(log_file)
+            if index is not None and not log_query.may_match_file(index):
+                self.search_stats['files_skipped'] += 1
+                continue
+            self.search_stats['files_scanned'] += 1
+            yield log_file
     
     def search_logs(
         self,
@@ -228,57 +758,53 @@ class LogCollector:
         level: Optional[str] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        keyword: Optional[str] = None
-    ) -> List[Dict]:
+        keyword: Optional[str] = None,
+        workers: int = 1
+    ) -> Iterator[Dict]:
         """
         البحث في السجلات
+        
+        مولّد كسول: يتخطى الملفات حسب فهارسها ويقرأ الباقي سطراً بسطر.
+        workers > 1 يفحص عدة ملفات في عمليات متوازية مع الحفاظ على الترتيب.
         """
-        results = []
+        log_query = LogQuery(source, level, start_time, end_time, keyword)
+        self.search_stats['searches'] += 1
         
         try:
-            # البحث في جميع ملفات السجلات
-            for log_file in self.storage_dir.glob("logs_*.jsonl*"):
-                
-                # فك الضغط إذا لزم الأمر
-                if log_file.suffix == '.gz':
-                    with gzip.open(log_file, 'rt') as f:
-                        lines = f.readlines()
-                else:
-                    with open(log_file, 'r') as f:
-                        lines = f.readlines()
-                
-                # البحث في السطور
-                for line in lines:
-                    try:
-                        entry = json.loads(line)
-                        
-                        # تطبيق الفلاتر
-                        if source and entry.get('source') != source:
-                            continue
-                        
-                        if level and entry.get('level') != level:
-                            continue
-                        
-                        timestamp = datetime.fromisoformat(entry.get('timestamp'))
-                        
-                        if start_time and timestamp < start_time:
-                            continue
-                        
-                        if end_time and timestamp > end_time:
-                            continue
-                        
-                        if keyword and keyword.lower() not in entry.get('message', '').lower():
-                            continue
-                        
-                        results.append(entry)
-                        
-                    except json.JSONDecodeError:
-                        continue
+            if self.current_file:
+                self.current_file.flush()
+            
+            if workers <= 1:
+                for log_file in self._candidate_files(log_query):
+                    yield from _iter_log_file(log_file, log_query)
+                return
+            
+            # نافذة محدودة من الملفات قيد الفحص لتقييد الذاكرة
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = deque()
+                for log_file in self._candidate_files(log_query):
+                    in_flight.append(pool.submit(_scan_log_file, log_file, log_query))
+                    if len(in_flight) >= workers * 2:
+                        yield from in_flight.popleft().result()
+                while in_flight:
+                    yield from in_flight.popleft().result()
         
         except Exception as e:
             logger.error(f"Error searching logs: {e}")
-        
-        return results
+    
+    def reindex_logs(self) -> int:
+        """بناء الفهارس المفقودة لملفات السجلات القديمة"""
+        current = Path(self.current_file.name) if self.current_file else None
+        built = 0
+        for log_file in self._log_files():
+            if log_file == current or LogFileIndex.path_for(log_file).exists():
+                continue
+            try:
+                build_log_index(log_file).save(log_file)
+                built += 1
+            except Exception as e:
+                logger.error(f"Error indexing {log_file}: {e}")
+        return built
 
 
 class DockerLogCollector:
@@ -363,7 +889,6 @@ if __name__ == "__main__":
     print(f"   Collected 10 sample logs")
     
     # انتظار المعالجة
-    import time
     time.sleep(2)
     
     print("\n4️⃣ Statistics:")
@@ -373,7 +898,7 @@ if __name__ == "__main__":
     print(f"   By level: {stats['logs_by_level']}")
     
     print("\n5️⃣ Searching logs...")
-    results = collector.search_logs(level="WARNING")
+    results = list(collector.search_logs(level="WARNING"))
     print(f"   Found {len(results)} WARNING logs")
     
     print("\n6️⃣ Stopping collector...")
@@ -0,0 +1,710 @@
+"""
+Packet Table - جدول الحزم العمودي
+Cyber Mirage Forensics Module
+
+تخزين عمودي لحزم الشبكة تعمل عليه كاشفات PcapAnalyzer:
+- أعمدة array.array مضغوطة (ts_ns, src, dst, sport, dport, proto, flags, length)
+- ترميز قاموسي للعناوين والبروتوكولات وأعلام TCP (معرّف صحيح لكل قيمة فريدة)
+- تجميع وعدّ متجه عبر NumPy عند توفره، مع مسار Python خالص كبديل
+- نوافذ زمنية منزلقة لعتبات الكاشفات
+
+نتائج الكاشفات مرتبة حسب أول ظهور للمجموعة، كما كانت حلقات PacketInfo.
+"""
+
+import logging
+import re
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from .pcap_reader import ip_to_str, protocol_name, tcp_flags_to_str
+except ImportError:
+    from pcap_reader import ip_to_str, protocol_name, tcp_flags_to_str
+
+logger = logging.getLogger(__name__)
+
+# الأعمدة ونوع array.array لكل منها
+COLUMNS = {
+    'ts_ns': 'q',
+    'src': 'I',
+    'dst': 'I',
+    'sport': 'H',
+    'dport': 'H',
+    'proto': 'H',
+    'flags': 'H',
+    'length': 'I',
+}
+
+NO_TIMESTAMP = -1   # طابع زمني غير معروف (لا يدخل النوافذ الزمنية)
+NO_ADDRESS = 0      # معرّف العنوان الفارغ (حزم غير IP من TShark)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MONTHS = {name: i for i, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+# صيغة frame.time في TShark: "Nov 14, 2023 22:13:20.123456789 UTC"
+TSHARK_TIME = re.compile(r'^(\w{3})\s+(\d{1,2}), (\d{4}) (\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,9}))?')
+# ISO 8601 وصيغة psql: "2024-01-01 10:00:00.12345+00" (fromisoformat في Python 3.10
+# يرفض الكسور من 1-5 خانات والإزاحات ±HH، فتُحلل الأجزاء هنا)
+ISO_TIME = re.compile(
+    r'^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2})?)(?:[.,](\d{1,9}))?\s*(Z|[+-]\d{2}(?::?\d{2})?)?$',
+    re.IGNORECASE)
+
+
+class PortScanGroup(NamedTuple):
+    src: str
+    dst: str
+    ports: List[int]
+
+
+class AuthGroup(NamedTuple):
+    src: str
+    dst: str
+    port: int
+    attempts: int
+
+
+class TransferGroup(NamedTuple):
+    src: str
+    dst: str
+    total_bytes: int
+
+
+class SessionGroup(NamedTuple):
+    src: str
+    dst: str
+    sport: int
+    dport: int
+    protocol: str
+    start_time: str
+    end_time: str
+    packets: int
+    total_bytes: int
+    flags: List[str]
+
+
+def parse_timestamp(text: Optional[str]) -> int:
+    """طابع زمني نصي (ISO أو TShark) -> نانوثانية منذ epoch، أو NO_TIMESTAMP"""
+    if not text:
+        return NO_TIMESTAMP
+    match = ISO_TIME.match(text)
+    if match:
+        base, fraction, offset = match.groups()
+        try:
+            moment = datetime.fromisoformat(base).replace(tzinfo=_utc_offset(offset))
+        except ValueError:
+            return NO_TIMESTAMP
+        delta = moment - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + int((fraction or '0').ljust(9, '0'))
+
+    try:
+        moment = datetime.fromisoformat(text)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        delta = moment - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+    except ValueError:
+        pass
+
+    match = TSHARK_TIME.match(text)
+    if not match or match.group(1) not in MONTHS:
+        return NO_TIMESTAMP
+    month, day, year, hour, minute, second, fraction = match.groups()
+    try:
+        moment = datetime(int(year), MONTHS[month], int(day), int(hour), int(minute), int(second),
+                          tzinfo=timezone.utc)
+    except ValueError:
+        return NO_TIMESTAMP
+    nanos = int((fraction or '0').ljust(9, '0'))
+    return int((moment - EPOCH).total_seconds()) * 1_000_000_000 + nanos
+
+
+def _utc_offset(offset: Optional[str]) -> timezone:
+    """Z / ±HH / ±HHMM / ±HH:MM -> timezone (بلا إزاحة = UTC)"""
+    if not offset or offset.upper() == 'Z':
+        return timezone.utc
+    digits = offset[1:].replace(':', '')
+    minutes = int(digits[:2]) * 60 + int(digits[2:4] or 0)
+    return timezone(timedelta(minutes=-minutes if offset[0] == '-' else minutes))
+
+
+# =============================================================================
+# الجدول
+# =============================================================================
+
+class PacketTable:
+    """
+    جدول حزم عمودي مع كاشفات مجمّعة
+
+    Usage:
+        table = PacketTable()
+        with PcapReader("capture.pcap") as reader:
+            table.extend_records(reader)
+        scans = table.port_scans(threshold=10, window=60)
+    """
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        if use_numpy and not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for the vectorized PacketTable backend")
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else use_numpy
+        self.backend = 'numpy' if self.use_numpy else 'python'
+
+        self._columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        # قواميس الترميز؛ المعرّف 0 محجوز للقيمة الفارغة
+        self.addresses: List[str] = ['']
+        self.protocols: List[str] = ['']
+        self.flag_names: List[Optional[str]] = [None]
+        self._address_ids: Dict[Any, int] = {b'': NO_ADDRESS, '': NO_ADDRESS, None: NO_ADDRESS}
+        self._protocol_ids: Dict[Any, int] = {'': 0, None: 0}
+        self._flag_ids: Dict[Any, int] = {0: 0, None: 0, '': 0}
+        # النص الأصلي للطابع الزمني لصفوف PacketInfo (None لصفوف PcapReader)
+        self._ts_text: Optional[List[Optional[str]]] = None
+        self._arrays: Optional[Dict[str, Any]] = None
+
+    def __len__(self) -> int:
+        return len(self._columns['ts_ns'])
+
+    # -------------------------------------------------------------------------
+    # الإضافة
+    # -------------------------------------------------------------------------
+
+    def _encode(self, ids: Dict[Any, int], values: List, key: Any, value: Any) -> int:
+        code = len(values)
+        ids[key] = code
+        values.append(value)
+        return code
+
+    def extend_records(self, records: Iterable) -> int:
+        """إضافة سجلات PacketRecord من PcapReader"""
+        columns = self._columns
+        ts_col, src_col, dst_col = columns['ts_ns'].append, columns['src'].append, columns['dst'].append
+        sport_col, dport_col = columns['sport'].append, columns['dport'].append
+        proto_col, flags_col, length_col = columns['proto'].append, columns['flags'].append, columns['length'].append
+        address_ids, protocol_ids, flag_ids = self._address_ids, self._protocol_ids, self._flag_ids
+        ts_text = self._ts_text
+        self._arrays = None
+
+        count = 0
+        for ts_ns, src_ip, dst_ip, sport, dport, proto_number, tcp_flags, length, _ in records:
+            src = address_ids.get(src_ip)
+            if src is None:
+                src = self._record_address_id(src_ip)
+            dst = address_ids.get(dst_ip)
+            if dst is None:
+                dst = self._record_address_id(dst_ip)
+            # الأرقام الخام مفاتيح منفصلة عن أسماء PacketInfo النصية
+            proto = protocol_ids.get(proto_number)
+            if proto is None:
+                proto = protocol_ids[proto_number] = self._protocol_id(protocol_name(proto_number))
+            flags = flag_ids.get(tcp_flags)
+            if flags is None:
+                flags = flag_ids[tcp_flags] = self._flag_id(tcp_flags_to_str(tcp_flags))
+
+            ts_col(ts_ns)
+            src_col(src)
+            dst_col(dst)
+            sport_col(sport)
+            dport_col(dport)
+            proto_col(proto)
+            flags_col(flags)
+            length_col(length)
+            if ts_text is not None:
+                ts_text.append(None)
+            count += 1
+        return count
+
+    def extend_packets(self, packets: Iterable) -> int:
+        """إضافة كائنات PacketInfo (من TShark أو iter_packets)"""
+        count = 0
+        self._arrays = None
+        for packet in packets:
+            if self._ts_text is None:
+                self._ts_text = [None] * len(self)
+            columns = self._columns
+            columns['ts_ns'].append(parse_timestamp(packet.timestamp))
+            columns['src'].append(self._address_id(packet.src_ip))
+            columns['dst'].append(self._address_id(packet.dst_ip))
+            columns['sport'].append(packet.src_port or 0)
+            columns['dport'].append(packet.dst_port or 0)
+            columns['proto'].append(self._protocol_id(packet.protocol))
+            columns['flags'].append(self._flag_id(packet.flags))
+            columns['length'].append(packet.length or 0)
+            self._ts_text.append(packet.timestamp)
+            count += 1
+        return count
+
+    @classmethod
+    def from_records(cls, records: Iterable, use_numpy: Optional[bool] = None) -> 'PacketTable':
+        table = cls(use_numpy)
+        table.extend_records(records)
+        return table
+
+    @classmethod
+    def from_packets(cls, packets: Iterable, use_numpy: Optional[bool] = None) -> 'PacketTable':
+        table = cls(use_numpy)
+        table.extend_packets(packets)
+        return table
+
+    def _address_id(self, address: Optional[str]) -> int:
+        code = self._address_ids.get(address)
+        if code is None:
+            code = self._encode(self._address_ids, self.addresses, address, address)
+        return code
+
+    def _record_address_id(self, address: bytes) -> int:
+        # نفس المعرّف للعنوان سواء جاء bytes من PcapReader أو نصاً من PacketInfo
+        code = self._address_id(ip_to_str(address))
+        self._address_ids[address] = code
+        return code
+
+    def _protocol_id(self, name: Optional[str]) -> int:
+        code = self._protocol_ids.get(name)
+        if code is None:
+            code = self._encode(self._protocol_ids, self.protocols, name, name)
+        return code
+
+    def _flag_id(self, flags: Optional[str]) -> int:
+        code = self._flag_ids.get(flags)
+        if code is None:
+            code = self._encode(self._flag_ids, self.flag_names, flags, flags)
+        return code
+
+    # -------------------------------------------------------------------------
+    # الوصول
+    # -------------------------------------------------------------------------
+
+    def columns(self) -> Dict[str, Any]:
+        """الأعمدة كمصفوفات NumPy (نسخة تُحدَّث بعد كل إضافة)"""
+        if not self.use_numpy:
+            return self._columns
+        if self._arrays is None:
+            self._arrays = {name: np.array(column, dtype=np.dtype(column.typecode))
+                            for name, column in self._columns.items()}
+        return self._arrays
+
+    def timestamp(self, row: int) -> str:
+        """النص الأصلي للطابع الزمني، أو ISO UTC من ts_ns"""
+        if self._ts_text is not None and self._ts_text[row] is not None:
+            return self._ts_text[row]
+        ts_ns = self._columns['ts_ns'][row]
+        return datetime.fromtimestamp(ts_ns / 1e9, tz=timezone.utc).isoformat()
+
+    # -------------------------------------------------------------------------
+    # الكاشفات
+    # -------------------------------------------------------------------------
+
+    def port_scans(self, threshold: int = 10, window: Optional[float] = None) -> List[PortScanGroup]:
+        """
+        أزواج (src, dst) التي لمست threshold منفذ وجهة مختلف أو أكثر
+
+        Args:
+            threshold: الحد الأدنى لعدد المنافذ
+            window: إن حُدد، يجب بلوغ العتبة خلال window ثانية
+        """
+        if self.use_numpy:
+            return self._port_scans_numpy(threshold, window)
+
+        c = self._columns
+        groups: Dict[Tuple[int, int], List] = {}
+        rows = zip(c['src'], c['dst'], c['dport'], c['ts_ns'])
+        for src, dst, dport, ts in rows:
+            if src == NO_ADDRESS or not dport or (window is not None and ts == NO_TIMESTAMP):
+                continue
+            group = groups.get((src, dst))
+            if group is None:
+                groups[(src, dst)] = group = [set(), []]
+            group[0].add(dport)
+            if window is not None:
+                group[1].append((ts, dport))
+
+        results = []
+        for (src, dst), (ports, hits) in groups.items():
+            if len(ports) < threshold:
+                continue
+            if window is not None:
+                hits.sort()
+                ports = _window_distinct([ts for ts, _ in hits], [p for _, p in hits], _window_ns(window))
+                if len(ports) < threshold:
+                    continue
+            results.append(PortScanGroup(self.addresses[src], self.addresses[dst], sorted(ports)))
+        return results
+
+    def brute_force(self, auth_ports: Sequence[int], threshold: int = 20,
+                    window: Optional[float] = None) -> List[AuthGroup]:
+        """
+        ثلاثيات (src, dst, منفذ مصادقة) بعدد محاولات >= threshold
+
+        Args:
+            auth_ports: منافذ المصادقة
+            threshold: الحد الأدنى للمحاولات
+            window: إن حُدد، أقصى عدد محاولات خلال window ثانية
+        """
+        if self.use_numpy:
+            return self._brute_force_numpy(auth_ports, threshold, window)
+
+        c = self._columns
+        auth_ports = set(auth_ports)
+        groups: Dict[Tuple[int, int, int], List[int]] = {}
+        for src, dst, dport, ts in zip(c['src'], c['dst'], c['dport'], c['ts_ns']):
+            if dport not in auth_ports or (window is not None and ts == NO_TIMESTAMP):
+                continue
+            key = (src, dst, dport)
+            times = groups.get(key)
+            if times is None:
+                groups[key] = times = []
+            times.append(ts)
+
+        results = []
+        for (src, dst, port), times in groups.items():
+            attempts = len(times)
+            if window is not None and attempts >= threshold:
+                times.sort()
+                attempts = _window_sum(times, None, _window_ns(window))
+            if attempts >= threshold:
+                results.append(AuthGroup(self.addresses[src], self.addresses[dst], port, attempts))
+        return results
+
+    def transfers(self, size_threshold: int = 1000000,
+                  window: Optional[float] = None) -> List[TransferGroup]:
+        """
+        أزواج (src, dst) التي نقلت size_threshold بايت أو أكثر
+
+        Args:
+            size_threshold: حد حجم البيانات (bytes)
+            window: إن حُدد، أقصى حجم منقول خلال window ثانية
+        """
+        if self.use_numpy:
+            return self._transfers_numpy(size_threshold, window)
+
+        c = self._columns
+        groups: Dict[Tuple[int, int], List] = {}
+        for src, dst, length, ts in zip(c['src'], c['dst'], c['length'], c['ts_ns']):
+            if src == NO_ADDRESS or not length or (window is not None and ts == NO_TIMESTAMP):
+                continue
+            group = groups.get((src, dst))
+            if group is None:
+                groups[(src, dst)] = group = [0, []]
+            group[0] += length
+            if window is not None:
+                group[1].append((ts, length))
+
+        results = []
+        for (src, dst), (total, hits) in groups.items():
+            if window is not None and total >= size_threshold:
+                hits.sort()
+                total = _window_sum([ts for ts, _ in hits], [n for _, n in hits], _window_ns(window))
+            if total >= size_threshold:
+                results.append(TransferGroup(self.addresses[src], self.addresses[dst], total))
+        return results
+
+    def sessions(self) -> List[SessionGroup]:
+        """جلسات ثنائية الاتجاه مجمعة حسب نقطتي النهاية"""
+        if self.use_numpy:
+            return self._sessions_numpy()
+
+        c = self._columns
+        groups: Dict[Tuple[int, int], List] = {}
+        rows = zip(c['src'], c['sport'], c['dst'], c['dport'], c['length'], c['flags'])
+        for row, (src, sport, dst, dport, length, flags) in enumerate(rows):
+            a = (src << 16) | sport
+            b = (dst << 16) | dport
+            key = (a, b) if a <= b else (b, a)
+            group = groups.get(key)
+            if group is None:
+                groups[key] = group = [row, row, 0, 0, []]
+            group[1] = row
+            group[2] += 1
+            group[3] += length
+            if flags:
+                group[4].append(self.flag_names[flags])
+        return self._session_groups(*zip(*groups.values())) if groups else []
+
+    def _session_groups(self, firsts: Sequence[int], lasts: Sequence[int], packets: Sequence[int],
+                        totals: Sequence[int], flags: Sequence[List[str]]) -> List[SessionGroup]:
+        """بناء SessionGroup عمودياً: قراءة كل عمود لصفوف البداية دفعة واحدة"""
+        addresses, protocols = self.addresses, self.protocols
+        return list(map(SessionGroup._make, zip(
+            [addresses[code] for code in self._gather('src', firsts)],
+            [addresses[code] for code in self._gather('dst', firsts)],
+            self._gather('sport', firsts),
+            self._gather('dport', firsts),
+            [protocols[code] for code in self._gather('proto', firsts)],
+            self._timestamps(firsts),
+            self._timestamps(lasts),
+            packets,
+            totals,
+            flags
+        )))
+
+    def _gather(self, name: str, rows) -> List[int]:
+        if self.use_numpy:
+            return self.columns()[name][rows].tolist()
+        column = self._columns[name]
+        return [column[row] for row in rows]
+
+    def _timestamps(self, rows) -> List[str]:
+        ts_text = self._ts_text
+        if ts_text is None:
+            return [datetime.fromtimestamp(ts_ns / 1e9, tz=timezone.utc).isoformat()
+                    for ts_ns in self._gather('ts_ns', rows)]
+        return [self.timestamp(row) for row in (rows.tolist() if hasattr(rows, 'tolist') else rows)]
+
+    def statistics(self, top: int = 10) -> Dict[str, Any]:
+        """إحصائيات الأعمدة (الأكثر تكراراً أولاً)"""
+        c = self.columns()
+        if self.use_numpy:
+            total_bytes = int(c['length'].sum(dtype=np.int64))
+            src_counts = np.bincount(c['src'], minlength=len(self.addresses))
+            dst_counts = np.bincount(c['dst'], minlength=len(self.addresses))
+            proto_counts = np.bincount(c['proto'], minlength=len(self.protocols))
+            port_counts = np.bincount(c['dport'], minlength=1)
+        else:
+            total_bytes = sum(c['length'])
+            src_counts = _bincount(c['src'], len(self.addresses))
+            dst_counts = _bincount(c['dst'], len(self.addresses))
+            proto_counts = _bincount(c['proto'], len(self.protocols))
+            port_counts = _bincount(c['dport'], 65536)
+
+        return {
+            "total_packets": len(self),
+            "total_bytes": total_bytes,
+            "unique_src_ips": sum(1 for n in src_counts if n),
+            "unique_dst_ips": sum(1 for n in dst_counts if n),
+            "protocols": {self.protocols[i]: n for i, n in _top(proto_counts, top)},
+            "top_dst_ports": {i: n for i, n in _top(port_counts, top)},
+            "top_src_ips": {self.addresses[i]: n for i, n in _top(src_counts, top)},
+            "top_dst_ips": {self.addresses[i]: n for i, n in _top(dst_counts, top)},
+        }
+
+    # -------------------------------------------------------------------------
+    # مسار NumPy
+    # -------------------------------------------------------------------------
+
+    def _valid_rows(self, mask, window: Optional[float]):
+        if window is not None:
+            mask &= self.columns()['ts_ns'] != NO_TIMESTAMP
+        return np.flatnonzero(mask)
+
+    def _port_scans_numpy(self, threshold: int, window: Optional[float]) -> List[PortScanGroup]:
+        c = self.columns()
+        rows = self._valid_rows((c['src'] != NO_ADDRESS) & (c['dport'] != 0), window)
+        group_ids, first_rows = _dense_groups(c['src'][rows], c['dst'][rows])
+        dport = c['dport'][rows]
+
+        # أزواج (مجموعة، منفذ) فريدة مرتبة -> منافذ كل مجموعة مرتبة
+        pairs = np.unique(group_ids * 65536 + dport)
+        pair_groups = pairs >> 16
+        counts = np.bincount(pair_groups, minlength=len(first_rows))
+        candidates = np.flatnonzero(counts >= threshold)
+        bounds = np.searchsorted(pair_groups, candidates)
+
+        if window is not None and len(candidates):
+            window_ns = _window_ns(window)
+            ts = c['ts_ns'][rows]
+            member = np.isin(group_ids, candidates)
+            order = np.flatnonzero(member)[np.lexsort((ts[member], group_ids[member]))]
+            starts = np.searchsorted(group_ids[order], candidates)
+            ends = np.append(starts[1:], len(order))
+
+        results = []
+        for i, group in enumerate(candidates):
+            if window is None:
+                ports = (pairs[bounds[i]:bounds[i] + counts[group]] & 0xFFFF).tolist()
+            else:
+                members = order[starts[i]:ends[i]]
+                ports = sorted(_window_distinct(ts[members].tolist(), dport[members].tolist(), window_ns))
+                if len(ports) < threshold:
+                    continue
+            row = rows[first_rows[group]]
+            results.append(PortScanGroup(
+                self.addresses[c['src'][row]], self.addresses[c['dst'][row]], ports))
+        return results
+
+    def _brute_force_numpy(self, auth_ports: Sequence[int], threshold: int,
+                           window: Optional[float]) -> List[AuthGroup]:
+        c = self.columns()
+        rows = self._valid_rows(np.isin(c['dport'], list(auth_ports)), window)
+        group_ids, first_rows = _dense_groups(c['src'][rows], c['dst'][rows], c['dport'][rows])
+        if window is None:
+            attempts = np.bincount(group_ids, minlength=len(first_rows))
+        else:
+            attempts = _window_max(group_ids, c['ts_ns'][rows], None, _window_ns(window), len(first_rows))
+
+        results = []
+        for group in np.flatnonzero(attempts >= threshold):
+            row = rows[first_rows[group]]
+            results.append(AuthGroup(self.addresses[c['src'][row]], self.addresses[c['dst'][row]],
+                                     int(c['dport'][row]), int(attempts[group])))
+        return results
+
+    def _transfers_numpy(self, size_threshold: int, window: Optional[float]) -> List[TransferGroup]:
+        c = self.columns()
+        rows = self._valid_rows((c['src'] != NO_ADDRESS) & (c['length'] != 0), window)
+        group_ids, first_rows = _dense_groups(c['src'][rows], c['dst'][rows])
+        lengths = c['length'][rows].astype(np.int64)
+        if window is None:
+            totals = _group_sums(group_ids, lengths, len(first_rows))
+        else:
+            totals = _window_max(group_ids, c['ts_ns'][rows], lengths, _window_ns(window), len(first_rows))
+
+        results = []
+        for group in np.flatnonzero(totals >= size_threshold):
+            row = rows[first_rows[group]]
+            results.append(TransferGroup(self.addresses[c['src'][row]], self.addresses[c['dst'][row]],
+                                         int(totals[group])))
+        return results
+
+    def _sessions_numpy(self) -> List[SessionGroup]:
+        c = self.columns()
+        if not len(self):
+            return []
+        a = (c['src'].astype(np.int64) << 16) | c['sport']
+        b = (c['dst'].astype(np.int64) << 16) | c['dport']
+        group_ids, first_rows = _dense_groups(np.minimum(a, b), np.maximum(a, b))
+
+        # ترتيب مستقر: صفوف كل جلسة متجاورة وبترتيبها الأصلي
+        order = np.argsort(group_ids, kind='stable')
+        starts = np.searchsorted(group_ids[order], np.arange(len(first_rows)))
+        packets = np.diff(np.append(starts, len(order)))
+        last_rows = order[starts + packets - 1]
+        totals = np.add.reduceat(c['length'][order].astype(np.int64), starts)
+
+        flagged = order[c['flags'][order] != 0]
+        flag_bounds = np.searchsorted(group_ids[flagged], np.arange(len(first_rows) + 1)).tolist()
+        names = self.flag_names
+        flag_names = [names[code] for code in c['flags'][flagged].tolist()]
+        flags = [flag_names[start:end] for start, end in zip(flag_bounds, flag_bounds[1:])]
+
+        return self._session_groups(first_rows, last_rows, packets.tolist(), totals.tolist(), flags)
+
+
+# =============================================================================
+# أدوات التجميع
+# =============================================================================
+
+def _window_ns(window: float) -> int:
+    return int(window * 1_000_000_000)
+
+
+def _window_sum(times: List[int], weights: Optional[List[int]], window_ns: int) -> int:
+    """أقصى مجموع أوزان (أو عدد) ضمن أي نافذة [t - window, t]؛ times مرتبة"""
+    best = total = left = 0
+    for right, ts in enumerate(times):
+        total += weights[right] if weights is not None else 1
+        while times[left] < ts - window_ns:
+            total -= weights[left] if weights is not None else 1
+            left += 1
+        if total > best:
+            best = total
+    return best
+
+
+def _window_distinct(times: List[int], ports: List[int], window_ns: int) -> List[int]:
+    """منافذ النافذة التي تحوي أكبر عدد من المنافذ المختلفة؛ times مرتبة"""
+    counts: Dict[int, int] = {}
+    best = best_left = best_right = left = 0
+    for right, ts in enumerate(times):
+        counts[ports[right]] = counts.get(ports[right], 0) + 1
+        while times[left] < ts - window_ns:
+            port = ports[left]
+            counts[port] -= 1
+            if not counts[port]:
+                del counts[port]
+            left += 1
+        if len(counts) > best:
+            best, best_left, best_right = len(counts), left, right + 1
+    return list(set(ports[best_left:best_right]))
+
+
+def _bincount(values: Iterable[int], size: int) -> List[int]:
+    counts = [0] * size
+    for value in values:
+        counts[value] += 1
+    return counts
+
+
+def _top(counts, n: int) -> List[Tuple[int, int]]:
+    """أعلى n قيم غير صفرية (الأصغر معرّفاً أولاً عند التساوي)"""
+    if NUMPY_AVAILABLE and isinstance(counts, np.ndarray):
+        nonzero = np.flatnonzero(counts)
+        best = nonzero[np.argsort(-counts[nonzero], kind='stable')[:n]]
+        return [(int(i), int(counts[i])) for i in best]
+    ranked = sorted((i for i, count in enumerate(counts) if count), key=lambda i: -counts[i])
+    return [(i, counts[i]) for i in ranked[:n]]
+
+
+def _dense_groups(*keys) -> Tuple[Any, Any]:
+    """
+    معرّفات مجموعات كثيفة لصفوف المفاتيح، مرقمة حسب أول ظهور
+
+    المفاتيح (معرّفات عناوين ومنافذ) تُدمج حسابياً في مفتاح int64 واحد
+    فيكفي فرز واحد؛ تُضغط أولاً إن تجاوز حاصل مداها int64.
+
+    Returns:
+        (معرّف المجموعة لكل صف، أول صف لكل مجموعة)
+    """
+    size = len(keys[0])
+    if not size:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    combined = np.zeros(size, dtype=np.int64)
+    span = 1
+    for key in keys:
+        key = key.astype(np.int64)
+        key_span = int(key.max()) + 1
+        if span * key_span >= 2 ** 62:
+            values, combined = np.unique(combined, return_inverse=True)
+            combined, span = combined.reshape(-1), len(values)
+            if span * key_span >= 2 ** 62:
+                values, key = np.unique(key, return_inverse=True)
+                key, key_span = key.reshape(-1), len(values)
+        combined = combined * key_span + key
+        span *= key_span
+
+    _, first_rows, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    rank = np.empty(len(first_rows), dtype=np.int64)
+    rank[np.argsort(first_rows)] = np.arange(len(first_rows))
+    return rank[inverse.reshape(-1)], np.sort(first_rows)
+
+
+def _group_sums(group_ids, values, groups: int):
+    order = np.argsort(group_ids, kind='stable')
+    starts = np.searchsorted(group_ids[order], np.arange(groups))
+    return np.add.reduceat(values[order], starts) if groups else np.zeros(0, dtype=np.int64)
+
+
+def _window_max(group_ids, ts, weights, window_ns: int, groups: int):
+    """
+    أقصى مجموع أوزان (أو عدد صفوف) لكل مجموعة ضمن نافذة [t - window, t] منزلقة
+
+    يرتب الصفوف حسب (مجموعة، زمن) ثم يجد بداية نافذة كل صف بـ searchsorted
+    واحد على مفتاح مركب (مجموعة، رتبة الزمن).
+    """
+    result = np.zeros(groups, dtype=np.int64)
+    if not len(group_ids):
+        return result
+    order = np.lexsort((ts, group_ids))
+    sorted_groups = group_ids[order]
+    sorted_ts = ts[order]
+
+    # رتبة الزمن: ts_j >= ts_i - window  <=>  rank_j >= rank(ts_i - window)
+    timeline = np.sort(sorted_ts)
+    ranks = np.searchsorted(timeline, sorted_ts, side='left')
+    window_ranks = np.searchsorted(timeline, sorted_ts - window_ns, side='left')
+    base = sorted_groups * (len(timeline) + 1)
+    left = np.searchsorted(base + ranks, base + window_ranks, side='left')
+
+    if weights is None:
+        totals = np.arange(1, len(order) + 1) - left
+    else:
+        cumulative = np.concatenate(([0], np.cumsum(weights[order])))
+        totals = cumulative[1:] - cumulative[left]
+
+    starts = np.flatnonzero(np.concatenate(([True], sorted_groups[1:] != sorted_groups[:-1])))
+    result[sorted_groups[starts]] = np.maximum.reduceat(totals, starts)
+    return result
@@ -6,18 +6,25 @@ Cyber Mirage Forensics Module
 - ملفات PCAP/PCAPNG
 - حركة مرور الشبكة
 - استخراج بيانات الجلسات
+
+الكاشفات تعمل على PacketTable العمودي (مجمّع عبر NumPy عند توفره).
 """
 
 import json
 import logging
 import subprocess
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
-from collections import Counter, defaultdict
-import struct
-import socket
+from collections import defaultdict
+
+try:
+    from .packet_table import PacketTable
+    from .pcap_reader import PcapReader, ip_to_str, protocol_name, tcp_flags_to_str
+except ImportError:
+    from packet_table import PacketTable
+    from pcap_reader import PcapReader, ip_to_str, protocol_name, tcp_flags_to_str
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -120,6 +127,9 @@ class PcapAnalyzer:
         self.sessions: Dict[str, NetworkSession] = {}
         self.suspicious_activities: List[SuspiciousActivity] = []
         self.statistics = defaultdict(int)
+        # الجدول العمودي للكاشفات (self.packets تُضاف إليه تلقائياً)
+        self.table = PacketTable()
+        self._table_synced = 0
     
     def analyze_with_tshark(self, pcap_file: str) -> Dict[str, Any]:
         """
@@ -223,7 +233,7 @@ class PcapAnalyzer:
     
     def analyze_basic(self, pcap_file: str) -> Dict[str, Any]:
         """
-        تحليل أساسي بدون TShark (قراءة PCAP يدوياً)
+        تحليل أساسي بدون TShark (قراءة PCAP/PCAPNG مباشرة عبر PcapReader)
         
         Args:
             pcap_file: مسار ملف PCAP
@@ -240,121 +250,157 @@ class PcapAnalyzer:
         }
         
         try:
-            with open(pcap_file, 'rb') as f:
-                # قراءة PCAP header
-                header = f.read(24)
-                if len(header) < 24:
-                    return {"error": "Invalid PCAP file"}
-                
-                magic = struct.unpack('I', header[0:4])[0]
-                
-                if magic == 0xa1b2c3d4:
-                    # Little endian
-                    byte_order = '<'
-                elif magic == 0xd4c3b2a1:
-                    # Big endian
-                    byte_order = '>'
-                else:
-                    return {"error": "Unknown PCAP format"}
-                
-                # قراءة الحزم
-                while True:
-                    packet_header = f.read(16)
-                    if len(packet_header) < 16:
-                        break
-                    
-                    ts_sec, ts_usec, incl_len, orig_len = struct.unpack(
-                        f'{byte_order}IIII', packet_header
-                    )
-                    
-                    packet_data = f.read(incl_len)
-                    if len(packet_data) < incl_len:
-                        break
-                    
-                    results["packet_count"] += 1
+            addresses = set()
+            ports = set()
+            
+            with PcapReader(pcap_file) as reader:
+                for record in reader:
+                    addresses.add(record.src)
+                    addresses.add(record.dst)
                     
-                    # تحليل Ethernet + IP header
-                    if len(packet_data) >= 34:  # Ethernet (14) + IP (20)
-                        ip_header_start = 14  # After Ethernet
-                        
-                        # IP addresses
-                        if len(packet_data) >= ip_header_start + 20:
-                            src_ip = socket.inet_ntoa(packet_data[ip_header_start+12:ip_header_start+16])
-                            dst_ip = socket.inet_ntoa(packet_data[ip_header_start+16:ip_header_start+20])
-                            
-                            results["ip_addresses"].add(src_ip)
-                            results["ip_addresses"].add(dst_ip)
-                            
-                            # Protocol
-                            protocol = packet_data[ip_header_start + 9]
-                            
-                            # TCP/UDP ports
-                            if protocol in (6, 17) and len(packet_data) >= ip_header_start + 24:
-                                ihl = (packet_data[ip_header_start] & 0x0F) * 4
-                                transport_start = ip_header_start + ihl
-                                
-                                if len(packet_data) >= transport_start + 4:
-                                    src_port = struct.unpack('!H', packet_data[transport_start:transport_start+2])[0]
-                                    dst_port = struct.unpack('!H', packet_data[transport_start+2:transport_start+4])[0]
-                                    
-                                    results["ports"].add(src_port)
-                                    results["ports"].add(dst_port)
+                    # TCP/UDP ports
+                    if record.proto in (6, 17):
+                        ports.add(record.sport)
+                        ports.add(record.dport)
+                
+                results["packet_count"] = reader.stats['packets']
+                results["format"] = reader.format
+                results["vlan_packets"] = reader.stats['vlan_packets']
+                results["truncated"] = reader.stats['truncated']
             
-            results["ip_addresses"] = list(results["ip_addresses"])
-            results["ports"] = list(results["ports"])
+            # تحويل العناوين إلى نص مرة واحدة لكل عنوان فريد
+            results["ip_addresses"] = [ip_to_str(address) for address in addresses]
+            results["ports"] = list(ports)
             
             logger.info(f"Basic analysis: {results['packet_count']} packets")
             
+        except ValueError as e:
+            return {"error": str(e)}
         except Exception as e:
             logger.error(f"Error in basic analysis: {e}")
             results["error"] = str(e)
         
         return results
     
-    def detect_port_scan(self, threshold: int = 10) -> List[SuspiciousActivity]:
+    def iter_packets(self, pcap_file: str) -> Iterator[PacketInfo]:
+        """
+        قراءة حزم الملف كمولّد PacketInfo (بدون TShark)
+        
+        Args:
+            pcap_file: مسار ملف PCAP/PCAPNG
+        """
+        with PcapReader(pcap_file) as reader:
+            for record in reader:
+                yield PacketInfo(
+                    timestamp=datetime.fromtimestamp(record.ts_ns / 1e9, tz=timezone.utc).isoformat(),
+                    src_ip=ip_to_str(record.src),
+                    dst_ip=ip_to_str(record.dst),
+                    src_port=record.sport,
+                    dst_port=record.dport,
+                    protocol=protocol_name(record.proto),
+                    length=record.length,
+                    flags=tcp_flags_to_str(record.tcp_flags)
+                )
+    
+    def load_packets(self, pcap_file: str) -> int:
+        """
+        تحميل حزم الملف إلى self.packets للكاشفات (بدون TShark)
+        
+        Returns:
+            عدد الحزم المضافة
+        """
+        before = len(self.packets)
+        self.packets.extend(self.iter_packets(pcap_file))
+        logger.info(f"Loaded {len(self.packets) - before} packets from {pcap_file}")
+        return len(self.packets) - before
+    
+    def load_table(self, pcap_file: str) -> int:
+        """
+        تحميل حزم الملف مباشرة إلى الجدول العمودي دون إنشاء PacketInfo
+        
+        أسرع وأقل ذاكرة للالتقاطات الكبيرة؛ الكاشفات والإحصائيات
+        والجلسات تراها، أما self.packets فلا.
+        
+        Returns:
+            عدد الحزم المضافة
+        """
+        self._packet_table()
+        with PcapReader(pcap_file) as reader:
+            count = self.table.extend_records(reader)
+        logger.info(f"Loaded {count} packets from {pcap_file} ({self.table.backend} table)")
+        return count
+    
+    def _packet_table(self) -> PacketTable:
+        """الجدول العمودي بعد إضافة ما استجد في self.packets"""
+        if len(self.packets) < self._table_synced:
+            # استُبدلت القائمة أو أُفرغت
+            self.table = PacketTable.from_packets(self.packets)
+        elif len(self.packets) > self._table_synced:
+            self.table.extend_packets(self.packets[self._table_synced:])
+        self._table_synced = len(self.packets)
+        return self.table
+    
+    def run_detectors(self,
+                      port_scan_threshold: int = 10,
+                      brute_force_threshold: int = 20,
+                      size_threshold: int = 1000000,
+                      auth_ports: List[int] = None,
+                      window: Optional[float] = None) -> Dict[str, Any]:
+        """
+        تشغيل جميع الكاشفات وبناء الجلسات على جدول واحد
+        
+        Args:
+            window: نافذة زمنية منزلقة (ثوانٍ) لعتبات الكاشفات، أو None للالتقاط كاملاً
+        
+        Returns:
+            الأنشطة المشبوهة لكل كاشف وعدد الجلسات
+        """
+        return {
+            "port_scan": self.detect_port_scan(port_scan_threshold, window=window),
+            "brute_force": self.detect_brute_force(auth_ports, brute_force_threshold, window=window),
+            "data_exfiltration": self.detect_data_exfiltration(size_threshold, window=window),
+            "sessions": len(self.build_sessions())
+        }
+    
+    def detect_port_scan(self, threshold: int = 10,
+                         window: Optional[float] = None) -> List[SuspiciousActivity]:
         """
         الكشف عن فحص المنافذ
         
         Args:
             threshold: الحد الأدنى لعدد المنافذ للاعتبار كـ scan
+            window: إن حُدد، يجب فحص threshold منفذ خلال window ثانية
         
         Returns:
             قائمة الأنشطة المشبوهة
         """
-        # تجميع المنافذ لكل IP مصدر
-        src_ports = defaultdict(set)
-        
-        for packet in self.packets:
-            if packet.src_ip and packet.dst_port:
-                key = (packet.src_ip, packet.dst_ip)
-                src_ports[key].add(packet.dst_port)
-        
         suspicious = []
-        for (src, dst), ports in src_ports.items():
-            if len(ports) >= threshold:
-                activity = SuspiciousActivity(
-                    activity_type="port_scan",
-                    description=f"Port scan detected: {len(ports)} ports scanned",
-                    src_ip=src,
-                    dst_ip=dst,
-                    confidence=min(0.9, 0.5 + (len(ports) / 100)),
-                    evidence=f"Scanned ports: {sorted(list(ports))[:20]}...",
-                    timestamp=datetime.now().isoformat()
-                )
-                suspicious.append(activity)
-                self.suspicious_activities.append(activity)
+        for src, dst, ports in self._packet_table().port_scans(threshold, window):
+            activity = SuspiciousActivity(
+                activity_type="port_scan",
+                description=f"Port scan detected: {len(ports)} ports scanned",
+                src_ip=src,
+                dst_ip=dst,
+                confidence=min(0.9, 0.5 + (len(ports) / 100)),
+                evidence=f"Scanned ports: {ports[:20]}...",
+                timestamp=datetime.now().isoformat()
+            )
+            suspicious.append(activity)
+            self.suspicious_activities.append(activity)
         
         return suspicious
     
     def detect_brute_force(self, 
                            auth_ports: List[int] = None,
-                           threshold: int = 20) -> List[SuspiciousActivity]:
+                           threshold: int = 20,
+                           window: Optional[float] = None) -> List[SuspiciousActivity]:
         """
         الكشف عن هجمات Brute Force
         
         Args:
             auth_ports: منافذ المصادقة
             threshold: الحد الأدنى للمحاولات
+            window: إن حُدد، يجب بلوغ threshold محاولة خلال window ثانية
         
         Returns:
             قائمة الأنشطة المشبوهة
@@ -362,103 +408,76 @@ class PcapAnalyzer:
         if auth_ports is None:
             auth_ports = [21, 22, 23, 2222, 2121, 3306, 3389]
         
-        # عد الاتصالات لكل IP على منافذ المصادقة
-        auth_attempts = defaultdict(int)
-        
-        for packet in self.packets:
-            if packet.dst_port in auth_ports:
-                key = (packet.src_ip, packet.dst_ip, packet.dst_port)
-                auth_attempts[key] += 1
-        
         suspicious = []
-        for (src, dst, port), count in auth_attempts.items():
-            if count >= threshold:
-                service = self.KNOWN_PORTS.get(port, f"Port {port}")
-                activity = SuspiciousActivity(
-                    activity_type="brute_force",
-                    description=f"Possible brute force on {service}: {count} attempts",
-                    src_ip=src,
-                    dst_ip=dst,
-                    confidence=min(0.95, 0.6 + (count / 200)),
-                    evidence=f"Port: {port}, Attempts: {count}",
-                    timestamp=datetime.now().isoformat()
-                )
-                suspicious.append(activity)
-                self.suspicious_activities.append(activity)
+        for src, dst, port, count in self._packet_table().brute_force(auth_ports, threshold, window):
+            service = self.KNOWN_PORTS.get(port, f"Port {port}")
+            activity = SuspiciousActivity(
+                activity_type="brute_force",
+                description=f"Possible brute force on {service}: {count} attempts",
+                src_ip=src,
+                dst_ip=dst,
+                confidence=min(0.95, 0.6 + (count / 200)),
+                evidence=f"Port: {port}, Attempts: {count}",
+                timestamp=datetime.now().isoformat()
+            )
+            suspicious.append(activity)
+            self.suspicious_activities.append(activity)
         
         return suspicious
     
     def detect_data_exfiltration(self, 
-                                 size_threshold: int = 1000000) -> List[SuspiciousActivity]:
+                                 size_threshold: int = 1000000,
+                                 window: Optional[float] = None) -> List[SuspiciousActivity]:
         """
         الكشف عن تسريب البيانات
         
         Args:
             size_threshold: حد حجم البيانات (bytes)
+            window: إن حُدد، يجب نقل size_threshold بايت خلال window ثانية
         
         Returns:
             قائمة الأنشطة المشبوهة
         """
-        # تجميع حجم البيانات المرسلة لكل IP
-        outbound_data = defaultdict(int)
-        
-        for packet in self.packets:
-            if packet.src_ip and packet.length:
-                key = (packet.src_ip, packet.dst_ip)
-                outbound_data[key] += packet.length
-        
         suspicious = []
-        for (src, dst), total_bytes in outbound_data.items():
-            if total_bytes >= size_threshold:
-                activity = SuspiciousActivity(
-                    activity_type="data_exfiltration",
-                    description=f"Large data transfer: {total_bytes / 1024:.2f} KB",
-                    src_ip=src,
-                    dst_ip=dst,
-                    confidence=min(0.8, 0.4 + (total_bytes / 10000000)),
-                    evidence=f"Total bytes: {total_bytes}",
-                    timestamp=datetime.now().isoformat()
-                )
-                suspicious.append(activity)
-                self.suspicious_activities.append(activity)
+        for src, dst, total_bytes in self._packet_table().transfers(size_threshold, window):
+            activity = SuspiciousActivity(
+                activity_type="data_exfiltration",
+                description=f"Large data transfer: {total_bytes / 1024:.2f} KB",
+                src_ip=src,
+                dst_ip=dst,
+                confidence=min(0.8, 0.4 + (total_bytes / 10000000)),
+                evidence=f"Total bytes: {total_bytes}",
+                timestamp=datetime.now().isoformat()
+            )
+            suspicious.append(activity)
+            self.suspicious_activities.append(activity)
         
         return suspicious
     
     def build_sessions(self) -> Dict[str, NetworkSession]:
         """
-        بناء جلسات الشبكة من الحزم
+        بناء جلسات الشبكة من الحزم (يُعاد البناء من الجدول عند كل استدعاء)
         
         Returns:
             قاموس الجلسات
         """
-        for packet in self.packets:
+        self.sessions.clear()
+        for group in self._packet_table().sessions():
             # معرف الجلسة (bidirectional)
-            session_key = self._get_session_key(
-                packet.src_ip, packet.dst_ip,
-                packet.src_port, packet.dst_port
+            session_key = self._get_session_key(group.src, group.dst, group.sport, group.dport)
+            self.sessions[session_key] = NetworkSession(
+                session_id=session_key,
+                src_ip=group.src,
+                dst_ip=group.dst,
+                src_port=group.sport,
+                dst_port=group.dport,
+                protocol=group.protocol,
+                start_time=group.start_time,
+                end_time=group.end_time,
+                packet_count=group.packets,
+                bytes_transferred=group.total_bytes,
+                flags=group.flags
             )
-            
-            if session_key not in self.sessions:
-                self.sessions[session_key] = NetworkSession(
-                    session_id=session_key,
-                    src_ip=packet.src_ip,
-                    dst_ip=packet.dst_ip,
-                    src_port=packet.src_port,
-                    dst_port=packet.dst_port,
-                    protocol=packet.protocol,
-                    start_time=packet.timestamp,
-                    packet_count=0,
-                    bytes_transferred=0,
-                    flags=[]
-                )
-            
-            session = self.sessions[session_key]
-            session.packet_count += 1
-            session.bytes_transferred += packet.length
-            session.end_time = packet.timestamp
-            
-            if packet.flags:
-                session.flags.append(packet.flags)
         
         return self.sessions
     
@@ -478,28 +497,14 @@ class PcapAnalyzer:
         Returns:
             إحصائيات
         """
-        if not self.packets:
+        table = self._packet_table()
+        if not len(table):
             return {"error": "No packets analyzed"}
         
-        protocol_counts = Counter(p.protocol for p in self.packets)
-        port_counts = Counter(p.dst_port for p in self.packets)
-        src_ip_counts = Counter(p.src_ip for p in self.packets)
-        dst_ip_counts = Counter(p.dst_ip for p in self.packets)
-        
-        total_bytes = sum(p.length for p in self.packets)
-        
-        return {
-            "total_packets": len(self.packets),
-            "total_bytes": total_bytes,
-            "unique_src_ips": len(set(p.src_ip for p in self.packets)),
-            "unique_dst_ips": len(set(p.dst_ip for p in self.packets)),
-            "protocols": dict(protocol_counts.most_common(10)),
-            "top_dst_ports": dict(port_counts.most_common(10)),
-            "top_src_ips": dict(src_ip_counts.most_common(10)),
-            "top_dst_ips": dict(dst_ip_counts.most_common(10)),
-            "sessions": len(self.sessions),
-            "suspicious_activities": len(self.suspicious_activities)
-        }
+        stats = table.statistics(top=10)
+        stats["sessions"] = len(self.sessions)
+        stats["suspicious_activities"] = len(self.suspicious_activities)
+        return stats
     
     def analyze_honeypot_traffic(self, pcap_file: str) -> Dict[str, Any]:
         """
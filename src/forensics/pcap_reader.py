@@ -0,0 +1,372 @@
+"""
+PCAP Reader - قارئ ملفات الالتقاط
+Cyber Mirage Forensics Module
+
+قارئ متدفق لملفات PCAP و PCAPNG:
+- mmap للملف وقراءة السجلات عبر struct.Struct مُعدّة مسبقاً دون نسخ
+- pcap الكلاسيكي (ميكروثانية/نانوثانية، أي ترتيب بايتات) و pcapng
+- Ethernet مع VLAN (802.1Q / 802.1ad)، Linux SLL، Raw IP، Loopback
+- IPv4 و IPv6
+
+ينتج سجلات PacketRecord مضغوطة واحدة تلو الأخرى، فتبقى الذاكرة محدودة
+مهما كان حجم الملف.
+"""
+
+import logging
+import mmap
+import socket
+import struct
+from functools import lru_cache
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# ثوابت الصيغ
+# =============================================================================
+
+PCAP_MAGIC = {
+    # magic (كما يُقرأ little-endian) -> (ترتيب البايتات، نانوثانية؟)
+    0xa1b2c3d4: ('<', False),
+    0xd4c3b2a1: ('>', False),
+    0xa1b23c4d: ('<', True),
+    0x4d3cb2a1: ('>', True),
+}
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# أنواع كتل pcapng
+BLOCK_IDB = 1
+BLOCK_OPB = 2
+BLOCK_SPB = 3
+BLOCK_EPB = 6
+
+# أنواع طبقة الربط
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IPV6_EXTENSION_HEADERS = (0, 43, 60)  # Hop-by-Hop, Routing, Destination Options
+IPV6_FRAGMENT = 44
+
+PROTOCOL_NAMES = {1: 'ICMP', 6: 'TCP', 17: 'UDP', 58: 'ICMPv6'}
+
+TCP_FLAG_NAMES = ((0x01, 'FIN'), (0x02, 'SYN'), (0x04, 'RST'), (0x08, 'PSH'),
+                  (0x10, 'ACK'), (0x20, 'URG'), (0x40, 'ECE'), (0x80, 'CWR'))
+
+# Structs لطبقات الشبكة (ترتيب الشبكة دائماً)
+U16 = struct.Struct('!H')
+IPV4_HEADER = struct.Struct('!B5xHxB2x4s4s')   # ver/ihl, flags/frag, proto, src, dst
+IPV6_HEADER = struct.Struct('!6xBx16s16s')      # next header, src, dst
+PORTS = struct.Struct('!HH')
+SLL_PROTOCOL = struct.Struct('!14xH')
+
+
+class PacketRecord(NamedTuple):
+    """سجل حزمة مضغوط (العناوين bytes بطول 4 أو 16)"""
+    ts_ns: int
+    src: bytes
+    dst: bytes
+    sport: int
+    dport: int
+    proto: int
+    tcp_flags: int
+    length: int
+    vlan: int
+
+
+@lru_cache(maxsize=65536)
+def ip_to_str(address: bytes) -> str:
+    """تحويل عنوان bytes إلى نص (مع تخزين مؤقت)"""
+    if len(address) == 4:
+        return socket.inet_ntoa(address)
+    return socket.inet_ntop(socket.AF_INET6, address)
+
+
+@lru_cache(maxsize=256)
+def tcp_flags_to_str(flags: int) -> Optional[str]:
+    """0x12 -> 'SYN|ACK'"""
+    if not flags:
+        return None
+    return '|'.join(name for bit, name in TCP_FLAG_NAMES if flags & bit)
+
+
+def protocol_name(proto: int) -> str:
+    return PROTOCOL_NAMES.get(proto, str(proto))
+
+
+# =============================================================================
+# تحليل الإطارات
+# =============================================================================
+
+def parse_frame(buf, offset: int, caplen: int, linktype: int) -> Optional[Tuple]:
+    """
+    تحليل إطار ملتقط حتى طبقة النقل
+
+    Returns:
+        (src, dst, sport, dport, proto, tcp_flags, vlan) أو None لغير IP
+    """
+    end = offset + caplen
+    vlan = 0
+
+    if linktype == LINKTYPE_ETHERNET:
+        if caplen < 14:
+            return None
+        ethertype = U16.unpack_from(buf, offset + 12)[0]
+        offset += 14
+        # وسوم VLAN (وقد تتعدد في QinQ)
+        while ethertype in ETHERTYPE_VLAN and offset + 4 <= end:
+            if not vlan:
+                vlan = U16.unpack_from(buf, offset)[0] & 0x0FFF
+            ethertype = U16.unpack_from(buf, offset + 2)[0]
+            offset += 4
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if caplen < 1:
+            return None
+        ethertype = ETHERTYPE_IPV6 if buf[offset] >> 4 == 6 else ETHERTYPE_IPV4
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if caplen < 16:
+            return None
+        ethertype = SLL_PROTOCOL.unpack_from(buf, offset)[0]
+        offset += 16
+    elif linktype == LINKTYPE_NULL:
+        if caplen < 4:
+            return None
+        # عائلة العناوين بترتيب بايتات جهاز الالتقاط
+        family = buf[offset] or buf[offset + 3]
+        ethertype = ETHERTYPE_IPV4 if family == 2 else ETHERTYPE_IPV6
+        offset += 4
+    else:
+        return None
+
+    if ethertype == ETHERTYPE_IPV4:
+        if offset + 20 > end:
+            return None
+        ver_ihl, frag, proto, src, dst = IPV4_HEADER.unpack_from(buf, offset)
+        transport = offset + (ver_ihl & 0x0F) * 4
+        if frag & 0x1FFF:
+            # جزء غير أول: لا يوجد رأس طبقة نقل
+            return src, dst, 0, 0, proto, 0, vlan
+    elif ethertype == ETHERTYPE_IPV6:
+        if offset + 40 > end:
+            return None
+        proto, src, dst = IPV6_HEADER.unpack_from(buf, offset)
+        transport = offset + 40
+        while proto in IPV6_EXTENSION_HEADERS and transport + 8 <= end:
+            proto, ext_len = buf[transport], buf[transport + 1]
+            transport += (ext_len + 1) * 8
+        if proto == IPV6_FRAGMENT and transport + 8 <= end:
+            frag = U16.unpack_from(buf, transport + 2)[0]
+            proto = buf[transport]
+            transport += 8
+            if frag & 0xFFF8:
+                return src, dst, 0, 0, proto, 0, vlan
+    else:
+        return None
+
+    sport = dport = flags = 0
+    if proto in (6, 17) and transport + 4 <= end:
+        sport, dport = PORTS.unpack_from(buf, transport)
+        if proto == 6 and transport + 14 <= end:
+            flags = buf[transport + 13]
+    return src, dst, sport, dport, proto, flags, vlan
+
+
+# =============================================================================
+# القارئ
+# =============================================================================
+
+class PcapReader:
+    """
+    قارئ PCAP/PCAPNG متدفق عبر mmap
+
+    Usage:
+        with PcapReader("capture.pcapng") as reader:
+            for record in reader:
+                ...
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format: Optional[str] = None
+        self.stats = {
+            'packets': 0,
+            'ip_packets': 0,
+            'non_ip_packets': 0,
+            'vlan_packets': 0,
+            'truncated': False
+        }
+        self._file = None
+        self._mmap = None
+
+    def __enter__(self) -> 'PcapReader':
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        self._file = open(self.path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # ملف فارغ
+            self.close()
+            raise ValueError("Invalid PCAP file")
+        if hasattr(self._mmap, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __iter__(self) -> Iterator[PacketRecord]:
+        return self.records()
+
+    def records(self) -> Iterator[PacketRecord]:
+        """سجلات حزم IP بالترتيب (الإطارات غير IP تُعدّ فقط)"""
+        if self._mmap is None:
+            self.open()
+        buf = self._mmap
+        if len(buf) < 4:
+            raise ValueError("Invalid PCAP file")
+
+        magic = struct.unpack_from('<I', buf, 0)[0]
+        if magic == PCAPNG_SHB:
+            self.format = 'pcapng'
+            frames = self._pcapng_frames(buf)
+        elif magic in PCAP_MAGIC:
+            byte_order, nanosecond = PCAP_MAGIC[magic]
+            self.format = 'pcap-ns' if nanosecond else 'pcap'
+            frames = self._pcap_frames(buf, byte_order, nanosecond)
+        else:
+            raise ValueError("Unknown PCAP format")
+
+        stats = self.stats
+        for ts_ns, offset, caplen, length, linktype in frames:
+            stats['packets'] += 1
+            parsed = parse_frame(buf, offset, caplen, linktype)
+            if parsed is None:
+                stats['non_ip_packets'] += 1
+                continue
+            src, dst, sport, dport, proto, flags, vlan = parsed
+            stats['ip_packets'] += 1
+            if vlan:
+                stats['vlan_packets'] += 1
+            yield PacketRecord(ts_ns, src, dst, sport, dport, proto, flags, length, vlan)
+
+    def _pcap_frames(self, buf, byte_order: str, nanosecond: bool) -> Iterator[Tuple]:
+        """إطارات pcap الكلاسيكي: (ts_ns, offset, caplen, orig_len, linktype)"""
+        if len(buf) < 24:
+            raise ValueError("Invalid PCAP file")
+        linktype = struct.unpack_from(f'{byte_order}I', buf, 20)[0] & 0x0FFFFFFF
+        record_header = struct.Struct(f'{byte_order}IIII')
+        unpack_header = record_header.unpack_from
+        frac_scale = 1 if nanosecond else 1000
+        size = len(buf)
+        offset = 24
+
+        while offset + 16 <= size:
+            ts_sec, ts_frac, caplen, orig_len = unpack_header(buf, offset)
+            offset += 16
+            if offset + caplen > size:
+                self.stats['truncated'] = True
+                return
+            yield ts_sec * 1_000_000_000 + ts_frac * frac_scale, offset, caplen, orig_len, linktype
+            offset += caplen
+        if offset != size:
+            self.stats['truncated'] = True
+
+    def _pcapng_frames(self, buf) -> Iterator[Tuple]:
+        """إطارات pcapng (عدة أقسام وواجهات)"""
+        size = len(buf)
+        offset = 0
+        byte_order = '<'
+        block_header = struct.Struct('<II')
+        interfaces: List[Tuple] = []  # (linktype, snaplen, دقة الطابع الزمني، إزاحته بالنانوثانية)
+
+        while offset + 12 <= size:
+            block_type = struct.unpack_from('<I', buf, offset)[0]
+            if block_type == PCAPNG_SHB:
+                # ترتيب البايتات يُحدد لكل قسم
+                bom = struct.unpack_from('<I', buf, offset + 8)[0]
+                byte_order = '<' if bom == PCAPNG_BYTE_ORDER_MAGIC else '>'
+                block_header = struct.Struct(f'{byte_order}II')
+                interfaces = []
+
+            block_type, block_len = block_header.unpack_from(buf, offset)
+            if block_len < 12 or offset + block_len > size:
+                self.stats['truncated'] = True
+                return
+            body = offset + 8
+
+            if block_type == BLOCK_EPB:
+                iface, ts_high, ts_low, caplen, orig_len = struct.unpack_from(f'{byte_order}IIIII', buf, body)
+                if iface < len(interfaces):
+                    linktype, _, resolution, ts_offset = interfaces[iface]
+                    yield (self._ts_ns((ts_high << 32) | ts_low, resolution) + ts_offset,
+                           body + 20, caplen, orig_len, linktype)
+            elif block_type == BLOCK_SPB:
+                if interfaces:
+                    orig_len = struct.unpack_from(f'{byte_order}I', buf, body)[0]
+                    linktype, snaplen = interfaces[0][:2]
+                    caplen = min(orig_len, block_len - 16, snaplen or orig_len)
+                    yield 0, body + 4, caplen, orig_len, linktype
+            elif block_type == BLOCK_OPB:
+                iface, _, ts_high, ts_low, caplen, orig_len = struct.unpack_from(f'{byte_order}HHIIII', buf, body)
+                if iface < len(interfaces):
+                    linktype, _, resolution, ts_offset = interfaces[iface]
+                    yield (self._ts_ns((ts_high << 32) | ts_low, resolution) + ts_offset,
+                           body + 20, caplen, orig_len, linktype)
+            elif block_type == BLOCK_IDB:
+                interfaces.append(self._parse_idb(buf, body, offset + block_len - 4, byte_order))
+
+            offset += block_len
+
+    @staticmethod
+    def _parse_idb(buf, body: int, end: int, byte_order: str) -> Tuple[int, int, Tuple[int, int], int]:
+        """(linktype, snaplen, دقة الطابع الزمني، إزاحته) من Interface Description Block"""
+        linktype, snaplen = struct.unpack_from(f'{byte_order}H2xI', buf, body)
+        resolution = (10, 6)  # الافتراضي: ميكروثانية
+        ts_offset = 0
+        option = struct.Struct(f'{byte_order}HH')
+        offset = body + 8
+        while offset + 4 <= end:
+            code, length = option.unpack_from(buf, offset)
+            if code == 0:
+                break
+            if code == 9 and length >= 1:
+                value = buf[offset + 4]
+                resolution = (2, value & 0x7F) if value & 0x80 else (10, value)
+            elif code == 14 and length >= 8:
+                ts_offset = struct.unpack_from(f'{byte_order}q', buf, offset + 4)[0] * 1_000_000_000
+            offset += 4 + (length + 3) // 4 * 4
+        return linktype, snaplen, resolution, ts_offset
+
+    @staticmethod
+    def _ts_ns(ticks: int, resolution: Tuple[int, int]) -> int:
+        base, exponent = resolution
+        if base == 2:
+            return (ticks * 1_000_000_000) >> exponent
+        if exponent <= 9:
+            return ticks * 10 ** (9 - exponent)
+        return ticks // 10 ** (exponent - 9)
+
+
+def read_pcap(path: str) -> Iterator[PacketRecord]:
+    """قراءة ملف التقاط كمولّد سجلات"""
+    with PcapReader(path) as reader:
+        yield from reader
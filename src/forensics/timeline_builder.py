@@ -6,17 +6,25 @@ Cyber Mirage Forensics Module
 - سجلات الهجمات
 - سجلات النظام
 - أحداث الشبكة
+
+الأحداث محفوظة في TimelineStore: مرتبة دائماً، مفهرسة حسب IP والخدمة
+والخطورة، وإعادة التحليل تضيف الجديد فقط.
 """
 
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import subprocess
 
+try:
+    from .timeline_store import TimelineStore
+except ImportError:  # run as a script from src/forensics
+    from timeline_store import TimelineStore
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -74,13 +82,29 @@ class TimelineBuilder:
             case_id: معرف القضية
         """
         self.case_id = case_id or f"TL_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        self.events: List[TimelineEvent] = []
+        self.store = TimelineStore(index_fields=("attacker_ip", "service", "severity"))
+        
+        # ما تم تحليله سابقاً، لتحليل الجديد فقط عند إعادة البناء:
+        # جلسات أُضيفت بدايتها فقط (مفتوحة)، وجلسات أُضيفت بدايتها ونهايتها
+        self._open_sessions: Set[str] = set()
+        self._closed_sessions: Set[str] = set()
+        self._log_watermarks: Dict[str, str] = {}
+        
         self.metadata = {
             "case_id": self.case_id,
             "created_at": datetime.now().isoformat(),
             "tool": "Cyber Mirage Timeline Builder"
         }
     
+    @property
+    def events(self) -> Tuple[TimelineEvent, ...]:
+        """
+        الأحداث مرتبة زمنياً (الأحداث بلا وقت صالح في النهاية)
+        
+        للقراءة فقط: الإضافة عبر add_event أو دوال parse_* حتى تبقى الفهارس متسقة.
+        """
+        return tuple(self.store)
+    
     def add_event(self, 
                   timestamp: str,
                   event_type: EventType,
@@ -108,7 +132,23 @@ class TimelineBuilder:
         Returns:
             الحدث المُضاف
         """
-        event = TimelineEvent(
+        return self.store.add(self._create_event(
+            timestamp, event_type, source, description, severity,
+            attacker_ip, service, details, mitre_technique
+        ))
+    
+    def _create_event(self,
+                      timestamp: str,
+                      event_type: EventType,
+                      source: str,
+                      description: str,
+                      severity: Severity = Severity.INFO,
+                      attacker_ip: str = None,
+                      service: str = None,
+                      details: Dict = None,
+                      mitre_technique: str = None) -> TimelineEvent:
+        """إنشاء حدث دون إضافته"""
+        return TimelineEvent(
             timestamp=timestamp,
             event_type=event_type.value,
             source=source,
@@ -119,8 +159,6 @@ class TimelineBuilder:
             details=details,
             mitre_technique=mitre_technique
         )
-        self.events.append(event)
-        return event
     
     def parse_attack_sessions(self, 
                               container_name: str = "cyber_mirage_postgres",
@@ -129,6 +167,9 @@ class TimelineBuilder:
         """
         استخراج الأحداث من جدول attack_sessions
         
+        الجلسات المُحللة سابقاً تُتخطى، وتُدمج الجديدة كدفعة واحدة. الجلسة
+        المفتوحة تُضاف بدايتها مرة واحدة ونهايتها عند ظهورها لاحقاً.
+        
         Returns:
             عدد الأحداث المُضافة
         """
@@ -149,12 +190,15 @@ class TimelineBuilder:
                 timeout=60
             )
             
-            count = 0
+            run = []
+            opened, closed = set(), set()
             for line in result.stdout.strip().split('\n'):
                 if line and '|' in line:
                     parts = line.split('|')
                     if len(parts) >= 4:
                         session_id = parts[0]
+                        if session_id in self._closed_sessions:
+                            continue
                         attacker_name = parts[1]
                         origin = parts[2]
                         start_time = parts[3]
@@ -166,23 +210,26 @@ class TimelineBuilder:
                         # تحديد تقنية MITRE
                         mitre = self._get_mitre_technique(service)
                         
-                        # حدث بداية الهجوم
-                        self.add_event(
-                            timestamp=start_time,
-                            event_type=EventType.ATTACK_START,
-                            source="attack_sessions",
-                            description=f"Attack started from {origin} on {service}",
-                            severity=Severity.HIGH,
-                            attacker_ip=origin,
-                            service=service,
-                            details={"session_id": session_id, "attacker_name": attacker_name},
-                            mitre_technique=mitre
-                        )
-                        count += 1
+                        # حدث بداية الهجوم (مرة واحدة)
+                        if session_id not in self._open_sessions:
+                            run.append(self._create_event(
+                                timestamp=start_time,
+                                event_type=EventType.ATTACK_START,
+                                source="attack_sessions",
+                                description=f"Attack started from {origin} on {service}",
+                                severity=Severity.HIGH,
+                                attacker_ip=origin,
+                                service=service,
+                                details={"session_id": session_id, "attacker_name": attacker_name},
+                                mitre_technique=mitre
+                            ))
                         
-                        # حدث نهاية الهجوم (إذا موجود)
-                        if end_time and end_time.strip():
-                            self.add_event(
+                        # حدث نهاية الهجوم (إذا موجود)، وإلا تبقى الجلسة مفتوحة
+                        if not (end_time and end_time.strip()):
+                            opened.add(session_id)
+                        else:
+                            closed.add(session_id)
+                            run.append(self._create_event(
                                 timestamp=end_time,
                                 event_type=EventType.ATTACK_END,
                                 source="attack_sessions",
@@ -191,9 +238,12 @@ class TimelineBuilder:
                                 attacker_ip=origin,
                                 service=service,
                                 details={"session_id": session_id}
-                            )
-                            count += 1
+                            ))
             
+            count = self.store.extend(run, source="attack_sessions")
+            # لا تُعلَّم الجلسة إلا بعد إضافة أحداثها
+            self._open_sessions = (self._open_sessions | opened) - closed
+            self._closed_sessions |= closed
             logger.info(f"Parsed {count} events from attack_sessions")
             return count
             
@@ -207,6 +257,8 @@ class TimelineBuilder:
         """
         استخراج الأحداث من سجلات Docker
         
+        الاستدعاءات التالية للحاوية نفسها تقرأ ما بعد آخر تحليل فقط (--since).
+        
         Args:
             container_name: اسم الحاوية
             lines: عدد الأسطر لقراءتها
@@ -215,20 +267,27 @@ class TimelineBuilder:
             عدد الأحداث المُضافة
         """
         try:
+            started = datetime.now(timezone.utc).isoformat()
+            since = self._log_watermarks.get(container_name)
             result = subprocess.run(
-                ["docker", "logs", "--tail", str(lines), container_name],
+                ["docker", "logs", "--tail", str(lines)]
+                + (["--since", since] if since else [])
+                + [container_name],
                 capture_output=True,
                 text=True,
                 timeout=60
             )
+            # أمر فاشل (حاوية متوقفة مثلاً) لا يُقدّم العلامة، فلا تضيع سجلاته
+            if result.returncode == 0:
+                self._log_watermarks[container_name] = started
             
-            count = 0
+            run = []
             for line in result.stdout.split('\n') + result.stderr.split('\n'):
                 event = self._parse_log_line(line, container_name)
                 if event:
-                    self.events.append(event)
-                    count += 1
+                    run.append(event)
             
+            count = self.store.extend(run, source=container_name)
             logger.info(f"Parsed {count} events from {container_name} logs")
             return count
             
@@ -328,8 +387,7 @@ class TimelineBuilder:
         return mitre_map.get(service, "Unknown")
     
     def sort_events(self):
-        """ترتيب الأحداث حسب الوقت"""
-        self.events.sort(key=lambda e: e.timestamp)
+        """الأحداث مرتبة دائماً في المخزن؛ تبقى للتوافق"""
     
     def filter_by_ip(self, ip: str) -> List[TimelineEvent]:
         """
@@ -341,7 +399,7 @@ class TimelineBuilder:
         Returns:
             قائمة الأحداث
         """
-        return [e for e in self.events if e.attacker_ip == ip]
+        return self.store.lookup("attacker_ip", ip)
     
     def filter_by_service(self, service: str) -> List[TimelineEvent]:
         """
@@ -353,7 +411,7 @@ class TimelineBuilder:
         Returns:
             قائمة الأحداث
         """
-        return [e for e in self.events if e.service == service]
+        return self.store.lookup("service", service)
     
     def filter_by_severity(self, severity: Severity) -> List[TimelineEvent]:
         """
@@ -365,7 +423,7 @@ class TimelineBuilder:
         Returns:
             قائمة الأحداث
         """
-        return [e for e in self.events if e.severity == severity.value]
+        return self.store.lookup("severity", severity.value)
     
     def filter_by_time_range(self, 
                              start: datetime, 
@@ -378,17 +436,9 @@ class TimelineBuilder:
             end: نهاية النطاق
         
         Returns:
-            قائمة الأحداث
+            قائمة الأحداث (الوقت بلا منطقة يُعامل كـ UTC)
         """
-        filtered = []
-        for event in self.events:
-            try:
-                event_time = datetime.fromisoformat(event.timestamp.replace('Z', '+00:00'))
-                if start <= event_time <= end:
-                    filtered.append(event)
-            except:
-                continue
-        return filtered
+        return self.store.between(start, end)
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -398,39 +448,27 @@ class TimelineBuilder:
             إحصائيات
         """
         stats = {
-            "total_events": len(self.events),
+            "total_events": len(self.store),
             "by_type": {},
-            "by_severity": {},
-            "by_service": {},
-            "unique_attackers": set(),
+            # الخطورة والخدمة والمهاجمون من الفهارس مباشرة
+            "by_severity": self.store.values("severity"),
+            "by_service": {k: v for k, v in self.store.values("service").items() if k},
+            "unique_attackers": sum(1 for ip in self.store.values("attacker_ip") if ip),
             "time_range": {
                 "start": None,
                 "end": None
             }
         }
         
-        for event in self.events:
+        for event in self.store:
             # حسب النوع
             stats["by_type"][event.event_type] = stats["by_type"].get(event.event_type, 0) + 1
-            
-            # حسب الخطورة
-            stats["by_severity"][event.severity] = stats["by_severity"].get(event.severity, 0) + 1
-            
-            # حسب الخدمة
-            if event.service:
-                stats["by_service"][event.service] = stats["by_service"].get(event.service, 0) + 1
-            
-            # المهاجمين الفريدين
-            if event.attacker_ip:
-                stats["unique_attackers"].add(event.attacker_ip)
-        
-        stats["unique_attackers"] = len(stats["unique_attackers"])
         
         # النطاق الزمني
-        if self.events:
-            self.sort_events()
-            stats["time_range"]["start"] = self.events[0].timestamp
-            stats["time_range"]["end"] = self.events[-1].timestamp
+        if len(self.store):
+            events = self.store.events
+            stats["time_range"]["start"] = (self.store.first() or events[0]).timestamp
+            stats["time_range"]["end"] = (self.store.last() or events[-1]).timestamp
         
         return stats
     
@@ -444,8 +482,6 @@ class TimelineBuilder:
         Returns:
             مسار الملف
         """
-        self.sort_events()
-        
         export_data = {
             "metadata": self.metadata,
             "statistics": self.get_statistics(),
@@ -470,8 +506,6 @@ class TimelineBuilder:
         """
         import csv
         
-        self.sort_events()
-        
         with open(file_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             
@@ -504,7 +538,6 @@ class TimelineBuilder:
         Returns:
             التقرير النصي
         """
-        self.sort_events()
         stats = self.get_statistics()
         
         report = f"""
@@ -533,7 +566,8 @@ class TimelineBuilder:
         report += "\n📅 EVENT TIMELINE:\n"
         report += "═" * 67 + "\n"
         
-        for event in self.events[:50]:  # أول 50 حدث
+        events = self.store.events
+        for event in events[:50]:  # أول 50 حدث
             severity_icon = {
                 "critical": "🔴",
                 "high": "🟠",
@@ -550,8 +584,8 @@ class TimelineBuilder:
    IP: {event.attacker_ip or 'N/A'} | Service: {event.service or 'N/A'}
 """
         
-        if len(self.events) > 50:
-            report += f"\n... and {len(self.events) - 50} more events\n"
+        if len(events) > 50:
+            report += f"\n... and {len(events) - 50} more events\n"
         
         report += """
 ═══════════════════════════════════════════════════════════════════
@@ -581,8 +615,6 @@ def build_full_timeline(case_id: str = None) -> TimelineBuilder:
     for container in containers:
         builder.parse_docker_logs(container)
     
-    builder.sort_events()
-    
     return builder
 
 
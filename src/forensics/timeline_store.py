@@ -0,0 +1,205 @@
+"""
+Timeline Store - مخزن الجدول الزمني التزايدي
+Cyber Mirage Forensics Module
+
+مخزن أحداث مرتب دائماً مع فهارس ثانوية:
+- كل دفعة (run) من مصدر واحد تُرتب ثم تُدمج في ذيل الترتيب الحالي
+- دمج عدة دفعات معاً عبر heapq.merge قبل دمجها في المخزن
+- فهارس ثانوية لحقول مختارة (IP، الخدمة، الخطورة)، كل منها مرتب زمنياً
+- استعلامات النطاق الزمني عبر bisect
+- تتبع المصادر المُدخلة حتى لا يُحلل الدليل نفسه مرتين
+
+الأحداث بلا وقت قابل للتحليل تُحفظ بعد المرتبة بترتيب إدخالها ولا تظهر
+في استعلامات النطاق الزمني.
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    from .packet_table import NO_TIMESTAMP, parse_timestamp
+except ImportError:  # run as a script from src/forensics
+    from packet_table import NO_TIMESTAMP, parse_timestamp
+
+
+def timeline_key(timestamp: Any) -> int:
+    """وقت الحدث -> نانوثانية منذ epoch (الوقت بلا منطقة يُعامل كـ UTC)، أو NO_TIMESTAMP"""
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return parse_timestamp(timestamp.isoformat())
+    if isinstance(timestamp, str):
+        return parse_timestamp(timestamp.replace('Z', '+00:00'))
+    return NO_TIMESTAMP
+
+
+class _SortedRun:
+    """مفاتيح وأحداث متوازية مرتبة حسب الوقت"""
+
+    __slots__ = ('keys', 'events')
+
+    def __init__(self):
+        self.keys: List[int] = []
+        self.events: List[Any] = []
+
+    def merge(self, keys: Sequence[int], events: Sequence[Any]):
+        """دمج دفعة مرتبة؛ يُعاد بناء الذيل فقط ابتداءً من أول مفتاح جديد"""
+        if not keys:
+            return
+        if not self.keys or keys[0] >= self.keys[-1]:
+            self.keys.extend(keys)
+            self.events.extend(events)
+            return
+
+        # المتساويان: الحدث الأقدم أولاً (heapq.merge مستقر)
+        start = bisect_right(self.keys, keys[0])
+        merged = list(heapq.merge(
+            zip(self.keys[start:], self.events[start:]), zip(keys, events), key=itemgetter(0)
+        ))
+        del self.keys[start:]
+        del self.events[start:]
+        self.keys.extend(map(itemgetter(0), merged))
+        self.events.extend(map(itemgetter(1), merged))
+
+    def between(self, start: int, end: int) -> List[Any]:
+        return self.events[bisect_left(self.keys, start):bisect_right(self.keys, end)]
+
+
+class TimelineStore:
+    """
+    مخزن أحداث تزايدي مرتب زمنياً
+
+    Usage:
+        store = TimelineStore(index_fields=('attacker_ip', 'service', 'severity'))
+        store.extend(events, source='EVD-1234')
+        store.lookup('attacker_ip', '45.155.205.1')
+        store.between(start, end, field='service', value='SSH')
+    """
+
+    def __init__(self, index_fields: Sequence[str] = (), timestamp_field: str = 'timestamp'):
+        self.index_fields = tuple(index_fields)
+        self.timestamp_field = timestamp_field
+        self.sources: Set[Hashable] = set()
+
+        self._timed = _SortedRun()
+        self._untimed: List[Any] = []
+        self._indexes: Dict[str, Dict[Any, _SortedRun]] = {name: {} for name in self.index_fields}
+        self._untimed_indexes: Dict[str, Dict[Any, List[Any]]] = {name: {} for name in self.index_fields}
+
+    def __len__(self) -> int:
+        return len(self._timed.events) + len(self._untimed)
+
+    def __iter__(self) -> Iterator[Any]:
+        yield from self._timed.events
+        yield from self._untimed
+
+    @property
+    def events(self) -> List[Any]:
+        """كل الأحداث: المرتبة زمنياً ثم غير المؤقتة"""
+        return self._timed.events + self._untimed
+
+    # =========================================================================
+    # الإدخال
+    # =========================================================================
+
+    def has_source(self, source: Hashable) -> bool:
+        return source in self.sources
+
+    def add(self, event: Any) -> Any:
+        self.extend([event])
+        return event
+
+    def extend(self, events: Iterable[Any], source: Optional[Hashable] = None) -> int:
+        """إضافة دفعة أحداث من مصدر واحد"""
+        return self.extend_runs([(source, events)])
+
+    def extend_runs(self, runs: Iterable[Tuple[Optional[Hashable], Iterable[Any]]]) -> int:
+        """
+        دمج عدة دفعات (مصدر، أحداث) في خطوة واحدة
+
+        كل دفعة تُرتب وحدها (Timsort خطي للدفعات المرتبة أصلاً)، ثم تُدمج
+        الدفعات عبر heapq.merge وتُدمج النتيجة في المخزن والفهارس مرة واحدة.
+        """
+        sorted_runs = []
+        untimed = []
+        for source, events in runs:
+            if source is not None:
+                self.sources.add(source)
+            timed = []
+            for event in events:
+                key = timeline_key(getattr(event, self.timestamp_field))
+                if key == NO_TIMESTAMP:
+                    untimed.append(event)
+                else:
+                    timed.append((key, event))
+            if timed:
+                timed.sort(key=itemgetter(0))
+                sorted_runs.append(timed)
+
+        merged = sorted_runs[0] if len(sorted_runs) == 1 else list(
+            heapq.merge(*sorted_runs, key=itemgetter(0))
+        )
+        self._merge(merged)
+
+        self._untimed.extend(untimed)
+        for name in self.index_fields:
+            index = self._untimed_indexes[name]
+            for event in untimed:
+                index.setdefault(getattr(event, name), []).append(event)
+
+        return len(merged) + len(untimed)
+
+    def _merge(self, merged: List[Tuple[int, Any]]):
+        if not merged:
+            return
+        self._timed.merge([key for key, _ in merged], [event for _, event in merged])
+
+        for name in self.index_fields:
+            groups: Dict[Any, List[Tuple[int, Any]]] = {}
+            for item in merged:
+                groups.setdefault(getattr(item[1], name), []).append(item)
+            index = self._indexes[name]
+            for value, items in groups.items():
+                bucket = index.get(value)
+                if bucket is None:
+                    bucket = index[value] = _SortedRun()
+                bucket.merge([key for key, _ in items], [event for _, event in items])
+
+    # =========================================================================
+    # الاستعلام
+    # =========================================================================
+
+    def lookup(self, field: str, value: Any) -> List[Any]:
+        """الأحداث ذات قيمة معينة لحقل مفهرس، بالترتيب الزمني"""
+        bucket = self._indexes[field].get(value)
+        timed = bucket.events if bucket else []
+        return timed + self._untimed_indexes[field].get(value, [])
+
+    def values(self, field: str) -> Dict[Any, int]:
+        """عدد الأحداث لكل قيمة من قيم حقل مفهرس"""
+        counts = {value: len(bucket.events) for value, bucket in self._indexes[field].items()}
+        for value, events in self._untimed_indexes[field].items():
+            counts[value] = counts.get(value, 0) + len(events)
+        return counts
+
+    def between(self, start: Any, end: Any, field: Optional[str] = None, value: Any = None) -> List[Any]:
+        """الأحداث ضمن [start, end] شاملاً، اختيارياً داخل فهرس حقل"""
+        start_key, end_key = timeline_key(start), timeline_key(end)
+        if NO_TIMESTAMP in (start_key, end_key):
+            raise ValueError(f"Invalid time range: {start!r} - {end!r}")
+        if field is None:
+            return self._timed.between(start_key, end_key)
+        bucket = self._indexes[field].get(value)
+        return bucket.between(start_key, end_key) if bucket else []
+
+    def first(self) -> Optional[Any]:
+        return self._timed.events[0] if self._timed.events else None
+
+    def last(self) -> Optional[Any]:
+        return self._timed.events[-1] if self._timed.events else None
+
+    def clear(self):
+        self.__init__(self.index_fields, self.timestamp_field)
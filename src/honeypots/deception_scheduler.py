@@ -0,0 +1,129 @@
+"""
+⏱️ Deception Delay Scheduler
+Cyber Mirage - Role 1: Adaptive Honeynet Layer
+
+Hashed timer wheel driving deception delays (INJECT_DELAY, RANDOM_DELAY,
+TARPIT, ...) on the listener event loop. A delayed session is just an
+entry in a wheel slot until its response is due, so holding tens of
+thousands of tarpitted attackers costs no threads and a single periodic
+tick instead of one loop timer per session.
+
+Author: Cyber Mirage Team
+Version: 1.0.0 - Production
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TimerEntry:
+    """A scheduled callback; cancel() makes the wheel skip it"""
+
+    __slots__ = ('rounds', 'callback', 'args', 'cancelled')
+
+    def __init__(self, rounds: int, callback: Callable[..., Any], args: tuple):
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel bound to the running asyncio loop.
+
+    Scheduling is O(1); timers fire on the first tick at or after their
+    deadline, so resolution is one tick (default 50 ms), which is well
+    below the granularity of any deception delay. The wheel only ticks
+    while timers are pending.
+    """
+
+    def __init__(self, tick: float = 0.05, slots: int = 512):
+        self.tick = tick
+        self.slots: List[List[TimerEntry]] = [[] for _ in range(slots)]
+        self.position = 0
+        self.pending = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ticker: Optional[asyncio.TimerHandle] = None
+        self.stats = {
+            'scheduled': 0,
+            'fired': 0,
+            'cancelled': 0,
+            'peak_pending': 0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Scheduling
+    # -------------------------------------------------------------------------
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args) -> TimerEntry:
+        """Run callback(*args) on the loop after roughly delay seconds"""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+
+        ticks = max(int(round(delay / self.tick)), 1)
+        rounds, offset = divmod(ticks - 1, len(self.slots))
+        entry = TimerEntry(rounds, callback, args)
+        self.slots[(self.position + offset + 1) % len(self.slots)].append(entry)
+
+        self.pending += 1
+        self.stats['scheduled'] += 1
+        self.stats['peak_pending'] = max(self.stats['peak_pending'], self.pending)
+        if self._ticker is None:
+            self._ticker = self.loop.call_later(self.tick, self._advance)
+        return entry
+
+    def sleep(self, delay: float) -> asyncio.Future:
+        """Awaitable that resolves after delay seconds without holding a thread"""
+        loop = self.loop or asyncio.get_running_loop()
+        future = loop.create_future()
+        if delay <= 0:
+            future.set_result(None)
+            return future
+
+        def wake():
+            if not future.done():
+                future.set_result(None)
+
+        entry = self.call_later(delay, wake)
+        future.add_done_callback(lambda f: entry.cancel() if f.cancelled() else None)
+        return future
+
+    # -------------------------------------------------------------------------
+    # Wheel
+    # -------------------------------------------------------------------------
+
+    def _advance(self) -> None:
+        self.position = (self.position + 1) % len(self.slots)
+        slot = self.slots[self.position]
+        keep = []
+        for entry in slot:
+            if entry.cancelled:
+                self.pending -= 1
+                self.stats['cancelled'] += 1
+            elif entry.rounds > 0:
+                entry.rounds -= 1
+                keep.append(entry)
+            else:
+                self.pending -= 1
+                self.stats['fired'] += 1
+                try:
+                    entry.callback(*entry.args)
+                except Exception as e:
+                    logger.error(f"Deception timer callback failed: {e}")
+        self.slots[self.position] = keep
+
+        if self.pending > 0:
+            self._ticker = self.loop.call_later(self.tick, self._advance)
+        else:
+            self._ticker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Scheduler counters for health reporting"""
+        return {'pending': self.pending, 'tick_seconds': self.tick, **self.stats}
@@ -4,18 +4,20 @@
 Provides a simple HTTP /health endpoint and lightweight TCP listeners
 on the ports declared in `docker-compose.production.yml` so the container
 stays up and reports healthy. This is intentionally simple and safe.
+
+All honeypot ports are served by the asyncio ListenerEngine
+(see listener_engine.py); tune it with the HONEYPOT_* environment variables.
 """
+import asyncio
 import json
 import logging
 import os
-import socket
 import threading
 import time
 import uuid
 from datetime import datetime
 from http.server import BaseHTTPRequestHandler, HTTPServer
 
-import psycopg2
 import redis
 
 # Ensure parent directory is importable for ai_agent package
@@ -25,10 +27,27 @@ CURRENT_DIR = os.path.dirname(__file__)
 sys.path.insert(0, os.path.join(CURRENT_DIR, ".."))
 
 from ai_agent import ActionType, DeceptionState, default_agent
+from deception_scheduler import TimerWheel  # sibling modules (script dir is on sys.path)
+from listener_engine import EngineConfig, ListenerEngine
+from persistence import ACTION, DECISION, EVENT, SCAN, SESSION, SESSION_END, PersistenceConfig, PgBatchWriter
+from scan_aggregator import ScanAggregator, ScanSession
+from threat_counters import ThreatCounterBuffer
 
 HOST = "0.0.0.0"
 HTTP_PORT = 8080
 HONEY_PORTS = [22, 21, 80, 443, 3306, 5432, 502, 445, 139, 1025]
+SERVICE_NAMES = {
+    22: 'SSH',
+    21: 'FTP',
+    80: 'HTTP',
+    443: 'HTTPS',
+    3306: 'MySQL',
+    5432: 'PostgreSQL',
+    502: 'Modbus',
+    445: 'SMB',
+    139: 'NetBIOS',
+    1025: 'SMTP'
+}
 agent = default_agent()
 SESSION_STATE = {}
 
@@ -46,35 +65,44 @@ REDIS_HOST = os.getenv('REDIS_HOST', 'redis')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 REDIS_PASS = os.getenv('REDIS_PASSWORD', 'changeme123')
 
-def get_db_connection():
-    """Create PostgreSQL connection"""
-    try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASS
-        )
-        return conn
-    except Exception as e:
-        logger.error(f"Database connection failed: {e}")
-        return None
+# Shared connection pool + batched background writer for all telemetry rows
+DB_WRITER = PgBatchWriter(PersistenceConfig.from_env(DB_HOST, DB_NAME, DB_USER, DB_PASS))
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
 
 def get_redis_connection():
-    """Create Redis connection"""
-    try:
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASS, decode_responses=True)
-        r.ping()
-        return r
-    except Exception as e:
-        logger.error(f"Redis connection failed: {e}")
-        return None
+    """Shared Redis client (thread-safe, connection-pooled; pinged once on creation)"""
+    global _redis_client
+    if _redis_client is not None:
+        return _redis_client
+    with _redis_lock:
+        if _redis_client is None:
+            try:
+                r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASS, decode_responses=True)
+                r.ping()
+                _redis_client = r
+            except Exception as e:
+                logger.error(f"Redis connection failed: {e}")
+                return None
+    return _redis_client
+
+
+# Coalesces threat:{ip} updates into one pipelined round-trip per window
+THREAT_COUNTERS = ThreatCounterBuffer(
+    get_redis_connection,
+    window=float(os.getenv("HONEYPOT_THREAT_FLUSH_MS", "500")) / 1000.0,
+)
 
 
 def ensure_ai_tables():
-    conn = get_db_connection()
-    if not conn:
-        return
+    with DB_WRITER.connection() as conn:
+        if conn:
+            _create_ai_tables(conn)
+
+
+def _create_ai_tables(conn):
     try:
         cur = conn.cursor()
         cur.execute("""
@@ -102,143 +130,49 @@ def ensure_ai_tables():
         cur.close()
     except Exception as e:
         logger.error(f"Failed ensuring AI tables: {e}")
-    finally:
-        conn.close()
 
 
 def log_agent_decision(session_id: str, action: ActionType, reason: str, state: DeceptionState, reward: float = 0.0):
-    conn = get_db_connection()
-    if not conn:
-        return
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO agent_decisions (id, session_id, action, strategy, reward, state)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """,
-            (
-                str(uuid.uuid4()),
-                str(session_id) if session_id else str(uuid.uuid4()),
-                action.value,
-                reason,
-                reward,
-                json.dumps(state.__dict__) if hasattr(state, '__dict__') else '{}',
-            ),
-        )
-        conn.commit()
-        cur.close()
-    except Exception as e:
-        logger.error(f"Failed logging agent decision: {e}")
-    finally:
-        conn.close()
+    DB_WRITER.submit(DECISION, (
+        str(uuid.uuid4()),
+        str(session_id) if session_id else str(uuid.uuid4()),
+        action.value,
+        reason,
+        reward,
+        json.dumps(state.__dict__) if hasattr(state, '__dict__') else '{}',
+    ))
 
 
 def log_deception_event(session_id: str, action: ActionType, parameters: dict, executed: bool = True):
-    conn = get_db_connection()
-    if not conn:
-        return
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO deception_events (id, session_id, action, parameters, executed)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (
-                str(uuid.uuid4()),
-                str(session_id) if session_id else str(uuid.uuid4()),
-                action.value,
-                json.dumps(parameters) if parameters else '{}',
-                executed,
-            ),
-        )
-        conn.commit()
-        cur.close()
-    except Exception as e:
-        logger.error(f"Failed logging deception event: {e}")
-    finally:
-        conn.close()
+    DB_WRITER.submit(EVENT, (
+        str(uuid.uuid4()),
+        str(session_id) if session_id else str(uuid.uuid4()),
+        action.value,
+        json.dumps(parameters) if parameters else '{}',
+        executed,
+    ))
 
 def log_attack(port, attacker_ip, attacker_port):
     """Log attack to PostgreSQL and Redis"""
+    session_id = None
     try:
-        # Determine service type
-        service_map = {
-            22: 'SSH',
-            21: 'FTP',
-            80: 'HTTP',
-            443: 'HTTPS',
-            3306: 'MySQL',
-            5432: 'PostgreSQL',
-            502: 'Modbus',
-            445: 'SMB',
-            139: 'NetBIOS',
-            1025: 'SMTP'
-        }
-        service = service_map.get(port, 'Unknown')
-        
-        # Log to PostgreSQL
-        conn = get_db_connection()
-        session_id = None
-        if conn:
-            try:
-                cursor = conn.cursor()
-                # Insert session and return id so we can log actions
-                try:
-                    cursor.execute("""
-                        INSERT INTO attack_sessions 
-                        (attacker_name, attacker_skill, origin, detected, start_time, honeypot_type)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                        RETURNING id
-                    """, (
-                        f"Attacker_{attacker_ip}_{service}",
-                        1.0,
-                        attacker_ip,
-                        True,
-                        datetime.now(),
-                        service
-                    ))
-                except Exception:
-                    # Fallback without honeypot_type
-                    cursor.execute("""
-                        INSERT INTO attack_sessions 
-                        (attacker_name, attacker_skill, origin, detected, start_time)
-                        VALUES (%s, %s, %s, %s, %s)
-                        RETURNING id
-                    """, (
-                        f"Attacker_{attacker_ip}_{service}",
-                        1.0,
-                        attacker_ip,
-                        True,
-                        datetime.now()
-                    ))
-
-                row = cursor.fetchone()
-                if row:
-                    session_id = row[0]
-                conn.commit()
-                cursor.close()
-                conn.close()
-                logger.info(f"✅ Logged {service} attack from {attacker_ip} to PostgreSQL (session {session_id})")
-            except Exception as e:
-                logger.error(f"PostgreSQL insert failed: {e}")
-                try:
-                    conn.close()
-                except:
-                    pass
+        service = SERVICE_NAMES.get(port, 'Unknown')
         
-        # Log to Redis
-        r = get_redis_connection()
-        if r:
-            try:
-                key = f"threat:{attacker_ip}"
-                r.hincrby(key, 'count', 1)
-                r.hset(key, 'last_seen', datetime.now().isoformat())
-                r.hset(key, 'service', service)
-                logger.info(f"✅ Logged threat intel to Redis for {attacker_ip}")
-            except Exception as e:
-                logger.error(f"Redis update failed: {e}")
+        # Queue the session row; the id is generated here so actions can reference it
+        session_id = str(uuid.uuid4())
+        DB_WRITER.submit(SESSION, (
+            session_id,
+            f"Attacker_{attacker_ip}_{service}",
+            1.0,
+            attacker_ip,
+            True,
+            datetime.now(),
+            service,
+        ))
+        logger.info(f"✅ Queued {service} attack from {attacker_ip} for PostgreSQL (session {session_id})")
+
+        # Log to Redis (coalesced per IP, flushed in the background)
+        THREAT_COUNTERS.record(attacker_ip, service)
     except Exception as e:
         logger.error(f"Attack logging failed: {e}")
 
@@ -256,10 +190,13 @@ def get_ppo_metrics():
         'status': 'active'
     }
     
-    conn = get_db_connection()
-    if not conn:
-        return metrics
-    
+    with DB_WRITER.connection() as conn:
+        if conn:
+            _query_ppo_metrics(conn, metrics)
+    return metrics
+
+
+def _query_ppo_metrics(conn, metrics):
     try:
         cur = conn.cursor()
         
@@ -294,10 +231,6 @@ def get_ppo_metrics():
         cur.close()
     except Exception as e:
         logger.error(f"Error getting PPO metrics: {e}")
-    finally:
-        conn.close()
-    
-    return metrics
 
 
 def get_system_health():
@@ -311,18 +244,17 @@ def get_system_health():
     
     # Check PostgreSQL
     start = time.time()
-    conn = get_db_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT 1")
-            cur.close()
-            health['postgres']['status'] = 'connected'
-            health['postgres']['latency_ms'] = round((time.time() - start) * 1000, 2)
-        except:
-            pass
-        finally:
-            conn.close()
+    with DB_WRITER.connection() as conn:
+        if conn:
+            try:
+                cur = conn.cursor()
+                cur.execute("SELECT 1")
+                cur.close()
+                health['postgres']['status'] = 'connected'
+                health['postgres']['latency_ms'] = round((time.time() - start) * 1000, 2)
+            except:
+                pass
+    health['postgres']['writer'] = DB_WRITER.get_stats()
     
     # Check Redis
     start = time.time()
@@ -334,10 +266,14 @@ def get_system_health():
             health['redis']['latency_ms'] = round((time.time() - start) * 1000, 2)
         except:
             pass
+    health['redis']['threat_counters'] = THREAT_COUNTERS.get_stats()
     
     # Honeypot status
     health['honeypots']['ports'] = HONEY_PORTS
     health['honeypots']['connections'] = len(SESSION_STATE)
+    health['honeypots']['engine'] = ENGINE.get_stats()
+    health['honeypots']['deception_scheduler'] = DELAY_SCHEDULER.get_stats()
+    health['honeypots']['scan_aggregator'] = SCAN_AGGREGATOR.get_stats()
     
     return health
 
@@ -400,62 +336,25 @@ def start_http():
         server.server_close()
 
 
-def tcp_listener(port):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    try:
-        sock.bind((HOST, port))
-        sock.listen(5)
-        logger.info(f"TCP honeypot listening on {HOST}:{port}")
-        while True:
-            conn, addr = sock.accept()
-            attacker_ip, attacker_port = addr
-            logger.info(f"Connection on port {port} from {addr}")
-
-            # Handle each connection in its own thread so listener stays responsive
-            th = threading.Thread(target=handle_connection, args=(conn, port, attacker_ip, attacker_port), daemon=True)
-            th.start()
-    except PermissionError:
-        logger.warning(f"Permission denied binding to port {port}; continuing")
-    except Exception as e:
-        logger.exception(f"Listener on port {port} failed: {e}")
-    finally:
-        try:
-            sock.close()
-        except Exception:
-            pass
-
-
 def insert_attack_action(session_id, step_number, action_id, action_text, suspicion=0.0, data_collected=0.0):
-    """Insert an action row tied to a session."""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return
-        cur = conn.cursor()
-        try:
-            # Ensure action_id is not null - use step_number as fallback
-            safe_action_id = action_id if action_id is not None else step_number
-            cur.execute("""
-                INSERT INTO attack_actions (session_id, step_number, action_id, reward, suspicion, data_collected, timestamp)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                str(session_id) if session_id else str(uuid.uuid4()),
-                step_number,
-                safe_action_id,
-                0.0,
-                suspicion,
-                data_collected,
-                datetime.now()
-            ))
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Failed inserting attack action: {e}")
-        finally:
-            cur.close()
-            conn.close()
-    except Exception as e:
-        logger.error(f"insert_attack_action error: {e}")
+    """Queue an action row tied to a session."""
+    # Ensure action_id is not null - use step_number as fallback
+    safe_action_id = action_id if action_id is not None else step_number
+    DB_WRITER.submit(ACTION, (
+        str(uuid.uuid4()),
+        str(session_id) if session_id else str(uuid.uuid4()),
+        step_number,
+        safe_action_id,
+        0.0,
+        suspicion,
+        data_collected,
+        datetime.now(),
+    ))
+
+
+def close_attack_session(session_id):
+    """Queue the end_time stamp for a finished session."""
+    DB_WRITER.submit(SESSION_END, (str(session_id), datetime.now()))
 
 
 def calculate_action_reward(action: ActionType, state: DeceptionState, metadata: dict) -> float:
@@ -539,8 +438,17 @@ def build_state(session_id: str, service: str, command_count: int, data_attempts
     )
 
 
+# Metadata keys carrying how long the session's next response is held back
+DELAY_KEYS = ("delay", "progressive_delay", "random_delay", "hold_time")
+
+
 def apply_action(conn, action: ActionType, service: str):
-    """Apply one of 20 elite deception actions."""
+    """Apply one of 20 elite deception actions.
+
+    Never blocks: delay and tarpit actions only report their hold time in the
+    returned metadata (see DELAY_KEYS); apply_deception() enforces it on the
+    timer wheel.
+    """
     
     # === Session Control Actions ===
     if action == ActionType.MAINTAIN:
@@ -555,7 +463,6 @@ def apply_action(conn, action: ActionType, service: str):
         return {"dropped": True}
     
     if action == ActionType.THROTTLE_SESSION:
-        time.sleep(2.0)
         return {"throttled": True, "delay": 2.0}
     
     if action == ActionType.REDIRECT_SESSION:
@@ -564,18 +471,15 @@ def apply_action(conn, action: ActionType, service: str):
     # === Delay Tactics ===
     if action == ActionType.INJECT_DELAY:
         delay = 0.5 if service != "FTP" else 1.5
-        time.sleep(delay)
         return {"delay": delay}
     
     if action == ActionType.PROGRESSIVE_DELAY:
         delay = min(SESSION_STATE.get(str(id(conn)), {}).get("delay_level", 0.5) * 1.5, 5.0)
-        time.sleep(delay)
         return {"progressive_delay": delay}
     
     if action == ActionType.RANDOM_DELAY:
         import random
         delay = random.uniform(0.1, 3.0)
-        time.sleep(delay)
         return {"random_delay": delay}
     
     # === Banner Manipulation ===
@@ -631,7 +535,6 @@ def apply_action(conn, action: ActionType, service: str):
     
     # === Advanced Tactics ===
     if action == ActionType.TARPIT:
-        time.sleep(5.0)
         return {"tarpit": True, "hold_time": 5.0}
     
     if action == ActionType.HONEYPOT_UPGRADE:
@@ -644,11 +547,100 @@ def apply_action(conn, action: ActionType, service: str):
     return {}
 
 
-def handle_connection(conn, port, attacker_ip, attacker_port):
-    """Handle an accepted connection with protocol emulation and logging."""
+class SessionConnection:
+    """Socket-like adapter over an asyncio writer for apply_action (loop thread only)."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+
+    def sendall(self, data: bytes) -> None:
+        self.writer.write(data)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def apply_deception(conn: SessionConnection, action: ActionType, service: str) -> dict:
+    """Apply an action and hold the session on the timer wheel for any delay it asks for."""
+    metadata = apply_action(conn, action, service)
+    delay = sum(float(metadata.get(key, 0.0)) for key in DELAY_KEYS)
+    if delay > 0 and not conn.writer.is_closing():
+        await DELAY_SCHEDULER.sleep(delay)
+    return metadata
+
+
+async def send(writer: asyncio.StreamWriter, data: bytes) -> None:
+    """Write to the attacker, ignoring connection errors like the old sendall paths."""
+    try:
+        writer.write(data)
+        await writer.drain()
+    except Exception:
+        pass
+
+
+SERVICE_BANNERS = {
+    22: b"SSH-2.0-OpenSSH_7.6p1 Ubuntu-4ubuntu0.3\r\n",
+    21: b"220 (vsFTPd 3.0.3)\r\n",
+    80: None,
+    443: None,
+    3306: None,
+    445: None,  # SMB uses binary protocol
+    139: None,  # NetBIOS uses binary protocol
+    502: b"Modbus/TCP proxy\r\n",
+    1025: b"220 smtpd (Postfix) ready\r\n"
+}
+
+
+async def read_first_payload(reader: asyncio.StreamReader, port) -> bytes:
+    """Wait for the attacker's first bytes with each protocol's read timeout."""
+    try:
+        if port == 21:
+            return await asyncio.wait_for(reader.readline(), timeout=300)
+        if port == 22:
+            return await asyncio.wait_for(reader.read(4096), timeout=2.0)
+        return await asyncio.wait_for(reader.read(2048), timeout=1.0)
+    except Exception:
+        return b""
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            port, attacker_ip, attacker_port):
+    """Handle an accepted connection with protocol emulation and logging.
+
+    Connections that never send data are folded into a per-IP scan session
+    by SCAN_AGGREGATOR; only the rest get a full session and agent decisions.
+    """
+    logger.info(f"Connection on port {port} from {(attacker_ip, attacker_port)}")
+    run_blocking = ENGINE.run_blocking
+    conn = SessionConnection(writer)
+    service = SERVICE_NAMES.get(port, 'Unknown')
     session_id = None
     try:
-        session_id, service = log_attack(port, attacker_ip, attacker_port)
+        # Send initial banner / response
+        if port == 80:
+            body = b"<html><body><h1>Welcome</h1><p>Apache/2.4.29 (Ubuntu)</p></body></html>"
+            resp = (
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/html; charset=UTF-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await send(writer, resp)
+
+        else:
+            banner = SERVICE_BANNERS.get(port)
+            if banner is None:
+                await send(writer, f"220 {port} service ready\r\n".encode())
+            else:
+                await send(writer, banner)
+
+        first_payload = await read_first_payload(reader, port)
+        if not first_payload:
+            SCAN_AGGREGATOR.record(attacker_ip, port, service)
+            THREAT_COUNTERS.record(attacker_ip, service)
+            return
+
+        session_id, service = await run_blocking(log_attack, port, attacker_ip, attacker_port)
         if not session_id:
             session_id = str(uuid.uuid4())
             service = service or "Unknown"
@@ -665,73 +657,33 @@ def handle_connection(conn, port, attacker_ip, attacker_port):
 
         state = build_state(session_id, service, 0, 0, False, SESSION_STATE[session_id]["start_time"], "", 0.0)
         action = agent.choose_action(state)
-        metadata = apply_action(conn, action, service)
+        metadata = await apply_deception(conn, action, service)
         # Calculate initial reward based on action taken
         initial_reward = calculate_action_reward(action, state, metadata)
-        log_agent_decision(session_id, action, agent.get_reason(action, state), state, initial_reward)
+        await run_blocking(log_agent_decision, session_id, action, agent.get_reason(action, state),
+                           state, initial_reward)
         if metadata:
-            log_deception_event(session_id, action, metadata)
+            await run_blocking(log_deception_event, session_id, action, metadata)
             if metadata.get("lure"):
                 SESSION_STATE[session_id]["lure_active"] = True
             if metadata.get("dropped"):
                 return
 
-        # Prepare banners
-        service_banners = {
-            22: b"SSH-2.0-OpenSSH_7.6p1 Ubuntu-4ubuntu0.3\r\n",
-            21: b"220 (vsFTPd 3.0.3)\r\n",
-            80: None,
-            443: None,
-            3306: None,
-            445: None,  # SMB uses binary protocol
-            139: None,  # NetBIOS uses binary protocol
-            502: b"Modbus/TCP proxy\r\n",
-            1025: b"220 smtpd (Postfix) ready\r\n"
-        }
-
-        # Send initial banner / response
-        if port == 80:
-            body = b"<html><body><h1>Welcome</h1><p>Apache/2.4.29 (Ubuntu)</p></body></html>"
-            resp = (
-                b"HTTP/1.1 200 OK\r\n"
-                b"Content-Type: text/html; charset=UTF-8\r\n"
-                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
-                b"Connection: close\r\n\r\n" + body
-            )
-            try:
-                conn.sendall(resp)
-            except Exception:
-                pass
-
-        else:
-            banner = service_banners.get(port)
-            if banner is None:
-                try:
-                    conn.sendall(f"220 {port} service ready\r\n".encode())
-                except Exception:
-                    pass
-            else:
-                try:
-                    conn.sendall(banner)
-                except Exception:
-                    pass
-
         # Protocol-specific handling
         if port == 21:
             # Simple FTP interactive emulation
             try:
-                conn.settimeout(300)
                 step = 1
                 logged_user = None
+                data = first_payload
                 while True:
-                    data = b""
                     # read a line
-                    while not data.endswith(b"\n"):
-                        chunk = conn.recv(1024)
-                        if not chunk:
-                            raise ConnectionResetError()
-                        data += chunk
+                    if data is None:
+                        data = await asyncio.wait_for(reader.readline(), timeout=300)
+                    if not data.endswith(b"\n"):
+                        raise ConnectionResetError()
                     line = data.decode(errors='ignore').strip()
+                    data = None
                     if not line:
                         break
                     cmd = line.split(' ')[0].upper()
@@ -743,7 +695,7 @@ def handle_connection(conn, port, attacker_ip, attacker_port):
                     SESSION_STATE[session_id]["last_command"] = line
                     suspicion = 0.2 * SESSION_STATE[session_id]["command_count"]
                     SESSION_STATE[session_id]["suspicion"] = suspicion
-                    insert_attack_action(session_id, step, None, line, suspicion=suspicion, data_collected=len(line))
+                    await run_blocking(insert_attack_action, session_id, step, None, line, suspicion, len(line))
                     current_state = build_state(
                         session_id,
                         service,
@@ -757,12 +709,13 @@ def handle_connection(conn, port, attacker_ip, attacker_port):
                     reward = agent.compute_reward(line, SESSION_STATE[session_id]["auth_success"], len(line), False)
                     next_action = agent.choose_action(current_state)
                     agent.update(state, action, reward, current_state)
-                    log_agent_decision(session_id, next_action, agent.get_reason(next_action, current_state), current_state, reward)
+                    await run_blocking(log_agent_decision, session_id, next_action,
+                                       agent.get_reason(next_action, current_state), current_state, reward)
                     action = next_action
                     state = current_state
-                    metadata = apply_action(conn, action, service)
+                    metadata = await apply_deception(conn, action, service)
                     if metadata:
-                        log_deception_event(session_id, action, metadata)
+                        await run_blocking(log_deception_event, session_id, action, metadata)
                         if metadata.get("lure"):
                             SESSION_STATE[session_id]["lure_active"] = True
                         if metadata.get("dropped"):
@@ -770,81 +723,51 @@ def handle_connection(conn, port, attacker_ip, attacker_port):
                     step += 1
 
                     if cmd == 'USER':
-                        try:
-                            conn.sendall(b"331 Please specify the password.\r\n")
-                        except Exception:
-                            pass
+                        await send(writer, b"331 Please specify the password.\r\n")
                     elif cmd == 'PASS':
                         logged_user = True
-                        try:
-                            conn.sendall(b"230 Login successful.\r\n")
-                        except Exception:
-                            pass
+                        await send(writer, b"230 Login successful.\r\n")
                     elif cmd == 'LIST' or cmd == 'NLST':
                         listing = b"-rw-r--r-- 1 root root 1024 Nov 26 2025 secrets.txt\r\n"
                         if SESSION_STATE[session_id].get("lure_active"):
                             listing += b"-rw-r--r-- 1 root root 4096 Nov 20 2025 finance_Q4_backup.zip\r\n"
-                        try:
-                            conn.sendall(b"150 Here comes the directory listing.\r\n")
-                            conn.sendall(listing)
-                            conn.sendall(b"226 Directory send OK.\r\n")
-                        except Exception:
-                            pass
+                        await send(writer, b"150 Here comes the directory listing.\r\n" + listing
+                                   + b"226 Directory send OK.\r\n")
                     elif cmd in ('RETR', 'STOR'):
                         if SESSION_STATE[session_id].get("lure_active") and cmd == 'RETR':
-                            try:
-                                conn.sendall(b"150 Opening data connection.\r\n")
-                                conn.sendall(b"Fake financial data -- classified\r\n")
-                                conn.sendall(b"226 Transfer complete.\r\n")
-                            except Exception:
-                                pass
+                            await send(
+                                writer,
+                                b"150 Opening data connection.\r\n"
+                                b"Fake financial data -- classified\r\n"
+                                b"226 Transfer complete.\r\n"
+                            )
                             continue
-                        try:
-                            conn.sendall(b"550 Permission denied.\r\n")
-                        except Exception:
-                            pass
+                        await send(writer, b"550 Permission denied.\r\n")
                     elif cmd in ('QUIT', 'BYE', 'EXIT'):
-                        try:
-                            conn.sendall(b"221 Goodbye.\r\n")
-                        except Exception:
-                            pass
+                        await send(writer, b"221 Goodbye.\r\n")
                         break
                     else:
                         # Generic response
-                        try:
-                            conn.sendall(b"200 OK\r\n")
-                        except Exception:
-                            pass
+                        await send(writer, b"200 OK\r\n")
             except Exception:
                 pass
 
         elif port == 22:
-            # Minimal SSH capture: read initial client bytes (if any) to avoid revealing honeypot
+            # Minimal SSH capture: record the initial client bytes
             try:
-                conn.settimeout(2.0)
-                try:
-                    data = conn.recv(4096)
-                    if data:
-                        insert_attack_action(session_id, 1, None, data.hex(), suspicion=0.0, data_collected=len(data))
-                except Exception:
-                    pass
-            finally:
-                # wait a short moment so logs capture
-                try:
-                    threading.Event().wait(0.2)
-                except:
-                    pass
+                data = first_payload
+                await run_blocking(insert_attack_action, session_id, 1, None, data.hex(), 0.0, len(data))
+            except Exception:
+                pass
+            # wait a short moment so logs capture
+            await asyncio.sleep(0.2)
 
         else:
-            # For other ports we attempt a short read to capture probes
+            # For other ports we record the captured probe
             try:
-                conn.settimeout(1.0)
-                try:
-                    data = conn.recv(2048)
-                    if data:
-                        insert_attack_action(session_id, 1, None, data.decode(errors='ignore'), suspicion=0.0, data_collected=len(data))
-                except Exception:
-                    pass
+                data = first_payload
+                await run_blocking(insert_attack_action, session_id, 1, None,
+                                   data.decode(errors='ignore'), 0.0, len(data))
             except Exception:
                 pass
 
@@ -854,43 +777,67 @@ def handle_connection(conn, port, attacker_ip, attacker_port):
         try:
             # update end_time for session
             if session_id:
-                conn_db = get_db_connection()
-                if conn_db:
-                    cur = conn_db.cursor()
-                    try:
-                        cur.execute("UPDATE attack_sessions SET end_time = %s WHERE id = %s", (datetime.now(), session_id))
-                        conn_db.commit()
-                    except Exception:
-                        pass
-                    finally:
-                        cur.close()
-                        conn_db.close()
+                await run_blocking(close_attack_session, session_id)
         except Exception:
             pass
         SESSION_STATE.pop(session_id, None)
         try:
-            conn.close()
+            writer.close()
+            await writer.wait_closed()
         except Exception:
             pass
 
 
+def log_scan_session(scan: ScanSession, final: bool):
+    """Upsert the aggregated attack_sessions row for connect-only traffic."""
+    DB_WRITER.submit(SCAN, (
+        scan.session_id,
+        f"Scanner_{scan.ip}",
+        0.5,
+        scan.ip,
+        True,
+        datetime.fromtimestamp(scan.first_seen),
+        datetime.fromtimestamp(scan.last_seen) if final else None,
+        scan.honeypot_type(),
+        scan.is_scan,
+        scan.reason(),
+    ))
+
+
+async def expire_scan_sessions():
+    """Close idle scan sessions so their final port list gets persisted."""
+    while True:
+        await asyncio.sleep(min(SCAN_AGGREGATOR.window, 5.0))
+        SCAN_AGGREGATOR.expire()
+
+
+ENGINE = ListenerEngine(handle_connection, EngineConfig.from_env(HOST, HONEY_PORTS))
+DELAY_SCHEDULER = TimerWheel()
+# Mirrors honeypots.connection_aggregation_window / scan_threshold in config/app.yml
+SCAN_AGGREGATOR = ScanAggregator(
+    log_scan_session,
+    window=float(os.getenv("HONEYPOT_AGGREGATION_WINDOW", "60")),
+    scan_threshold=int(os.getenv("HONEYPOT_SCAN_THRESHOLD", "3")),
+)
+ENGINE.add_background_task(expire_scan_sessions)
+
+
 def main():
     ensure_ai_tables()
+    DB_WRITER.start()
     # Start HTTP health server
     t = threading.Thread(target=start_http, daemon=True)
     t.start()
 
-    # Start lightweight TCP listeners for each honeypot port
-    for p in HONEY_PORTS:
-        th = threading.Thread(target=tcp_listener, args=(p,), daemon=True)
-        th.start()
-
-    # Keep main thread alive
+    # Serve every honeypot port from the event loop engine (blocks)
     try:
-        while True:
-            threading.Event().wait(60)
+        ENGINE.run()
     except KeyboardInterrupt:
         logger.info("Shutting down honeypot manager")
+    finally:
+        SCAN_AGGREGATOR.flush()
+        THREAT_COUNTERS.stop()
+        DB_WRITER.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,306 @@
+"""
+⚡ Honeypot Listener Engine
+Cyber Mirage - Role 1: Adaptive Honeynet Layer
+
+Event-loop based TCP front end for the honeypot ports. A single asyncio
+loop serves every port of a worker process, so a mass scan costs one
+coroutine per socket instead of one OS thread. Features:
+- Configurable listen backlog
+- Global cap on concurrently served sessions
+- Per-IP admission control (concurrent sessions + token-bucket rate)
+- Optional multi-process mode (one loop per core via SO_REUSEPORT)
+- Bounded thread pool for blocking work (DB, Redis) issued by handlers
+
+Author: Cyber Mirage Team
+Version: 1.0.0 - Production
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SessionHandler = Callable[[asyncio.StreamReader, asyncio.StreamWriter, int, str, int], Awaitable[None]]
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+@dataclass
+class EngineConfig:
+    """Listener engine settings"""
+    host: str = "0.0.0.0"
+    ports: List[int] = field(default_factory=list)
+    backlog: int = 1024
+    max_sessions: int = 10000
+    max_sessions_per_ip: int = 32
+    per_ip_rate: float = 20.0       # new connections per second per IP
+    per_ip_burst: int = 50          # token bucket size per IP
+    workers: int = 1                # event loops (processes); 0 = one per core
+    io_workers: int = 32            # threads for blocking handler work
+
+    @classmethod
+    def from_env(cls, host: str, ports: List[int]) -> "EngineConfig":
+        """Build a config from HONEYPOT_* environment variables"""
+        workers = int(os.getenv("HONEYPOT_WORKERS", "1"))
+        return cls(
+            host=host,
+            ports=list(ports),
+            backlog=int(os.getenv("HONEYPOT_LISTEN_BACKLOG", "1024")),
+            max_sessions=int(os.getenv("HONEYPOT_MAX_SESSIONS", "10000")),
+            max_sessions_per_ip=int(os.getenv("HONEYPOT_MAX_SESSIONS_PER_IP", "32")),
+            per_ip_rate=float(os.getenv("HONEYPOT_PER_IP_RATE", "20")),
+            per_ip_burst=int(os.getenv("HONEYPOT_PER_IP_BURST", "50")),
+            workers=workers if workers > 0 else (os.cpu_count() or 1),
+            io_workers=int(os.getenv("HONEYPOT_IO_WORKERS", "32")),
+        )
+
+
+# =============================================================================
+# ADMISSION CONTROL
+# =============================================================================
+
+class AdmissionController:
+    """
+    Decides whether a new connection may be served.
+
+    Enforces the global session cap, a per-IP concurrency cap and a per-IP
+    token bucket for connection rate. Only touched from the event loop
+    thread, so no locking is needed.
+    """
+
+    # Idle rate buckets are pruned once the table grows past this size
+    PRUNE_THRESHOLD = 50000
+
+    def __init__(self, config: EngineConfig):
+        self.config = config
+        self.active_total = 0
+        self.active_by_ip: Dict[str, int] = {}
+        self._buckets: Dict[str, List[float]] = {}
+        self.stats = {
+            'admitted': 0,
+            'rejected_capacity': 0,
+            'rejected_ip_sessions': 0,
+            'rejected_ip_rate': 0,
+        }
+
+    def admit(self, ip: str, now: Optional[float] = None) -> bool:
+        """Try to admit a connection from ip; counts it as active on success"""
+        now = time.monotonic() if now is None else now
+
+        if self.active_total >= self.config.max_sessions:
+            self.stats['rejected_capacity'] += 1
+            return False
+
+        if self.active_by_ip.get(ip, 0) >= self.config.max_sessions_per_ip:
+            self.stats['rejected_ip_sessions'] += 1
+            return False
+
+        bucket = self._buckets.get(ip)
+        if bucket is None:
+            if len(self._buckets) >= self.PRUNE_THRESHOLD:
+                self._prune(now)
+            bucket = [float(self.config.per_ip_burst), now]
+            self._buckets[ip] = bucket
+        else:
+            elapsed = now - bucket[1]
+            bucket[0] = min(self.config.per_ip_burst, bucket[0] + elapsed * self.config.per_ip_rate)
+            bucket[1] = now
+
+        if bucket[0] < 1.0:
+            self.stats['rejected_ip_rate'] += 1
+            return False
+
+        bucket[0] -= 1.0
+        self.active_total += 1
+        self.active_by_ip[ip] = self.active_by_ip.get(ip, 0) + 1
+        self.stats['admitted'] += 1
+        return True
+
+    def release(self, ip: str) -> None:
+        """Mark a previously admitted connection as finished"""
+        self.active_total = max(self.active_total - 1, 0)
+        remaining = self.active_by_ip.get(ip, 0) - 1
+        if remaining > 0:
+            self.active_by_ip[ip] = remaining
+        else:
+            self.active_by_ip.pop(ip, None)
+
+    def _prune(self, now: float) -> None:
+        """Drop buckets that have fully refilled and have no active sessions"""
+        refill_time = self.config.per_ip_burst / max(self.config.per_ip_rate, 1e-9)
+        stale = [
+            ip for ip, (_, last) in self._buckets.items()
+            if now - last >= refill_time and ip not in self.active_by_ip
+        ]
+        for ip in stale:
+            del self._buckets[ip]
+
+
+# =============================================================================
+# LISTENER ENGINE
+# =============================================================================
+
+class ListenerEngine:
+    """
+    Serves all honeypot ports from one asyncio event loop per worker.
+
+    Handlers are coroutines receiving (reader, writer, port, peer_ip,
+    peer_port). Blocking calls made by handlers should go through
+    run_blocking() so they never stall the loop.
+    """
+
+    def __init__(self, handler: SessionHandler, config: EngineConfig):
+        self.handler = handler
+        self.config = config
+        self.admission = AdmissionController(config)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.io_pool: Optional[ThreadPoolExecutor] = None
+        self.servers: List[asyncio.AbstractServer] = []
+        self.listening_ports: List[int] = []
+        self.background: List[Callable[[], Awaitable[None]]] = []
+        self.stats = {
+            'connections_total': 0,
+            'handler_errors': 0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Blocking work
+    # -------------------------------------------------------------------------
+
+    async def run_blocking(self, func: Callable[..., Any], *args) -> Any:
+        """Run a blocking function on the bounded I/O pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_pool, func, *args)
+
+    def add_background_task(self, factory: Callable[[], Awaitable[None]]) -> None:
+        """Register a coroutine factory started alongside the listeners in every worker"""
+        self.background.append(factory)
+
+    # -------------------------------------------------------------------------
+    # Serving
+    # -------------------------------------------------------------------------
+
+    async def _on_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                             port: int) -> None:
+        peer = writer.get_extra_info('peername') or ('0.0.0.0', 0)
+        peer_ip, peer_port = peer[0], peer[1]
+        self.stats['connections_total'] += 1
+
+        if not self.admission.admit(peer_ip):
+            writer.transport.abort()
+            return
+
+        try:
+            await self.handler(reader, writer, port, peer_ip, peer_port)
+        except Exception as e:
+            self.stats['handler_errors'] += 1
+            logger.error(f"Session handler error for {peer_ip}:{peer_port} on port {port}: {e}")
+        finally:
+            self.admission.release(peer_ip)
+            if not writer.is_closing():
+                writer.close()
+
+    async def _start_port(self, port: int, reuse_port: bool) -> None:
+        async def on_connection(reader, writer):
+            await self._on_connection(reader, writer, port)
+
+        try:
+            server = await asyncio.start_server(
+                on_connection,
+                host=self.config.host,
+                port=port,
+                backlog=self.config.backlog,
+                reuse_address=True,
+                reuse_port=reuse_port or None,
+            )
+        except PermissionError:
+            logger.warning(f"Permission denied binding to port {port}; continuing")
+            return
+        except OSError as e:
+            logger.error(f"Listener on port {port} failed: {e}")
+            return
+
+        self.servers.append(server)
+        self.listening_ports.append(port)
+        logger.info(f"TCP honeypot listening on {self.config.host}:{port} (backlog {self.config.backlog})")
+
+    async def serve(self, reuse_port: bool = False) -> None:
+        """Bind every configured port and serve until cancelled"""
+        self.loop = asyncio.get_running_loop()
+        self.io_pool = ThreadPoolExecutor(
+            max_workers=self.config.io_workers, thread_name_prefix="honeypot-io"
+        )
+        tasks = [asyncio.create_task(factory()) for factory in self.background]
+        try:
+            for port in self.config.ports:
+                await self._start_port(port, reuse_port)
+            if self.servers:
+                await asyncio.gather(*(server.serve_forever() for server in self.servers))
+            else:
+                # Nothing bound (e.g. all ports denied); stay up like the old listeners did
+                logger.warning("No honeypot ports bound")
+                await asyncio.Event().wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            for server in self.servers:
+                server.close()
+            self.io_pool.shutdown(wait=False)
+
+    def _run_worker(self, reuse_port: bool) -> None:
+        try:
+            asyncio.run(self.serve(reuse_port=reuse_port))
+        except KeyboardInterrupt:
+            pass
+
+    def run(self) -> None:
+        """
+        Run the engine in the current thread (blocking).
+
+        With workers > 1 and SO_REUSEPORT available, workers - 1 extra
+        processes are forked, each with its own event loop on the same
+        ports; the kernel spreads incoming connections across them. Each
+        worker applies admission limits independently.
+        """
+        workers = self.config.workers
+        reuse_port = workers > 1 and hasattr(socket, 'SO_REUSEPORT')
+        if workers > 1 and not reuse_port:
+            logger.warning("SO_REUSEPORT unavailable; running a single event loop")
+            workers = 1
+
+        children = []
+        if workers > 1:
+            ctx = multiprocessing.get_context('fork')
+            for i in range(workers - 1):
+                proc = ctx.Process(target=self._run_worker, args=(reuse_port,),
+                                   name=f"honeypot-worker-{i + 1}", daemon=True)
+                proc.start()
+                children.append(proc)
+            logger.info(f"Started {len(children)} additional listener workers")
+
+        try:
+            self._run_worker(reuse_port)
+        finally:
+            for proc in children:
+                proc.terminate()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Engine counters for health/status reporting"""
+        return {
+            'ports': list(self.listening_ports),
+            'active_sessions': self.admission.active_total,
+            'active_ips': len(self.admission.active_by_ip),
+            'max_sessions': self.config.max_sessions,
+            'workers': self.config.workers,
+            **self.stats,
+            **self.admission.stats,
+        }
@@ -0,0 +1,427 @@
+"""
+🗃️ Honeypot Persistence Layer
+Cyber Mirage - Role 1: Adaptive Honeynet Layer
+
+Pooled, batched PostgreSQL writer for honeypot telemetry:
+- One shared ThreadedConnectionPool instead of a connect() per row
+- Background writer that buffers attack sessions, actions, agent
+  decisions, deception events and session end times, and flushes them
+  with execute_values every N ms or N rows
+- Bounded queue: producers block briefly when it is full (backpressure)
+- Spill file: rows that cannot reach Postgres are appended to a local
+  JSONL file and replayed once the database is reachable again; new rows
+  queue up behind the spill so they never overtake the sessions they
+  refer to
+
+Author: Cyber Mirage Team
+Version: 1.0.0 - Production
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# ROW KINDS
+# =============================================================================
+
+SESSION = "session"
+SCAN = "scan"
+ACTION = "action"
+DECISION = "decision"
+EVENT = "event"
+SESSION_END = "session_end"
+
+# Flush order respects attack_actions -> attack_sessions foreign key
+FLUSH_ORDER = (SESSION, SCAN, ACTION, DECISION, EVENT, SESSION_END)
+
+# Upserts keyed by the first column; only the latest row per key is sent
+UPSERT_KINDS = (SCAN,)
+
+# Every insert carries a client-generated id so spill replays are idempotent
+STATEMENTS = {
+    SESSION: """
+        INSERT INTO attack_sessions
+        (id, attacker_name, attacker_skill, origin, detected, start_time, honeypot_type)
+        VALUES %s ON CONFLICT (id) DO NOTHING
+    """,
+    SCAN: """
+        INSERT INTO attack_sessions
+        (id, attacker_name, attacker_skill, origin, detected, start_time, end_time,
+         honeypot_type, is_scan, scan_reason)
+        VALUES %s ON CONFLICT (id) DO UPDATE SET
+            end_time = EXCLUDED.end_time,
+            honeypot_type = EXCLUDED.honeypot_type,
+            is_scan = EXCLUDED.is_scan,
+            scan_reason = EXCLUDED.scan_reason
+    """,
+    ACTION: """
+        INSERT INTO attack_actions
+        (id, session_id, step_number, action_id, reward, suspicion, data_collected, timestamp)
+        VALUES %s ON CONFLICT (id) DO NOTHING
+    """,
+    DECISION: """
+        INSERT INTO agent_decisions (id, session_id, action, strategy, reward, state)
+        VALUES %s ON CONFLICT (id) DO NOTHING
+    """,
+    EVENT: """
+        INSERT INTO deception_events (id, session_id, action, parameters, executed)
+        VALUES %s ON CONFLICT (id) DO NOTHING
+    """,
+    SESSION_END: """
+        UPDATE attack_sessions AS s SET end_time = v.end_time::timestamp
+        FROM (VALUES %s) AS v(id, end_time)
+        WHERE s.id = v.id::uuid
+    """,
+}
+
+# Errors meaning "Postgres is unreachable" rather than "this batch is bad"
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, pg_pool.PoolError)
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+@dataclass
+class PersistenceConfig:
+    """Writer settings"""
+    host: str = "postgres"
+    database: str = "cyber_mirage"
+    user: str = "cybermirage"
+    password: str = ""
+    pool_min: int = 1
+    pool_max: int = 8
+    flush_interval: float = 0.2     # seconds
+    batch_rows: int = 500
+    queue_size: int = 50000
+    enqueue_timeout: float = 0.5    # how long producers wait on a full queue
+    replay_interval: float = 5.0    # seconds between reconnect probes while rows are spilled
+    spill_path: str = "data/spill/honeypot_db.jsonl"
+
+    @classmethod
+    def from_env(cls, host: str, database: str, user: str, password: str) -> "PersistenceConfig":
+        """Build a config from HONEYPOT_DB_* environment variables"""
+        return cls(
+            host=host,
+            database=database,
+            user=user,
+            password=password,
+            pool_min=int(os.getenv("HONEYPOT_DB_POOL_MIN", "1")),
+            pool_max=int(os.getenv("HONEYPOT_DB_POOL_MAX", "8")),
+            flush_interval=int(os.getenv("HONEYPOT_DB_FLUSH_MS", "200")) / 1000.0,
+            batch_rows=int(os.getenv("HONEYPOT_DB_BATCH_ROWS", "500")),
+            queue_size=int(os.getenv("HONEYPOT_DB_QUEUE_SIZE", "50000")),
+            enqueue_timeout=float(os.getenv("HONEYPOT_DB_ENQUEUE_TIMEOUT", "0.5")),
+            spill_path=os.getenv("HONEYPOT_DB_SPILL_PATH", "data/spill/honeypot_db.jsonl"),
+        )
+
+
+# =============================================================================
+# BATCH WRITER
+# =============================================================================
+
+class PgBatchWriter:
+    """
+    Shared connection pool plus background group-commit writer.
+
+    submit() is cheap and thread-safe; rows are flushed in FLUSH_ORDER
+    within one connection checkout per batch.
+    """
+
+    def __init__(self, config: PersistenceConfig):
+        self.config = config
+        self.queue: "queue.Queue[Tuple[str, Sequence[Any]]]" = queue.Queue(maxsize=config.queue_size)
+        self._pool: Optional[pg_pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._pool_pid = os.getpid()
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._db_available = True
+        self._last_probe = 0.0
+        self.stats = {
+            'rows_submitted': 0,
+            'rows_written': 0,
+            'rows_failed': 0,
+            'rows_spilled': 0,
+            'rows_replayed': 0,
+            'batches': 0,
+            'backpressure_waits': 0,
+            'last_flush_ms': 0.0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Connection pool
+    # -------------------------------------------------------------------------
+
+    def _get_pool(self) -> pg_pool.ThreadedConnectionPool:
+        if self._pool_pid != os.getpid():
+            # Forked listener worker: never share the parent's sockets
+            self._pool = None
+            self._pool_pid = os.getpid()
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pg_pool.ThreadedConnectionPool(
+                        self.config.pool_min,
+                        self.config.pool_max,
+                        host=self.config.host,
+                        database=self.config.database,
+                        user=self.config.user,
+                        password=self.config.password,
+                    )
+        return self._pool
+
+    @contextmanager
+    def connection(self) -> Iterator[Optional[Any]]:
+        """Borrow a pooled connection; yields None if Postgres is unreachable"""
+        try:
+            db_pool = self._get_pool()
+            conn = db_pool.getconn()
+        except Exception as e:
+            logger.error(f"Database connection failed: {e}")
+            yield None
+            return
+
+        broken = False
+        try:
+            yield conn
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            if not broken and not conn.closed:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            db_pool.putconn(conn, close=broken or bool(conn.closed))
+
+    # -------------------------------------------------------------------------
+    # Producers
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the background writer thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="honeypot-db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, kind: str, row: Sequence[Any]) -> None:
+        """Queue a row for the next flush, spilling it if the queue stays full"""
+        self.start()
+        self.stats['rows_submitted'] += 1
+        try:
+            self.queue.put_nowait((kind, row))
+            return
+        except queue.Full:
+            self.stats['backpressure_waits'] += 1
+
+        try:
+            self.queue.put((kind, row), timeout=self.config.enqueue_timeout)
+        except queue.Full:
+            logger.warning("DB write queue saturated; spilling row to disk")
+            self._spill([(kind, row)])
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush what is queued and stop the writer"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    # -------------------------------------------------------------------------
+    # Writer loop
+    # -------------------------------------------------------------------------
+
+    def _drain(self) -> List[Tuple[str, Sequence[Any]]]:
+        """Collect up to batch_rows rows, waiting at most flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.config.flush_interval
+        while len(batch) < self.config.batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+            # Grab everything already queued without waiting again
+            while len(batch) < self.config.batch_rows:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+        return batch
+
+    def _probe(self) -> bool:
+        with self.connection() as conn:
+            self._db_available = conn is not None
+        return self._db_available
+
+    def _spill_pending(self) -> bool:
+        return (os.path.exists(self.config.spill_path)
+                or os.path.exists(self.config.spill_path + ".replay"))
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self.queue.empty():
+            self._write(self._drain())
+
+    def _write(self, batch: List[Tuple[str, Sequence[Any]]]) -> None:
+        """
+        Flush a batch behind any spilled rows
+
+        New rows may refer to spilled sessions (actions, session ends), so
+        while a spill is pending it is replayed first; if Postgres is still
+        unreachable, or the replay does not finish, the batch is appended to
+        the spill instead. An unreachable database is probed at most every
+        replay_interval.
+        """
+        if self._spill_pending():
+            now = time.monotonic()
+            if self._db_available or now - self._last_probe >= self.config.replay_interval:
+                self._last_probe = now
+                if self._db_available or self._probe():
+                    self._replay_spill()
+            if self._spill_pending():
+                self._spill(batch)
+                return
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Sequence[Any]]]) -> bool:
+        """Write a batch; returns False (and spills) if Postgres is unreachable"""
+        grouped: Dict[str, List[Sequence[Any]]] = {}
+        for kind, row in batch:
+            grouped.setdefault(kind, []).append(row)
+
+        start = time.perf_counter()
+        written = 0
+        try:
+            with self.connection() as conn:
+                if conn is None:
+                    self._db_available = False
+                    self._spill(batch)
+                    return False
+                cur = conn.cursor()
+                try:
+                    for kind in FLUSH_ORDER:
+                        rows = grouped.get(kind)
+                        if not rows:
+                            continue
+                        if kind in UPSERT_KINDS:
+                            rows = list({row[0]: row for row in rows}.values())
+                        try:
+                            execute_values(cur, STATEMENTS[kind], rows, page_size=self.config.batch_rows)
+                            conn.commit()
+                            written += len(rows)
+                        except CONNECTION_ERRORS:
+                            raise
+                        except Exception as e:
+                            conn.rollback()
+                            self.stats['rows_failed'] += len(rows)
+                            logger.error(f"Dropping {len(rows)} {kind} rows after insert failure: {e}")
+                        grouped.pop(kind, None)
+                finally:
+                    cur.close()
+        except CONNECTION_ERRORS as e:
+            logger.error(f"PostgreSQL unavailable, spilling {sum(map(len, grouped.values()))} rows: {e}")
+            self._spill([(kind, row) for kind, rows in grouped.items() for row in rows])
+            self.stats['rows_written'] += written
+            self._db_available = False
+            return False
+
+        self._db_available = True
+        self.stats['rows_written'] += written
+        self.stats['batches'] += 1
+        self.stats['last_flush_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return True
+
+    # -------------------------------------------------------------------------
+    # Spill file
+    # -------------------------------------------------------------------------
+
+    def _spill(self, rows: List[Tuple[str, Sequence[Any]]]) -> None:
+        if not rows:
+            return
+        with self._spill_lock:
+            try:
+                os.makedirs(os.path.dirname(self.config.spill_path) or ".", exist_ok=True)
+                with open(self.config.spill_path, "a", encoding="utf-8") as f:
+                    f.write("".join(
+                        json.dumps({"kind": kind, "row": list(row)}, default=str) + "\n"
+                        for kind, row in rows
+                    ))
+                self.stats['rows_spilled'] += len(rows)
+            except Exception as e:
+                self.stats['rows_failed'] += len(rows)
+                logger.error(f"Failed spilling {len(rows)} rows: {e}")
+
+    def _replay_spill(self) -> bool:
+        """Re-send spilled rows; returns False if Postgres failed again"""
+        replay_path = self.config.spill_path + ".replay"
+        with self._spill_lock:
+            if not os.path.exists(replay_path):
+                try:
+                    os.replace(self.config.spill_path, replay_path)
+                except FileNotFoundError:
+                    return True
+
+        completed = True
+        chunk: List[Tuple[str, Sequence[Any]]] = []
+        with open(replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                    chunk.append((item["kind"], item["row"]))
+                except (ValueError, KeyError):
+                    continue
+                if len(chunk) >= self.config.batch_rows:
+                    completed = self._replay_chunk(chunk)
+                    chunk = []
+                    if not completed:
+                        break
+            if completed and chunk:
+                completed = self._replay_chunk(chunk)
+            if not completed:
+                # The failed chunk was re-spilled by _flush; stream the unread tail after it
+                with self._spill_lock, open(self.config.spill_path, "a", encoding="utf-8") as spill:
+                    for line in f:
+                        spill.write(line)
+
+        os.remove(replay_path)
+        return completed
+
+    def _replay_chunk(self, chunk: List[Tuple[str, Sequence[Any]]]) -> bool:
+        if not self._flush(chunk):
+            return False
+        self.stats['rows_replayed'] += len(chunk)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Writer counters for health reporting"""
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.config.queue_size,
+            'spill_pending': self._spill_pending(),
+            'db_available': self._db_available,
+            **self.stats,
+        }
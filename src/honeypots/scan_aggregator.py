@@ -0,0 +1,167 @@
+"""
+🔭 Scan Aggregator
+Cyber Mirage - Role 1: Adaptive Honeynet Layer
+
+Front stage for honeypot ingestion. Connections that never send a byte
+(SYN/connect scans, banner grabs that hang up) do not get their own
+attack session; instead they are folded into one aggregated session per
+source IP:
+- A sliding window of `window` seconds tracks the ports each IP touched
+- Once `scan_threshold` distinct ports are hit inside the window the
+  session is flagged as a port sweep (is_scan) and emitted immediately
+- The session stays open while probes keep arriving and is emitted again
+  with the final port list after `window` seconds of silence
+
+Only connections that actually send data open a full session with agent
+decisions (see honeypot_manager.handle_connection).
+
+Author: Cyber Mirage Team
+Version: 1.0.0 - Production
+"""
+
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScanSession:
+    """Aggregated connect-only activity from one source IP"""
+    session_id: str
+    ip: str
+    first_seen: float
+    last_seen: float
+    ports: Dict[int, int] = field(default_factory=dict)          # port -> probes
+    services: Dict[int, str] = field(default_factory=dict)       # port -> service
+    recent: Deque[Tuple[float, int]] = field(default_factory=deque)  # (ts, port) in window
+    recent_ports: Dict[int, int] = field(default_factory=dict)       # port -> probes in window
+    is_scan: bool = False
+
+    @property
+    def connections(self) -> int:
+        return sum(self.ports.values())
+
+    def port_list(self) -> List[int]:
+        return sorted(self.ports)
+
+    def reason(self) -> str:
+        ports = self.port_list()
+        shown = ", ".join(str(p) for p in ports[:32])
+        if len(ports) > 32:
+            shown += ", ..."
+        if self.is_scan:
+            return f"Port sweep: {len(ports)} ports in {self.connections} connections [{shown}]"
+        return f"Connect-only probe: {self.connections} connections [{shown}]"
+
+    def honeypot_type(self) -> str:
+        if self.is_scan or len(self.services) != 1:
+            return "PortScan"
+        return next(iter(self.services.values()))
+
+
+class ScanAggregator:
+    """
+    Per-IP sliding-window tracker that collapses probes into scan sessions.
+
+    emit(session, final) is called when a session becomes a sweep and again
+    when it closes; it must not block (the manager queues a DB row).
+    """
+
+    def __init__(self, emit: Callable[[ScanSession, bool], None], window: float = 60.0,
+                 scan_threshold: int = 3, max_tracked_ips: int = 100000):
+        self.emit = emit
+        self.window = window
+        self.scan_threshold = scan_threshold
+        self.max_tracked_ips = max_tracked_ips
+        # ip -> open session, least recently active first
+        self.sessions: "OrderedDict[str, ScanSession]" = OrderedDict()
+        self.stats = {
+            'probes': 0,
+            'sessions_opened': 0,
+            'scans_detected': 0,
+            'sessions_closed': 0,
+            'forced_closes': 0,
+        }
+
+    def record(self, ip: str, port: int, service: str, now: Optional[float] = None) -> ScanSession:
+        """Fold a connect-only connection into the IP's aggregated session"""
+        now = time.time() if now is None else now
+        self.stats['probes'] += 1
+
+        session = self.sessions.get(ip)
+        if session is not None and now - session.last_seen > self.window:
+            self._close(ip)
+            session = None
+
+        if session is None:
+            if len(self.sessions) >= self.max_tracked_ips:
+                oldest_ip = next(iter(self.sessions))
+                self._close(oldest_ip)
+                self.stats['forced_closes'] += 1
+            session = ScanSession(session_id=str(uuid.uuid4()), ip=ip, first_seen=now, last_seen=now)
+            self.sessions[ip] = session
+            self.stats['sessions_opened'] += 1
+        else:
+            self.sessions.move_to_end(ip)
+
+        session.last_seen = now
+        session.ports[port] = session.ports.get(port, 0) + 1
+        session.services[port] = service
+
+        # Slide the window; recent_ports keeps the distinct-port count O(1) per probe
+        session.recent.append((now, port))
+        session.recent_ports[port] = session.recent_ports.get(port, 0) + 1
+        while session.recent and now - session.recent[0][0] > self.window:
+            _, old_port = session.recent.popleft()
+            remaining = session.recent_ports[old_port] - 1
+            if remaining:
+                session.recent_ports[old_port] = remaining
+            else:
+                del session.recent_ports[old_port]
+
+        if not session.is_scan and len(session.recent_ports) >= self.scan_threshold:
+            session.is_scan = True
+            self.stats['scans_detected'] += 1
+            logger.info(f"🔍 Port sweep from {ip}: {len(session.ports)} ports")
+            self._emit(session, final=False)
+
+        return session
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Close sessions idle for longer than the window; returns how many"""
+        now = time.time() if now is None else now
+        expired = []
+        for ip, session in self.sessions.items():
+            if now - session.last_seen <= self.window:
+                break  # ordered by activity, the rest are newer
+            expired.append(ip)
+        for ip in expired:
+            self._close(ip)
+        return len(expired)
+
+    def flush(self) -> None:
+        """Close every open session (shutdown)"""
+        for ip in list(self.sessions):
+            self._close(ip)
+
+    def _close(self, ip: str) -> None:
+        session = self.sessions.pop(ip)
+        session.recent.clear()
+        session.recent_ports.clear()
+        self.stats['sessions_closed'] += 1
+        self._emit(session, final=True)
+
+    def _emit(self, session: ScanSession, final: bool) -> None:
+        try:
+            self.emit(session, final)
+        except Exception as e:
+            logger.error(f"Failed emitting scan session for {session.ip}: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Aggregator counters for health reporting"""
+        return {'open_sessions': len(self.sessions), **self.stats}
@@ -0,0 +1,143 @@
+"""
+📈 Threat Counter Buffer
+Cyber Mirage - Role 1: Adaptive Honeynet Layer
+
+Coalesces the per-connection `threat:{ip}` Redis updates made by the
+honeypot manager. Hits from the same IP inside one flush window are
+merged into a single HINCRBY plus one HSET of last_seen/service, and a
+whole window is sent as one pipelined round-trip. During a scan burst
+thousands of connections from a handful of IPs become a few commands.
+
+Author: Cyber Mirage Team
+Version: 1.0.0 - Production
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ThreatCounterBuffer:
+    """
+    In-process coalescing buffer for threat:{ip} hashes.
+
+    record() is thread-safe and never touches the network; a background
+    thread (started on first use, and again after a fork) flushes every
+    `window` seconds, or immediately once `max_ips` distinct IPs are
+    pending.
+    """
+
+    def __init__(self, client_factory: Callable[[], Optional[Any]], window: float = 0.5,
+                 max_ips: int = 10000):
+        self.client_factory = client_factory
+        self.window = window
+        self.max_ips = max_ips
+        # ip -> [count, last_seen, service]
+        self.pending: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            'hits_recorded': 0,
+            'ips_flushed': 0,
+            'redis_commands': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'hits_dropped': 0,
+        }
+
+    def record(self, ip: str, service: str, seen: Optional[datetime] = None) -> None:
+        """Count one connection from ip against service"""
+        seen_iso = (seen or datetime.now()).isoformat()
+        with self._lock:
+            entry = self.pending.get(ip)
+            if entry is None:
+                self.pending[ip] = [1, seen_iso, service]
+                full = len(self.pending) >= self.max_ips
+            else:
+                entry[0] += 1
+                entry[1] = seen_iso
+                entry[2] = service
+                full = False
+            self.stats['hits_recorded'] += 1
+        if full:
+            self._wake.set()
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+    def flush(self) -> int:
+        """Send all pending updates in one pipeline; returns IPs written"""
+        with self._lock:
+            if not self.pending:
+                return 0
+            batch, self.pending = self.pending, {}
+
+        client = self.client_factory()
+        try:
+            if client is None:
+                raise ConnectionError("Redis unavailable")
+            pipe = client.pipeline(transaction=False)
+            for ip, (count, last_seen, service) in batch.items():
+                key = f"threat:{ip}"
+                pipe.hincrby(key, 'count', count)
+                pipe.hset(key, mapping={'last_seen': last_seen, 'service': service})
+            pipe.execute()
+        except Exception as e:
+            self.stats['flush_errors'] += 1
+            logger.error(f"Redis update failed: {e}")
+            self._requeue(batch)
+            return 0
+
+        self.stats['flushes'] += 1
+        self.stats['ips_flushed'] += len(batch)
+        self.stats['redis_commands'] += 2 * len(batch)
+        return len(batch)
+
+    def _requeue(self, batch: Dict[str, List[Any]]) -> None:
+        """Merge a failed batch back so counts survive a Redis outage"""
+        with self._lock:
+            for ip, (count, last_seen, service) in batch.items():
+                entry = self.pending.get(ip)
+                if entry is not None:
+                    entry[0] += count
+                elif len(self.pending) < self.max_ips:
+                    self.pending[ip] = [count, last_seen, service]
+                else:
+                    self.stats['hits_dropped'] += count
+
+    # -------------------------------------------------------------------------
+    # Background flusher
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the flush thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="threat-counter-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Flush what is pending and stop the thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.window)
+            self._wake.clear()
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer counters for health reporting"""
+        with self._lock:
+            pending = len(self.pending)
+        return {'pending_ips': pending, 'window_seconds': self.window, **self.stats}
@@ -5,7 +5,11 @@ Provides comprehensive IP geolocation with accuracy suitable for enterprise thre
 
 import logging
 import ipaddress
-from typing import Dict, Optional, Tuple, List
+import socket
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, List, Iterable, Any
 from datetime import datetime
 import json
 import hashlib
@@ -13,6 +17,95 @@ import hashlib
 logger = logging.getLogger(__name__)
 
 
+def _ip_to_int(ip: str) -> Tuple[int, int]:
+    """Return (version, integer value) for an address string, or (0, 0) if invalid."""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, ValueError, TypeError):
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+    except (OSError, ValueError, TypeError):
+        return 0, 0
+
+
+class IntervalIndex:
+    """
+    Sorted (start, end, record) interval table with bisect lookup.
+    
+    Built once from a {cidr: record} mapping. Overlapping networks are split
+    into disjoint intervals where the entry declared first wins, matching
+    the first-match scan the dictionaries were previously searched with.
+    IPv4 bounds are stored in compact unsigned arrays.
+    """
+    
+    def __init__(self, networks: Dict[str, Any]):
+        self.records: List[Any] = []
+        # version -> (starts, ends, record ids)
+        self._tables: Dict[int, Tuple[Any, Any, List[int]]] = {}
+        
+        parsed = {4: [], 6: []}
+        for network_str, record in networks.items():
+            try:
+                network = ipaddress.ip_network(network_str, strict=False)
+            except ValueError:
+                logger.warning(f"Skipping invalid network in geolocation data: {network_str}")
+                continue
+            parsed[network.version].append(
+                (int(network.network_address), int(network.broadcast_address), len(self.records))
+            )
+            self.records.append(record)
+        
+        for version, ranges in parsed.items():
+            starts, ends, ids = self._flatten(ranges)
+            if version == 4:
+                starts, ends = array('I', starts), array('I', ends)
+            self._tables[version] = (starts, ends, ids)
+    
+    @staticmethod
+    def _flatten(ranges: List[Tuple[int, int, int]]) -> Tuple[List[int], List[int], List[int]]:
+        """Split overlapping ranges into disjoint intervals, earliest record first"""
+        if not ranges:
+            return [], [], []
+        
+        edges = sorted({start for start, _, _ in ranges} | {end + 1 for _, end, _ in ranges})
+        owner: List[Optional[int]] = [None] * len(edges)
+        for start, end, record_id in sorted(ranges, key=lambda r: r[2], reverse=True):
+            first = bisect_right(edges, start) - 1
+            last = bisect_right(edges, end) - 1
+            for segment in range(first, last + 1):
+                owner[segment] = record_id
+        
+        starts, ends, ids = [], [], []
+        for segment, record_id in enumerate(owner):
+            if record_id is None:
+                continue
+            end = edges[segment + 1] - 1
+            if ids and ids[-1] == record_id and ends[-1] + 1 == edges[segment]:
+                ends[-1] = end  # merge with the previous interval
+            else:
+                starts.append(edges[segment])
+                ends.append(end)
+                ids.append(record_id)
+        return starts, ends, ids
+    
+    def lookup_int(self, version: int, value: int) -> Optional[Any]:
+        """Record covering an integer address, or None"""
+        starts, ends, ids = self._tables[version]
+        i = bisect_right(starts, value) - 1
+        if i >= 0 and value <= ends[i]:
+            return self.records[ids[i]]
+        return None
+    
+    def lookup(self, ip: str) -> Optional[Any]:
+        """Record covering ip, or None"""
+        version, value = _ip_to_int(ip)
+        return self.lookup_int(version, value) if version else None
+    
+    def __len__(self) -> int:
+        return sum(len(starts) for starts, _, _ in self._tables.values())
+
+
 class EliteGeolocationService:
     """
     Advanced IP Geolocation Service with comprehensive data:
@@ -25,8 +118,11 @@ class EliteGeolocationService:
     - VPN/Proxy/Tor detection
     """
     
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, cache_size: int = 50000):
+        # Bounded LRU of ip -> location result
+        self.cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
         
         # Comprehensive IP database with real geolocation data
         self.ip_database = self._build_comprehensive_database()
@@ -37,6 +133,18 @@ class EliteGeolocationService:
         # ISP and ASN mapping
         self.isp_database = self._build_isp_database()
         
+        # Compiled interval indexes, built once
+        self._location_index = IntervalIndex(self.ip_database)
+        self._isp_index = IntervalIndex(self.isp_database)
+        self._anonymizer_index = IntervalIndex(self.anonymizer_ranges)
+        
+        # First-octet fallback for IPv4 addresses outside every network
+        self._octet_fallback: Dict[int, Dict] = {}
+        for network_str, data in self.ip_database.items():
+            octet = network_str.split('.')[0]
+            if octet.isdigit():
+                self._octet_fallback.setdefault(int(octet), data)
+        
     def _build_comprehensive_database(self) -> Dict:
         """Build comprehensive IP geolocation database with accurate coordinates."""
         return {
@@ -786,8 +894,12 @@ class EliteGeolocationService:
             Dictionary with comprehensive location data
         """
         # Check cache first
-        if ip in self.cache:
-            return self.cache[ip]
+        cached = self.cache.get(ip)
+        if cached is not None:
+            self.cache.move_to_end(ip)
+            self.cache_stats["hits"] += 1
+            return cached
+        self.cache_stats["misses"] += 1
         
         try:
             ip_obj = ipaddress.ip_address(ip)
@@ -817,7 +929,7 @@ class EliteGeolocationService:
                     "threat_level": "Low",
                     "anonymizer_type": None
                 }
-                self.cache[ip] = result
+                self._cache_result(ip, result)
                 return result
             
             # Lookup in main database
@@ -839,7 +951,7 @@ class EliteGeolocationService:
             }
             
             # Cache result
-            self.cache[ip] = result
+            self._cache_result(ip, result)
             
             return result
             
@@ -847,32 +959,63 @@ class EliteGeolocationService:
             logger.error(f"Error getting location for {ip}: {e}")
             return self._get_unknown_location(ip)
     
+    def bulk_locate(self, ips: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Geolocate many IPs at once (e.g. every row of the threat map).
+        
+        Args:
+            ips: IP addresses; duplicates are resolved once
+            
+        Returns:
+            Dictionary of IP -> location data, in first-seen order
+        """
+        results = {}
+        for ip in ips:
+            if ip not in results:
+                results[ip] = self.get_location(ip)
+        return results
+    
+    def _cache_result(self, ip: str, result: Dict):
+        """Insert into the LRU cache, evicting the least recently used entry"""
+        self.cache[ip] = result
+        self.cache.move_to_end(ip)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+            self.cache_stats["evictions"] += 1
+    
+    def get_stats(self) -> Dict:
+        """Cache and index statistics."""
+        return {
+            "cached_ips": len(self.cache),
+            "cache_size": self.cache_size,
+            **self.cache_stats,
+            "location_intervals": len(self._location_index),
+            "isp_intervals": len(self._isp_index),
+            "anonymizer_intervals": len(self._anonymizer_index),
+        }
+    
     def _lookup_ip_in_database(self, ip: str) -> Dict:
         """Lookup IP in comprehensive database."""
-        try:
-            ip_obj = ipaddress.ip_address(ip)
-            
-            # Try exact match first
-            for network_str, data in self.ip_database.items():
-                try:
-                    network = ipaddress.ip_network(network_str, strict=False)
-                    if ip_obj in network:
-                        return data.copy()
-                except:
-                    continue
-            
-            # If no match, try first octet matching
-            first_octet = int(str(ip).split('.')[0])
-            for network_str, data in self.ip_database.items():
-                if network_str.startswith(f"{first_octet}."):
-                    return data.copy()
-            
-            # Default to unknown with estimated location
-            return self._estimate_location_by_range(ip)
-            
-        except Exception as e:
-            logger.error(f"Database lookup error for {ip}: {e}")
+        version, value = _ip_to_int(ip)
+        if not version:
+            logger.error(f"Database lookup error for {ip}: invalid address")
             return self._get_default_location()
+        
+        # Try exact match first
+        data = self._location_index.lookup_int(version, value)
+        if data is not None:
+            return data.copy()
+        
+        if version != 4:
+            return self._get_default_location()
+        
+        # If no match, try first octet matching
+        data = self._octet_fallback.get(value >> 24)
+        if data is not None:
+            return data.copy()
+        
+        # Default to unknown with estimated location
+        return self._estimate_location_by_range(ip)
     
     def _estimate_location_by_range(self, ip: str) -> Dict:
         """Estimate location based on IP range patterns."""
@@ -912,77 +1055,57 @@ class EliteGeolocationService:
     
     def _lookup_isp(self, ip: str) -> Dict:
         """Lookup ISP and ASN information."""
-        try:
-            ip_obj = ipaddress.ip_address(ip)
-            
-            for network_str, data in self.isp_database.items():
-                try:
-                    network = ipaddress.ip_network(network_str, strict=False)
-                    if ip_obj in network:
-                        return data.copy()
-                except:
-                    continue
-            
-            # Default ISP info
-            return {
-                "isp": "Unknown ISP",
-                "asn": "Unknown",
-                "org": "Unknown Organization"
-            }
-            
-        except:
-            return {
-                "isp": "Unknown ISP",
-                "asn": "Unknown",
-                "org": "Unknown Organization"
-            }
+        data = self._isp_index.lookup(ip)
+        if data is not None:
+            return data.copy()
+        
+        # Default ISP info
+        return {
+            "isp": "Unknown ISP",
+            "asn": "Unknown",
+            "org": "Unknown Organization"
+        }
     
     def _check_anonymizer(self, ip: str) -> Dict:
         """Check if IP is VPN, Proxy, or Tor."""
-        try:
-            ip_obj = ipaddress.ip_address(ip)
-            
-            for network_str, anon_type in self.anonymizer_ranges.items():
-                try:
-                    network = ipaddress.ip_network(network_str, strict=False)
-                    if ip_obj in network:
-                        is_tor = "Tor" in anon_type
-                        is_vpn = "VPN" in anon_type
-                        is_proxy = "Proxy" in anon_type
-                        
-                        return {
-                            "is_vpn": is_vpn,
-                            "is_proxy": is_proxy,
-                            "is_tor": is_tor,
-                            "is_hosting": "Hosting" in anon_type or "Cloud" in anon_type,
-                            "is_cloud": "Cloud" in anon_type,
-                            "threat_level": "High" if is_tor else "Medium",
-                            "anonymizer_type": anon_type
-                        }
-                except:
-                    continue
-            
-            # Not an anonymizer
+        version, value = _ip_to_int(ip)
+        if not version:
             return {
                 "is_vpn": False,
                 "is_proxy": False,
                 "is_tor": False,
                 "is_hosting": False,
                 "is_cloud": False,
-                "threat_level": "Low",
+                "threat_level": "Unknown",
                 "anonymizer_type": None
             }
+        
+        anon_type = self._anonymizer_index.lookup_int(version, value)
+        if anon_type is not None:
+            is_tor = "Tor" in anon_type
+            is_vpn = "VPN" in anon_type
+            is_proxy = "Proxy" in anon_type
             
-        except:
             return {
-                "is_vpn": False,
-                "is_proxy": False,
-                "is_tor": False,
-                "is_hosting": False,
-                "is_cloud": False,
-                "threat_level": "Unknown",
-                "anonymizer_type": None
+                "is_vpn": is_vpn,
+                "is_proxy": is_proxy,
+                "is_tor": is_tor,
+                "is_hosting": "Hosting" in anon_type or "Cloud" in anon_type,
+                "is_cloud": "Cloud" in anon_type,
+                "threat_level": "High" if is_tor else "Medium",
+                "anonymizer_type": anon_type
             }
+        
+        # Not an anonymizer
+        return {
+            "is_vpn": False,
+            "is_proxy": False,
+            "is_tor": False,
+            "is_hosting": False,
+            "is_cloud": False,
+            "threat_level": "Low",
+            "anonymizer_type": None
+        }
     
     def _get_default_location(self) -> Dict:
         """Get default location data for unknown IPs."""
@@ -7,18 +7,26 @@ Provides message queue, event streaming, and data orchestration.
 
 from .message_queue import (
     MessageQueueManager,
+    BatchPublisher,
     Message,
     StreamName,
     MessagePriority,
     ConsumerGroup,
     get_queue
 )
+from .message_codecs import encode_payload, decode_payload, resolve_codec
+from .pipeline_metrics import PipelineCollector
 
 __all__ = [
     'MessageQueueManager',
+    'BatchPublisher',
     'Message',
     'StreamName',
     'MessagePriority',
     'ConsumerGroup',
-    'get_queue'
+    'get_queue',
+    'encode_payload',
+    'decode_payload',
+    'resolve_codec',
+    'PipelineCollector'
 ]
@@ -0,0 +1,191 @@
+"""
+🗜️ Message Codecs - Stream Payload Encoding
+Cyber Mirage - Role 7: Data Pipeline & Orchestration
+
+Pluggable payload encodings for Redis Stream entries:
+- json: the original text encoding, readable by every consumer
+- msgpack: compact binary encoding (requires msgpack)
+- <codec>+zlib / <codec>+zstd: compress payloads above a size threshold,
+  meant for large forensics evidence (zstd requires zstandard)
+
+A producer is configured with a codec spec such as "msgpack+zstd". Each
+entry records the codec actually applied in its `codec` header field
+(payloads under the threshold are left uncompressed). Entries without the
+field are JSON, so existing streams and older producers keep working, and
+JSON entries are still written without the field for older consumers.
+
+Author: Cyber Mirage Team
+Version: 1.0.0 - Production
+"""
+
+import json
+import threading
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Union
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+DEFAULT_CODEC = 'json'
+
+
+# =============================================================================
+# PAYLOAD CODECS
+# =============================================================================
+
+class PayloadCodec:
+    """Serializes message payload dicts"""
+    name = ''
+
+    def encode(self, payload: Dict[str, Any]) -> Union[str, bytes]:
+        raise NotImplementedError
+
+    def decode(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class JsonCodec(PayloadCodec):
+    """Compact JSON text"""
+    name = 'json'
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        return json.dumps(payload, separators=(',', ':'))
+
+    def decode(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        return json.loads(data)
+
+
+class MsgpackCodec(PayloadCodec):
+    """MessagePack binary"""
+    name = 'msgpack'
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        return msgpack.packb(payload, use_bin_type=True)
+
+    def decode(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+# =============================================================================
+# COMPRESSORS
+# =============================================================================
+
+class Compressor:
+    """Byte-level compression applied on top of a payload codec"""
+    name = ''
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class ZlibCompressor(Compressor):
+    name = 'zlib'
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCompressor(Compressor):
+    """zstandard; contexts are not thread-safe so each thread gets its own"""
+    name = 'zstd'
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        self._local = threading.local()
+
+    def _contexts(self):
+        local = self._local
+        if not hasattr(local, 'compressor'):
+            local.compressor = zstandard.ZstdCompressor(level=self.level)
+            local.decompressor = zstandard.ZstdDecompressor()
+        return local.compressor, local.decompressor
+
+    def compress(self, data: bytes) -> bytes:
+        return self._contexts()[0].compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._contexts()[1].decompress(data)
+
+
+PAYLOAD_CODECS: Dict[str, PayloadCodec] = {'json': JsonCodec()}
+if MSGPACK_AVAILABLE:
+    PAYLOAD_CODECS['msgpack'] = MsgpackCodec()
+
+COMPRESSORS: Dict[str, Compressor] = {'zlib': ZlibCompressor()}
+if ZSTD_AVAILABLE:
+    COMPRESSORS['zstd'] = ZstdCompressor()
+
+
+# =============================================================================
+# ENCODE / DECODE
+# =============================================================================
+
+@lru_cache(maxsize=64)
+def resolve_codec(spec: str) -> Tuple[PayloadCodec, Optional[Compressor]]:
+    """
+    Parse a codec spec ("json", "msgpack", "msgpack+zstd", ...)
+
+    Raises:
+        ValueError: unknown codec, or its library is not installed
+    """
+    name, _, compression = spec.partition('+')
+    codec = PAYLOAD_CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown or unavailable message codec: {name}")
+    if not compression:
+        return codec, None
+    compressor = COMPRESSORS.get(compression)
+    if compressor is None:
+        raise ValueError(f"Unknown or unavailable message compression: {compression}")
+    return codec, compressor
+
+
+def encode_payload(
+    payload: Dict[str, Any],
+    spec: str = DEFAULT_CODEC,
+    min_compress_size: int = 1024
+) -> Tuple[str, Union[str, bytes]]:
+    """
+    Encode a payload with a codec spec
+
+    Compression is applied only when the encoded payload reaches
+    min_compress_size bytes and actually gets smaller.
+
+    Returns:
+        (codec applied, for the entry's codec field; encoded payload)
+    """
+    codec, compressor = resolve_codec(spec)
+    data = codec.encode(payload)
+    if compressor is not None and len(data) >= min_compress_size:
+        raw = data.encode() if isinstance(data, str) else data
+        compressed = compressor.compress(raw)
+        if len(compressed) < len(raw):
+            return f"{codec.name}+{compressor.name}", compressed
+    return codec.name, data
+
+
+def decode_payload(data: Union[str, bytes], codec_name: str = DEFAULT_CODEC) -> Dict[str, Any]:
+    """Decode a payload written by encode_payload() under codec_name"""
+    codec, compressor = resolve_codec(codec_name)
+    if compressor is not None:
+        data = compressor.decompress(data.encode() if isinstance(data, str) else data)
+    return codec.decode(data)
@@ -9,21 +9,50 @@ Lightweight message queue using Redis Streams for:
 - Forensics evidence queue
 - Alert notifications
 
+Producers on hot paths can batch: publish_many() pipelines many XADDs into
+one round-trip and BatchPublisher micro-batches events from any thread in
+the background. Streams are trimmed approximately (MAXLEN ~) so Redis only
+drops whole macro nodes instead of re-trimming on every write.
+
+With priority_lanes enabled every stream is split into one sub-stream per
+MessagePriority (NORMAL keeps the base key, so existing entries are read
+as normal traffic). Consumers read the lanes with weighted fair quotas, so
+CRITICAL alerts are not stuck behind a flood of LOW attack events.
+
+Payloads are encoded by a pluggable codec (see message_codecs): JSON by
+default, msgpack and zlib/zstd compression per stream. Entries are read
+back over an undecoded connection, so binary payloads survive and text
+fields skip the client-side UTF-8 round trip.
+
+get_stats() collects every stream's XINFO in one pipelined round-trip and
+reports consumer lag per group, publish-to-ack and handler duration
+histograms per stream, and dead-letter counts and rate; PipelineCollector
+(pipeline_metrics) exports the same data to Prometheus.
+
 Author: Cyber Mirage Team
-Version: 1.0.0 - Production
+Version: 1.1.0 - Production
 """
 
 import json
 import logging
+import math
 import time
+from bisect import bisect_left
 import uuid
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Deque, Iterable, Tuple, Union
 from dataclasses import dataclass, asdict, field
 from enum import Enum
 import redis
 
+try:
+    from .message_codecs import DEFAULT_CODEC, decode_payload, encode_payload, resolve_codec
+except ImportError:  # run as a script from src/pipeline
+    from message_codecs import DEFAULT_CODEC, decode_payload, encode_payload, resolve_codec
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -75,34 +104,63 @@ class Message:
     producer_id: str
     retry_count: int = 0
     max_retries: int = 3
+    redis_id: Optional[str] = None  # stream entry ID, set when read back
     
     def to_dict(self) -> Dict:
         return asdict(self)
     
-    def to_redis(self) -> Dict[str, str]:
-        """Convert to Redis-compatible format"""
-        return {
+    def to_redis(
+        self,
+        codec: str = DEFAULT_CODEC,
+        min_compress_size: int = 1024
+    ) -> Dict[str, Any]:
+        """
+        Convert to Redis-compatible format
+        
+        Args:
+            codec: Payload codec spec (see message_codecs)
+            min_compress_size: Smallest encoded payload that gets compressed
+        """
+        codec_name, payload = encode_payload(self.payload, codec, min_compress_size)
+        fields = {
             'message_id': self.message_id,
-            'payload': json.dumps(self.payload),
+            'payload': payload,
             'priority': str(self.priority),
             'timestamp': self.timestamp,
             'producer_id': self.producer_id,
             'retry_count': str(self.retry_count),
             'max_retries': str(self.max_retries)
         }
+        if codec_name != DEFAULT_CODEC:
+            fields['codec'] = codec_name
+        return fields
     
     @classmethod
     def from_redis(cls, message_id: str, stream: str, data: Dict[str, str]) -> 'Message':
-        """Create Message from Redis data"""
+        """Create Message from Redis data (decoded or raw bytes replies)"""
+        if isinstance(message_id, bytes):
+            message_id = message_id.decode()
+        if isinstance(stream, bytes):
+            stream = stream.decode()
+        if data and isinstance(next(iter(data)), bytes):
+            payload = data.get(b'payload', b'{}')
+            data = {
+                key.decode(): value.decode()
+                for key, value in data.items() if key != b'payload'
+            }
+        else:
+            payload = data.get('payload', '{}')
+        
         return cls(
             message_id=data.get('message_id', message_id),
             stream=stream,
-            payload=json.loads(data.get('payload', '{}')),
+            payload=decode_payload(payload, data.get('codec', DEFAULT_CODEC)),
             priority=int(data.get('priority', 2)),
             timestamp=data.get('timestamp', datetime.now().isoformat()),
             producer_id=data.get('producer_id', 'unknown'),
             retry_count=int(data.get('retry_count', 0)),
-            max_retries=int(data.get('max_retries', 3))
+            max_retries=int(data.get('max_retries', 3)),
+            redis_id=message_id
         )
 
 
@@ -117,6 +175,151 @@ class StreamStats:
     pending_messages: int
 
 
+# =============================================================================
+# METRICS
+# =============================================================================
+
+# Histogram bucket bounds in seconds
+END_TO_END_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+HANDLER_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram with Prometheus semantics"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative bucket counts keyed by upper bound, plus sum and count"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            running += count
+            cumulative['+Inf' if bound == float('inf') else bound] = running
+        return {'buckets': cumulative, 'sum': total, 'count': running}
+
+
+# =============================================================================
+# BATCH PUBLISHER
+# =============================================================================
+
+class BatchPublisher:
+    """
+    Background micro-batching publisher
+
+    submit() is thread-safe and never touches the network. A background
+    thread (started on first use) drains the buffer through
+    MessageQueueManager._xadd_batch() every `flush_interval` seconds, or as
+    soon as `max_batch` messages are waiting. At most `max_pending` messages
+    are buffered; beyond that submit() rejects new ones so a Redis outage
+    cannot grow memory without bound.
+    """
+
+    def __init__(self, manager: 'MessageQueueManager', max_batch: int = 500,
+                 flush_interval: float = 0.05, max_pending: int = 50000):
+        self.manager = manager
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending: Deque[Message] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            'messages_submitted': 0,
+            'messages_flushed': 0,
+            'messages_dropped': 0,
+            'batches': 0,
+            'flush_errors': 0,
+        }
+
+    def submit(self, message: Message) -> bool:
+        """Queue a message; False if the buffer is full and it was dropped"""
+        with self._lock:
+            if len(self.pending) >= self.max_pending:
+                self.stats['messages_dropped'] += 1
+                return False
+            self.pending.append(message)
+            self.stats['messages_submitted'] += 1
+            full = len(self.pending) >= self.max_batch
+        if full:
+            self._wake.set()
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        return True
+
+    def flush(self) -> int:
+        """Publish everything buffered, max_batch per round-trip; returns messages sent"""
+        sent = 0
+        while True:
+            with self._lock:
+                if not self.pending:
+                    return sent
+                count = min(self.max_batch, len(self.pending))
+                batch = [self.pending.popleft() for _ in range(count)]
+
+            ids = self.manager._xadd_batch(batch)
+            if ids is None:
+                self.stats['flush_errors'] += 1
+                self._requeue(batch)
+                return sent
+
+            self.stats['batches'] += 1
+            self.stats['messages_flushed'] += len(batch)
+            sent += len(batch)
+
+    def _requeue(self, batch: List[Message]) -> None:
+        """Put a failed batch back at the front, oldest first, within max_pending"""
+        with self._lock:
+            room = max(0, self.max_pending - len(self.pending))
+            keep = batch[:room]
+            self.stats['messages_dropped'] += len(batch) - len(keep)
+            self.pending.extendleft(reversed(keep))
+
+    def start(self) -> None:
+        """Start the flush thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="mq-batch-publisher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Flush what is pending and stop the thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Batch publisher flush failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Publisher counters for monitoring"""
+        return {'pending': len(self.pending), 'max_pending': self.max_pending, **self.stats}
+
+
 # =============================================================================
 # MESSAGE QUEUE MANAGER
 # =============================================================================
@@ -126,6 +329,7 @@ class MessageQueueManager:
     Production-grade message queue using Redis Streams
     
     Features:
+    - Optional per-priority lanes with weighted fair consumption
     - Multiple streams for different event types
     - Consumer groups for distributed processing
     - Message acknowledgment and retry
@@ -134,13 +338,33 @@ class MessageQueueManager:
     - Metrics and monitoring
     """
     
+    # Default consume() share per priority when priority lanes are on
+    LANE_WEIGHTS = {
+        MessagePriority.CRITICAL: 8,
+        MessagePriority.HIGH: 4,
+        MessagePriority.NORMAL: 2,
+        MessagePriority.LOW: 1
+    }
+    
     def __init__(
         self,
         redis_host: str = 'redis',
         redis_port: int = 6379,
         redis_password: str = None,
         max_stream_length: int = 100000,
-        producer_id: str = None
+        producer_id: str = None,
+        batch_publish: bool = False,
+        publish_batch_size: int = 500,
+        publish_flush_interval: float = 0.05,
+        max_pending_publish: int = 50000,
+        handler_concurrency: int = 1,
+        stream_concurrency: Optional[Dict[StreamName, int]] = None,
+        priority_lanes: bool = False,
+        lane_weights: Optional[Dict[MessagePriority, int]] = None,
+        latency_window: int = 2048,
+        codec: str = DEFAULT_CODEC,
+        stream_codecs: Optional[Dict[StreamName, str]] = None,
+        min_compress_size: int = 1024
     ):
         """
         Initialize message queue manager
@@ -149,17 +373,62 @@ class MessageQueueManager:
             redis_host: Redis server hostname
             redis_port: Redis server port
             redis_password: Redis password
-            max_stream_length: Maximum messages per stream
+            max_stream_length: Approximate maximum messages per stream
             producer_id: Unique producer identifier
+            batch_publish: Route the publish_* event helpers through the
+                background BatchPublisher instead of one XADD each
+            publish_batch_size: Messages per pipelined round-trip
+            publish_flush_interval: Seconds a queued message may wait
+            max_pending_publish: Messages buffered before new ones are dropped
+            handler_concurrency: Handlers run in parallel per stream by
+                consumer workers (1 = sequential)
+            stream_concurrency: Per-stream overrides of handler_concurrency
+            priority_lanes: Publish into per-priority sub-streams and
+                consume them with weighted fair quotas
+            lane_weights: Share of each consume() batch per priority
+                (defaults to LANE_WEIGHTS)
+            latency_window: Recent latency samples kept per priority
+            codec: Payload codec spec for published messages, e.g.
+                "json", "msgpack" or "msgpack+zstd"
+            stream_codecs: Per-stream overrides of codec
+            min_compress_size: Smallest encoded payload that gets compressed
+        
+        Raises:
+            ValueError: a codec is unknown or its library is not installed
         """
         self.redis_host = redis_host
         self.redis_port = redis_port
         self.redis_password = redis_password
         self.max_stream_length = max_stream_length
         self.producer_id = producer_id or f"producer-{uuid.uuid4().hex[:8]}"
+        self.batch_publish = batch_publish
+        self.publish_batch_size = publish_batch_size
+        self.publish_flush_interval = publish_flush_interval
+        self.max_pending_publish = max_pending_publish
+        self.handler_concurrency = handler_concurrency
+        self.stream_concurrency: Dict[str, int] = {
+            stream.value: limit for stream, limit in (stream_concurrency or {}).items()
+        }
+        self.priority_lanes = priority_lanes
+        self.lane_weights = dict(lane_weights or self.LANE_WEIGHTS)
+        self.codec = codec
+        self.stream_codecs: Dict[str, str] = {
+            stream.value: spec for stream, spec in (stream_codecs or {}).items()
+        }
+        self.min_compress_size = min_compress_size
+        for spec in {codec, *self.stream_codecs.values()}:
+            resolve_codec(spec)
         
-        # Redis connection
+        # Lane key -> base stream key, so handlers registered on a stream
+        # also receive its lanes' messages
+        self._lane_base: Dict[str, str] = {
+            self._lane_key(stream, priority): stream.value
+            for stream in StreamName for priority in MessagePriority
+        }
+        
+        # Redis connections (decoded, and raw for reading entries back)
         self._redis: Optional[redis.Redis] = None
+        self._redis_raw: Optional[redis.Redis] = None
         
         # Message handlers
         self._handlers: Dict[str, List[Callable]] = {}
@@ -168,12 +437,36 @@ class MessageQueueManager:
         self._consumers: Dict[str, threading.Thread] = {}
         self._running = False
         
+        # Consumer groups known to exist, and per-stream handler pools
+        self._groups_ready: set = set()
+        self._handler_pools: Dict[str, ThreadPoolExecutor] = {}
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        
+        # Background publisher, created on first use
+        self._publisher: Optional[BatchPublisher] = None
+        self._publisher_lock = threading.Lock()
+        
+        # Publish-to-ack latency samples (seconds) per priority value
+        self._latency: Dict[int, Deque[float]] = {
+            priority.value: deque(maxlen=latency_window) for priority in MessagePriority
+        }
+        
+        # Per-stream histograms and dead-letter accounting
+        self._end_to_end = {stream.value: LatencyHistogram(END_TO_END_BUCKETS) for stream in StreamName}
+        self._handler_duration = {stream.value: LatencyHistogram(HANDLER_BUCKETS) for stream in StreamName}
+        self._dlq_by_stream: Dict[str, int] = {stream.value: 0 for stream in StreamName}
+        self._dlq_times: Deque[float] = deque(maxlen=10000)
+        
         # Statistics
         self.stats = {
             'messages_published': 0,
             'messages_consumed': 0,
             'messages_failed': 0,
-            'messages_retried': 0
+            'messages_retried': 0,
+            'publish_round_trips': 0,
+            'ack_round_trips': 0,
+            'messages_dead_lettered': 0
         }
         
         logger.info(f"MessageQueueManager initialized with producer_id: {self.producer_id}")
@@ -193,6 +486,17 @@ class MessageQueueManager:
             )
         return self._redis
     
+    @property
+    def redis_raw(self) -> "redis.Redis":
+        """Twin of self.redis without response decoding, for reading entries"""
+        if self._redis_raw is None:
+            pool = self.redis.connection_pool
+            kwargs = dict(pool.connection_kwargs, decode_responses=False)
+            self._redis_raw = redis.Redis(
+                connection_pool=pool.__class__(connection_class=pool.connection_class, **kwargs)
+            )
+        return self._redis_raw
+    
     def is_connected(self) -> bool:
         """Check Redis connection"""
         try:
@@ -222,15 +526,22 @@ class MessageQueueManager:
         group: ConsumerGroup,
         start_from: str = '0'
     ) -> bool:
-        """Create a consumer group for a stream"""
+        """Create a consumer group for a stream (and all its lanes)"""
+        return all(
+            self._create_group(key, group, start_from)
+            for key in self._lane_keys(stream)
+        )
+    
+    def _create_group(self, key: str, group: ConsumerGroup, start_from: str = '0') -> bool:
+        """XGROUP CREATE on one stream key, treating BUSYGROUP as success"""
         try:
             self.redis.xgroup_create(
-                stream.value,
+                key,
                 group.value,
                 id=start_from,
                 mkstream=True
             )
-            logger.info(f"Created consumer group {group.value} for stream {stream.value}")
+            logger.info(f"Created consumer group {group.value} for stream {key}")
             return True
         except redis.ResponseError as e:
             if "BUSYGROUP" in str(e):
@@ -242,18 +553,62 @@ class MessageQueueManager:
             logger.error(f"Failed to create consumer group: {e}")
             return False
     
+    def _ensure_group(self, key: str, group: ConsumerGroup) -> bool:
+        """Create the consumer group on a stream key on first use only"""
+        if (key, group.value) in self._groups_ready:
+            return True
+        if self._create_group(key, group):
+            self._groups_ready.add((key, group.value))
+            return True
+        return False
+    
+    @staticmethod
+    def _lane_key(stream: StreamName, priority: MessagePriority) -> str:
+        """Sub-stream for a priority; NORMAL shares the base stream key"""
+        if priority == MessagePriority.NORMAL:
+            return stream.value
+        return f"{stream.value}:{priority.name.lower()}"
+    
+    def _lane_keys(self, stream: StreamName) -> List[str]:
+        """Stream keys to read for a stream, highest priority first"""
+        if not self.priority_lanes:
+            return [stream.value]
+        return [
+            self._lane_key(stream, priority)
+            for priority in sorted(MessagePriority, key=lambda p: p.value, reverse=True)
+        ]
+    
+    def _lane_quotas(self, count: int) -> List[int]:
+        """Split a batch of `count` across the lanes by weight (at least one each)"""
+        priorities = sorted(MessagePriority, key=lambda p: p.value, reverse=True)
+        total = sum(self.lane_weights.get(p, 1) for p in priorities)
+        return [
+            max(1, math.floor(count * self.lane_weights.get(p, 1) / total + 0.5))
+            for p in priorities
+        ]
+    
     def get_stream_info(self, stream: StreamName) -> Optional[StreamStats]:
         """Get stream information"""
+        return self._stream_info(stream.value)
+    
+    def _stream_info(self, key: str) -> Optional[StreamStats]:
+        """XINFO STREAM/GROUPS for one stream key"""
         try:
-            info = self.redis.xinfo_stream(stream.value)
-            groups = self.redis.xinfo_groups(stream.value)
+            # Raw reply: first/last entries may carry binary payloads
+            info = self.redis_raw.xinfo_stream(key)
+            groups = self.redis.xinfo_groups(key)
+            
+            def entry_id(entry) -> Optional[str]:
+                if not entry or entry[0] is None:
+                    return None
+                return entry[0].decode() if isinstance(entry[0], bytes) else entry[0]
             
             return StreamStats(
-                stream_name=stream.value,
+                stream_name=key,
                 length=info.get('length', 0),
                 groups=len(groups),
-                first_entry=info.get('first-entry', [None])[0] if info.get('first-entry') else None,
-                last_entry=info.get('last-entry', [None])[0] if info.get('last-entry') else None,
+                first_entry=entry_id(info.get('first-entry')),
+                last_entry=entry_id(info.get('last-entry')),
                 pending_messages=sum(g.get('pending', 0) for g in groups)
             )
         except redis.ResponseError:
@@ -266,7 +621,10 @@ class MessageQueueManager:
         """Trim stream to maximum length"""
         try:
             maxlen = maxlen or self.max_stream_length
-            return self.redis.xtrim(stream.value, maxlen=maxlen, approximate=True)
+            return sum(
+                self.redis.xtrim(key, maxlen=maxlen, approximate=True)
+                for key in self._lane_keys(stream)
+            )
         except Exception as e:
             logger.error(f"Failed to trim stream: {e}")
             return 0
@@ -275,6 +633,30 @@ class MessageQueueManager:
     # MESSAGE PUBLISHING
     # =========================================================================
     
+    def _new_message(
+        self,
+        stream: StreamName,
+        payload: Dict[str, Any],
+        priority: MessagePriority
+    ) -> Message:
+        """Wrap a payload in a Message stamped with this producer"""
+        return Message(
+            message_id=str(uuid.uuid4()),
+            stream=self._lane_key(stream, priority) if self.priority_lanes else stream.value,
+            payload=payload,
+            priority=priority.value,
+            timestamp=datetime.now().isoformat(),
+            producer_id=self.producer_id
+        )
+    
+    def _encode(self, message: Message) -> Dict[str, Any]:
+        """Stream entry fields for a message using its stream's codec"""
+        base = self._lane_base.get(message.stream, message.stream)
+        return message.to_redis(
+            self.stream_codecs.get(base, self.codec),
+            self.min_compress_size
+        )
+    
     def publish(
         self,
         stream: StreamName,
@@ -293,24 +675,19 @@ class MessageQueueManager:
             Message ID if successful
         """
         try:
-            message = Message(
-                message_id=str(uuid.uuid4()),
-                stream=stream.value,
-                payload=payload,
-                priority=priority.value,
-                timestamp=datetime.now().isoformat(),
-                producer_id=self.producer_id
-            )
+            message = self._new_message(stream, payload, priority)
             
             # Add to stream
             redis_id = self.redis.xadd(
-                stream.value,
-                message.to_redis(),
-                maxlen=self.max_stream_length
+                message.stream,
+                self._encode(message),
+                maxlen=self.max_stream_length,
+                approximate=True
             )
             
             self.stats['messages_published'] += 1
-            logger.debug(f"Published message {message.message_id} to {stream.value}")
+            self.stats['publish_round_trips'] += 1
+            logger.debug(f"Published message {message.message_id} to {message.stream}")
             
             return redis_id
             
@@ -318,6 +695,97 @@ class MessageQueueManager:
             logger.error(f"Failed to publish message: {e}")
             return None
     
+    def publish_many(
+        self,
+        stream: StreamName,
+        payloads: Iterable[Dict[str, Any]],
+        priority: MessagePriority = MessagePriority.NORMAL
+    ) -> List[Optional[str]]:
+        """
+        Publish several messages to a stream with pipelined XADDs
+        
+        Args:
+            stream: Target stream
+            payloads: Message payloads, published in order
+            priority: Priority applied to every message
+        
+        Returns:
+            Redis entry IDs in payload order (None where a chunk failed)
+        """
+        messages = [self._new_message(stream, payload, priority) for payload in payloads]
+        redis_ids: List[Optional[str]] = []
+        for start in range(0, len(messages), self.publish_batch_size):
+            chunk = messages[start:start + self.publish_batch_size]
+            ids = self._xadd_batch(chunk)
+            redis_ids.extend(ids if ids is not None else [None] * len(chunk))
+        return redis_ids
+    
+    def _xadd_batch(self, messages: List[Message]) -> Optional[List[str]]:
+        """XADD messages (any mix of streams) in one pipeline; None on failure"""
+        if not messages:
+            return []
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for message in messages:
+                pipe.xadd(
+                    message.stream,
+                    self._encode(message),
+                    maxlen=self.max_stream_length,
+                    approximate=True
+                )
+            redis_ids = pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to publish batch of {len(messages)} messages: {e}")
+            return None
+        
+        self.stats['messages_published'] += len(messages)
+        self.stats['publish_round_trips'] += 1
+        return redis_ids
+    
+    @property
+    def publisher(self) -> BatchPublisher:
+        """Get or create the background batch publisher"""
+        if self._publisher is None:
+            with self._publisher_lock:
+                if self._publisher is None:
+                    self._publisher = BatchPublisher(
+                        self,
+                        max_batch=self.publish_batch_size,
+                        flush_interval=self.publish_flush_interval,
+                        max_pending=self.max_pending_publish
+                    )
+        return self._publisher
+    
+    def publish_async(
+        self,
+        stream: StreamName,
+        payload: Dict[str, Any],
+        priority: MessagePriority = MessagePriority.NORMAL
+    ) -> Optional[str]:
+        """
+        Queue a message for the background batch publisher
+        
+        Returns:
+            The message's own message_id (the Redis entry ID is assigned at
+            flush time), or None if the publish buffer is full
+        """
+        message = self._new_message(stream, payload, priority)
+        if not self.publisher.submit(message):
+            logger.warning(f"Publish buffer full, dropped message for {stream.value}")
+            return None
+        return message.message_id
+    
+    def _publish_event(
+        self,
+        stream: StreamName,
+        payload: Dict[str, Any],
+        priority: MessagePriority = MessagePriority.NORMAL
+    ) -> Optional[str]:
+        """Publish an event helper's payload, batched when batch_publish is on"""
+        if self.batch_publish:
+            return self.publish_async(stream, payload, priority)
+        return self.publish(stream, payload, priority)
+    
     def publish_attack_event(
         self,
         attacker_ip: str,
@@ -334,7 +802,7 @@ class MessageQueueManager:
             'details': details or {},
             'timestamp': datetime.now().isoformat()
         }
-        return self.publish(StreamName.ATTACK_EVENTS, payload, MessagePriority.HIGH)
+        return self._publish_event(StreamName.ATTACK_EVENTS, payload, MessagePriority.HIGH)
     
     def publish_ai_decision(
         self,
@@ -352,7 +820,7 @@ class MessageQueueManager:
             'reward': reward,
             'timestamp': datetime.now().isoformat()
         }
-        return self.publish(StreamName.AI_DECISIONS, payload)
+        return self._publish_event(StreamName.AI_DECISIONS, payload)
     
     def publish_alert(
         self,
@@ -373,7 +841,7 @@ class MessageQueueManager:
             'source': source or self.producer_id,
             'timestamp': datetime.now().isoformat()
         }
-        return self.publish(StreamName.ALERTS, payload, priority)
+        return self._publish_event(StreamName.ALERTS, payload, priority)
     
     def publish_forensics_event(
         self,
@@ -389,7 +857,7 @@ class MessageQueueManager:
             'data': data,
             'timestamp': datetime.now().isoformat()
         }
-        return self.publish(StreamName.FORENSICS, payload)
+        return self._publish_event(StreamName.FORENSICS, payload)
     
     # =========================================================================
     # MESSAGE CONSUMPTION
@@ -406,6 +874,11 @@ class MessageQueueManager:
         """
         Consume messages from a stream
         
+        With priority lanes the batch is split across the lanes by weight,
+        and any share a lane cannot fill goes to the busier lanes, highest
+        priority first. Every lane gets at least one slot, so very small
+        counts may return up to one extra message per lane.
+        
         Args:
             stream: Source stream
             group: Consumer group
@@ -414,43 +887,126 @@ class MessageQueueManager:
             block: Block timeout in milliseconds
         
         Returns:
-            List of messages
+            List of messages, highest priority first
         """
+        keys = self._lane_keys(stream)
         try:
-            # Ensure group exists
-            self.create_consumer_group(stream, group)
+            # Ensure group exists (one XGROUP CREATE per stream key/group)
+            for key in keys:
+                self._ensure_group(key, group)
+            
+            if self.priority_lanes:
+                return self._consume_lanes(keys, group, consumer_name, count, block)
             
             # Read new messages
-            result = self.redis.xreadgroup(
+            result = self.redis_raw.xreadgroup(
                 group.value,
                 consumer_name,
                 {stream.value: '>'},
                 count=count,
                 block=block
             )
-            
-            messages = []
-            if result:
-                for stream_name, entries in result:
-                    for entry_id, data in entries:
-                        message = Message.from_redis(entry_id, stream_name, data)
-                        messages.append(message)
-            
-            return messages
+            return self._parse_entries(result)
             
         except Exception as e:
+            if "NOGROUP" in str(e):
+                # Stream or group was deleted; recreate on the next read
+                for key in keys:
+                    self._groups_ready.discard((key, group.value))
             logger.error(f"Failed to consume messages: {e}")
             return []
     
+    def _consume_lanes(
+        self,
+        keys: List[str],
+        group: ConsumerGroup,
+        consumer_name: str,
+        count: int,
+        block: Optional[int]
+    ) -> List[Message]:
+        """Weighted fair read across priority lanes"""
+        quotas = self._lane_quotas(count)
+        
+        # One non-blocking read per lane, pipelined
+        pipe = self.redis_raw.pipeline(transaction=False)
+        for key, quota in zip(keys, quotas):
+            pipe.xreadgroup(group.value, consumer_name, {key: '>'}, count=quota)
+        batches = [self._parse_entries(result) for result in pipe.execute()]
+        messages = [message for batch in batches for message in batch]
+        
+        # Hand unused share to lanes that filled their quota
+        spare = count - len(messages)
+        for key, quota, batch in zip(keys, quotas, batches):
+            if spare <= 0:
+                break
+            if len(batch) == quota:
+                extra = self._parse_entries(self.redis_raw.xreadgroup(
+                    group.value, consumer_name, {key: '>'}, count=spare
+                ))
+                messages.extend(extra)
+                spare -= len(extra)
+        
+        # Nothing anywhere: block on all lanes at once
+        if not messages and block is not None:
+            messages = self._parse_entries(self.redis_raw.xreadgroup(
+                group.value, consumer_name, {key: '>' for key in keys},
+                count=count, block=block
+            ))
+        
+        messages.sort(key=lambda message: message.priority, reverse=True)
+        return messages
+    
+    @staticmethod
+    def _parse_entries(result) -> List[Message]:
+        """Messages from an XREADGROUP reply"""
+        messages = []
+        if result:
+            for stream_name, entries in result:
+                for entry_id, data in entries:
+                    messages.append(Message.from_redis(entry_id, stream_name, data))
+        return messages
+    
     def acknowledge(
         self,
         stream: StreamName,
         group: ConsumerGroup,
-        message_ids: List[str]
+        messages: List[Union[Message, str]]
     ) -> int:
-        """Acknowledge processed messages"""
+        """
+        Acknowledge processed messages
+        
+        Message objects are acked on the stream key they were read from
+        (their priority lane). Bare entry IDs only identify an entry on the
+        base key, so they are rejected when priority lanes are enabled.
+        """
+        read = [m for m in messages if isinstance(m, Message)]
+        ids = [m for m in messages if not isinstance(m, Message)]
+        acked = self._acknowledge_messages(group, read) if read else 0
+        if not ids:
+            return acked
+        if self.priority_lanes:
+            logger.error(f"Cannot acknowledge {len(ids)} bare IDs on {stream.value} with priority lanes; "
+                         f"pass the consumed Message objects")
+            return acked
+        try:
+            return acked + self.redis.xack(stream.value, group.value, *ids)
+        except Exception as e:
+            logger.error(f"Failed to acknowledge messages: {e}")
+            return acked
+    
+    def _acknowledge_messages(self, group: ConsumerGroup, messages: List[Message]) -> int:
+        """XACK messages on their own stream keys in one round-trip"""
+        by_key: Dict[str, List[str]] = {}
+        for message in messages:
+            by_key.setdefault(message.stream, []).append(message.redis_id)
         try:
-            return self.redis.xack(stream.value, group.value, *message_ids)
+            if len(by_key) == 1:
+                key, ids = next(iter(by_key.items()))
+                return self.redis.xack(key, group.value, *ids)
+            pipe = self.redis.pipeline(transaction=False)
+            for key, ids in by_key.items():
+                pipe.xack(key, group.value, *ids)
+            return sum(pipe.execute())
         except Exception as e:
             logger.error(f"Failed to acknowledge messages: {e}")
             return 0
@@ -461,16 +1017,24 @@ class MessageQueueManager:
         group: ConsumerGroup,
         count: int = 100
     ) -> List[Dict]:
-        """Get pending messages for a group"""
+        """Get pending messages for a group (across all lanes)"""
+        pending = []
+        for key in self._lane_keys(stream):
+            pending.extend(self._pending_range(key, group, count - len(pending)))
+            if len(pending) >= count:
+                break
+        return pending
+    
+    def _pending_range(self, key: str, group: ConsumerGroup, count: int) -> List[Dict]:
+        """XPENDING entries for one stream key"""
         try:
-            pending = self.redis.xpending_range(
-                stream.value,
+            return self.redis.xpending_range(
+                key,
                 group.value,
                 '-',
                 '+',
                 count=count
             )
-            return pending
         except Exception as e:
             logger.error(f"Failed to get pending messages: {e}")
             return []
@@ -484,9 +1048,27 @@ class MessageQueueManager:
         count: int = 10
     ) -> List[Message]:
         """Claim pending messages from failed consumers"""
+        messages = []
+        for key in self._lane_keys(stream):
+            messages.extend(self._claim_key(
+                key, group, consumer_name, min_idle_time, count - len(messages)
+            ))
+            if len(messages) >= count:
+                break
+        return messages
+    
+    def _claim_key(
+        self,
+        key: str,
+        group: ConsumerGroup,
+        consumer_name: str,
+        min_idle_time: int,
+        count: int
+    ) -> List[Message]:
+        """Claim idle pending entries on one stream key"""
         try:
             # Get pending messages
-            pending = self.get_pending(stream, group, count)
+            pending = self._pending_range(key, group, count)
             
             if not pending:
                 return []
@@ -501,8 +1083,8 @@ class MessageQueueManager:
                 return []
             
             # Claim messages
-            result = self.redis.xclaim(
-                stream.value,
+            result = self.redis_raw.xclaim(
+                key,
                 group.value,
                 consumer_name,
                 min_idle_time,
@@ -511,7 +1093,7 @@ class MessageQueueManager:
             
             messages = []
             for entry_id, data in result:
-                message = Message.from_redis(entry_id, stream.value, data)
+                message = Message.from_redis(entry_id, key, data)
                 message.retry_count += 1
                 messages.append(message)
                 self.stats['messages_retried'] += 1
@@ -539,13 +1121,15 @@ class MessageQueueManager:
     
     def _process_message(self, message: Message) -> bool:
         """Process a message using registered handlers"""
-        handlers = self._handlers.get(message.stream, [])
+        base = self._lane_base.get(message.stream, message.stream)
+        handlers = self._handlers.get(base, [])
         
         if not handlers:
             logger.warning(f"No handlers for stream {message.stream}")
             return True
         
         success = True
+        start = time.perf_counter()
         for handler in handlers:
             try:
                 if not handler(message):
@@ -553,11 +1137,15 @@ class MessageQueueManager:
             except Exception as e:
                 logger.error(f"Handler error for message {message.message_id}: {e}")
                 success = False
+        histogram = self._handler_duration.get(base)
+        if histogram is not None:
+            histogram.observe(time.perf_counter() - start)
         
-        if success:
-            self.stats['messages_consumed'] += 1
-        else:
-            self.stats['messages_failed'] += 1
+        with self._stats_lock:
+            if success:
+                self.stats['messages_consumed'] += 1
+            else:
+                self.stats['messages_failed'] += 1
         
         return success
     
@@ -565,14 +1153,138 @@ class MessageQueueManager:
     # CONSUMER WORKERS
     # =========================================================================
     
+    def set_stream_concurrency(self, stream: StreamName, limit: int):
+        """Set how many handlers may run at once for a stream"""
+        with self._pool_lock:
+            self.stream_concurrency[stream.value] = limit
+            pool = self._handler_pools.pop(stream.value, None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+    
+    def _handler_pool(self, stream: StreamName) -> Optional[ThreadPoolExecutor]:
+        """Shared handler pool for a stream; None when handlers run inline"""
+        limit = self.stream_concurrency.get(stream.value, self.handler_concurrency)
+        if limit <= 1:
+            return None
+        with self._pool_lock:
+            pool = self._handler_pools.get(stream.value)
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=limit,
+                    thread_name_prefix=f"handlers-{stream.name.lower()}"
+                )
+                self._handler_pools[stream.value] = pool
+            return pool
+    
+    def _dispatch_batch(
+        self,
+        stream: StreamName,
+        group: ConsumerGroup,
+        messages: List[Message],
+        claimed: bool = False
+    ) -> int:
+        """
+        Run handlers over a fetched batch and acknowledge it with one XACK
+        
+        Handlers run on the stream's pool, so they must be thread-safe when
+        the stream's concurrency is above 1. Fresh messages that fail stay
+        pending for claim_pending(); claimed ones are acknowledged after one
+        more attempt. Either kind goes to the DLQ once out of retries.
+        
+        Returns:
+            Number of messages acknowledged
+        """
+        to_ack = []
+        to_process = []
+        for message in messages:
+            if claimed and message.retry_count >= message.max_retries:
+                self._move_to_dlq(message)
+                to_ack.append(message)
+            else:
+                to_process.append(message)
+        
+        pool = self._handler_pool(stream)
+        if pool is None:
+            results = [self._process_message(message) for message in to_process]
+        else:
+            results = list(pool.map(self._process_message, to_process))
+        
+        for message, success in zip(to_process, results):
+            if success or claimed:
+                to_ack.append(message)
+            elif message.retry_count >= message.max_retries:
+                self._move_to_dlq(message)
+                to_ack.append(message)
+        
+        if not to_ack:
+            return 0
+        self.stats['ack_round_trips'] += 1
+        acked = self._acknowledge_messages(group, to_ack)
+        if acked:
+            self._record_latency(to_ack)
+        return acked
+    
+    def _record_latency(self, messages: List[Message]):
+        """Sample publish-to-ack latency per priority and per stream"""
+        now = datetime.now()
+        for message in messages:
+            try:
+                published = datetime.fromisoformat(message.timestamp)
+            except ValueError:
+                continue
+            latency = max(0.0, (now - published).total_seconds())
+            samples = self._latency.get(message.priority)
+            if samples is not None:
+                samples.append(latency)
+            histogram = self._end_to_end.get(self._lane_base.get(message.stream, message.stream))
+            if histogram is not None:
+                histogram.observe(latency)
+    
+    def get_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """Publish-to-ack latency percentiles (ms) per priority over recent messages"""
+        latency = {}
+        for priority in MessagePriority:
+            samples = sorted(self._latency[priority.value])
+            if not samples:
+                continue
+            
+            def percentile(q: float) -> float:
+                return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+            
+            latency[priority.name] = {
+                'samples': len(samples),
+                'avg_ms': round(sum(samples) / len(samples) * 1000, 2),
+                'p50_ms': percentile(0.50),
+                'p95_ms': percentile(0.95),
+                'p99_ms': percentile(0.99),
+                'max_ms': round(samples[-1] * 1000, 2)
+            }
+        return latency
+    
     def start_consumer(
         self,
         stream: StreamName,
         group: ConsumerGroup,
-        consumer_name: str = None
+        consumer_name: str = None,
+        batch_size: int = 10,
+        concurrency: int = None
     ):
-        """Start a consumer worker thread"""
+        """
+        Start a consumer worker thread
+        
+        Args:
+            stream: Source stream
+            group: Consumer group
+            consumer_name: Consumer name (generated if omitted)
+            batch_size: Messages fetched per XREADGROUP
+            concurrency: Override the stream's handler concurrency; the
+                limit is shared by every consumer of the stream
+        """
         consumer_name = consumer_name or f"consumer-{uuid.uuid4().hex[:8]}"
+        if concurrency is not None:
+            self.set_stream_concurrency(stream, concurrency)
+        for key in self._lane_keys(stream):
+            self._ensure_group(key, group)
         
         def worker():
             logger.info(f"Consumer {consumer_name} started for {stream.value}")
@@ -580,31 +1292,17 @@ class MessageQueueManager:
             while self._running:
                 try:
                     # Consume messages
-                    messages = self.consume(stream, group, consumer_name, count=10, block=5000)
-                    
-                    for message in messages:
-                        success = self._process_message(message)
-                        
-                        if success:
-                            self.acknowledge(stream, group, [message.message_id])
-                        elif message.retry_count >= message.max_retries:
-                            # Move to dead letter queue
-                            self._move_to_dlq(message)
-                            self.acknowledge(stream, group, [message.message_id])
+                    messages = self.consume(stream, group, consumer_name, count=batch_size, block=5000)
+                    if messages:
+                        self._dispatch_batch(stream, group, messages)
                     
                     # Claim stale pending messages
                     stale_messages = self.claim_pending(
                         stream, group, consumer_name,
                         min_idle_time=60000, count=5
                     )
-                    
-                    for message in stale_messages:
-                        if message.retry_count < message.max_retries:
-                            self._process_message(message)
-                            self.acknowledge(stream, group, [message.message_id])
-                        else:
-                            self._move_to_dlq(message)
-                            self.acknowledge(stream, group, [message.message_id])
+                    if stale_messages:
+                        self._dispatch_batch(stream, group, stale_messages, claimed=True)
                     
                 except Exception as e:
                     logger.error(f"Consumer {consumer_name} error: {e}")
@@ -631,8 +1329,14 @@ class MessageQueueManager:
             self.redis.xadd(
                 'stream:dead_letter',
                 {'payload': json.dumps(dlq_payload)},
-                maxlen=10000
+                maxlen=10000,
+                approximate=True
             )
+            base = self._lane_base.get(message.stream, message.stream)
+            with self._stats_lock:
+                self.stats['messages_dead_lettered'] += 1
+                self._dlq_by_stream[base] = self._dlq_by_stream.get(base, 0) + 1
+                self._dlq_times.append(time.time())
             logger.warning(f"Message {message.message_id} moved to DLQ after {message.retry_count} retries")
         except Exception as e:
             logger.error(f"Failed to move message to DLQ: {e}")
@@ -643,6 +1347,10 @@ class MessageQueueManager:
         for name, thread in self._consumers.items():
             thread.join(timeout=10)
         self._consumers.clear()
+        with self._pool_lock:
+            pools, self._handler_pools = self._handler_pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=True)
         logger.info("All consumers stopped")
     
     # =========================================================================
@@ -650,30 +1358,99 @@ class MessageQueueManager:
     # =========================================================================
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get queue statistics"""
-        stats = dict(self.stats)
+        """
+        Get queue statistics
         
-        # Add stream stats
-        stream_stats = {}
-        for stream in StreamName:
-            info = self.get_stream_info(stream)
-            if info:
-                stream_stats[stream.value] = {
-                    'length': info.length,
-                    'groups': info.groups,
-                    'pending': info.pending_messages
-                }
+        Stream and consumer group state for every stream (and lane) comes
+        from one pipelined round-trip, so this is cheap enough to scrape
+        every few seconds.
+        """
+        stats = dict(self.stats)
         
-        stats['streams'] = stream_stats
+        stats['streams'] = self._collect_stream_stats()
+        stats['latency_by_priority'] = self.get_latency_stats()
+        stats['end_to_end_latency'] = {
+            key: histogram.snapshot() for key, histogram in self._end_to_end.items()
+        }
+        stats['handler_duration'] = {
+            key: histogram.snapshot() for key, histogram in self._handler_duration.items()
+        }
+        stats['dead_letter'] = self._dlq_stats()
         stats['consumers'] = len(self._consumers)
         stats['running'] = self._running
+        if self._publisher is not None:
+            stats['batch_publisher'] = self._publisher.get_stats()
         
         return stats
     
+    def _collect_stream_stats(self) -> Dict[str, Dict[str, Any]]:
+        """XINFO STREAM + XINFO GROUPS for every stream key in one pipeline"""
+        keys = [key for stream in StreamName for key in self._lane_keys(stream)]
+        try:
+            pipe = self.redis_raw.pipeline(transaction=False)
+            for key in keys:
+                pipe.xinfo_stream(key)
+                pipe.xinfo_groups(key)
+            replies = pipe.execute(raise_on_error=False)
+        except Exception as e:
+            logger.error(f"Failed to collect stream stats: {e}")
+            return {}
+        
+        now_ms = time.time() * 1000
+        stream_stats = {}
+        for index, key in enumerate(keys):
+            info, groups = replies[2 * index], replies[2 * index + 1]
+            if isinstance(info, Exception) or isinstance(groups, Exception):
+                continue  # stream does not exist yet
+            last_generated = _text(info.get('last-generated-id'))
+            first_entry = info.get('first-entry')
+            first_id = _text(first_entry[0]) if first_entry else None
+            
+            group_stats = {}
+            for group in groups:
+                delivered = _text(group.get('last-delivered-id')) or '0-0'
+                lag = group.get('lag')
+                if lag is None and delivered == last_generated:
+                    lag = 0
+                # Age bound of the oldest undelivered entry: it was added
+                # after the last delivered one (or is the first entry)
+                since = _id_ms(delivered) or _id_ms(first_id)
+                behind = lag != 0 and delivered != last_generated and since
+                group_stats[_text(group.get('name'))] = {
+                    'lag': lag,
+                    'lag_seconds': round(max(0.0, now_ms - since) / 1000, 3) if behind else 0.0,
+                    'pending': group.get('pending', 0),
+                    'consumers': group.get('consumers', 0),
+                    'last_delivered_id': delivered
+                }
+            
+            stream_stats[key] = {
+                'length': info.get('length', 0),
+                'groups': len(groups),
+                'pending': sum(g['pending'] for g in group_stats.values()),
+                'last_generated_id': last_generated,
+                'consumer_groups': group_stats
+            }
+        return stream_stats
+    
+    def _dlq_stats(self, window: float = 300.0) -> Dict[str, Any]:
+        """Dead-lettered totals and the rate over the last `window` seconds"""
+        cutoff = time.time() - window
+        with self._stats_lock:
+            recent = sum(1 for ts in self._dlq_times if ts >= cutoff)
+            by_stream = dict(self._dlq_by_stream)
+        processed = self.stats['messages_consumed'] + self.stats['messages_failed']
+        return {
+            'total': self.stats['messages_dead_lettered'],
+            'by_stream': by_stream,
+            'rate_per_minute': round(recent * 60 / window, 3),
+            'ratio': round(self.stats['messages_dead_lettered'] / processed, 4) if processed else 0.0
+        }
+    
     def flush_stream(self, stream: StreamName) -> bool:
         """Delete all messages from a stream"""
         try:
-            self.redis.delete(stream.value)
+            self.redis.delete(*self._lane_keys(stream))
             logger.info(f"Flushed stream {stream.value}")
             return True
         except Exception as e:
@@ -683,12 +1460,30 @@ class MessageQueueManager:
     def close(self):
         """Close connections and stop consumers"""
         self.stop_consumers()
+        if self._publisher is not None:
+            self._publisher.stop()
         if self._redis:
             self._redis.close()
             self._redis = None
+        if self._redis_raw:
+            self._redis_raw.close()
+            self._redis_raw = None
         logger.info("MessageQueueManager closed")
 
 
+def _text(value: Any) -> Optional[str]:
+    """Decode a raw reply value"""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _id_ms(entry_id: Optional[str]) -> Optional[int]:
+    """Millisecond timestamp part of a stream entry ID ('0-0' -> None)"""
+    if not entry_id:
+        return None
+    ms = int(entry_id.split('-', 1)[0])
+    return ms or None
+
+
 # =============================================================================
 # EVENT PUBLISHER SINGLETON
 # =============================================================================
@@ -0,0 +1,238 @@
+"""
+Unit Tests for AI Engine Server Stream Ingestion
+Tests batched XREADGROUP consumption, pipelined threat updates and acks
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.ai.ai_engine_server import AIEngineServer
+from src.pipeline.pipeline_metrics import PROMETHEUS_AVAILABLE
+from src.pipeline.message_codecs import MSGPACK_AVAILABLE
+from src.pipeline.message_queue import MessagePriority, MessageQueueManager, StreamName
+
+
+class TestStreamIngestion:
+    """Test suite for AIEngineServer stream consumption"""
+
+    def setup_method(self):
+        self.server = fakeredis.FakeServer()
+        self.queue = self._queue()
+        self.engine = self._engine()
+
+    def teardown_method(self):
+        self.queue.close()
+
+    def _queue(self, **kwargs):
+        queue = MessageQueueManager(producer_id="honeypot", **kwargs)
+        queue._redis = fakeredis.FakeRedis(server=self.server, decode_responses=True)
+        return queue
+
+    def _engine(self, **kwargs):
+        engine = AIEngineServer(consumer_name='engine-1', batch_size=10, block_ms=50, **kwargs)
+        engine.redis_client = fakeredis.aioredis.FakeRedis(server=self.server, decode_responses=True)
+        engine.stream_client = fakeredis.aioredis.FakeRedis(server=self.server)
+        return engine
+
+    def _publish(self, count, ip='185.220.101.1'):
+        for i in range(count):
+            self.queue.publish_attack_event(ip, 'SSH', 'brute_force', {'attempt': i})
+
+    def _pending(self, key=StreamName.ATTACK_EVENTS.value):
+        return self.queue.redis.xpending(key, self.engine.group.value)['pending']
+
+    def test_batched_read_and_ack(self):
+        self._publish(25)
+
+        async def drain():
+            await self.engine.ensure_groups()
+            sizes = []
+            while True:
+                messages = await self.engine.read_batch()
+                if not messages:
+                    return sizes
+                sizes.append(len(messages))
+                await self.engine.process_batch(messages)
+
+        assert asyncio.run(drain()) == [10, 10, 5]
+        assert self.engine.attack_count == 25
+        assert self._pending() == 0
+        threat = self.queue.redis.hgetall('threat:185.220.101.1')
+        assert threat['count'] == '25'
+        assert self.queue.redis.ttl('threat:185.220.101.1') > 0
+
+    @pytest.mark.skipif(not PROMETHEUS_AVAILABLE, reason="prometheus_client not installed")
+    def test_exports_pipeline_metrics(self):
+        self.queue = self._queue(priority_lanes=True)
+        self.engine = self._engine(priority_lanes=True)
+        self.queue.publish(StreamName.ATTACK_EVENTS, {'attacker_ip': '1.1.1.1'}, MessagePriority.CRITICAL)
+        self.queue.publish(StreamName.ATTACK_EVENTS, {'attacker_ip': '2.2.2.2'})
+
+        async def drain():
+            await self.engine.ensure_groups()
+            await self.engine.process_batch(await self.engine.read_batch())
+
+        asyncio.run(drain())
+        registry = self.engine._metrics_registry
+        labels = {'stream': StreamName.ATTACK_EVENTS.value}
+        assert registry.get_sample_value('pipeline_messages_total', {'event': 'consumed'}) == 2
+        assert registry.get_sample_value('pipeline_end_to_end_latency_seconds_count', labels) == 2
+        assert registry.get_sample_value(
+            'pipeline_handler_duration_seconds_bucket', dict(labels, le='+Inf')) == 2
+        assert registry.get_sample_value('pipeline_dead_letter_total', labels) == 0
+        assert 'pipeline_end_to_end_latency_seconds_bucket' in self.engine.pipeline_metrics()
+
+    def test_legacy_event_fields(self):
+        scores = asyncio.run(self.engine.process_events([
+            {'source_ip': '10.0.0.5', 'attack_type': 'sqli'},
+            {'attacker_ip': '10.0.0.5', 'action': 'sqli'},
+        ]))
+        assert scores == [0.5, 0.5]
+        assert self.queue.redis.hget('threat:10.0.0.5', 'count') == '2'
+
+    def test_concurrency_is_bounded(self):
+        engine = self._engine(concurrency=3)
+        active, peak = [0], [0]
+
+        async def score(event):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.001)
+            active[0] -= 1
+            return 1.0
+
+        engine.score_attack_event = score
+        scores = asyncio.run(engine.process_events([{'attacker_ip': '1.2.3.4'}] * 20))
+        assert scores == [1.0] * 20
+        assert peak[0] == 3
+
+    def test_recovers_unacknowledged_entries(self):
+        self._publish(4)
+
+        async def crash_then_recover():
+            await self.engine.ensure_groups()
+            delivered = await self.engine.read_batch()
+            # Process dies before acking; restart re-reads its own pending entries
+            recovered = await self.engine.read_batch(pending=True)
+            await self.engine.process_batch(recovered)
+            return delivered, recovered, await self.engine.read_batch(pending=True)
+
+        delivered, recovered, remaining = asyncio.run(crash_then_recover())
+        assert [m.redis_id for m in recovered] == [m.redis_id for m in delivered]
+        assert remaining == []
+        assert self._pending() == 0
+
+    def test_trimmed_pending_entries_are_acknowledged(self):
+        self._publish(3)
+
+        async def crash_trim_recover():
+            await self.engine.ensure_groups()
+            await self.engine.read_batch()
+            self.queue.redis.xtrim(StreamName.ATTACK_EVENTS.value, maxlen=0)
+            return await self.engine.read_batch(pending=True)
+
+        assert asyncio.run(crash_trim_recover()) == []
+        assert self._pending() == 0
+        assert self.engine.dead_lettered == 0
+
+    def test_undecodable_entries_are_dead_lettered(self):
+        key = StreamName.ATTACK_EVENTS.value
+        self._publish(1)
+        self.queue.redis.xadd(key, {'payload': 'x', 'codec': 'bogus'})
+        self.queue.redis.xadd(key, {'payload': '{}', 'priority': 'high'})
+        self._publish(1)
+
+        async def drain():
+            await self.engine.ensure_groups()
+            messages = await self.engine.read_batch()
+            await self.engine.process_batch(messages)
+            return messages
+
+        assert len(asyncio.run(drain())) == 2
+        assert self._pending() == 0
+        assert self.engine.dead_lettered == 2
+        assert self.engine.get_stats()['dead_letter']['by_stream'][key] == 2
+        dead = self.queue.redis.xrange('stream:dead_letter')
+        assert [fields['raw:codec'] for _, fields in dead[:1]] == ['bogus']
+        assert json.loads(dead[1][1]['payload'])['original_stream'] == key
+
+    def test_recovery_moves_on_when_pending_entries_stall(self):
+        self._publish(2, ip='10.0.0.1')
+        process_batch = self.engine.process_batch
+
+        async def skip_poison(messages):
+            # Poison entries are never acked, e.g. a handler that keeps failing
+            healthy = [m for m in messages if m.payload['attacker_ip'] != '10.0.0.1']
+            if healthy:
+                await process_batch(healthy)
+
+        async def run():
+            await self.engine.ensure_groups()
+            await self.engine.read_batch()  # delivered, then the process dies
+            self._publish(3, ip='10.0.0.2')
+            self.engine.process_batch = skip_poison
+            self.engine.running = True
+            task = asyncio.create_task(self.engine.monitor_attacks())
+            for _ in range(100):
+                if self.engine.attack_count >= 3:
+                    break
+                await asyncio.sleep(0.01)
+            self.engine.running = False
+            await asyncio.wait_for(task, timeout=2)
+
+        asyncio.run(run())
+        assert self.engine.attack_count == 3
+        assert self._pending() == 2
+
+    def test_priority_lanes_read_highest_first(self):
+        self.queue = self._queue(priority_lanes=True)
+        self.engine = self._engine(priority_lanes=True)
+        self.queue.publish(StreamName.ATTACK_EVENTS, {'attacker_ip': '1.1.1.1'}, MessagePriority.LOW)
+        self.queue.publish(StreamName.ATTACK_EVENTS, {'attacker_ip': '2.2.2.2'}, MessagePriority.CRITICAL)
+
+        async def read():
+            await self.engine.ensure_groups()
+            return await self.engine.read_batch()
+
+        messages = asyncio.run(read())
+        assert [m.priority for m in messages] == [MessagePriority.CRITICAL.value, MessagePriority.LOW.value]
+        assert messages[0].stream == 'stream:attacks:critical'
+
+    @pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack not installed")
+    def test_binary_payloads(self):
+        self.queue = self._queue(codec='msgpack')
+        self._publish(3, ip='45.155.205.9')
+
+        async def read():
+            await self.engine.ensure_groups()
+            return await self.engine.read_batch()
+
+        messages = asyncio.run(read())
+        assert [m.payload['details']['attempt'] for m in messages] == [0, 1, 2]
+
+    def test_monitor_attacks_loop(self):
+        self._publish(15)
+
+        async def run():
+            self.engine.running = True
+            task = asyncio.create_task(self.engine.monitor_attacks())
+            for _ in range(100):
+                if self.engine.attack_count >= 15:
+                    break
+                await asyncio.sleep(0.01)
+            self.engine.running = False
+            await asyncio.wait_for(task, timeout=2)
+
+        asyncio.run(run())
+        assert self.engine.attack_count == 15
+        assert self.engine.batches_processed == 2
+        assert self._pending() == 0
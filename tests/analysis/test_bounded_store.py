@@ -0,0 +1,130 @@
+"""
+Unit Tests for the Bounded Store
+Tests LRU capacity eviction, idle expiry and attacker profile offload
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# analysis modules are loaded directly; the package __init__ pulls in optional feeds
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src' / 'analysis'))
+
+from bounded_store import BoundedStore
+from attack_patterns import AttackPatternAnalyzer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DictRedis:
+    """Minimal get/setex stand-in for the offload path"""
+
+    def __init__(self):
+        self.data = {}
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def get(self, key):
+        return self.data.get(key)
+
+
+class TestBoundedStore:
+    """Test suite for BoundedStore"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.evicted = []
+        self.store = BoundedStore(
+            max_entries=3, ttl=10, clock=self.clock,
+            on_evict=lambda key, value, reason: self.evicted.append((key, reason)),
+        )
+
+    def test_lru_capacity_eviction(self):
+        for key in "abc":
+            self.store[key] = key.upper()
+        assert self.store.get("a") == "A"  # a becomes most recent
+        self.store["d"] = "D"
+
+        assert "b" not in self.store
+        assert self.store.keys() == ["c", "a", "d"]
+        assert self.evicted == [("b", "capacity")]
+        assert self.store.stats['evicted_capacity'] == 1
+
+    def test_idle_entries_expire(self):
+        self.store["a"] = 1
+        self.clock.now = 5
+        self.store["b"] = 2
+        self.clock.now = 12
+
+        assert "a" not in self.store
+        assert self.store.get("b") == 2
+        assert self.evicted == [("a", "expired")]
+
+    def test_access_refreshes_ttl(self):
+        self.store["a"] = 1
+        self.clock.now = 8
+        assert self.store["a"] == 1
+        self.clock.now = 16
+        assert self.store.expire() == 0
+        assert len(self.store) == 1
+
+    def test_default_factory(self):
+        counts = BoundedStore(max_entries=2, ttl=None, default_factory=int)
+        counts["x"] += 1
+        counts["x"] += 1
+        assert counts["x"] == 2
+        with pytest.raises(KeyError):
+            self.store["missing"]
+
+    def test_stats_include_memory(self):
+        self.store["a"] = {"k": "v" * 100}
+        stats = self.store.get_stats()
+        assert stats['entries'] == 1
+        assert stats['max_entries'] == 3
+        assert stats['estimated_bytes'] > 100
+
+
+class TestAnalyzerStores:
+    """Bounded session/profile stores inside AttackPatternAnalyzer"""
+
+    LINE = "Failed password for invalid user admin from {ip} port 22 ssh2"
+
+    def test_sessions_and_profiles_are_bounded(self):
+        analyzer = AttackPatternAnalyzer(max_sessions=10, max_profiles=10)
+        for i in range(50):
+            ip = f"198.51.100.{i}"
+            analyzer.analyze(self.LINE.format(ip=ip), ip, "ssh")
+
+        stats = analyzer.get_statistics()
+        assert stats['active_sessions'] == 10
+        assert stats['attacker_profiles'] == 10
+        assert stats['memory']['ip_failure_counts']['entries'] == 10
+        assert stats['memory']['attack_sessions']['evicted_capacity'] == 40
+
+    def test_evicted_profile_round_trips_through_redis(self):
+        redis = DictRedis()
+        analyzer = AttackPatternAnalyzer(redis_client=redis, max_profiles=1)
+        analyzer.analyze(self.LINE.format(ip="203.0.113.1"), "203.0.113.1", "ssh")
+        analyzer.analyze(self.LINE.format(ip="203.0.113.2"), "203.0.113.2", "ssh")
+
+        assert "attacker_profile:203.0.113.1" in redis.data
+        restored = analyzer.get_attacker_profile("203.0.113.1")
+        assert restored.ip_addresses == ["203.0.113.1"]
+        assert restored.total_attacks >= 1
+        assert analyzer.get_statistics()['profiles_restored'] == 1
+
+    def test_session_pattern_history_is_capped(self):
+        analyzer = AttackPatternAnalyzer(max_patterns_per_session=5)
+        for _ in range(10):
+            analyzer.analyze(self.LINE.format(ip="203.0.113.9"), "203.0.113.9", "ssh")
+        session = analyzer.get_session("203.0.113.9", "ssh")
+        assert len(session.patterns_detected) == 5
+        assert session.total_events > 5
@@ -0,0 +1,181 @@
+"""
+Unit Tests for IP Reputation
+Tests the CIDR range index and the two-tier reputation cache
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# analysis modules are loaded directly; the package __init__ pulls in optional feeds
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src' / 'analysis'))
+
+from ip_reputation import (
+    AbuseType, CIDRIndex, IPReputation, IPReputationResult, NO_MATCH, parse_range
+)
+
+
+class TestCIDRIndex:
+    """Test suite for CIDRIndex"""
+
+    def setup_method(self):
+        self.index = CIDRIndex({
+            "malicious": {"203.0.113.0/25": {"name": "low-half"}},
+            "cloud": {"203.": {"name": "wide"}, "203.0.": {"name": "narrow"}},
+            "whitelist": {"2001:db8::/32": {"name": "v6"}},
+            "geoip": {"8.8": {"name": "google"}},
+        })
+
+    def test_parse_range(self):
+        assert str(parse_range("185.220.101.")) == "185.220.101.0/24"
+        assert str(parse_range("209.58.")) == "209.58.0.0/16"
+        assert str(parse_range("8.8")) == "8.8.0.0/16"
+        assert str(parse_range("2001:db8::/32")) == "2001:db8::/32"
+        with pytest.raises(ValueError):
+            parse_range("300.1.")
+
+    def test_non_octet_aligned_cidr(self):
+        assert self.index.lookup("203.0.113.127").malicious == {"name": "low-half"}
+        assert self.index.lookup("203.0.113.128").malicious is None
+
+    def test_longest_prefix_wins(self):
+        assert self.index.lookup("203.0.9.9").cloud == {"name": "narrow"}
+        assert self.index.lookup("203.1.9.9").cloud == {"name": "wide"}
+
+    def test_all_tables_in_one_lookup(self):
+        match = self.index.lookup("203.0.113.5")
+        assert match.malicious == {"name": "low-half"}
+        assert match.cloud == {"name": "narrow"}
+        assert match.whitelist is None
+
+    def test_octet_boundaries_are_respected(self):
+        # "8.8" used to match 8.80.x.x with str.startswith
+        assert self.index.lookup("8.8.1.1").geoip == {"name": "google"}
+        assert self.index.lookup("8.80.1.1").geoip is None
+
+    def test_ipv6_and_invalid(self):
+        assert self.index.lookup("2001:db8::1").whitelist == {"name": "v6"}
+        assert self.index.lookup("2001:db9::1") is NO_MATCH
+        assert self.index.lookup("not-an-ip") is NO_MATCH
+        assert self.index.lookup("1.2.3") is NO_MATCH
+
+
+class TestIPReputationRanges:
+    """Range checks of IPReputation backed by the index"""
+
+    def setup_method(self):
+        self.engine = IPReputation()
+
+    def test_range_checks(self):
+        assert self.engine._check_malicious_ranges("185.220.101.50")['description'] == "Tor Exit Node (DFRI)"
+        assert self.engine._check_vpn_proxy("209.58.1.2")['provider'] == "Choopa/Vultr"
+        assert self.engine._check_cloud_provider("13.53.131.159")['provider'] == "Amazon AWS"
+        assert self.engine._check_whitelist("8.8.8.8")['provider'] == "Google DNS"
+        assert self.engine._check_malicious_ranges("11.1.1.1") is None
+
+    def test_check_reputation_uses_index(self):
+        result = self.engine.check_reputation("141.98.10.50")
+        assert result.category == "bot"
+        assert result.blacklist_status["spamhaus_zen"] is True
+        assert result.geographic_info["country_code"] == "NL"
+        assert self.engine.check_reputation("8.8.8.8").reputation_label == "TRUSTED"
+
+
+class FakeRedis:
+    """In-memory hash store with the pipeline calls the reputation cache uses"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+        self.ttls.pop(key, None)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        results = []
+        for name, args, kwargs in self.calls:
+            key = args[0]
+            if name == 'hset':
+                self.redis.hashes.setdefault(key, {}).update(kwargs['mapping'])
+                results.append(len(kwargs['mapping']))
+            elif name == 'expire':
+                self.redis.ttls[key] = args[1]
+                results.append(True)
+            elif name == 'hmget':
+                results.append([self.redis.hashes.get(key, {}).get(f) for f in args[1:]])
+            elif name == 'ttl':
+                results.append(self.redis.ttls.get(key, -2))
+        return results
+
+
+class TestReputationCache:
+    """Two-tier (LRU + Redis) reputation cache"""
+
+    def setup_method(self):
+        self.redis = FakeRedis()
+        self.engine = IPReputation(redis_client=self.redis)
+
+    def test_serialization_round_trip(self):
+        result = self.engine.check_reputation("185.220.101.50")
+        restored = IPReputationResult.from_cache(result.to_cache())
+        assert restored.reputation_score == result.reputation_score
+        assert restored.blacklist_status == result.blacklist_status
+        assert restored.raw_data['malicious_info']['category'] == "tor"
+        assert IPReputationResult.from_cache('[0]') is None
+
+    def test_local_hit(self):
+        first = self.engine.check_reputation("141.98.10.50")
+        assert self.engine.check_reputation("141.98.10.50") is first
+        stats = self.engine.get_statistics()
+        assert stats['cache_hits'] == 1
+        assert stats['cache_misses'] == 1
+
+    def test_workers_share_redis_tier(self):
+        self.engine.check_reputation("141.98.10.50")
+        other = IPReputation(redis_client=self.redis)
+        result = other.check_reputation("141.98.10.50")
+
+        assert result.category == "bot"
+        stats = other.get_statistics()
+        assert stats['redis_hits'] == 1
+        assert stats['total_ips_checked'] == 0
+        assert stats['cached_ips'] == 1  # promoted to the local tier
+
+    def test_ttl_by_label_and_negative_caching(self):
+        self.engine.check_reputation("45.146.165.10")   # APT range -> BLOCKED
+        self.engine.check_reputation("77.77.77.77")     # no intelligence at all
+        assert self.redis.ttls["ip_reputation:45.146.165.10"] == IPReputation.LABEL_TTLS["BLOCKED"]
+        assert self.redis.ttls["ip_reputation:77.77.77.77"] == self.engine.negative_ttl
+        assert self.redis.hashes["ip_reputation:77.77.77.77"]['negative'] == '1'
+
+        self.engine.check_reputation("77.77.77.77")
+        assert self.engine.get_statistics()['negative_hits'] == 1
+
+    def test_expired_local_entry_is_refreshed(self):
+        engine = IPReputation(negative_ttl=0)
+        engine.check_reputation("77.77.77.77")
+        engine.check_reputation("77.77.77.77")
+        assert engine.get_statistics()['total_ips_checked'] == 2
+
+    def test_abuse_report_invalidates_both_tiers(self):
+        self.engine.check_reputation("77.77.77.78")
+        self.engine.report_abuse("77.77.77.78", AbuseType.BRUTE_FORCE, "ssh spray")
+        assert "ip_reputation:77.77.77.78" not in self.redis.hashes
+        assert self.engine.check_reputation("77.77.77.78").abuse_reports == 1
@@ -0,0 +1,76 @@
+"""
+Unit Tests for the Archive Writers
+Tests block-parallel gzip and multithreaded zstd round trips
+"""
+
+import gzip
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.forensics.archive_writer import ZSTD_AVAILABLE, ParallelGzipWriter, ZstdStreamWriter, open_compressed
+
+BLOCK = 64 * 1024
+
+
+def payload(size):
+    # نصف عشوائي ونصف قابل للضغط، ليعبر القاموس حدود الكتل
+    text = b"Oct 16 sshd[2211]: Failed password for root from 45.155.205.1\n"
+    data = bytearray()
+    while len(data) < size:
+        data += os.urandom(512) + text * 20
+    return bytes(data[:size])
+
+
+class TestParallelGzipWriter:
+    """Test suite for ParallelGzipWriter"""
+
+    @pytest.mark.parametrize('size', [0, 1, BLOCK - 1, BLOCK, 3 * BLOCK, 10 * BLOCK + 123])
+    def test_round_trip(self, size):
+        data = payload(size)
+        sink = io.BytesIO()
+        with ParallelGzipWriter(sink, workers=3, block_size=BLOCK) as writer:
+            # كتابات بأحجام غير منتظمة
+            for start in range(0, size, 10000):
+                writer.write(data[start:start + 10000])
+
+        assert gzip.decompress(sink.getvalue()) == data
+        assert writer.bytes_in == size and writer.bytes_out == len(sink.getvalue())
+
+    def test_compresses_like_gzip(self):
+        data = payload(20 * BLOCK)
+        sink = io.BytesIO()
+        with ParallelGzipWriter(sink, workers=4, block_size=BLOCK) as writer:
+            writer.write(data)
+        # القاموس المشترك يبقي النسبة قريبة من الضغط التسلسلي
+        assert len(sink.getvalue()) < len(gzip.compress(data, 6)) * 1.05
+
+    def test_write_after_close(self):
+        writer = ParallelGzipWriter(io.BytesIO())
+        writer.close()
+        writer.close()
+        with pytest.raises(ValueError):
+            writer.write(b"late")
+
+
+@pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard not installed")
+def test_zstd_round_trip():
+    import zstandard
+
+    data = payload(5 * BLOCK)
+    sink = io.BytesIO()
+    with ZstdStreamWriter(sink, workers=2) as writer:
+        writer.write(data)
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(sink.getvalue()) == data
+    assert writer.bytes_in == len(data)
+
+
+def test_unknown_compression():
+    with pytest.raises(ValueError):
+        open_compressed(io.BytesIO(), 'lzma')
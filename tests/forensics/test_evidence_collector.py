@@ -0,0 +1,400 @@
+"""
+Unit Tests for Evidence Collector
+Tests concurrent collection sweeps, per-collector timings and partial results,
+streaming integrity verification, database exports and case exports
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+import src.forensics.evidence_collector as evidence_module
+from src.forensics.archive_writer import ZSTD_AVAILABLE
+from src.forensics.evidence_collector import EvidenceCollector, TimelineEvent, hash_file
+
+if ZSTD_AVAILABLE:
+    import zstandard
+
+COLLECTOR_DELAY = 0.1
+
+
+class TestCollectionSweep:
+    """Test suite for EvidenceCollector.run_collection"""
+
+    def setup_method(self):
+        self.active = 0
+        self.peak = 0
+        self.counter_lock = threading.Lock()
+
+    def _collector(self, tmp_path, delays=None):
+        """EvidenceCollector whose docker/netstat calls are replaced by sleeps"""
+        collector = EvidenceCollector(evidence_base_path=str(tmp_path))
+        delays = delays or {}
+
+        def fake_run(cmd, **kwargs):
+            name = next((c for c in collector.CONTAINER_SERVICES if c in cmd), 'network')
+            with self.counter_lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            try:
+                time.sleep(delays.get(name, COLLECTOR_DELAY))
+                return type('Result', (), {'stdout': f"log line from {name}\n", 'stderr': ''})()
+            finally:
+                with self.counter_lock:
+                    self.active -= 1
+
+        collector._fake_run = fake_run
+        return collector
+
+    def _run(self, monkeypatch, collector, **kwargs):
+        monkeypatch.setattr(evidence_module.subprocess, 'run', collector._fake_run)
+        case = collector.create_case("Sweep", "SOC Analyst", "test", "intrusion_attempt")
+        return case, collector.run_collection(case.case_id, **kwargs)
+
+    def test_sequential_matches_collect_all_order(self, tmp_path, monkeypatch):
+        collector = self._collector(tmp_path, delays={'network': 0})
+        case, report = self._run(monkeypatch, collector, max_workers=1)
+
+        expected = [f"container_logs:{name}" for name in collector.CONTAINER_SERVICES]
+        expected += ['database', 'redis', 'threat_intel', 'network']
+        assert [r.collector for r in report.results] == expected
+        assert report.complete and len(report.evidence) == 10
+        assert self.peak == 1
+        assert case.evidence_items == [e.evidence_id for e in report.evidence]
+
+    def test_parallel_sweep_is_bounded_and_faster(self, tmp_path, monkeypatch):
+        collector = self._collector(tmp_path)
+        _, report = self._run(monkeypatch, collector, max_workers=4)
+
+        # 7 collectors sleep (6 containers + 2 network calls); 4 at a time
+        assert self.peak == 4
+        assert report.max_workers == 4
+        assert report.duration_seconds < 6 * COLLECTOR_DELAY
+        assert report.time_to_first_evidence < report.duration_seconds
+        container = report.results[0]
+        assert container.status == 'collected' and container.duration_seconds >= COLLECTOR_DELAY
+        # Plan order is kept even though collectors finish out of order
+        assert [e.evidence_id for e in report.evidence] == [r.evidence_id for r in report.results]
+        assert collector.get_statistics()['container_logs_collected'] == 6
+
+    def test_failures_are_partial_results(self, tmp_path, monkeypatch):
+        collector = self._collector(tmp_path)
+        monkeypatch.setattr(collector, 'collect_redis_evidence', lambda case_id: 1 / 0)
+        monkeypatch.setattr(collector, 'collect_threat_intel', lambda case_id: None)
+        received = []
+        _, report = self._run(monkeypatch, collector, on_evidence=received.append)
+
+        by_name = {r.collector: r for r in report.results}
+        assert by_name['redis'].status == 'failed' and 'division by zero' in by_name['redis'].error
+        assert by_name['threat_intel'].error == 'No evidence returned'
+        assert not report.complete
+        assert len(report.evidence) == len(received) == 8
+
+    def test_timeout_reports_unfinished_collectors(self, tmp_path, monkeypatch):
+        slow = 'cyber_mirage_modbus'
+        collector = self._collector(tmp_path, delays={slow: 1.0})
+        _, report = self._run(monkeypatch, collector, max_workers=10, timeout=0.5)
+
+        by_name = {r.collector: r for r in report.results}
+        assert by_name[f"container_logs:{slow}"].status == 'timeout'
+        assert report.duration_seconds < 1.0
+        assert len(report.evidence) == 9
+        assert collector.get_statistics()['last_collection']['complete'] is False
+
+
+class TestIntegrityVerification:
+    """Test suite for streaming hashes and verify_case"""
+
+    @pytest.mark.parametrize('size', [0, 1, 4095, 4096, 4097, 3 * 4096 + 17])
+    def test_hash_file_matches_hashlib(self, tmp_path, size):
+        data = os.urandom(size)
+        path = tmp_path / 'blob.bin'
+        path.write_bytes(data)
+
+        hashes = hash_file(str(path), chunk_size=4096)
+        assert hashes['size'] == size
+        for name in ('md5', 'sha256', 'sha512'):
+            assert hashes[name] == hashlib.new(name, data).hexdigest()
+
+    def _case(self, tmp_path, monkeypatch):
+        collector = EvidenceCollector(evidence_base_path=str(tmp_path))
+        monkeypatch.setattr(evidence_module.subprocess, 'run', lambda cmd, **kwargs: type(
+            'Result', (), {'stdout': f"output of {cmd}\n" * 100, 'stderr': ''})())
+        case = collector.create_case("Integrity", "SOC Analyst", "test", "intrusion_attempt")
+        collector.collect_all(case.case_id)
+        return collector, case
+
+    def test_collected_hashes_match_files(self, tmp_path, monkeypatch):
+        collector, case = self._case(tmp_path, monkeypatch)
+        evidence = collector.get_evidence(case.evidence_items[0])
+        hashes = hash_file(evidence.file_path)
+        assert (hashes['md5'], hashes['sha256'], hashes['sha512']) == \
+            (evidence.hash_md5, evidence.hash_sha256, evidence.hash_sha512)
+        assert collector.verify_evidence(evidence.evidence_id) == (True, "Evidence integrity verified")
+
+    @pytest.mark.parametrize('max_workers', [1, 2])
+    def test_verify_case(self, tmp_path, monkeypatch, max_workers):
+        collector, case = self._case(tmp_path, monkeypatch)
+        monkeypatch.setattr(collector, 'PARALLEL_VERIFY_MIN_BYTES', 0)
+        tampered, missing = (collector.get_evidence(i) for i in case.evidence_items[1:3])
+        with open(tampered.file_path, 'ab') as f:
+            f.write(b"injected\n")
+        os.remove(missing.file_path)
+
+        results = collector.verify_case(case.case_id, max_workers=max_workers)
+
+        assert list(results) == case.evidence_items
+        assert results[tampered.evidence_id] == (False, "SHA256 hash mismatch - evidence may be tampered")
+        assert results[missing.evidence_id] == (False, "Evidence file not found")
+        assert sum(ok for ok, _ in results.values()) == len(results) - 2
+        assert tampered.status == 'corrupted' and not tampered.integrity_verified
+        assert collector.get_statistics()['verifications'] == len(results) - 2
+
+
+class FakeDatabase:
+    """Minimal psycopg2-style connection: named cursors, itersize and copy_expert"""
+
+    def __init__(self, tables, broken=(), fail_after=None):
+        self.tables = tables
+        self.broken = set(broken)
+        self.fail_after = fail_after or {}  # table -> rows returned before the connection drops
+        self.autocommit = False
+        self.cursors = []
+        self.rollbacks = 0
+
+    def cursor(self, name=None, withhold=False):
+        cursor = FakeCursor(self, name)
+        self.cursors.append(cursor)
+        return cursor
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeCursor:
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.itersize = 2000
+        self.fetches = []
+        self.queries = []
+        self.rowcount = -1
+
+    def execute(self, query):
+        self.queries.append(query)
+        table = next(t for t in self.db.tables if f"FROM {t} " in query)
+        if table in self.db.broken:
+            raise RuntimeError(f'relation "{table}" does not exist')
+        self.table = table
+        self.columns, self.rows = self.db.tables[table]
+        self.description = [(column,) for column in self.columns]
+
+    def _rows(self):
+        for index, row in enumerate(self.rows):
+            if index == self.db.fail_after.get(self.table):
+                raise RuntimeError("server closed the connection\nunexpectedly")
+            yield row
+
+    def __iter__(self):
+        rows = self._rows()
+        for start in range(0, len(self.rows), self.itersize):
+            batch = self.rows[start:start + self.itersize]
+            self.fetches.append(len(batch))
+            for _ in batch:
+                yield next(rows)
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def copy_expert(self, sql, file):
+        self.execute(sql)
+        file.write(",".join(self.columns) + "\n")
+        for row in self._rows():
+            file.write((",".join(str(v) for v in row) + "\n").encode())
+        self.rowcount = len(self.rows)
+
+    def close(self):
+        pass
+
+
+class TestDatabaseExport:
+    """Test suite for streaming collect_database_evidence exports"""
+
+    def _collector(self, tmp_path, sessions=2500, broken=(), fail_after=None):
+        db = FakeDatabase({
+            'attack_sessions': (['id', 'src_ip'], [(i, f"45.155.205.{i % 250}") for i in range(sessions)]),
+            'threat_intelligence': (['ip', 'score'], [('45.155.205.1', 90)] * 700),
+            'alerts': (['id', 'severity'], [(1, 'high'), (2, 'low')]),
+        }, broken=broken, fail_after=fail_after)
+        collector = EvidenceCollector(db_connection=db, evidence_base_path=str(tmp_path))
+        case = collector.create_case("Database", "SOC Analyst", "test", "intrusion_attempt")
+        return collector, case, db
+
+    def test_json_snapshot_keeps_row_caps(self, tmp_path):
+        collector, case, db = self._collector(tmp_path)
+        evidence = collector.collect_database_evidence(case.case_id)
+
+        assert [q.split()[-2:] for q in db.cursors[0].queries[:2]] == [['LIMIT', '1000'], ['LIMIT', '500']]
+        assert evidence.file_path.endswith('.json')
+        assert evidence.metadata['tables'] == ['attack_sessions', 'threat_intelligence', 'alerts']
+        assert collector.verify_evidence(evidence.evidence_id)[0]
+
+    def test_jsonl_streams_full_tables(self, tmp_path):
+        collector, case, db = self._collector(tmp_path)
+        evidence = collector.collect_database_evidence(case.case_id, export_format='jsonl', itersize=1000)
+
+        lines = [json.loads(line) for line in Path(evidence.file_path).read_text().splitlines()]
+        assert lines[0]['type'] == 'header' and lines[0]['evidence_id'] == evidence.evidence_id
+        assert lines[-1] == {'type': 'summary',
+                             'tables_collected': ['attack_sessions', 'threat_intelligence', 'alerts'],
+                             'record_counts': {'attack_sessions': 2500, 'threat_intelligence': 700,
+                                               'recent_alerts': 2},
+                             'truncated_tables': []}
+        assert lines[1] == {'type': 'row', 'table': 'attack_sessions', 'data': {'id': 0, 'src_ip': '45.155.205.0'}}
+        assert all('LIMIT' not in q for c in db.cursors for q in c.queries)
+
+        sessions = db.cursors[0]
+        assert sessions.name.startswith('evidence_evd_') and sessions.fetches == [1000, 1000, 500]
+        assert evidence.metadata['record_counts']['attack_sessions'] == 2500
+        assert evidence.file_size == Path(evidence.file_path).stat().st_size
+        assert evidence.hash_sha512 == hash_file(evidence.file_path)['sha512']
+
+    def test_csv_writes_copy_blocks(self, tmp_path):
+        collector, case, db = self._collector(tmp_path)
+        evidence = collector.collect_database_evidence(case.case_id, export_format='csv')
+
+        text = Path(evidence.file_path).read_text()
+        block = text.split('COPY alerts FROM stdin WITH (FORMAT csv, HEADER);\n')[1]
+        assert block == 'id,severity\n1,high\n2,low\n\\.\n'
+        assert text.count('\\.\n') == 3
+        assert db.cursors[0].queries[0].startswith('COPY (SELECT * FROM attack_sessions')
+        assert evidence.metadata['record_counts'] == {'attack_sessions': 2500, 'threat_intelligence': 700,
+                                                      'recent_alerts': 2}
+        assert collector.verify_evidence(evidence.evidence_id)[0]
+
+    def test_failed_table_is_skipped(self, tmp_path):
+        collector, case, db = self._collector(tmp_path, broken=['threat_intelligence'])
+        evidence = collector.collect_database_evidence(case.case_id, export_format='jsonl')
+
+        assert evidence.metadata['tables'] == ['attack_sessions', 'alerts']
+        assert evidence.metadata['record_counts']['threat_intelligence'] == 0
+        assert evidence.metadata['truncated_tables'] == ['threat_intelligence']
+        assert db.rollbacks == 1
+
+    def test_table_failing_midway_is_marked_truncated(self, tmp_path):
+        collector, case, db = self._collector(tmp_path, fail_after={'threat_intelligence': 300})
+        evidence = collector.collect_database_evidence(case.case_id, export_format='jsonl', itersize=100)
+
+        lines = [json.loads(line) for line in Path(evidence.file_path).read_text().splitlines()]
+        rows = [line for line in lines if line.get('table') == 'threat_intelligence' and line['type'] == 'row']
+        assert len(rows) == 300
+        assert lines[1 + 2500 + 300] == {'type': 'truncated', 'table': 'threat_intelligence', 'rows': 300,
+                                         'error': 'server closed the connection\nunexpectedly'}
+        assert evidence.metadata['tables'] == ['attack_sessions', 'alerts']
+        assert evidence.metadata['record_counts']['threat_intelligence'] == 300
+        assert evidence.metadata['truncated_tables'] == ['threat_intelligence']
+        assert lines[-1]['truncated_tables'] == ['threat_intelligence']
+        assert db.rollbacks == 1
+
+    def test_csv_table_failing_midway_is_marked_truncated(self, tmp_path):
+        collector, case, _ = self._collector(tmp_path, fail_after={'alerts': 1})
+        evidence = collector.collect_database_evidence(case.case_id, export_format='csv')
+
+        text = Path(evidence.file_path).read_text()
+        assert text.endswith('COPY alerts FROM stdin WITH (FORMAT csv, HEADER);\nid,severity\n1,high\n\\.\n'
+                             '-- TRUNCATED alerts: server closed the connection unexpectedly\n')
+        assert evidence.metadata['record_counts']['recent_alerts'] is None
+        assert evidence.metadata['truncated_tables'] == ['alerts']
+        assert collector.verify_evidence(evidence.evidence_id)[0]
+
+    def test_unknown_format(self, tmp_path):
+        collector, case, _ = self._collector(tmp_path)
+        with pytest.raises(ValueError):
+            collector.collect_database_evidence(case.case_id, export_format='xml')
+
+
+class TestCaseExport:
+    """Test suite for streaming case exports"""
+
+    def _case(self, tmp_path, monkeypatch):
+        collector = EvidenceCollector(evidence_base_path=str(tmp_path))
+        monkeypatch.setattr(evidence_module.subprocess, 'run', lambda cmd, **kwargs: type(
+            'Result', (), {'stdout': f"output of {cmd}\n" * 2000, 'stderr': ''})())
+        case = collector.create_case("Export", "SOC Analyst", "test", "intrusion_attempt")
+        for name in list(collector.CONTAINER_SERVICES)[:3]:
+            collector.collect_container_logs(case.case_id, name)
+        return collector, case
+
+    def _members(self, archive):
+        with tarfile.open(fileobj=io.BytesIO(archive), mode='r:*') as tar:
+            return {m.name: tar.extractfile(m).read() for m in tar.getmembers()}
+
+    def test_archive_manifest(self, tmp_path, monkeypatch):
+        collector, case = self._case(tmp_path, monkeypatch)
+        path = collector.export_case(case.case_id, workers=2)
+        assert path.endswith('.tar.gz')
+
+        members = self._members(Path(path).read_bytes())
+        names = list(members)
+        assert names[0] == f"{case.case_id}/case_info.json"
+        assert names[-1] == f"{case.case_id}/manifest.json"
+        assert len(names) == 5
+
+        manifest = json.loads(members[names[-1]])
+        assert [f['path'] for f in manifest['files']] == names[:-1]
+        for entry in manifest['files']:
+            assert entry['sha256'] == hashlib.sha256(members[entry['path']]).hexdigest()
+            assert entry['size'] == len(members[entry['path']])
+        assert sorted(f['evidence_id'] for f in manifest['files'][1:]) == sorted(case.evidence_items)
+        assert all(f['matches_recorded'] for f in manifest['files'][1:])
+        assert collector.get_statistics()['exports'] == 1
+
+    @pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard not installed")
+    def test_stream_to_sink(self, tmp_path, monkeypatch):
+        collector, case = self._case(tmp_path, monkeypatch)
+        tampered = collector.get_evidence(case.evidence_items[0])
+        with open(tampered.file_path, 'a') as f:
+            f.write("injected\n")
+
+        sink = io.BytesIO()
+        manifest = collector.stream_case(case.case_id, sink, compression='zstd', workers=2)
+
+        archive = sink.getvalue()
+        assert manifest['archive']['size'] == len(archive)
+        assert manifest['archive']['sha256'] == hashlib.sha256(archive).hexdigest()
+        assert manifest['archive']['uncompressed_size'] > len(archive)
+        by_id = {f.get('evidence_id'): f for f in manifest['files']}
+        assert by_id[tampered.evidence_id]['matches_recorded'] is False
+        members = self._members(zstandard.ZstdDecompressor().decompressobj().decompress(archive))
+        assert len(members) == 5
+
+    def test_json_export_streams_case_timeline(self, tmp_path, monkeypatch):
+        collector, case = self._case(tmp_path, monkeypatch)
+        other = collector.create_case("Other", "SOC Analyst", "test", "intrusion_attempt")
+        event = dict(timestamp='2026-10-16T12:00:00', event_type='attack_detected', source='ssh',
+                     description='test', actor='45.155.205.1', target='ssh', severity='high', indicators=[])
+        collector.timeline = [
+            TimelineEvent(evidence_id=case.evidence_items[0], **event),
+            TimelineEvent(evidence_id='EVD-UNKNOWN', **event),
+            TimelineEvent(evidence_id=None, **event),
+        ]
+
+        data = json.loads(Path(collector.export_case(case.case_id, format='json')).read_text())
+        assert data['case']['case_id'] == case.case_id
+        assert [e['evidence_id'] for e in data['evidence']] == case.evidence_items
+        assert [e['evidence_id'] for e in data['timeline']] == [case.evidence_items[0]]
+
+        empty = json.loads(Path(collector.export_case(other.case_id, format='json')).read_text())
+        assert empty['evidence'] == [] and empty['timeline'] == []
@@ -0,0 +1,229 @@
+"""
+Unit Tests for Log Collector Search
+Tests sidecar indexes, index-based file skipping and streaming search
+"""
+
+import gzip
+import json
+import sys
+import threading
+import types
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.forensics.log_collector import (
+    LogCollector, LogEntry, LogFileIndex, LogQuery, TrigramBloom, _iter_log_file
+)
+
+BASE_TIME = datetime(2026, 10, 1, 12, 0, 0)
+
+
+class TestLogSearch:
+    """Test suite for indexed LogCollector.search_logs"""
+
+    def setup_method(self):
+        self.collector = None
+
+    def _collector(self, tmp_path):
+        self.collector = LogCollector(storage_dir=str(tmp_path))
+        return self.collector
+
+    def _write_file(self, collector, day, source, level, messages):
+        """One rotated, compressed and indexed file"""
+        collector._rotate_file()
+        for i, message in enumerate(messages):
+            collector._write_log(LogEntry(
+                timestamp=BASE_TIME + timedelta(days=day, minutes=i),
+                source=source,
+                level=level,
+                message=message
+            ))
+        collector._close_current_file()
+        collector.wait_for_compression()
+
+    def _populate(self, tmp_path):
+        collector = self._collector(tmp_path)
+        self._write_file(collector, 0, 'ssh', 'INFO', ['Failed password for root', 'Accepted key'])
+        self._write_file(collector, 1, 'http', 'WARNING', ['GET /admin 403', 'sqlmap probe detected'])
+        self._write_file(collector, 2, 'ssh', 'ERROR', ['محاولة دخول مشبوهة', 'Connection closed'])
+        return collector
+
+    def test_sidecar_index_written(self, tmp_path):
+        collector = self._populate(tmp_path)
+        files = collector._log_files()
+        assert len(files) == 3 and all(f.suffix == '.gz' for f in files)
+
+        index = LogFileIndex.load(files[1])
+        assert LogFileIndex.path_for(files[1]).name.endswith('.idx.json')
+        assert index.lines == 2
+        assert index.sources == {'http'} and index.levels == {'WARNING'}
+        assert index.min_timestamp == BASE_TIME + timedelta(days=1)
+        assert index.max_timestamp == BASE_TIME + timedelta(days=1, minutes=1)
+        assert index.bloom.may_contain('sqlmap') and index.bloom.may_contain('AdMiN')
+
+    def test_search_is_lazy_generator(self, tmp_path):
+        collector = self._populate(tmp_path)
+        results = collector.search_logs(source='ssh')
+        assert isinstance(results, types.GeneratorType)
+        assert collector.search_stats['files_scanned'] == 0
+        assert next(results)['message'] == 'Failed password for root'
+
+    @pytest.mark.parametrize('query, expected, skipped', [
+        ({'source': 'http'}, ['GET /admin 403', 'sqlmap probe detected'], 2),
+        ({'level': 'ERROR'}, ['محاولة دخول مشبوهة', 'Connection closed'], 2),
+        ({'start_time': BASE_TIME + timedelta(days=1, minutes=1)},
+         ['sqlmap probe detected', 'محاولة دخول مشبوهة', 'Connection closed'], 1),
+        ({'end_time': BASE_TIME + timedelta(minutes=5)}, ['Failed password for root', 'Accepted key'], 2),
+        ({'keyword': 'PASS'}, ['Failed password for root'], 2),
+        ({'keyword': 'password for ro'}, ['Failed password for root'], 2),
+        ({'keyword': 'ssword fo'}, ['Failed password for root'], 2),
+        ({'keyword': 'مشبوهة'}, ['محاولة دخول مشبوهة'], 2),
+        ({'keyword': 'no such text'}, [], 3),
+    ])
+    def test_index_skips_files(self, tmp_path, query, expected, skipped):
+        collector = self._populate(tmp_path)
+        assert [e['message'] for e in collector.search_logs(**query)] == expected
+        assert collector.search_stats['files_skipped'] == skipped
+
+    def test_current_and_unindexed_files_are_scanned(self, tmp_path):
+        collector = self._populate(tmp_path)
+        legacy = tmp_path / 'logs_20200101_000000.jsonl.gz'
+        with gzip.open(legacy, 'wt') as f:
+            f.write(json.dumps({'timestamp': BASE_TIME.isoformat(), 'source': 'ftp',
+                                'level': 'INFO', 'message': 'legacy ftp login'}) + '\n')
+        collector._rotate_file()
+        collector._write_log(LogEntry(BASE_TIME, 'ftp', 'INFO', 'live ftp login'))
+
+        assert [e['message'] for e in collector.search_logs(source='ftp')] == \
+            ['legacy ftp login', 'live ftp login']
+        assert collector.reindex_logs() == 1
+        assert LogFileIndex.load(legacy).sources == {'ftp'}
+        collector._close_current_file()
+
+    def test_escaped_characters_match(self, tmp_path):
+        collector = self._collector(tmp_path)
+        # Kelvin sign lowercases to 'k' but is \u-escaped on disk
+        self._write_file(collector, 0, 'ssh', 'INFO', ['user \u212aevin "quoted" ok'])
+        assert len(list(collector.search_logs(keyword='kevin'))) == 1
+        assert len(list(collector.search_logs(keyword='"quoted"'))) == 1
+
+    def test_parallel_scan_preserves_order(self, tmp_path):
+        collector = self._collector(tmp_path)
+        for day in range(6):
+            self._write_file(collector, day, 'ssh', 'INFO', [f'day {day} line {i}' for i in range(50)])
+        sequential = list(collector.search_logs(keyword='line 1'))
+        parallel = list(collector.search_logs(keyword='line 1', workers=2))
+        assert len(sequential) == 6 * 11
+        assert parallel == sequential
+
+    def test_bloom_has_no_false_negatives(self):
+        messages = [f'session {i} from 10.0.{i % 256}.{i % 7}' for i in range(500)]
+        trigrams = set()
+        for message in messages:
+            trigrams.update(message.lower()[i:i + 3] for i in range(len(message) - 2))
+        bloom = TrigramBloom.from_dict(TrigramBloom.for_items(trigrams).to_dict())
+        assert all(bloom.may_contain(message[3:15]) for message in messages)
+        misses = sum(bloom.may_contain(f'zq{i}xw') for i in range(200))
+        assert misses < 20
+
+
+class TestGroupCommitWriter:
+    """Test suite for the batched LogCollector writer"""
+
+    def setup_method(self):
+        self.collector = None
+
+    def teardown_method(self):
+        if self.collector:
+            self.collector.stop()
+
+    def _entries(self, count):
+        return [LogEntry(BASE_TIME + timedelta(seconds=i), 'ssh', 'INFO', f'line {i}') for i in range(count)]
+
+    def _lines(self):
+        return [json.loads(line)['message']
+                for log_file in self.collector._log_files()
+                for line in gzip.open(log_file, 'rt')]
+
+    def test_drains_queue_in_batches(self, tmp_path):
+        self.collector = LogCollector(storage_dir=str(tmp_path), batch_size=500)
+        for entry in self._entries(2000):
+            assert self.collector.collect(entry)
+        self.collector.start()
+        self.collector.stop()
+
+        writer = self.collector.get_stats()['writer']
+        assert writer['lines_written'] == 2000
+        assert writer['batches_written'] == 4
+        assert writer['avg_batch_size'] == 500
+        assert writer['queue_high_watermark'] == 2000
+        assert self.collector.get_stats()['total_logs'] == 2000
+        assert self._lines() == [f'line {i}' for i in range(2000)]
+
+    def test_stop_waits_for_drain_and_closes_every_file(self, tmp_path):
+        self.collector = LogCollector(storage_dir=str(tmp_path), batch_size=50)
+        self.collector.max_file_size = 2000
+        for entry in self._entries(1000):
+            assert self.collector.collect(entry)
+        self.collector.start()
+        self.collector.stop()
+
+        assert self.collector.current_file is None
+        assert not self.collector.worker_thread
+        assert not list(tmp_path.glob('*.jsonl'))
+        log_files = self.collector._log_files()
+        assert len(log_files) > 1
+        assert all(LogFileIndex.path_for(log_file).exists() for log_file in log_files)
+        # Same-second rotations are suffixed _1, _2, ... so file order is not line order
+        assert sorted(self._lines()) == sorted(f'line {i}' for i in range(1000))
+
+    @pytest.mark.parametrize('fsync_interval, expected', [(0, 4), (None, 0), (3600, 1)])
+    def test_fsync_interval(self, tmp_path, fsync_interval, expected):
+        self.collector = LogCollector(storage_dir=str(tmp_path), batch_size=10, fsync_interval=fsync_interval)
+        for _ in range(3):
+            self.collector._write_batch(self._entries(10))
+        self.collector._close_current_file()
+        # Every batch at 0, never at None, only the close-time sync otherwise
+        assert self.collector.writer_stats['fsyncs'] == expected
+
+    def test_backpressure_when_full(self, tmp_path):
+        self.collector = LogCollector(storage_dir=str(tmp_path), max_queue_size=10, put_timeout=0.01)
+        results = [self.collector.collect(entry) for entry in self._entries(12)]
+        assert results == [True] * 10 + [False, False]
+
+        writer = self.collector.get_stats()['writer']
+        assert writer['dropped'] == 2
+        assert writer['backpressure_waits'] == 2
+        assert writer['backpressure_seconds'] > 0
+        assert writer['queue_depth'] == writer['queue_capacity'] == 10
+
+    def test_compression_does_not_block_writer(self, tmp_path):
+        self.collector = LogCollector(storage_dir=str(tmp_path))
+        release = threading.Event()
+        compress = self.collector._compress_file
+        self.collector._compress_file = lambda filename: release.wait(5) and compress(filename)
+
+        self.collector._write_batch(self._entries(5))
+        self.collector._close_current_file()
+        self.collector._write_batch(self._entries(5))
+        assert self.collector.get_stats()['writer']['compressions_pending'] == 1
+        assert len(list(self.collector.search_logs())) == 10
+
+        release.set()
+        assert self.collector.wait_for_compression(timeout=5)
+        assert self.collector.writer_stats['files_compressed'] == 1
+
+    def test_search_follows_background_compression(self, tmp_path):
+        self.collector = LogCollector(storage_dir=str(tmp_path))
+        self.collector._write_batch(self._entries(3))
+        log_file = Path(self.collector.current_file.name)
+        self.collector._close_current_file()
+        self.collector.wait_for_compression()
+        assert not log_file.exists()
+        # A path listed before compression finished still opens
+        assert len(list(_iter_log_file(log_file, LogQuery()))) == 3
@@ -0,0 +1,221 @@
+"""
+Unit Tests for the Columnar Packet Table
+Tests the grouped detectors on both backends against the per-packet loops
+they replaced, sliding windows, sessions and PcapAnalyzer integration
+"""
+
+import random
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.forensics.packet_table import NUMPY_AVAILABLE, PacketTable, parse_timestamp
+from src.forensics.pcap_analyzer import PacketInfo, PcapAnalyzer
+from src.forensics.pcap_reader import PcapReader
+
+from tests.forensics.test_pcap_reader import ATTACKER, HONEYPOT, ethernet, ipv4, pcap, tcp, write
+
+BACKENDS = [
+    'python',
+    pytest.param('numpy', marks=pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")),
+]
+BASE_TIME = datetime(2026, 10, 1, 12, 0, 0, tzinfo=timezone.utc)
+AUTH_PORTS = [21, 22, 23, 2222, 2121, 3306, 3389]
+
+
+def packet(src, dst, sport, dport, length=60, seconds=0.0, flags='SYN', protocol='TCP'):
+    return PacketInfo(
+        timestamp=(BASE_TIME + timedelta(seconds=seconds)).isoformat(),
+        src_ip=src, dst_ip=dst, src_port=sport, dst_port=dport,
+        protocol=protocol, length=length, flags=flags
+    )
+
+
+def random_packets(count=3000, seed=7):
+    rng = random.Random(seed)
+    attackers = [f"45.155.205.{i}" for i in range(1, 12)] + ['']
+    targets = [HONEYPOT, '10.0.0.6', '2001:db8::5']
+    packets = []
+    for i in range(count):
+        dport = rng.choice([0, 22, 22, 2222, 3306, 80] + [rng.randint(1, 1024)] * 3)
+        packets.append(packet(rng.choice(attackers), rng.choice(targets), rng.randint(1024, 1100), dport,
+                              length=rng.choice([0, 60, 1500, 65000]), seconds=i * 0.05,
+                              flags=rng.choice([None, 'SYN', 'SYN|ACK', 'ACK']),
+                              protocol=rng.choice(['TCP', 'UDP'])))
+    return packets
+
+
+# المرجع: حلقات PacketInfo السابقة
+def legacy_port_scans(packets, threshold):
+    src_ports = defaultdict(set)
+    for p in packets:
+        if p.src_ip and p.dst_port:
+            src_ports[(p.src_ip, p.dst_ip)].add(p.dst_port)
+    return [(src, dst, sorted(ports)) for (src, dst), ports in src_ports.items() if len(ports) >= threshold]
+
+
+def legacy_brute_force(packets, threshold):
+    attempts = defaultdict(int)
+    for p in packets:
+        if p.dst_port in AUTH_PORTS:
+            attempts[(p.src_ip, p.dst_ip, p.dst_port)] += 1
+    return [key + (count,) for key, count in attempts.items() if count >= threshold]
+
+
+def legacy_transfers(packets, threshold):
+    totals = defaultdict(int)
+    for p in packets:
+        if p.src_ip and p.length:
+            totals[(p.src_ip, p.dst_ip)] += p.length
+    return [key + (total,) for key, total in totals.items() if total >= threshold]
+
+
+def legacy_sessions(packets):
+    sessions = {}
+    for p in packets:
+        key = tuple(sorted([f"{p.src_ip}:{p.src_port}", f"{p.dst_ip}:{p.dst_port}"]))
+        if key not in sessions:
+            sessions[key] = [p.src_ip, p.dst_ip, p.src_port, p.dst_port, p.protocol, p.timestamp, None, 0, 0, []]
+        session = sessions[key]
+        session[6] = p.timestamp
+        session[7] += 1
+        session[8] += p.length
+        if p.flags:
+            session[9].append(p.flags)
+    return [tuple(s) for s in sessions.values()]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+class TestPacketTable:
+    """Test suite for PacketTable detectors"""
+
+    def _table(self, backend, packets):
+        return PacketTable.from_packets(packets, use_numpy=backend == 'numpy')
+
+    def test_matches_per_packet_loops(self, backend):
+        packets = random_packets()
+        table = self._table(backend, packets)
+        assert table.backend == backend
+
+        assert [tuple(g) for g in table.port_scans(threshold=40)] == legacy_port_scans(packets, 40)
+        assert [tuple(g) for g in table.brute_force(AUTH_PORTS, threshold=30)] == legacy_brute_force(packets, 30)
+        assert [tuple(g) for g in table.transfers(1000000)] == legacy_transfers(packets, 1000000)
+        assert [tuple(g) for g in table.sessions()] == legacy_sessions(packets)
+
+    def test_brute_force_window(self, backend):
+        # 30 محاولة بطيئة (كل دقيقة) ثم 25 سريعة خلال 25 ثانية
+        packets = [packet(ATTACKER, HONEYPOT, 40000 + i, 22, seconds=i * 60) for i in range(30)]
+        packets += [packet(ATTACKER, HONEYPOT, 41000 + i, 22, seconds=3600 + i) for i in range(25)]
+        packets += [packet('45.155.205.9', HONEYPOT, 42000 + i, 22, seconds=i * 60) for i in range(40)]
+        table = self._table(backend, packets)
+
+        assert [(g.src, g.attempts) for g in table.brute_force(AUTH_PORTS, threshold=20)] == \
+            [(ATTACKER, 55), ('45.155.205.9', 40)]
+        assert [(g.src, g.attempts) for g in table.brute_force(AUTH_PORTS, threshold=20, window=30)] == \
+            [(ATTACKER, 25)]
+        # النافذة شاملة لطرفيها
+        assert table.brute_force(AUTH_PORTS, threshold=2, window=60)[0].attempts == 25
+
+    def test_port_scan_window(self, backend):
+        slow = [packet(ATTACKER, HONEYPOT, 40000, port, seconds=port * 10) for port in range(1, 21)]
+        fast = [packet('45.155.205.9', HONEYPOT, 40000, port, seconds=1000 + port * 0.1) for port in range(1, 16)]
+        # تكرار نفس المنفذ لا يُحسب مرتين
+        fast += [packet('45.155.205.9', HONEYPOT, 40001, 5, seconds=1002)]
+        table = self._table(backend, slow + fast)
+
+        assert [g.src for g in table.port_scans(threshold=10)] == [ATTACKER, '45.155.205.9']
+        scans = table.port_scans(threshold=10, window=5)
+        assert [(g.src, g.ports) for g in scans] == [('45.155.205.9', list(range(1, 16)))]
+        assert table.port_scans(threshold=5, window=40)[0].ports == [1, 2, 3, 4, 5]
+
+    def test_transfer_window(self, backend):
+        packets = [packet(HONEYPOT, ATTACKER, 22, 40000, length=400000, seconds=i * 120) for i in range(5)]
+        packets += [packet(HONEYPOT, '45.155.205.9', 22, 40000, length=400000, seconds=i) for i in range(3)]
+        table = self._table(backend, packets)
+
+        assert [g.total_bytes for g in table.transfers(1000000)] == [2000000, 1200000]
+        assert [(g.dst, g.total_bytes) for g in table.transfers(1000000, window=60)] == \
+            [('45.155.205.9', 1200000)]
+
+    def test_untimed_rows_skip_windows(self, backend):
+        packets = [packet(ATTACKER, HONEYPOT, 40000 + i, 22) for i in range(5)]
+        for p in packets:
+            p.timestamp = 'not a time'
+        table = self._table(backend, packets)
+        assert table.brute_force(AUTH_PORTS, threshold=5)[0].attempts == 5
+        assert table.brute_force(AUTH_PORTS, threshold=1, window=60) == []
+        assert table.sessions()[0].start_time == 'not a time'
+
+    def test_statistics(self, backend):
+        packets = [packet(ATTACKER, HONEYPOT, 40000, 22, length=100)] * 3
+        packets += [packet('45.155.205.9', HONEYPOT, 40000, 80, length=50, protocol='HTTP')]
+        stats = self._table(backend, packets).statistics()
+        assert stats['total_packets'] == 4 and stats['total_bytes'] == 350
+        assert (stats['unique_src_ips'], stats['unique_dst_ips']) == (2, 1)
+        assert stats['protocols'] == {'TCP': 3, 'HTTP': 1}
+        assert stats['top_dst_ports'] == {22: 3, 80: 1}
+        assert stats['top_src_ips'] == {ATTACKER: 3, '45.155.205.9': 1}
+
+    def test_records_and_packets_share_addresses(self, backend, tmp_path):
+        path = write(tmp_path, pcap([ethernet(ipv4(ATTACKER, HONEYPOT, 6, tcp(40000, 22)))] * 3))
+        table = PacketTable(use_numpy=backend == 'numpy')
+        with PcapReader(path) as reader:
+            assert table.extend_records(reader) == 3
+        table.extend_packets([packet(ATTACKER, HONEYPOT, 40000, 22, flags='SYN')])
+
+        assert table.addresses == ['', ATTACKER, HONEYPOT]
+        session, = table.sessions()
+        assert session.packets == 4 and session.flags == ['SYN'] * 4
+        assert session.start_time == '2023-11-14T22:13:20.123456+00:00'
+        assert table.brute_force(AUTH_PORTS, threshold=4)[0].attempts == 4
+
+
+class TestPcapAnalyzerTable:
+    """Test suite for PcapAnalyzer detectors on the packet table"""
+
+    def test_detectors_follow_packets(self):
+        analyzer = PcapAnalyzer()
+        analyzer.packets = [packet(ATTACKER, HONEYPOT, 40000 + i, 22, seconds=i) for i in range(25)]
+        assert len(analyzer.detect_brute_force()) == 1
+
+        analyzer.packets.extend(packet(ATTACKER, HONEYPOT, 40000, port) for port in range(100, 112))
+        results = analyzer.run_detectors(window=60)
+        assert [a.activity_type for a in results['port_scan']] == ['port_scan']
+        assert results['brute_force'][0].description == 'Possible brute force on SSH: 25 attempts'
+        assert results['data_exfiltration'] == []
+        assert results['sessions'] == 37
+
+        # إعادة البناء لا تضاعف الجلسات
+        analyzer.build_sessions()
+        assert sum(s.packet_count for s in analyzer.sessions.values()) == 37
+
+        analyzer.packets = analyzer.packets[:5]
+        assert analyzer.get_statistics()['total_packets'] == 5
+
+    def test_load_table(self, tmp_path):
+        frames = [ethernet(ipv4(ATTACKER, HONEYPOT, 6, tcp(40000 + port, port))) for port in range(1, 31)]
+        analyzer = PcapAnalyzer()
+        assert analyzer.load_table(write(tmp_path, pcap(frames))) == 30
+        assert analyzer.packets == []
+
+        scan, = analyzer.detect_port_scan(threshold=10, window=60)
+        assert scan.src_ip == ATTACKER and scan.description == 'Port scan detected: 30 ports scanned'
+        stats = analyzer.get_statistics()
+        assert stats['total_packets'] == 30 and stats['protocols'] == {'TCP': 30}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('2023-11-14T22:13:20.123456+00:00', 1700000000_123456000),
+    ('2023-11-14T22:13:20', 1700000000_000000000),
+    ('Nov 14, 2023 22:13:20.123456789 UTC', 1700000000_123456789),
+    ('garbage', -1),
+    ('', -1),
+])
+def test_parse_timestamp(text, expected):
+    assert parse_timestamp(text) == expected
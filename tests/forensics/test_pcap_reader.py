@@ -0,0 +1,205 @@
+"""
+Unit Tests for the Streaming PCAP Reader
+Tests classic pcap, nanosecond and big-endian captures, pcapng, VLAN tags
+and the PcapAnalyzer integration
+"""
+
+import socket
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.forensics.pcap_analyzer import PcapAnalyzer
+from src.forensics.pcap_reader import PcapReader, ip_to_str, read_pcap
+
+ATTACKER = '185.220.101.7'
+HONEYPOT = '10.0.0.5'
+
+
+def ipv4(src, dst, proto, payload, frag=0):
+    return struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(payload), 1, frag, 64, proto, 0,
+                       socket.inet_aton(src), socket.inet_aton(dst)) + payload
+
+
+def ipv6(src, dst, proto, payload):
+    return struct.pack('!IHBB16s16s', 0x60000000, len(payload), proto, 64,
+                       socket.inet_pton(socket.AF_INET6, src),
+                       socket.inet_pton(socket.AF_INET6, dst)) + payload
+
+
+def tcp(sport, dport, flags=0x02):
+    return struct.pack('!HHIIBBHHH', sport, dport, 0, 0, 0x50, flags, 65535, 0, 0)
+
+
+def udp(sport, dport, data=b''):
+    return struct.pack('!HHHH', sport, dport, 8 + len(data), 0) + data
+
+
+def ethernet(packet, ethertype=0x0800, vlans=()):
+    header = b'\x00\x11\x22\x33\x44\x55' + b'\x66\x77\x88\x99\xaa\xbb'
+    for tpid, vid in vlans:
+        header += struct.pack('!HH', tpid, vid)
+    return header + struct.pack('!H', ethertype) + packet
+
+
+ARP = ethernet(b'\x00' * 28, ethertype=0x0806)
+
+
+def pcap(frames, byte_order='<', nanosecond=False, linktype=1):
+    magic = 0xa1b23c4d if nanosecond else 0xa1b2c3d4
+    data = struct.pack(f'{byte_order}IHHiIII', magic, 2, 4, 0, 0, 65535, linktype)
+    for i, frame in enumerate(frames):
+        frac = 123456789 if nanosecond else 123456
+        data += struct.pack(f'{byte_order}IIII', 1700000000 + i, frac, len(frame), len(frame) + 4) + frame
+    return data
+
+
+def _pad(data):
+    return data + b'\x00' * (-len(data) % 4)
+
+
+def _block(block_type, body):
+    length = 12 + len(body)
+    return struct.pack('<II', block_type, length) + body + struct.pack('<I', length)
+
+
+def pcapng_section(interfaces, packets):
+    """interfaces: [(linktype, tsresol)]; packets: [(iface or None for SPB, ticks, frame)]"""
+    data = _block(0x0A0D0D0A, struct.pack('<IHHq', 0x1A2B3C4D, 1, 0, -1))
+    for linktype, tsresol in interfaces:
+        options = struct.pack('<HHB3x', 9, 1, tsresol) + struct.pack('<HH', 0, 0)
+        data += _block(1, struct.pack('<HHI', linktype, 0, 65535) + options)
+    for iface, ticks, frame in packets:
+        if iface is None:
+            data += _block(3, struct.pack('<I', len(frame)) + _pad(frame))
+        else:
+            data += _block(6, struct.pack('<IIIII', iface, ticks >> 32, ticks & 0xFFFFFFFF,
+                                          len(frame), len(frame)) + _pad(frame))
+    return data
+
+
+def write(tmp_path, data, name='capture.pcap'):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+class TestPcapReader:
+    """Test suite for PcapReader"""
+
+    def test_classic_pcap(self, tmp_path):
+        path = write(tmp_path, pcap([
+            ethernet(ipv4(ATTACKER, HONEYPOT, 6, tcp(40000, 22, 0x12))),
+            ARP,
+            ethernet(ipv4(ATTACKER, HONEYPOT, 17, udp(5353, 53, b'q'))),
+        ]))
+        with PcapReader(path) as reader:
+            records = list(reader)
+            assert reader.format == 'pcap'
+            assert reader.stats['packets'] == 3 and reader.stats['non_ip_packets'] == 1
+
+        syn, dns = records
+        assert ip_to_str(syn.src) == ATTACKER and ip_to_str(syn.dst) == HONEYPOT
+        assert (syn.sport, syn.dport, syn.proto, syn.tcp_flags) == (40000, 22, 6, 0x12)
+        assert syn.ts_ns == 1700000000_123456000
+        assert syn.length == len(ethernet(ipv4(ATTACKER, HONEYPOT, 6, tcp(40000, 22)))) + 4
+        assert (dns.sport, dns.dport, dns.proto, dns.tcp_flags) == (5353, 53, 17, 0)
+
+    @pytest.mark.parametrize('byte_order', ['<', '>'])
+    def test_nanosecond_and_byte_order(self, tmp_path, byte_order):
+        path = write(tmp_path, pcap([ethernet(ipv4(ATTACKER, HONEYPOT, 6, tcp(1, 2)))],
+                                    byte_order=byte_order, nanosecond=True))
+        with PcapReader(path) as reader:
+            record, = reader
+            assert reader.format == 'pcap-ns'
+        assert record.ts_ns == 1700000000_123456789
+
+    def test_vlan_and_qinq(self, tmp_path):
+        packet = ipv4(ATTACKER, HONEYPOT, 6, tcp(40001, 3306))
+        path = write(tmp_path, pcap([
+            ethernet(packet, vlans=[(0x8100, 0x2064)]),
+            ethernet(packet, vlans=[(0x88A8, 300), (0x8100, 42)]),
+            ethernet(packet),
+        ]))
+        with PcapReader(path) as reader:
+            records = list(reader)
+            assert reader.stats['vlan_packets'] == 2
+        assert [r.vlan for r in records] == [100, 300, 0]
+        assert all(r.dport == 3306 for r in records)
+
+    def test_pcapng_interfaces_and_ipv6(self, tmp_path):
+        raw_v6 = ipv6('2001:db8::1', '2001:db8::5', 6, tcp(50000, 443, 0x02))
+        path = write(tmp_path, pcapng_section(
+            interfaces=[(1, 6), (101, 9)],
+            packets=[
+                (0, 1700000000_000001, ethernet(ipv4(ATTACKER, HONEYPOT, 17, udp(1, 161)))),
+                (1, 1700000000_000000002, raw_v6),
+                (None, 0, ethernet(ipv4(HONEYPOT, ATTACKER, 6, tcp(22, 40000, 0x18)))),
+                (0, 0, ARP),
+            ]), name='capture.pcapng')
+
+        with PcapReader(path) as reader:
+            records = list(reader)
+            assert reader.format == 'pcapng'
+            assert reader.stats['packets'] == 4
+
+        v4, v6, simple = records
+        assert v4.ts_ns == 1700000000_000001000 and v4.dport == 161
+        assert ip_to_str(v6.src) == '2001:db8::1' and v6.dport == 443
+        assert v6.ts_ns == 1700000000_000000002
+        assert simple.sport == 22 and simple.tcp_flags == 0x18
+
+    def test_non_first_fragment_has_no_ports(self, tmp_path):
+        path = write(tmp_path, pcap([ethernet(ipv4(ATTACKER, HONEYPOT, 17, b'x' * 16, frag=185))]))
+        record, = read_pcap(path)
+        assert (record.sport, record.dport, record.proto) == (0, 0, 17)
+
+    def test_truncated_capture(self, tmp_path):
+        data = pcap([ethernet(ipv4(ATTACKER, HONEYPOT, 6, tcp(1, 22)))] * 3)
+        path = write(tmp_path, data[:-10])
+        with PcapReader(path) as reader:
+            assert len(list(reader)) == 2
+            assert reader.stats['truncated']
+
+    def test_invalid_files(self, tmp_path):
+        with pytest.raises(ValueError):
+            list(read_pcap(write(tmp_path, b'', name='empty.pcap')))
+        with pytest.raises(ValueError):
+            list(read_pcap(write(tmp_path, b'not a capture file', name='junk.pcap')))
+
+
+class TestPcapAnalyzerReader:
+    """Test suite for PcapAnalyzer on top of PcapReader"""
+
+    def setup_method(self):
+        self.analyzer = PcapAnalyzer()
+
+    def test_analyze_basic(self, tmp_path):
+        path = write(tmp_path, pcapng_section([(1, 6)], [
+            (0, 1, ethernet(ipv4(ATTACKER, HONEYPOT, 6, tcp(40000, 2222)), vlans=[(0x8100, 7)])),
+            (0, 2, ARP),
+        ]), name='capture.pcapng')
+        results = self.analyzer.analyze_basic(path)
+        assert results['packet_count'] == 2
+        assert sorted(results['ip_addresses']) == sorted([ATTACKER, HONEYPOT])
+        assert sorted(results['ports']) == [2222, 40000]
+        assert results['format'] == 'pcapng' and results['vlan_packets'] == 1
+
+    def test_analyze_basic_rejects_unknown_format(self, tmp_path):
+        assert self.analyzer.analyze_basic(write(tmp_path, b'\x00' * 64)) == {'error': 'Unknown PCAP format'}
+
+    def test_load_packets_feeds_detectors(self, tmp_path):
+        frames = [ethernet(ipv4(ATTACKER, HONEYPOT, 6, tcp(40000 + port, port))) for port in range(1, 31)]
+        path = write(tmp_path, pcap(frames))
+
+        assert self.analyzer.load_packets(path) == 30
+        packet = self.analyzer.packets[0]
+        assert (packet.src_ip, packet.protocol, packet.flags) == (ATTACKER, 'TCP', 'SYN')
+        assert packet.timestamp.startswith('2023-11-14T22:13:20.123456')
+        scans = self.analyzer.detect_port_scan(threshold=10)
+        assert len(scans) == 1 and scans[0].src_ip == ATTACKER
@@ -0,0 +1,251 @@
+"""
+Unit Tests for the Incremental Timeline Store
+Tests sorted merging of runs, secondary indexes, bisect time ranges and
+incremental rebuilds in TimelineBuilder and EvidenceCollector
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import src.forensics.timeline_builder as builder_module
+from src.forensics.evidence_collector import EvidenceCollector
+from src.forensics.timeline_builder import EventType, Severity, TimelineBuilder, TimelineEvent
+from src.forensics.timeline_store import TimelineStore, timeline_key
+
+from tests.forensics.test_evidence_collector import FakeDatabase
+
+BASE_TIME = datetime(2026, 10, 16, 12, 0, 0)
+IPS = [f"45.155.205.{i}" for i in range(1, 6)] + [None]
+SERVICES = ['SSH', 'FTP', 'HTTP', None]
+SEVERITIES = [s.value for s in Severity]
+
+
+def event(seconds, ip=None, service=None, severity='info', timestamp=None):
+    return TimelineEvent(
+        timestamp=timestamp or (BASE_TIME + timedelta(seconds=seconds)).isoformat(),
+        event_type='system_event', source='test', description=f"t+{seconds}",
+        severity=severity, attacker_ip=ip, service=service
+    )
+
+
+def random_runs(count=20, size=200, seed=3):
+    rng = random.Random(seed)
+    runs = []
+    for n in range(count):
+        # كل مصدر مرتب داخلياً (أحياناً تنازلياً) ومتداخل زمنياً مع غيره
+        run = sorted((event(rng.randint(0, 5000), rng.choice(IPS), rng.choice(SERVICES), rng.choice(SEVERITIES))
+                      for _ in range(size)), key=lambda e: e.timestamp, reverse=n % 3 == 0)
+        runs.append((f"source-{n}", run))
+    return runs
+
+
+class TestTimelineStore:
+    """Test suite for TimelineStore"""
+
+    def _store(self):
+        return TimelineStore(index_fields=('attacker_ip', 'service', 'severity'))
+
+    def test_merged_runs_match_full_sort(self):
+        runs = random_runs()
+        store = self._store()
+        # دفعات متعددة بأحجام مختلفة
+        store.extend_runs(runs[:5])
+        for source, run in runs[5:15]:
+            store.extend(run, source=source)
+        store.extend_runs(runs[15:])
+
+        expected = sorted((e for _, run in runs for e in run), key=lambda e: e.timestamp)
+        assert [e.timestamp for e in store.events] == [e.timestamp for e in expected]
+        assert len(store) == 4000 and store.has_source('source-19')
+
+        for ip in IPS:
+            assert store.lookup('attacker_ip', ip) == [e for e in store.events if e.attacker_ip == ip]
+        assert store.values('severity') == {s: sum(e.severity == s for e in expected) for s in SEVERITIES}
+
+        start, end = BASE_TIME + timedelta(seconds=1000), BASE_TIME + timedelta(seconds=1500)
+        in_range = [e for e in store.events if start <= datetime.fromisoformat(e.timestamp) <= end]
+        assert store.between(start, end) == in_range
+        assert store.between(start.isoformat(), end.isoformat(), field='service', value='SSH') == \
+            [e for e in in_range if e.service == 'SSH']
+
+    def test_equal_timestamps_keep_insertion_order(self):
+        store = self._store()
+        first = [event(10, ip='45.155.205.1'), event(20)]
+        second = [event(10, ip='45.155.205.1'), event(5)]
+        store.extend(first)
+        store.extend(second)
+        assert store.events == [second[1], first[0], second[0], first[1]]
+        assert store.lookup('attacker_ip', '45.155.205.1') == [first[0], second[0]]
+
+    def test_untimed_events_are_kept_last(self):
+        store = self._store()
+        broken = event(0, ip='45.155.205.9', timestamp='not a time')
+        store.extend([broken, event(30, ip='45.155.205.9'), event(10)])
+
+        assert store.events[-1] is broken
+        assert store.first().description == 't+10' and store.last().description == 't+30'
+        assert store.lookup('attacker_ip', '45.155.205.9')[-1] is broken
+        assert broken not in store.between(BASE_TIME - timedelta(days=1), BASE_TIME + timedelta(days=1))
+        with pytest.raises(ValueError):
+            store.between('garbage', BASE_TIME)
+
+    @pytest.mark.parametrize('text, expected', [
+        ('2026-10-16T12:00:00Z', datetime(2026, 10, 16, 12, tzinfo=timezone.utc)),
+        ('2026-10-16 14:00:00+02:00', datetime(2026, 10, 16, 12, tzinfo=timezone.utc)),
+        ('2026-10-16 12:00:00,250', datetime(2026, 10, 16, 12, 0, 0, 250000)),
+    ])
+    def test_timeline_key(self, text, expected):
+        assert timeline_key(text) == timeline_key(expected)
+
+
+def fake_run(outputs, calls):
+    """subprocess.run returning each output in turn; (stdout, returncode) tuples fail"""
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        stdout, returncode = outputs.pop(0), 0
+        if isinstance(stdout, tuple):
+            stdout, returncode = stdout
+        return type('Result', (), {'stdout': stdout, 'stderr': '', 'returncode': returncode})()
+    return run
+
+
+class TestTimelineBuilder:
+    """Test suite for TimelineBuilder on the store"""
+
+    def test_filters_use_indexes(self):
+        builder = TimelineBuilder("TEST")
+        builder.add_event('2026-10-16T12:00:05', EventType.LOGIN_ATTEMPT, 'ssh', 'login',
+                          Severity.MEDIUM, attacker_ip='45.155.205.1', service='SSH')
+        builder.add_event('2026-10-16T12:00:01', EventType.ATTACK_START, 'ftp', 'attack',
+                          Severity.HIGH, attacker_ip='45.155.205.2', service='FTP')
+        builder.add_event('2026-10-16T12:00:03', EventType.ATTACK_START, 'ssh', 'attack',
+                          Severity.HIGH, attacker_ip='45.155.205.1', service='SSH')
+
+        assert [e.timestamp[-2:] for e in builder.events] == ['01', '03', '05']
+        assert [e.timestamp[-2:] for e in builder.filter_by_ip('45.155.205.1')] == ['03', '05']
+        assert len(builder.filter_by_service('FTP')) == 1
+        assert len(builder.filter_by_severity(Severity.HIGH)) == 2
+        assert len(builder.filter_by_time_range(datetime(2026, 10, 16, 12, 0, 2),
+                                                datetime(2026, 10, 16, 12, 0, 5))) == 2
+
+        stats = builder.get_statistics()
+        assert stats['unique_attackers'] == 2 and stats['by_service'] == {'SSH': 2, 'FTP': 1}
+        assert stats['time_range'] == {'start': '2026-10-16T12:00:01', 'end': '2026-10-16T12:00:05'}
+
+    def test_psql_timestamps_are_ordered(self):
+        builder = TimelineBuilder("TEST")
+        # psql trims trailing zeros from fractions and prints offsets as ±HH
+        for timestamp in ['2024-01-01 10:00:03.12345', '2024-01-01 10:00:00',
+                          '2024-01-01 12:00:02.1234+02', '2024-01-01 10:00:01.123456+00',
+                          '2024-01-01 10:00:04.5Z']:
+            builder.add_event(timestamp, EventType.LOGIN_ATTEMPT, 'ssh', 'login', Severity.LOW)
+
+        assert [e.timestamp[11:19] for e in builder.events] == \
+            ['10:00:00', '10:00:01', '12:00:02', '10:00:03', '10:00:04']
+        assert len(builder.filter_by_time_range(datetime(2024, 1, 1, 10, 0, 1),
+                                                datetime(2024, 1, 1, 10, 0, 3, 200000))) == 3
+        assert builder.get_statistics()['time_range']['end'] == '2024-01-01 10:00:04.5Z'
+
+    def test_timestamp_precision_and_offsets(self):
+        base = timeline_key('2024-01-01T10:00:00+00:00')
+        assert timeline_key('2024-01-01 10:00:00.12345') == base + 123_450_000
+        assert timeline_key('2024-01-01 10:00:00.123456789') == base + 123_456_789
+        assert timeline_key('2024-01-01 05:30:00-0430') == base
+        assert timeline_key('2024-01-01 10:00:00+00') == base
+
+    def test_events_are_read_only(self):
+        builder = TimelineBuilder("TEST")
+        builder.add_event('2026-10-16T12:00:05', EventType.LOGIN_ATTEMPT, 'ssh', 'login', Severity.LOW)
+        with pytest.raises(AttributeError):
+            builder.events.append(builder.events[0])
+
+    def test_rebuild_parses_only_new_data(self, monkeypatch):
+        calls = []
+        sessions = "1|SSH_bot|45.155.205.1|2026-10-16 12:00:00|2026-10-16 12:05:00|300|4\n"
+        monkeypatch.setattr(builder_module.subprocess, 'run', fake_run([
+            sessions,
+            sessions + "2|FTP_bot|45.155.205.2|2026-10-16 11:00:00||0|0\n",
+            "2026-10-16 12:01:00 Login attempt from 45.155.205.1\n",
+            "2026-10-16 12:02:00 ERROR from 45.155.205.3\n",
+        ], calls))
+        builder = TimelineBuilder("TEST")
+
+        assert builder.parse_attack_sessions() == 2
+        assert builder.parse_attack_sessions() == 1
+        assert builder.parse_docker_logs('cyber_mirage_ssh') == 1
+        assert builder.parse_docker_logs('cyber_mirage_ssh') == 1
+
+        assert '--since' not in calls[2] and calls[3][calls[3].index('--since') + 1]
+        assert [e.event_type for e in builder.events] == \
+            ['attack_start', 'attack_start', 'login_attempt', 'system_event', 'attack_end']
+
+    def test_open_session_end_is_added_when_it_closes(self, monkeypatch):
+        open_session = "1|SSH_bot|45.155.205.1|2026-10-16 12:00:00||0|0\n"
+        monkeypatch.setattr(builder_module.subprocess, 'run', fake_run([
+            open_session,
+            open_session,
+            "1|SSH_bot|45.155.205.1|2026-10-16 12:00:00|2026-10-16 12:05:00|300|4\n",
+            "1|SSH_bot|45.155.205.1|2026-10-16 12:00:00|2026-10-16 12:05:00|300|4\n",
+        ], []))
+        builder = TimelineBuilder("TEST")
+
+        assert [builder.parse_attack_sessions() for _ in range(4)] == [1, 0, 1, 0]
+        assert [e.event_type for e in builder.events] == ['attack_start', 'attack_end']
+
+    def test_failed_docker_logs_keeps_watermark(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(builder_module.subprocess, 'run', fake_run([
+            ("", 1),
+            "2026-10-16 12:01:00 Login attempt from 45.155.205.1\n",
+            ("", 1),
+            "2026-10-16 12:02:00 Login attempt from 45.155.205.1\n",
+        ], calls))
+        builder = TimelineBuilder("TEST")
+
+        assert [builder.parse_docker_logs('cyber_mirage_ssh') for _ in range(4)] == [0, 1, 0, 1]
+        assert [('--since' in call) for call in calls] == [False, False, True, True]
+        assert calls[2] == calls[3]
+
+
+class TestEvidenceTimeline:
+    """Test suite for incremental EvidenceCollector.build_timeline"""
+
+    def test_rebuild_parses_only_new_evidence(self, tmp_path, monkeypatch):
+        db = FakeDatabase({
+            'attack_sessions': (['timestamp', 'source_ip', 'service'],
+                                [(f"2026-10-16T12:{59 - i:02d}:00", f"45.155.205.{i % 3}", 'ssh') for i in range(40)]),
+            'threat_intelligence': (['ip'], []),
+            'alerts': (['id'], []),
+        })
+        collector = EvidenceCollector(db_connection=db, evidence_base_path=str(tmp_path))
+        case = collector.create_case("Timeline", "SOC Analyst", "test", "intrusion_attempt")
+        parsed = []
+        extract = collector._extract_events_from_json
+        monkeypatch.setattr(collector, '_extract_events_from_json',
+                            lambda data, evidence: parsed.append(evidence.evidence_id) or extract(data, evidence))
+
+        first = collector.collect_database_evidence(case.case_id)
+        timeline = collector.build_timeline(case.case_id)
+        assert len(timeline) == 41 and parsed == [first.evidence_id]
+        assert [e.timestamp for e in timeline[:40]] == sorted(e.timestamp for e in timeline[:40])
+
+        assert collector.build_timeline(case.case_id) == timeline and len(parsed) == 1
+
+        second = collector.collect_database_evidence(case.case_id)
+        timeline = collector.build_timeline(case.case_id)
+        assert parsed == [first.evidence_id, second.evidence_id] and len(timeline) == 82
+        assert len(case.timeline_events) == 82
+        assert case.timeline_events[0] == timeline[0].to_dict()
+
+        assert len(collector.query_timeline(case.case_id, field='actor', value='45.155.205.0')) == 28
+        window = collector.query_timeline(case.case_id, '2026-10-16T12:30:00', '2026-10-16T12:39:00',
+                                          field='source', value='ssh')
+        assert len(window) == 20
+        assert collector.query_timeline('CASE-MISSING') == []
@@ -0,0 +1,68 @@
+"""
+Unit Tests for the Deception Delay Scheduler
+Tests timer wheel sleeps, cancellation and ordering
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# honeypot modules run as scripts from their own directory
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src' / 'honeypots'))
+
+from deception_scheduler import TimerWheel
+
+
+class TestTimerWheel:
+    """Test suite for TimerWheel"""
+
+    def test_sleep_waits_for_delay(self):
+        """sleep() resolves no earlier than one tick before the deadline"""
+        async def scenario():
+            wheel = TimerWheel(tick=0.01, slots=8)
+            start = time.monotonic()
+            await wheel.sleep(0.05)
+            return time.monotonic() - start, wheel
+
+        elapsed, wheel = asyncio.run(scenario())
+        assert elapsed >= 0.04
+        assert wheel.pending == 0
+        assert wheel.stats['fired'] == 1
+
+    def test_delays_longer_than_one_revolution(self):
+        """Timers spanning several wheel rounds fire in deadline order"""
+        async def scenario():
+            wheel = TimerWheel(tick=0.005, slots=4)
+            fired = []
+            for delay in (0.06, 0.01, 0.03):
+                wheel.call_later(delay, fired.append, delay)
+            await wheel.sleep(0.08)
+            return fired
+
+        assert asyncio.run(scenario()) == [0.01, 0.03, 0.06]
+
+    def test_many_concurrent_sleepers(self):
+        """Thousands of held sessions share one ticking timer"""
+        async def scenario():
+            wheel = TimerWheel(tick=0.01)
+            await asyncio.gather(*(wheel.sleep(0.02) for _ in range(5000)))
+            return wheel
+
+        wheel = asyncio.run(scenario())
+        assert wheel.stats['peak_pending'] == 5000
+        assert wheel.pending == 0
+
+    def test_cancelled_sleep_is_skipped(self):
+        """Cancelling a sleeping session drops its timer"""
+        async def scenario():
+            wheel = TimerWheel(tick=0.01)
+            task = asyncio.ensure_future(wheel.sleep(0.05))
+            await asyncio.sleep(0)
+            task.cancel()
+            await wheel.sleep(0.08)
+            return wheel
+
+        wheel = asyncio.run(scenario())
+        assert wheel.stats['cancelled'] == 1
+        assert wheel.pending == 0
@@ -0,0 +1,103 @@
+"""
+Unit Tests for the Honeypot Listener Engine
+Tests admission control and event-loop session serving
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+
+# honeypot modules run as scripts from their own directory
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src' / 'honeypots'))
+
+from listener_engine import AdmissionController, EngineConfig, ListenerEngine
+
+
+class TestAdmissionController:
+    """Test suite for per-IP and global admission control"""
+
+    def test_global_session_cap(self):
+        """Connections beyond max_sessions are rejected"""
+        ctrl = AdmissionController(EngineConfig(max_sessions=2, max_sessions_per_ip=10))
+        assert ctrl.admit('10.0.0.1', now=0.0)
+        assert ctrl.admit('10.0.0.2', now=0.0)
+        assert not ctrl.admit('10.0.0.3', now=0.0)
+        assert ctrl.stats['rejected_capacity'] == 1
+
+        ctrl.release('10.0.0.1')
+        assert ctrl.admit('10.0.0.3', now=0.0)
+
+    def test_per_ip_session_cap(self):
+        """A single IP cannot hold more than max_sessions_per_ip"""
+        ctrl = AdmissionController(EngineConfig(max_sessions_per_ip=2))
+        assert ctrl.admit('10.0.0.1', now=0.0)
+        assert ctrl.admit('10.0.0.1', now=0.0)
+        assert not ctrl.admit('10.0.0.1', now=0.0)
+        assert ctrl.admit('10.0.0.2', now=0.0)
+        assert ctrl.stats['rejected_ip_sessions'] == 1
+
+    def test_per_ip_rate_limit_refills(self):
+        """Token bucket rejects bursts and refills over time"""
+        ctrl = AdmissionController(EngineConfig(per_ip_rate=1.0, per_ip_burst=2))
+        for _ in range(2):
+            assert ctrl.admit('10.0.0.1', now=0.0)
+            ctrl.release('10.0.0.1')
+        assert not ctrl.admit('10.0.0.1', now=0.0)
+        assert ctrl.stats['rejected_ip_rate'] == 1
+        assert ctrl.admit('10.0.0.1', now=1.5)
+
+    def test_release_cleans_up_ip(self):
+        """Releasing the last session forgets the IP"""
+        ctrl = AdmissionController(EngineConfig())
+        ctrl.admit('10.0.0.1', now=0.0)
+        ctrl.release('10.0.0.1')
+        assert ctrl.active_total == 0
+        assert '10.0.0.1' not in ctrl.active_by_ip
+
+
+class TestListenerEngine:
+    """Test suite for serving sessions from the event loop"""
+
+    def test_serves_multiple_ports(self):
+        """Handlers are invoked with the accepting port"""
+        seen = []
+
+        async def handler(reader, writer, port, peer_ip, peer_port):
+            seen.append((port, peer_ip))
+            writer.write(b"hello\r\n")
+            await writer.drain()
+
+        async def scenario():
+            engine = ListenerEngine(handler, EngineConfig(host='127.0.0.1', ports=[0]))
+            task = asyncio.create_task(engine.serve())
+            while not engine.servers:
+                await asyncio.sleep(0.01)
+            port = engine.servers[0].sockets[0].getsockname()[1]
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            data = await reader.readline()
+            writer.close()
+            task.cancel()
+            return data
+
+        assert asyncio.run(scenario()) == b"hello\r\n"
+        assert seen == [(0, '127.0.0.1')]
+
+    def test_run_blocking_uses_pool(self):
+        """Blocking work runs off the event loop thread"""
+        import threading
+
+        async def handler(*args):
+            pass
+
+        async def scenario():
+            engine = ListenerEngine(handler, EngineConfig(host='127.0.0.1', ports=[]))
+            task = asyncio.create_task(engine.serve())
+            while engine.io_pool is None:
+                await asyncio.sleep(0.01)
+            name = await engine.run_blocking(lambda: threading.current_thread().name)
+            task.cancel()
+            return name
+
+        assert asyncio.run(scenario()).startswith('honeypot-io')
@@ -0,0 +1,131 @@
+"""
+Unit Tests for the Honeypot Persistence Layer
+Tests spill and replay ordering of the batched PostgreSQL writer
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+# honeypot modules run as scripts from their own directory
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src' / 'honeypots'))
+
+import persistence
+from persistence import ACTION, SESSION, SESSION_END, STATEMENTS, PersistenceConfig, PgBatchWriter
+
+KINDS = {statement: kind for kind, statement in STATEMENTS.items()}
+
+
+class FakeDatabase:
+    """attack_sessions and attack_actions with the session_id foreign key"""
+
+    def __init__(self):
+        self.down = False
+        self.sessions = {}
+        self.actions = []
+
+    def execute_values(self, cur, sql, rows, page_size=100):
+        kind = KINDS[sql]
+        if kind == SESSION:
+            for row in rows:
+                self.sessions.setdefault(row[0], None)
+        elif kind == ACTION:
+            if any(row[1] not in self.sessions for row in rows):
+                raise psycopg2.IntegrityError("attack_actions_session_id_fkey")
+            self.actions.extend(row[0] for row in rows)
+        elif kind == SESSION_END:
+            for session_id, end_time in rows:
+                if session_id in self.sessions:
+                    self.sessions[session_id] = end_time
+
+
+class FakeConnection:
+    closed = False
+
+    def cursor(self):
+        return self
+
+    def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, db):
+        self.db = db
+
+    def getconn(self):
+        if self.db.down:
+            raise psycopg2.OperationalError("could not connect to server")
+        return FakeConnection()
+
+    def putconn(self, conn, close=False):
+        pass
+
+
+class TestSpillReplay:
+    """Test suite for PgBatchWriter spill ordering"""
+
+    def setup_method(self):
+        self.db = FakeDatabase()
+
+    def _writer(self, tmp_path, monkeypatch, replay_interval=0.0):
+        monkeypatch.setattr(persistence, 'execute_values', self.db.execute_values)
+        writer = PgBatchWriter(PersistenceConfig(
+            spill_path=str(tmp_path / 'spill.jsonl'), replay_interval=replay_interval))
+        pool = FakePool(self.db)
+        writer._get_pool = lambda: pool
+        return writer
+
+    @staticmethod
+    def _session(session_id):
+        return SESSION, (session_id, 'bot', 1, '45.155.205.1', False, '2026-10-17 12:00:00', 'ssh')
+
+    @staticmethod
+    def _action(action_id, session_id):
+        return ACTION, (action_id, session_id, 1, 0, 0.0, 0.0, 'ls', '2026-10-17 12:00:01')
+
+    def test_actions_for_spilled_sessions_survive_recovery(self, tmp_path, monkeypatch):
+        writer = self._writer(tmp_path, monkeypatch)
+        writer._write([self._session('s-known')])
+
+        self.db.down = True
+        writer._write([self._session('s-spilled')])
+        writer._write([self._action('a-1', 's-spilled')])
+        assert writer.get_stats()['rows_spilled'] == 2
+
+        self.db.down = False
+        writer._write([
+            self._action('a-2', 's-spilled'),
+            self._action('a-3', 's-known'),
+            (SESSION_END, ('s-spilled', '2026-10-17 12:05:00')),
+        ])
+
+        assert self.db.actions == ['a-1', 'a-2', 'a-3']
+        assert self.db.sessions['s-spilled'] == '2026-10-17 12:05:00'
+        assert not writer._spill_pending()
+        assert writer.stats['rows_failed'] == 0
+
+    def test_new_rows_queue_behind_spill_between_probes(self, tmp_path, monkeypatch):
+        writer = self._writer(tmp_path, monkeypatch, replay_interval=3600)
+        self.db.down = True
+        writer._write([self._session('s-1')])
+        writer._last_probe = time.monotonic()
+
+        # Postgres is back but the next probe is not due: keep order by spilling
+        self.db.down = False
+        writer._write([self._action('a-1', 's-1')])
+        assert self.db.actions == [] and writer._spill_pending()
+
+        writer._last_probe = 0.0
+        writer._write([])
+        assert self.db.actions == ['a-1'] and not writer._spill_pending()
@@ -0,0 +1,86 @@
+"""
+Unit Tests for the Scan Aggregator
+Tests sliding-window port sweep detection and session emission
+"""
+
+import sys
+from pathlib import Path
+
+# honeypot modules run as scripts from their own directory
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src' / 'honeypots'))
+
+from scan_aggregator import ScanAggregator
+
+
+class TestScanAggregator:
+    """Test suite for ScanAggregator"""
+
+    def setup_method(self):
+        self.emitted = []
+        self.aggregator = ScanAggregator(
+            lambda session, final: self.emitted.append((session.session_id, session.is_scan, final,
+                                                        session.port_list())),
+            window=60, scan_threshold=3,
+        )
+
+    def test_port_sweep_collapses_into_one_session(self):
+        """A sweep across many ports yields one scan session"""
+        for i, port in enumerate(range(20, 40)):
+            self.aggregator.record('45.33.32.156', port, 'Unknown', now=100.0 + i)
+
+        assert len(self.aggregator.sessions) == 1
+        assert self.emitted == [(self.emitted[0][0], True, False, [20, 21, 22])]
+
+        self.aggregator.expire(now=200.0)
+        session_id, is_scan, final, ports = self.emitted[-1]
+        assert session_id == self.emitted[0][0]
+        assert is_scan and final
+        assert ports == list(range(20, 40))
+
+    def test_below_threshold_is_single_probe_session(self):
+        """Repeated connects to one port aggregate without being a sweep"""
+        for i in range(5):
+            self.aggregator.record('10.0.0.1', 22, 'SSH', now=100.0 + i)
+        self.aggregator.expire(now=500.0)
+
+        assert len(self.emitted) == 1
+        _, is_scan, final, ports = self.emitted[0]
+        assert not is_scan and final and ports == [22]
+
+    def test_threshold_uses_sliding_window(self):
+        """Ports spread further apart than the window never trigger a sweep"""
+        self.aggregator.record('10.0.0.1', 21, 'FTP', now=0.0)
+        self.aggregator.record('10.0.0.1', 22, 'SSH', now=50.0)
+        self.aggregator.record('10.0.0.1', 80, 'HTTP', now=100.0)
+        assert not self.aggregator.sessions['10.0.0.1'].is_scan
+
+        self.aggregator.record('10.0.0.1', 443, 'HTTPS', now=110.0)
+        assert self.aggregator.sessions['10.0.0.1'].is_scan
+
+    def test_idle_ip_starts_new_session(self):
+        """Activity after a full idle window opens a fresh session"""
+        first = self.aggregator.record('10.0.0.1', 22, 'SSH', now=0.0)
+        second = self.aggregator.record('10.0.0.1', 22, 'SSH', now=120.0)
+        assert first.session_id != second.session_id
+        assert self.aggregator.stats['sessions_closed'] == 1
+
+    def test_tracked_ips_are_bounded(self):
+        """The least recently active IP is closed when the table is full"""
+        aggregator = ScanAggregator(lambda s, f: None, max_tracked_ips=2)
+        aggregator.record('10.0.0.1', 22, 'SSH', now=0.0)
+        aggregator.record('10.0.0.2', 22, 'SSH', now=1.0)
+        aggregator.record('10.0.0.3', 22, 'SSH', now=2.0)
+        assert list(aggregator.sessions) == ['10.0.0.2', '10.0.0.3']
+        assert aggregator.stats['forced_closes'] == 1
+
+    def test_window_port_counts_follow_the_window(self):
+        """Per-port window counts are updated on append and expiry"""
+        for i in range(1000):
+            session = self.aggregator.record('10.0.0.1', 22, 'SSH', now=i * 0.1)
+        assert session.recent_ports == {22: len(session.recent)} and not session.is_scan
+
+        # The oldest probes slide out of the 60 s window as new ones arrive
+        self.aggregator.record('10.0.0.1', 21, 'FTP', now=130.0)
+        assert session.recent_ports == {22: 300, 21: 1}
+        self.aggregator.record('10.0.0.1', 23, 'Telnet', now=150.0)
+        assert session.is_scan and session.recent_ports == {22: 100, 21: 1, 23: 1}
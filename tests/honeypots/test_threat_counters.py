@@ -0,0 +1,90 @@
+"""
+Unit Tests for the Threat Counter Buffer
+Tests per-IP coalescing and pipelined Redis flushes
+"""
+
+import sys
+from pathlib import Path
+
+# honeypot modules run as scripts from their own directory
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src' / 'honeypots'))
+
+from threat_counters import ThreatCounterBuffer
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def hincrby(self, key, field, amount):
+        self.commands.append(('hincrby', key, field, amount))
+
+    def hset(self, key, mapping):
+        self.commands.append(('hset', key, mapping))
+
+    def execute(self):
+        if self.client.fail:
+            raise ConnectionError("down")
+        self.client.round_trips += 1
+        self.client.commands.extend(self.commands)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.fail = False
+        self.round_trips = 0
+        self.commands = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class TestThreatCounterBuffer:
+    """Test suite for ThreatCounterBuffer"""
+
+    def setup_method(self):
+        self.redis = FakeRedis()
+        # Long window so the background thread never flushes during a test
+        self.buffer = ThreatCounterBuffer(lambda: self.redis, window=60)
+
+    def teardown_method(self):
+        self.buffer._stop.set()
+        self.buffer._wake.set()
+
+    def test_coalesces_hits_per_ip(self):
+        """A burst from one IP becomes one HINCRBY and one HSET"""
+        for _ in range(1000):
+            self.buffer.record('185.220.101.45', 'SSH')
+        self.buffer.record('45.33.32.156', 'FTP')
+
+        assert self.buffer.flush() == 2
+        assert self.redis.round_trips == 1
+        assert len(self.redis.commands) == 4
+        assert ('hincrby', 'threat:185.220.101.45', 'count', 1000) in self.redis.commands
+
+    def test_last_service_wins(self):
+        """HSET carries the latest service seen in the window"""
+        self.buffer.record('10.0.0.1', 'SSH')
+        self.buffer.record('10.0.0.1', 'HTTP')
+        self.buffer.flush()
+        hset = [c for c in self.redis.commands if c[0] == 'hset'][0]
+        assert hset[2]['service'] == 'HTTP'
+
+    def test_failed_flush_keeps_counts(self):
+        """Counts survive a Redis outage and merge with new hits"""
+        self.redis.fail = True
+        self.buffer.record('10.0.0.1', 'SSH')
+        self.buffer.record('10.0.0.1', 'SSH')
+        assert self.buffer.flush() == 0
+        assert self.buffer.stats['flush_errors'] == 1
+
+        self.redis.fail = False
+        self.buffer.record('10.0.0.1', 'SSH')
+        self.buffer.flush()
+        assert ('hincrby', 'threat:10.0.0.1', 'count', 3) in self.redis.commands
+
+    def test_empty_flush_is_free(self):
+        """No round-trip when nothing is pending"""
+        assert self.buffer.flush() == 0
+        assert self.redis.round_trips == 0
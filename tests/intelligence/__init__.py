@@ -0,0 +1 @@
+"""Unit tests package for threat intelligence components"""
@@ -0,0 +1,72 @@
+"""
+Unit Tests for the Geolocation Service
+Tests the interval index, LRU cache and bulk lookups
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.intelligence.geolocation_service import EliteGeolocationService, IntervalIndex
+
+
+class TestIntervalIndex:
+    """Test suite for IntervalIndex"""
+
+    def test_lookup_and_boundaries(self):
+        index = IntervalIndex({"10.0.0.0/8": "a", "192.0.2.128/25": "b", "2001:db8::/32": "v6"})
+        assert index.lookup("10.255.255.255") == "a"
+        assert index.lookup("11.0.0.0") is None
+        assert index.lookup("192.0.2.127") is None
+        assert index.lookup("192.0.2.200") == "b"
+        assert index.lookup("2001:db8::42") == "v6"
+        assert index.lookup("not-an-ip") is None
+
+    def test_first_declared_network_wins_on_overlap(self):
+        index = IntervalIndex({"185.220.0.0/16": "narrow", "185.0.0.0/8": "wide"})
+        assert index.lookup("185.220.1.1") == "narrow"
+        assert index.lookup("185.221.1.1") == "wide"
+        assert len(index) == 3
+
+        index = IntervalIndex({"185.0.0.0/8": "wide", "185.220.0.0/16": "narrow"})
+        assert index.lookup("185.220.1.1") == "wide"
+        assert len(index) == 1
+
+
+class TestEliteGeolocationService:
+    """Test suite for EliteGeolocationService lookups"""
+
+    def setup_method(self):
+        self.service = EliteGeolocationService(cache_size=3)
+
+    def test_database_isp_and_anonymizer(self):
+        location = self.service.get_location("185.220.101.50")
+        assert location["is_tor"] is True
+        assert location["isp"] == "Various Europe"
+        assert self.service.get_location("8.8.8.8")["city"] == "Mountain View"
+
+    def test_first_octet_fallback_and_estimate(self):
+        # 8.1.x.x is outside 8.8.0.0/16 but shares its first octet
+        assert self.service.get_location("8.1.2.3")["city"] == "Mountain View"
+        assert self.service.get_location("2a00:1450::1")["country"] == "Unknown"
+
+    def test_private_address(self):
+        assert self.service.get_location("10.1.2.3")["network_type"] == "Private"
+
+    def test_lru_cache_is_bounded(self):
+        for ip in ["3.1.1.1", "4.1.1.1", "13.1.1.1"]:
+            self.service.get_location(ip)
+        self.service.get_location("3.1.1.1")  # refresh
+        self.service.get_location("23.1.1.1")
+
+        assert list(self.service.cache) == ["13.1.1.1", "3.1.1.1", "23.1.1.1"]
+        stats = self.service.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 1
+
+    def test_bulk_locate(self):
+        results = self.service.bulk_locate(["3.1.1.1", "8.8.8.8", "3.1.1.1"])
+        assert list(results) == ["3.1.1.1", "8.8.8.8"]
+        assert results["8.8.8.8"]["country_code"] == "US"
+        assert self.service.get_stats()["misses"] == 2
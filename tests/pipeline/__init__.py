@@ -0,0 +1 @@
+"""Unit tests package for data pipeline components"""
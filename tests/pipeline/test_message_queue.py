@@ -0,0 +1,381 @@
+"""
+Unit Tests for the Message Queue Manager
+Tests batched publishing and consumption against an in-memory Redis
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.pipeline.message_codecs import MSGPACK_AVAILABLE
+from src.pipeline.message_queue import (
+    BatchPublisher, ConsumerGroup, Message, MessagePriority, MessageQueueManager, StreamName
+)
+
+
+class FailingPipeline:
+    def xadd(self, *args, **kwargs):
+        pass
+
+    def execute(self):
+        raise ConnectionError("down")
+
+
+class TestBatchedPublish:
+    """Test suite for publish_many and the BatchPublisher"""
+
+    def setup_method(self):
+        self.queue = MessageQueueManager(producer_id="test", publish_batch_size=100)
+        self.queue._redis = fakeredis.FakeRedis(decode_responses=True)
+
+    def teardown_method(self):
+        self.queue.close()
+
+    def test_publish_many_one_round_trip_per_chunk(self):
+        """250 payloads with batch size 100 take three pipelined round-trips"""
+        ids = self.queue.publish_many(StreamName.ATTACK_EVENTS, [{'n': i} for i in range(250)])
+
+        assert len(ids) == 250 and all(ids)
+        assert self.queue.stats['publish_round_trips'] == 3
+        assert self.queue.stats['messages_published'] == 250
+        entries = self.queue.redis.xrange(StreamName.ATTACK_EVENTS.value)
+        assert [Message.from_redis(i, 's', d).payload['n'] for i, d in entries] == list(range(250))
+
+    def test_publish_many_failure_returns_none(self):
+        self.queue._redis.pipeline = lambda transaction=True: FailingPipeline()
+        assert self.queue.publish_many(StreamName.ALERTS, [{'n': 1}, {'n': 2}]) == [None, None]
+        assert self.queue.stats['messages_published'] == 0
+
+    def test_batch_publisher_flush(self):
+        """Queued messages across streams are flushed together"""
+        # Long interval and large batch so the background thread stays idle
+        publisher = BatchPublisher(self.queue, max_batch=1000, flush_interval=60)
+        for i in range(10):
+            stream = StreamName.ATTACK_EVENTS if i % 2 else StreamName.ALERTS
+            assert publisher.submit(self.queue._new_message(stream, {'n': i}, MessagePriority.NORMAL))
+
+        assert self.queue.redis.xlen(StreamName.ALERTS.value) == 0
+        assert publisher.flush() == 10
+        assert self.queue.stats['publish_round_trips'] == 1
+        assert self.queue.redis.xlen(StreamName.ALERTS.value) == 5
+        assert self.queue.redis.xlen(StreamName.ATTACK_EVENTS.value) == 5
+
+    def test_batch_publisher_bounded_and_requeues(self):
+        """A full buffer rejects new messages; a failed flush keeps order"""
+        publisher = BatchPublisher(self.queue, max_batch=1000, flush_interval=60, max_pending=3)
+        messages = [self.queue._new_message(StreamName.ALERTS, {'n': i}, MessagePriority.HIGH)
+                    for i in range(4)]
+        assert [publisher.submit(m) for m in messages] == [True, True, True, False]
+        assert publisher.stats['messages_dropped'] == 1
+
+        real_pipeline = self.queue._redis.pipeline
+        self.queue._redis.pipeline = lambda transaction=True: FailingPipeline()
+        assert publisher.flush() == 0
+        assert [m.payload['n'] for m in publisher.pending] == [0, 1, 2]
+
+        self.queue._redis.pipeline = real_pipeline
+        assert publisher.flush() == 3
+        assert publisher.get_stats()['flush_errors'] == 1
+
+    def test_event_helpers_use_background_publisher(self):
+        """With batch_publish the helpers queue and close() drains the buffer"""
+        self.queue.batch_publish = True
+        message_id = self.queue.publish_attack_event('185.220.101.45', 'SSH', 'brute_force')
+
+        assert message_id is not None
+        self.queue.publisher.stop()
+        entries = self.queue.redis.xrange(StreamName.ATTACK_EVENTS.value)
+        assert len(entries) == 1
+        assert entries[0][1]['message_id'] == message_id
+        assert self.queue.get_stats()['batch_publisher']['messages_flushed'] == 1
+
+    def test_stream_trimmed_approximately(self):
+        self.queue.max_stream_length = 10
+        self.queue.publish_many(StreamName.HONEYPOT_LOGS, [{'n': i} for i in range(500)])
+        assert self.queue.redis.xlen(StreamName.HONEYPOT_LOGS.value) < 500
+
+
+class TestBatchedConsumer:
+    """Test suite for batch dispatch, pooled handlers and batched XACK"""
+
+    def setup_method(self):
+        self.queue = MessageQueueManager(producer_id="test")
+        self.queue._redis = fakeredis.FakeRedis(decode_responses=True)
+        self.stream = StreamName.ATTACK_EVENTS
+        self.group = ConsumerGroup.AI_PROCESSOR
+
+    def teardown_method(self):
+        self.queue.close()
+
+    def _fetch(self, count):
+        self.queue.publish_many(self.stream, [{'n': i} for i in range(count)])
+        return self.queue.consume(self.stream, self.group, 'worker-1', count=count, block=None)
+
+    def _pending(self):
+        return self.queue.redis.xpending(self.stream.value, self.group.value)['pending']
+
+    def test_group_created_once(self):
+        calls = []
+        create = self.queue._redis.xgroup_create
+        self.queue._redis.xgroup_create = lambda *a, **kw: calls.append(a) or create(*a, **kw)
+        for _ in range(3):
+            self.queue.consume(self.stream, self.group, 'worker-1', block=None)
+        assert len(calls) == 1
+
+    def test_batch_acknowledged_in_one_xack(self):
+        """Entry IDs (not payload message_ids) are acked, once per batch"""
+        self.queue.register_handler(self.stream, lambda message: True)
+        messages = self._fetch(20)
+        assert self._pending() == 20
+
+        assert self.queue._dispatch_batch(self.stream, self.group, messages) == 20
+        assert self.queue.stats['ack_round_trips'] == 1
+        assert self._pending() == 0
+
+    def test_failed_messages_stay_pending(self):
+        self.queue.register_handler(self.stream, lambda message: message.payload['n'] != 3)
+        messages = self._fetch(5)
+
+        assert self.queue._dispatch_batch(self.stream, self.group, messages) == 4
+        assert self._pending() == 1
+        assert self.queue.stats['messages_failed'] == 1
+
+    def test_exhausted_claims_go_to_dlq(self):
+        self.queue.register_handler(self.stream, lambda message: False)
+        messages = self._fetch(2)
+        for message in messages:
+            message.retry_count = message.max_retries
+
+        assert self.queue._dispatch_batch(self.stream, self.group, messages, claimed=True) == 2
+        assert self.queue.redis.xlen('stream:dead_letter') == 2
+        assert self._pending() == 0
+
+    def test_handlers_run_concurrently_within_stream_limit(self):
+        """I/O-bound handlers overlap, never more than the stream's limit"""
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def slow_handler(message):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            with lock:
+                state['active'] -= 1
+            return True
+
+        self.queue.register_handler(self.stream, slow_handler)
+        self.queue.set_stream_concurrency(self.stream, 4)
+        messages = self._fetch(16)
+
+        start = time.perf_counter()
+        assert self.queue._dispatch_batch(self.stream, self.group, messages) == 16
+        elapsed = time.perf_counter() - start
+
+        assert state['peak'] == 4
+        assert elapsed < 16 * 0.05 / 2
+        assert self.queue.stats['messages_consumed'] == 16
+
+
+class TestPriorityLanes:
+    """Test suite for per-priority sub-streams and weighted consumption"""
+
+    def setup_method(self):
+        self.queue = MessageQueueManager(producer_id="test", priority_lanes=True)
+        self.queue._redis = fakeredis.FakeRedis(decode_responses=True)
+        self.stream = StreamName.ALERTS
+        self.group = ConsumerGroup.ALERT_MANAGER
+
+    def teardown_method(self):
+        self.queue.close()
+
+    def test_lane_keys(self):
+        self.queue.publish(self.stream, {'n': 1}, MessagePriority.CRITICAL)
+        self.queue.publish(self.stream, {'n': 2}, MessagePriority.NORMAL)
+
+        assert self.queue.redis.xlen('stream:alerts:critical') == 1
+        assert self.queue.redis.xlen('stream:alerts') == 1
+        assert self.queue._lane_keys(self.stream)[0] == 'stream:alerts:critical'
+
+    def test_critical_not_starved_by_flood(self):
+        """A batch after a LOW flood still carries every CRITICAL message first"""
+        self.queue.publish_many(self.stream, [{'n': i} for i in range(500)], MessagePriority.LOW)
+        self.queue.publish_many(self.stream, [{'alert': i} for i in range(3)], MessagePriority.CRITICAL)
+
+        messages = self.queue.consume(self.stream, self.group, 'worker-1', count=10, block=None)
+
+        assert [m.priority for m in messages[:3]] == [MessagePriority.CRITICAL.value] * 3
+        assert len(messages) == 10
+
+    def test_weighted_quotas(self):
+        """Busy lanes split a batch by weight"""
+        for priority in MessagePriority:
+            self.queue.publish_many(self.stream, [{'n': i} for i in range(50)], priority)
+
+        messages = self.queue.consume(self.stream, self.group, 'worker-1', count=15, block=None)
+        counts = {p.value: sum(m.priority == p.value for m in messages) for p in MessagePriority}
+        assert counts == {4: 8, 3: 4, 2: 2, 1: 1}
+
+    def test_legacy_entries_read_as_normal_lane(self):
+        """Entries written before lanes were enabled stay readable"""
+        legacy = MessageQueueManager(producer_id="legacy")
+        legacy._redis = self.queue._redis
+        legacy.publish(self.stream, {'old': True}, MessagePriority.HIGH)
+
+        messages = self.queue.consume(self.stream, self.group, 'worker-1', count=10, block=None)
+        assert [m.payload for m in messages] == [{'old': True}]
+
+    def test_dispatch_acks_across_lanes_and_records_latency(self):
+        seen = []
+        self.queue.register_handler(self.stream, lambda message: seen.append(message.stream) or True)
+        self.queue.publish(self.stream, {'n': 1}, MessagePriority.CRITICAL)
+        self.queue.publish(self.stream, {'n': 2}, MessagePriority.LOW)
+        messages = self.queue.consume(self.stream, self.group, 'worker-1', count=10, block=None)
+
+        assert self.queue._dispatch_batch(self.stream, self.group, messages) == 2
+        assert seen == ['stream:alerts:critical', 'stream:alerts:low']
+        assert self.queue.stats['ack_round_trips'] == 1
+        assert self.queue.get_pending(self.stream, self.group) == []
+
+        latency = self.queue.get_stats()['latency_by_priority']
+        assert set(latency) == {'CRITICAL', 'LOW'}
+        assert latency['CRITICAL']['samples'] == 1
+        assert latency['CRITICAL']['p99_ms'] >= 0
+
+
+    def test_acknowledge_messages_on_their_lanes(self):
+        self.queue.publish(self.stream, {'n': 1}, MessagePriority.CRITICAL)
+        self.queue.publish(self.stream, {'n': 2}, MessagePriority.NORMAL)
+        messages = self.queue.consume(self.stream, self.group, 'worker-1', count=10, block=None)
+
+        # Bare IDs cannot say which lane they came from
+        assert self.queue.acknowledge(self.stream, self.group, [m.redis_id for m in messages]) == 0
+        assert len(self.queue.get_pending(self.stream, self.group)) == 2
+
+        assert self.queue.acknowledge(self.stream, self.group, messages) == 2
+        assert self.queue.get_pending(self.stream, self.group) == []
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack not installed")
+class TestBinaryCodecs:
+    """Test suite for binary payloads over the decoded client"""
+
+    def setup_method(self):
+        self.queue = MessageQueueManager(
+            producer_id="test",
+            codec='msgpack',
+            stream_codecs={StreamName.FORENSICS: 'msgpack+zlib'},
+            min_compress_size=256
+        )
+        self.queue._redis = fakeredis.FakeRedis(decode_responses=True)
+        self.group = ConsumerGroup.FORENSICS_COLLECTOR
+
+    def teardown_method(self):
+        self.queue.close()
+
+    def _read(self, stream):
+        return self.queue.consume(stream, self.group, 'worker-1', count=10, block=None)
+
+    def test_per_stream_codec_header(self):
+        self.queue.publish(StreamName.ALERTS, {'title': 'x'})
+        self.queue.publish(StreamName.FORENSICS, {'blob': 'A' * 4096})
+
+        raw = self.queue.redis_raw
+        alert = raw.xrange(StreamName.ALERTS.value)[0][1]
+        evidence = raw.xrange(StreamName.FORENSICS.value)[0][1]
+        assert alert[b'codec'] == b'msgpack'
+        assert evidence[b'codec'] == b'msgpack+zlib'
+        assert len(evidence[b'payload']) < 4096
+
+    def test_binary_round_trip_through_consume(self):
+        payload = {'blob': 'A' * 4096, 'hashes': {'sha256': 'ab' * 32}, 'size': 4096}
+        self.queue.publish(StreamName.FORENSICS, payload)
+
+        messages = self._read(StreamName.FORENSICS)
+        assert [m.payload for m in messages] == [payload]
+        assert isinstance(messages[0].redis_id, str)
+        assert messages[0].stream == StreamName.FORENSICS.value
+
+    def test_legacy_json_entries_still_decode(self):
+        """Entries from older producers (no codec field) are JSON"""
+        self.queue.redis.xadd(StreamName.FORENSICS.value, {
+            'message_id': 'legacy-1', 'payload': '{"case_id": "CASE-7"}', 'priority': '2',
+            'timestamp': '2026-01-01T00:00:00', 'producer_id': 'old',
+            'retry_count': '0', 'max_retries': '3'
+        })
+        messages = self._read(StreamName.FORENSICS)
+        assert messages[0].payload == {'case_id': 'CASE-7'}
+        assert messages[0].message_id == 'legacy-1'
+
+    def test_stream_info_with_binary_entries(self):
+        self.queue.publish(StreamName.ALERTS, {'title': 'x'})
+        info = self.queue.get_stream_info(StreamName.ALERTS)
+        assert info.length == 1
+        assert info.first_entry == info.last_entry
+
+    def test_unavailable_codec_rejected(self):
+        with pytest.raises(ValueError):
+            MessageQueueManager(codec='msgpack+brotli')
+
+
+class TestPipelineStats:
+    """Test suite for lag, latency histograms and dead-letter stats"""
+
+    def setup_method(self):
+        self.queue = MessageQueueManager(producer_id="test")
+        self.queue._redis = fakeredis.FakeRedis(decode_responses=True)
+        self.stream = StreamName.ATTACK_EVENTS
+        self.group = ConsumerGroup.AI_PROCESSOR
+
+    def teardown_method(self):
+        self.queue.close()
+
+    def test_consumer_lag(self):
+        self.queue.publish_many(self.stream, [{'n': i} for i in range(10)])
+        self.queue.consume(self.stream, self.group, 'worker-1', count=4, block=None)
+
+        group = self.queue.get_stats()['streams'][self.stream.value]['consumer_groups'][self.group.value]
+        assert group['lag'] == 6
+        assert group['pending'] == 4
+        assert group['lag_seconds'] >= 0
+
+        self.queue.consume(self.stream, self.group, 'worker-1', count=10, block=None)
+        group = self.queue.get_stats()['streams'][self.stream.value]['consumer_groups'][self.group.value]
+        assert group['lag'] == 0 and group['lag_seconds'] == 0.0
+
+    def test_stream_stats_in_one_round_trip(self):
+        self.queue.publish(self.stream, {'n': 1})
+        calls = []
+        pipeline = self.queue.redis_raw.pipeline
+        self.queue._redis_raw.pipeline = lambda *a, **kw: calls.append(1) or pipeline(*a, **kw)
+
+        stats = self.queue.get_stats()
+        assert len(calls) == 1
+        assert list(stats['streams']) == [self.stream.value]
+
+    def test_histograms_and_dead_letter(self):
+        self.queue.register_handler(self.stream, lambda message: message.payload['n'] % 2 == 0)
+        self.queue.publish_many(self.stream, [{'n': i} for i in range(6)])
+        messages = self.queue.consume(self.stream, self.group, 'worker-1', count=10, block=None)
+        for message in messages:
+            message.retry_count = message.max_retries
+        self.queue._dispatch_batch(self.stream, self.group, messages)
+
+        stats = self.queue.get_stats()
+        handler = stats['handler_duration'][self.stream.value]
+        end_to_end = stats['end_to_end_latency'][self.stream.value]
+        assert handler['count'] == 6 and handler['buckets']['+Inf'] == 6
+        assert end_to_end['count'] == 6
+        assert list(end_to_end['buckets'].values()) == sorted(end_to_end['buckets'].values())
+
+        dead_letter = stats['dead_letter']
+        assert dead_letter['total'] == 3
+        assert dead_letter['by_stream'][self.stream.value] == 3
+        assert dead_letter['rate_per_minute'] == pytest.approx(3 * 60 / 300)
+        assert dead_letter['ratio'] == 0.5
@@ -0,0 +1,63 @@
+"""
+Unit Tests for the Pipeline Prometheus Collector
+Tests metric families rendered from MessageQueueManager stats
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+fakeredis = pytest.importorskip("fakeredis")
+prometheus_client = pytest.importorskip("prometheus_client")
+
+from src.pipeline.message_queue import ConsumerGroup, MessageQueueManager, StreamName
+from src.pipeline.pipeline_metrics import PipelineCollector
+
+
+class TestPipelineCollector:
+    """Test suite for PipelineCollector"""
+
+    def setup_method(self):
+        self.queue = MessageQueueManager(producer_id="test")
+        self.queue._redis = fakeredis.FakeRedis(decode_responses=True)
+        self.registry = prometheus_client.CollectorRegistry()
+        self.registry.register(PipelineCollector(self.queue))
+
+    def teardown_method(self):
+        self.queue.close()
+
+    def _value(self, name, **labels):
+        return self.registry.get_sample_value(name, labels)
+
+    def test_exports_lag_latency_and_counters(self):
+        stream, group = StreamName.ALERTS, ConsumerGroup.ALERT_MANAGER
+        self.queue.register_handler(stream, lambda message: True)
+        self.queue.publish_many(stream, [{'n': i} for i in range(5)])
+        messages = self.queue.consume(stream, group, 'worker-1', count=3, block=None)
+        self.queue._dispatch_batch(stream, group, messages)
+
+        assert self._value('pipeline_messages_total', event='published') == 5
+        assert self._value('pipeline_messages_total', event='consumed') == 3
+        assert self._value('pipeline_stream_length', stream='stream:alerts') == 5
+        assert self._value('pipeline_consumer_lag_messages',
+                           stream='stream:alerts', group='group:alerts') == 2
+        assert self._value('pipeline_end_to_end_latency_seconds_count', stream='stream:alerts') == 3
+        assert self._value('pipeline_handler_duration_seconds_bucket',
+                           stream='stream:alerts', le='+Inf') == 3
+        assert self._value('pipeline_dead_letter_rate_per_minute') == 0.0
+
+    def test_stream_gauges_only(self):
+        registry = prometheus_client.CollectorRegistry()
+        registry.register(PipelineCollector(self.queue, local_metrics=False))
+        self.queue.publish_many(StreamName.ALERTS, [{'n': i} for i in range(2)])
+
+        assert registry.get_sample_value('pipeline_stream_length', {'stream': 'stream:alerts'}) == 2
+        assert b'pipeline_messages' not in prometheus_client.generate_latest(registry)
+        assert b'pipeline_dead_letter' not in prometheus_client.generate_latest(registry)
+
+    def test_scrape_survives_redis_outage(self):
+        self.queue.get_stats = lambda: (_ for _ in ()).throw(ConnectionError("down"))
+        assert b'pipeline_' not in prometheus_client.generate_latest(self.registry)